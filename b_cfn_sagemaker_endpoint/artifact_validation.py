@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from b_cfn_sagemaker_endpoint.model_props import ModelProps
+
+
+@dataclass(frozen=True)
+class ArtifactValidation:
+    """
+    Pre-flight validation of model artifacts.
+
+    Before each endpoint update, every model archive referenced by the endpoint's models is streamed
+    from S3 and checked for gzip and tar integrity, size limits and required entries, without
+    staging it on disk. The inference script (``SAGEMAKER_PROGRAM`` environment variable of a
+    container) is a required entry of its container's archive, unless the code is submitted from
+    elsewhere (``SAGEMAKER_SUBMIT_DIRECTORY``). Invalid artifacts are rejected in seconds, and the
+    endpoint keeps serving its current models, instead of an update, that fails after provisioning
+    instances for several minutes.
+
+    Properties
+    ==========
+
+    ``required_entries``
+        Paths, that every model archive (or uncompressed model data prefix) must contain, e.g.
+        "code/requirements.txt".
+    ``max_size``
+        Maximum size of a model archive, in bytes.
+    ``max_uncompressed_size``
+        Maximum total size of a model archive's entries, in bytes.
+    ``smoke_test``
+        Compiles every Python source of model archives, without executing it, since the refresh
+        function has none of the model container's dependencies installed.
+    ``entry_point_functions``
+        Functions, that the smoke test requires the inference script to define, e.g. "model_fn".
+    """
+
+    required_entries: Optional[List[str]] = None
+    max_size: Optional[int] = None
+    max_uncompressed_size: Optional[int] = None
+    smoke_test: bool = False
+    entry_point_functions: Optional[List[str]] = None
+
+    def __post_init__(self):
+        if self.max_size is not None and self.max_size <= 0:
+            raise ValueError('Max size must be positive.')
+
+        if self.max_uncompressed_size is not None and self.max_uncompressed_size <= 0:
+            raise ValueError('Max uncompressed size must be positive.')
+
+        if self.entry_point_functions and not self.smoke_test:
+            raise ValueError('Entry point functions are checked only by the smoke test.')
+
+    def to_settings(self, models_props: List[ModelProps]) -> Dict[str, Any]:
+        """
+        Returns the validation's settings, as read by the refresh function.
+
+        :param models_props: Models, whose artifacts are validated.
+
+        :return: Settings with validated artifacts and their required entries.
+        """
+
+        artifacts = {}
+        for props in models_props:
+            entry_points = props.entry_points
+            for url in props.model_data_urls:
+                artifacts[url] = {
+                    'url': url,
+                    'required_entries': list(self.required_entries or []),
+                    'entry_point': entry_points.get(url),
+                }
+
+        return {
+            'artifacts': list(artifacts.values()),
+            'max_size': self.max_size,
+            'max_uncompressed_size': self.max_uncompressed_size,
+            'smoke_test': self.smoke_test,
+            'entry_point_functions': list(self.entry_point_functions or []),
+        }
@@ -0,0 +1,203 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from aws_cdk.aws_applicationautoscaling import (
+    AdjustmentType,
+    ScalableTarget,
+    ScalingInterval,
+    ServiceNamespace,
+)
+from aws_cdk.aws_cloudwatch import Metric
+from aws_cdk.aws_iam import Role
+from aws_cdk.aws_s3 import BlockPublicAccess, Bucket, BucketEncryption, IBucket
+from aws_cdk.aws_sagemaker import CfnEndpointConfig
+from aws_cdk.aws_sns import Topic
+from aws_cdk.core import Construct, Duration
+
+
+@dataclass(frozen=True)
+class AsyncInference:
+    """
+    Asynchronous inference mode of the endpoint.
+
+    Requests are queued by SageMaker and their results are written to the output bucket, while
+    success and error notifications are published to SNS topics. Production variants are scaled
+    on the queue backlog per instance, down to zero instances when the queue is empty.
+
+    Properties
+    ==========
+
+    ``output_bucket``
+        Optional. Bucket of inference results and failures. By default, a new bucket is created.
+    ``output_prefix``
+        Key prefix of inference results.
+    ``failure_prefix``
+        Key prefix of inference failures.
+    ``notifications``
+        Creates success and error SNS topics, that inference results are published to.
+    ``max_concurrent_invocations_per_instance``
+        Optional. Maximum number of concurrent requests sent to a single instance.
+    ``min_capacity``
+        Minimum instance count of each variant. Zero scales idle variants down to no instances.
+    ``max_capacity``
+        Maximum instance count of each variant.
+    ``backlog_per_instance``
+        Target ``ApproximateBacklogSizePerInstance``, i.e. queued requests per instance.
+    ``scale_in_cooldown``
+        Time to wait after a scale-in activity before another one can start.
+    ``scale_out_cooldown``
+        Time to wait after a scale-out activity before another one can start.
+    """
+
+    output_bucket: Optional[IBucket] = None
+    output_prefix: str = 'async-inference/output'
+    failure_prefix: str = 'async-inference/failures'
+    notifications: bool = True
+    max_concurrent_invocations_per_instance: Optional[int] = None
+    min_capacity: int = 0
+    max_capacity: int = 4
+    backlog_per_instance: float = 5
+    scale_in_cooldown: Duration = Duration.minutes(5)
+    scale_out_cooldown: Duration = Duration.minutes(1)
+
+    def __post_init__(self):
+        if self.min_capacity < 0 or self.max_capacity < max(self.min_capacity, 1):
+            raise ValueError(
+                'Async inference capacity must satisfy: 0 <= min_capacity <= max_capacity and 1 <= max_capacity.'
+            )
+
+    def bind(self, scope: Construct, execution_role_arns: Iterable[str]) -> 'AsyncInferenceResources':
+        """
+        Creates async inference output locations and notification topics.
+
+        :param scope: Construct scope.
+        :param execution_role_arns: ARNs of models' execution roles, that write inference results.
+
+        :return: Async inference resources.
+        """
+
+        return AsyncInferenceResources(scope, 'AsyncInference', self, execution_role_arns)
+
+    def bind_scaling(self, scope: Construct, endpoint_name: str, variant_name: str) -> ScalableTarget:
+        """
+        Registers a production variant as a scalable target, scaled on the queue backlog.
+
+        :param scope: Construct scope.
+        :param endpoint_name: SageMaker endpoint name.
+        :param variant_name: Production variant name.
+
+        :return: Scalable target of the variant.
+        """
+
+        def metric(name: str) -> Metric:
+            return Metric(
+                namespace='AWS/SageMaker',
+                metric_name=name,
+                dimensions_map={'EndpointName': endpoint_name},
+                statistic='Average',
+                period=Duration.minutes(1)
+            )
+
+        scalable_target = ScalableTarget(
+            scope=scope,
+            id=f'{variant_name}ScalableTarget',
+            service_namespace=ServiceNamespace.SAGEMAKER,
+            resource_id=f'endpoint/{endpoint_name}/variant/{variant_name}',
+            scalable_dimension='sagemaker:variant:DesiredInstanceCount',
+            min_capacity=self.min_capacity,
+            max_capacity=self.max_capacity
+        )
+        scalable_target.scale_to_track_metric(
+            'ApproximateBacklogSizePerInstance',
+            target_value=self.backlog_per_instance,
+            custom_metric=metric('ApproximateBacklogSizePerInstance'),
+            scale_in_cooldown=self.scale_in_cooldown,
+            scale_out_cooldown=self.scale_out_cooldown
+        )
+
+        if self.min_capacity == 0:
+            # Backlog per instance is not reported without instances, hence target tracking
+            # never scales out from zero. A single instance is added once requests are queued.
+            scalable_target.scale_on_metric(
+                'HasBacklogWithoutCapacity',
+                metric=metric('HasBacklogWithoutCapacity'),
+                scaling_steps=[
+                    ScalingInterval(upper=0.5, change=0),
+                    ScalingInterval(lower=0.5, change=1),
+                ],
+                adjustment_type=AdjustmentType.CHANGE_IN_CAPACITY,
+                cooldown=self.scale_out_cooldown
+            )
+
+        return scalable_target
+
+
+class AsyncInferenceResources(Construct):
+    """
+    Output locations and notification topics of an endpoint in asynchronous inference mode.
+
+    :param scope: Construct scope.
+    :param id: Scoped id of the resource.
+    :param async_inference: Async inference settings.
+    :param execution_role_arns: ARNs of models' execution roles, that write inference results.
+    """
+
+    def __init__(
+            self,
+            scope: Construct,
+            id: str,
+            async_inference: AsyncInference,
+            execution_role_arns: Iterable[str]
+    ):
+        super().__init__(scope, id)
+
+        self.__output_bucket = async_inference.output_bucket or Bucket(
+            scope=self,
+            id='OutputBucket',
+            encryption=BucketEncryption.S3_MANAGED,
+            block_public_access=BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True
+        )
+        self.__success_topic: Optional[Topic] = None
+        self.__error_topic: Optional[Topic] = None
+        if async_inference.notifications:
+            self.__success_topic = Topic(scope=self, id='SuccessTopic')
+            self.__error_topic = Topic(scope=self, id='ErrorTopic')
+
+        # Inference results are written and published on behalf of the models' execution roles.
+        for index, execution_role_arn in enumerate(dict.fromkeys(execution_role_arns)):
+            execution_role = Role.from_role_arn(self, f'ExecutionRole{index}', execution_role_arn)
+            self.__output_bucket.grant_put(execution_role)
+            for topic in filter(None, [self.__success_topic, self.__error_topic]):
+                topic.grant_publish(execution_role)
+
+        bucket_url = f's3://{self.__output_bucket.bucket_name}'
+        self.__config = CfnEndpointConfig.AsyncInferenceConfigProperty(
+            output_config=CfnEndpointConfig.AsyncInferenceOutputConfigProperty(
+                s3_output_path=f'{bucket_url}/{async_inference.output_prefix}',
+                s3_failure_path=f'{bucket_url}/{async_inference.failure_prefix}',
+                notification_config=CfnEndpointConfig.AsyncInferenceNotificationConfigProperty(
+                    success_topic=self.__success_topic.topic_arn,
+                    error_topic=self.__error_topic.topic_arn
+                ) if async_inference.notifications else None
+            ),
+            client_config=CfnEndpointConfig.AsyncInferenceClientConfigProperty(
+                max_concurrent_invocations_per_instance=async_inference.max_concurrent_invocations_per_instance
+            ) if async_inference.max_concurrent_invocations_per_instance else None
+        )
+
+    @property
+    def config(self) -> CfnEndpointConfig.AsyncInferenceConfigProperty:
+        return self.__config
+
+    @property
+    def output_bucket(self) -> IBucket:
+        return self.__output_bucket
+
+    @property
+    def success_topic(self) -> Optional[Topic]:
+        return self.__success_topic
+
+    @property
+    def error_topic(self) -> Optional[Topic]:
+        return self.__error_topic
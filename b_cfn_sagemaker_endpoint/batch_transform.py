@@ -0,0 +1,189 @@
+import re
+from typing import Iterable, Optional, Union
+
+from aws_cdk.aws_events import EventPattern, Rule
+from aws_cdk.aws_events_targets import LambdaFunction
+from aws_cdk.aws_iam import Effect, PolicyStatement
+from aws_cdk.aws_lambda import Code, Function
+from aws_cdk.aws_lambda_event_sources import SqsEventSource
+from aws_cdk.aws_s3 import Bucket, EventType, IBucket, NotificationKeyFilter
+from aws_cdk.aws_sagemaker import CfnModel
+from aws_cdk.aws_sqs import DeadLetterQueue, Queue
+from aws_cdk.core import Construct, Duration, Stack, Token
+
+from b_cfn_sagemaker_endpoint.bucket_event import BucketEvent
+from b_cfn_sagemaker_endpoint.event_intake import EventIntake
+from b_cfn_sagemaker_endpoint.model_props import ModelProps
+from b_cfn_sagemaker_endpoint.refresh.function import RefreshFunction
+from b_cfn_sagemaker_endpoint.refresh_function_props import RefreshFunctionProps
+from b_cfn_sagemaker_endpoint.transform_settings import TransformSettings
+
+
+class BatchTransform(Construct):
+    """
+    S3-triggered SageMaker batch transform pipeline.
+
+    Offline scoring counterpart of ``SagemakerEndpoint``, that runs the same model. Input files
+    uploaded under ``input_prefix`` are sent by bucket events to an intake queue. The transform
+    function receives them in batches and starts a single transform job per batch, that reads all
+    its files via a manifest file, hence many small input files are coalesced into a single job.
+    Job results are written to ``output_prefix`` of the output bucket, under the job's name.
+    Started and finished jobs are reported as CloudWatch metrics (``BSagemakerBatchTransform``
+    namespace, ``TransformName`` dimension): started jobs, input objects & bytes, coalescing wait,
+    completed & failed jobs, job duration and throughput.
+
+    Note, that the model's execution role must be allowed to read input files and manifests, and
+    to write outputs.
+
+    :param scope: Construct scope.
+    :param id: Scoped id of the resource.
+    :param model: Model properties, bound to a new ``CfnModel``, or an already bound model, e.g.
+        one of ``SagemakerEndpoint.models``.
+    :param input_bucket: Bucket of input files.
+    :param input_prefix: Key prefix of input files, e.g. "transform-input/".
+    :param output_bucket: Bucket of transform outputs. Default is the input bucket.
+    :param output_prefix: Key prefix of transform outputs. Must not overlap with ``input_prefix``
+        in the same bucket. Default is "transform-output/".
+    :param settings: Transform job settings, e.g. instance type, concurrency, payload size, split
+        type and batch strategy. See ``TransformSettings``.
+    :param bucket_events: Input bucket events. Default is ``OBJECT_CREATED`` events of objects
+        under ``input_prefix``.
+    :param coalescing: Intake queue batching of input files. Files received within
+        ``max_batching_window``, up to ``batch_size`` files, are transformed by a single job.
+        Default is up to 1000 files within 1 minute.
+    :param job_name_prefix: Prefix of transform job names, at most 40 characters. Default is
+        derived from the id.
+    :param function_props: Transform function's runtime, architecture and memory settings.
+    """
+
+    MAX_JOB_NAME_PREFIX_LENGTH = 40
+
+    def __init__(
+            self,
+            scope: Construct,
+            id: str,
+            model: Union[ModelProps, CfnModel],
+            input_bucket: Bucket,
+            input_prefix: str,
+            output_bucket: IBucket = None,
+            output_prefix: str = 'transform-output/',
+            settings: TransformSettings = None,
+            bucket_events: Iterable[BucketEvent] = None,
+            coalescing: EventIntake = None,
+            job_name_prefix: str = None,
+            function_props: RefreshFunctionProps = None
+    ):
+        output_bucket = output_bucket or input_bucket
+        settings = settings or TransformSettings()
+        coalescing = coalescing or EventIntake(batch_size=1000, max_batching_window=Duration.minutes(1))
+        function_props = function_props or RefreshFunctionProps()
+        job_name_prefix = job_name_prefix or re.sub('[^a-zA-Z0-9-]', '-', id)[:self.MAX_JOB_NAME_PREFIX_LENGTH]
+
+        if not output_prefix.endswith('/'):
+            raise ValueError('Output prefix must end with "/".')
+
+        if len(job_name_prefix) > self.MAX_JOB_NAME_PREFIX_LENGTH:
+            raise ValueError(f'Job name prefix can not be longer than {self.MAX_JOB_NAME_PREFIX_LENGTH} characters.')
+
+        if (
+                output_bucket is input_bucket
+                and not Token.is_unresolved(input_prefix)
+                and not Token.is_unresolved(output_prefix)
+                and (input_prefix.startswith(output_prefix) or output_prefix.startswith(input_prefix))
+        ):
+            raise ValueError('Output prefix can not overlap with the input prefix, since outputs would be transformed.')
+
+        super().__init__(scope, id)
+
+        self.__model = model.bind(self) if isinstance(model, ModelProps) else model
+        self.__job_name_prefix = job_name_prefix
+
+        self.__function = Function(
+            scope=self,
+            id='TransformFunction',
+            code=Code.from_asset(RefreshFunction.SOURCE_PATH),
+            handler='transform.handler',
+            runtime=function_props.runtime,
+            architecture=function_props.architecture,
+            memory_size=function_props.memory_size,
+            timeout=Duration.minutes(5),
+        )
+
+        # Queue visibility timeout must not be lower than the function's timeout.
+        self.__intake_queue = Queue(
+            scope=self,
+            id='IntakeQueue',
+            visibility_timeout=Duration.minutes(5),
+            retention_period=coalescing.retention_period,
+            dead_letter_queue=DeadLetterQueue(
+                max_receive_count=coalescing.max_receive_count,
+                queue=Queue(self, 'IntakeDeadLetterQueue', retention_period=coalescing.retention_period)
+            )
+        )
+        self.__function.add_event_source(SqsEventSource(
+            self.__intake_queue,
+            batch_size=coalescing.batch_size,
+            max_batching_window=coalescing.max_batching_window
+        ))
+
+        current_stack = Stack.of(self)
+        # SageMaker resource ARNs have lowercase names.
+        self.__function.add_to_role_policy(PolicyStatement(
+            actions=[
+                'sagemaker:CreateTransformJob',
+                'sagemaker:DescribeTransformJob',
+                'sagemaker:AddTags',
+                'sagemaker:ListTags',
+            ],
+            effect=Effect.ALLOW,
+            resources=[current_stack.format_arn(
+                service='sagemaker',
+                resource='transform-job',
+                resource_name=f'{job_name_prefix.lower()}-*'
+            )]
+        ))
+        output_bucket.grant_put(self.__function, f'{output_prefix}manifests/*')
+
+        self.__function.add_environment('TRANSFORM_JOB_NAME_PREFIX', job_name_prefix)
+        self.__function.add_environment('TRANSFORM_MODEL_NAME', self.__model.attr_model_name)
+        self.__function.add_environment('TRANSFORM_OUTPUT_URL', f's3://{output_bucket.bucket_name}/{output_prefix}')
+        self.__function.add_environment(
+            'TRANSFORM_JOB_TEMPLATE',
+            current_stack.to_json_string(settings.to_job_template())
+        )
+
+        Rule(
+            scope=self,
+            id='TransformJobStateChangeRule',
+            description='Sends finished SageMaker transform jobs to their transform function.',
+            event_pattern=EventPattern(
+                source=['aws.sagemaker'],
+                detail_type=['SageMaker Transform Job State Change'],
+                detail={
+                    'TransformJobName': [{'prefix': f'{job_name_prefix}-'}],
+                    'TransformJobStatus': ['Completed', 'Failed', 'Stopped'],
+                }
+            ),
+            targets=[LambdaFunction(self.__function)]
+        )
+
+        if bucket_events is None:
+            bucket_events = [BucketEvent(EventType.OBJECT_CREATED, [NotificationKeyFilter(prefix=input_prefix)])]
+        for event in bucket_events:
+            event.bind(input_bucket, self.__intake_queue)
+
+    @property
+    def model(self) -> CfnModel:
+        return self.__model
+
+    @property
+    def function(self) -> Function:
+        return self.__function
+
+    @property
+    def intake_queue(self) -> Queue:
+        return self.__intake_queue
+
+    @property
+    def job_name_prefix(self) -> str:
+        return self.__job_name_prefix
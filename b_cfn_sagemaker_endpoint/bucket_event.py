@@ -1,9 +1,11 @@
 from dataclasses import dataclass, field
-from typing import Iterable
+from typing import Iterable, List, Optional, Union
 
 from aws_cdk.aws_lambda import Function
 from aws_cdk.aws_s3 import Bucket, NotificationKeyFilter, EventType
-from aws_cdk.aws_s3_notifications import LambdaDestination
+from aws_cdk.aws_s3_notifications import LambdaDestination, SqsDestination
+from aws_cdk.aws_sqs import Queue
+from aws_cdk.core import Token
 
 
 @dataclass(frozen=True)
@@ -26,5 +28,113 @@ class BucketEvent:
     event_type: EventType
     key_filters:  Iterable[NotificationKeyFilter] = field(default_factory=list)
 
-    def bind(self, bucket: Bucket, handler: Function) -> None:
-        return bucket.add_event_notification(self.event_type, LambdaDestination(handler), *self.key_filters)
+    @property
+    def key_prefix(self) -> Optional[str]:
+        """
+        Returns object key prefix the events are filtered by, if any.
+        """
+
+        return next((key_filter.prefix for key_filter in self.key_filters if key_filter.prefix), None)
+
+    @property
+    def key_suffix(self) -> Optional[str]:
+        """
+        Returns object key suffix the events are filtered by, if any.
+        """
+
+        return next((key_filter.suffix for key_filter in self.key_filters if key_filter.suffix), None)
+
+    @classmethod
+    def for_key(cls, key: str, event_type: EventType = EventType.OBJECT_CREATED) -> 'BucketEvent':
+        """
+        Creates bucket events that target only a single object, e.g. a models data manifest.
+
+        :param key: Target object key.
+        :param event_type: S3 notification event type.
+
+        :return: Bucket events of the target object.
+        """
+
+        name = key.rsplit('/', 1)[-1]
+        return cls(event_type, [NotificationKeyFilter(prefix=key, suffix=name)])
+
+    @classmethod
+    def for_model_data(
+            cls,
+            model_data_urls: Iterable[str],
+            multi_model_data_urls: Iterable[str] = (),
+            event_type: EventType = EventType.OBJECT_CREATED
+    ) -> List['BucketEvent']:
+        """
+        Creates default bucket events of models data.
+
+        Models data archives are matched by their "*.tar.gz" suffix. Once any model references
+        uncompressed model data, i.e. an S3 URL prefix that ends with "/", events are filtered by
+        each referenced archive key and each uncompressed model data prefix instead, since S3 does
+        not allow overlapping filters. Events of all objects are handled, if any of the keys is not
+        known at synth time.
+
+        :param model_data_urls: S3 URLs of model archives and prefixes of uncompressed model data.
+        :param multi_model_data_urls: S3 URL prefixes of multi-model containers' archives.
+        :param event_type: S3 notification event type.
+
+        :return: Bucket events of models data.
+        """
+
+        model_data_urls = list(model_data_urls)
+        if not any(url.endswith('/') for url in model_data_urls):
+            return [cls(event_type, [NotificationKeyFilter(suffix='.tar.gz')])]
+
+        events = cls.for_model_keys(model_data_urls, multi_model_data_urls, event_type)
+        return events if events is not None else [cls(event_type)]
+
+    @classmethod
+    def for_model_keys(
+            cls,
+            model_data_urls: Iterable[str],
+            multi_model_data_urls: Iterable[str] = (),
+            event_type: EventType = EventType.OBJECT_CREATED
+    ) -> Optional[List['BucketEvent']]:
+        """
+        Creates bucket events of exactly the referenced models data.
+
+        Each archive is matched by its full key, while uncompressed model data and multi-model
+        containers' archives are matched by their prefixes. Unlike the "*.tar.gz" suffix, these
+        events never match models data of other endpoints, that share the same bucket.
+
+        :param model_data_urls: S3 URLs of model archives and prefixes of uncompressed model data.
+        :param multi_model_data_urls: S3 URL prefixes of multi-model containers' archives.
+        :param event_type: S3 notification event type.
+
+        :return: Bucket events of models data, or None, if any of the keys is not known at synth time.
+        """
+
+        # Filters by key prefix and suffix.
+        filters = [
+            (key, '' if key.endswith('/') else key.rsplit('/', 1)[-1])
+            for key in [url.replace('s3://', '', 1).partition('/')[2] for url in model_data_urls]
+        ]
+        filters += [(url.replace('s3://', '', 1).partition('/')[2], '.tar.gz') for url in multi_model_data_urls]
+        if not filters or any(Token.is_unresolved(prefix) or not prefix for prefix, _ in filters):
+            return None
+
+        # Filters covered by other filters would overlap them.
+        filters = sorted(set(filters))
+        filters = [
+            (prefix, suffix) for prefix, suffix in filters
+            if not any(
+                (other_prefix, other_suffix) != (prefix, suffix)
+                and prefix.startswith(other_prefix)
+                and suffix.endswith(other_suffix)
+                for other_prefix, other_suffix in filters
+            )
+        ]
+
+        return [
+            cls(event_type, [NotificationKeyFilter(prefix=prefix, suffix=suffix or None)])
+            for prefix, suffix in filters
+        ]
+
+    def bind(self, bucket: Bucket, handler: Union[Function, Queue]) -> None:
+        destination = SqsDestination(handler) if isinstance(handler, Queue) else LambdaDestination(handler)
+        return bucket.add_event_notification(self.event_type, destination, *self.key_filters)
@@ -0,0 +1,342 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+from b_cfn_sagemaker_endpoint.response_cache import MISSING, ResponseCache
+
+# Error codes of requests, that are retried with a backoff.
+THROTTLING_ERROR_CODES = ('ThrottlingException', 'TooManyRequestsException', 'SlowDown')
+TRANSIENT_ERROR_CODES = ('ServiceUnavailable', 'InternalFailure', 'InternalServerError', 'ModelNotReadyException')
+
+
+def _merge(payloads: List[Any]) -> Any:
+    return payloads
+
+
+def _split(response: Any, count: int) -> List[Any]:
+    if not isinstance(response, list) or len(response) != count:
+        raise ValueError(f'Batched response must be a JSON list of {count} results.')
+    return response
+
+
+def _retry_after(value: Optional[str]) -> float:
+    """
+    Parses a ``Retry-After`` header, given either in seconds or as an HTTP date.
+
+    :return: Delay in seconds, or zero, if the header is missing or invalid.
+    """
+
+    if not value:
+        return 0.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _LoopState:
+    """
+    Invocation state of a client, that is bound to a single running event loop.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.batch: List[Tuple[Any, asyncio.Future]] = []
+        self.batch_timer: Optional[asyncio.TimerHandle] = None
+        # The event loop keeps only weak references to tasks, hence in-flight batches are kept alive here.
+        self.batch_tasks: Set[asyncio.Task] = set()
+
+
+@dataclass(frozen=True)
+class MicroBatching:
+    """
+    Client-side micro-batching of small JSON requests.
+
+    Requests sent within ``max_delay`` of each other are merged into a single endpoint invocation,
+    and its response is split back into results of each request. By default, payloads are merged
+    into a JSON list, and the model must respond with a JSON list of results in the same order.
+
+    Properties
+    ==========
+
+    ``max_batch_size``
+        Maximum number of requests merged into a single invocation.
+    ``max_delay``
+        Maximum time (in seconds) a request waits for other requests to be merged with.
+    ``max_payload_size``
+        Maximum size (in bytes) of a serialized payload, that is merged. Larger payloads are sent alone.
+    ``merge``
+        Function that merges payloads into a single payload.
+    ``split``
+        Function that splits a merged response into results of the given number of requests.
+    """
+
+    max_batch_size: int = 16
+    max_delay: float = 0.005
+    max_payload_size: int = 4096
+    merge: Callable[[List[Any]], Any] = field(default=_merge)
+    split: Callable[[Any, int], List[Any]] = field(default=_split)
+
+
+class EndpointClient:
+    """
+    Asynchronous JSON inference client of a deployed endpoint.
+
+    Invocations are sent by a single pooled ``sagemaker-runtime`` client from a bounded number
+    of threads, hence a caller process reuses its connections and never sends more than
+    ``max_concurrency`` requests at a time. Throttled and transient failures are retried with
+    full jitter exponential backoff, that respects ``Retry-After`` of throttled responses.
+    Clients are best created once per endpoint with ``for_endpoint()``, and can be used from any
+    number of event loops, e.g. of different threads, each getting its own micro-batches.
+
+    :param endpoint_name: SageMaker endpoint name, e.g. ``SagemakerEndpoint.endpoint_name``.
+    :param sagemaker_runtime_client: ``boto3`` SageMaker runtime client. By default, a client
+        shared by all endpoints of the process.
+    :param max_concurrency: Maximum number of concurrent invocations.
+    :param micro_batching: Enables client-side micro-batching. Default is None.
+    :param response_cache: Enables caching of responses until the endpoint is refreshed. Default is None.
+    :param max_attempts: Maximum number of attempts of a single invocation.
+    :param base_backoff: Backoff (in seconds) of the first retry, doubled on each subsequent retry.
+    :param max_backoff: Maximum backoff in seconds.
+    :param throttling_backoff: Minimum backoff (in seconds) after a throttled invocation.
+    :param random: Function that returns a random number in ``[0, 1)``, used for jitter.
+    :param sleep: Coroutine function that sleeps for the given number of seconds.
+    """
+
+    __instances: Dict[str, 'EndpointClient'] = {}
+    __shared_runtime_client: Any = None
+    __shared_pool_size = 0
+    __lock = threading.Lock()
+
+    def __init__(
+            self,
+            endpoint_name: str,
+            sagemaker_runtime_client: Any = None,
+            max_concurrency: int = 16,
+            micro_batching: Optional[MicroBatching] = None,
+            response_cache: Optional[ResponseCache] = None,
+            max_attempts: int = 5,
+            base_backoff: float = 0.1,
+            max_backoff: float = 10.0,
+            throttling_backoff: float = 1.0,
+            random: Callable[[], float] = random.random,
+            sleep: Callable[[float], Awaitable[None]] = asyncio.sleep
+    ):
+        self.__endpoint_name = endpoint_name
+        self.__runtime_client = sagemaker_runtime_client
+        if sagemaker_runtime_client is None:
+            # Sizes the shared client's connection pool for this client.
+            self.__shared_client(max_concurrency)
+        self.__max_concurrency = max_concurrency
+        self.__micro_batching = micro_batching
+        self.__response_cache = response_cache
+        self.__max_attempts = max_attempts
+        self.__base_backoff = base_backoff
+        self.__max_backoff = max_backoff
+        self.__throttling_backoff = throttling_backoff
+        self.__random = random
+        self.__sleep = sleep
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='endpoint-client')
+        # Created lazily per event loop, since asyncio primitives are bound to the running loop.
+        self.__loop_states: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]' = (
+            weakref.WeakKeyDictionary()
+        )
+        self.__loop_states_lock = threading.Lock()
+
+    @classmethod
+    def for_endpoint(cls, endpoint_name: str, **kwargs: Any) -> 'EndpointClient':
+        """
+        Returns the process-wide client of the endpoint, creating it on the first call.
+
+        :param endpoint_name: SageMaker endpoint name.
+        :param kwargs: Other ``EndpointClient`` arguments, used only when the client is created.
+
+        :return: Endpoint client.
+        """
+
+        with cls.__lock:
+            if endpoint_name not in cls.__instances:
+                cls.__instances[endpoint_name] = cls(endpoint_name, **kwargs)
+            return cls.__instances[endpoint_name]
+
+    @property
+    def endpoint_name(self) -> str:
+        return self.__endpoint_name
+
+    async def invoke(self, payload: Any) -> Any:
+        """
+        Invokes the endpoint with a JSON payload.
+
+        :param payload: JSON serializable payload.
+
+        :return: Deserialized JSON response.
+        """
+
+        if not self.__response_cache:
+            return await self.__invoke_uncached(payload)
+
+        # The generation is read before the invocation, so that a response computed by a model,
+        # that is being replaced, is never cached for the next generation.
+        generation = await asyncio.get_running_loop().run_in_executor(
+            self.__executor,
+            self.__response_cache.generation
+        )
+        response = self.__response_cache.get(payload, generation)
+        if response is MISSING:
+            response = await self.__invoke_uncached(payload)
+            self.__response_cache.put(payload, generation, response)
+
+        return response
+
+    async def invoke_many(self, payloads: List[Any]) -> List[Any]:
+        """
+        Invokes the endpoint with many JSON payloads concurrently.
+
+        :param payloads: JSON serializable payloads.
+
+        :return: Deserialized JSON responses, in order of payloads.
+        """
+
+        return list(await asyncio.gather(*[self.invoke(payload) for payload in payloads]))
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False)
+
+    async def __invoke_uncached(self, payload: Any) -> Any:
+        if self.__micro_batching and len(json.dumps(payload)) <= self.__micro_batching.max_payload_size:
+            future = asyncio.get_running_loop().create_future()
+            self.__add_to_batch(payload, future)
+            return await future
+
+        return await self.__invoke(payload)
+
+    def __loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        with self.__loop_states_lock:
+            if loop not in self.__loop_states:
+                self.__loop_states[loop] = _LoopState(self.__max_concurrency)
+            return self.__loop_states[loop]
+
+    async def __invoke(self, payload: Any) -> Any:
+        semaphore = self.__loop_state().semaphore
+        body = json.dumps(payload)
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, self.__max_attempts + 1):
+            async with semaphore:
+                try:
+                    response = await loop.run_in_executor(self.__executor, self.__invoke_endpoint, body)
+                    return json.loads(response)
+                except (ClientError, ConnectionError, HTTPClientError) as ex:
+                    delay = self.__backoff(ex, attempt)
+                    if delay is None or attempt == self.__max_attempts:
+                        raise
+
+            # Backoff is waited without holding a concurrency slot.
+            await self.__sleep(delay)
+
+    def __invoke_endpoint(self, body: str) -> bytes:
+        runtime_client = self.__runtime_client or self.__shared_client(self.__max_concurrency)
+        response = runtime_client.invoke_endpoint(
+            EndpointName=self.__endpoint_name,
+            Body=body.encode(),
+            ContentType='application/json',
+            Accept='application/json'
+        )
+        return response['Body'].read()
+
+    def __backoff(self, ex: Exception, attempt: int) -> Optional[float]:
+        """
+        Resolves the delay before the next attempt.
+
+        :return: Delay in seconds, or None, if the error is not retried.
+        """
+
+        minimum = 0.0
+        if isinstance(ex, ClientError):
+            code = ex.response.get('Error', {}).get('Code')
+            status = ex.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            if code in THROTTLING_ERROR_CODES or status == 429:
+                headers = ex.response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+                minimum = max(self.__throttling_backoff, _retry_after(headers.get('retry-after')))
+            elif code not in TRANSIENT_ERROR_CODES and status not in (500, 502, 503, 504):
+                return None
+
+        # Full jitter spreads retries of concurrent callers over time.
+        return max(minimum, self.__random() * min(self.__max_backoff, self.__base_backoff * 2 ** (attempt - 1)))
+
+    def __add_to_batch(self, payload: Any, future: asyncio.Future) -> None:
+        state = self.__loop_state()
+        state.batch.append((payload, future))
+        if len(state.batch) >= self.__micro_batching.max_batch_size:
+            self.__flush_batch(state)
+        elif state.batch_timer is None:
+            state.batch_timer = asyncio.get_running_loop().call_later(
+                self.__micro_batching.max_delay,
+                self.__flush_batch,
+                state
+            )
+
+    def __flush_batch(self, state: _LoopState) -> None:
+        if state.batch_timer is not None:
+            state.batch_timer.cancel()
+            state.batch_timer = None
+
+        batch, state.batch = state.batch, []
+        if batch:
+            task = asyncio.ensure_future(self.__send_batch(batch))
+            state.batch_tasks.add(task)
+            task.add_done_callback(state.batch_tasks.discard)
+
+    async def __send_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                results = [await self.__invoke(batch[0][0])]
+            else:
+                response = await self.__invoke(self.__micro_batching.merge([payload for payload, _ in batch]))
+                results = self.__micro_batching.split(response, len(batch))
+        except Exception as ex:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(ex)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @classmethod
+    def __shared_client(cls, max_concurrency: int) -> Any:
+        """
+        Returns the shared runtime client, whose connection pool fits the largest ``max_concurrency``
+        requested so far. A client with a larger pool replaces the shared one, once requested.
+        """
+
+        with cls.__lock:
+            if cls.__shared_runtime_client is None or cls.__shared_pool_size < max_concurrency:
+                import boto3
+                from botocore.config import Config
+
+                cls.__shared_pool_size = max(max_concurrency, cls.__shared_pool_size, 10)
+                cls.__shared_runtime_client = boto3.client(
+                    'sagemaker-runtime',
+                    config=Config(
+                        max_pool_connections=cls.__shared_pool_size,
+                        # Retries are handled by the client itself.
+                        retries={'max_attempts': 1, 'mode': 'standard'},
+                        tcp_keepalive=True
+                    )
+                )
+            return cls.__shared_runtime_client
@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+from aws_cdk.core import Duration
+
+
+@dataclass(frozen=True)
+class EventIntake:
+    """
+    Lossless, batched intake of S3 bucket events.
+
+    Bucket events are sent to an SQS queue, instead of invoking the refresh function directly.
+    The function receives them in batches, drops already handled records by their S3 sequencer
+    and coalesces the rest into a single refresh decision. Delivery is at-least-once: a failed
+    batch is retried and, after ``max_receive_count`` attempts, moved to a dead-letter queue.
+
+    Properties
+    ==========
+
+    ``batch_size``
+        Maximum number of queue messages handled by a single refresh function invocation.
+    ``max_batching_window``
+        Maximum time to gather a batch of messages before the refresh function is invoked.
+    ``max_receive_count``
+        Number of times a message is received before it is moved to the dead-letter queue.
+    ``retention_period``
+        How long messages are kept in the intake and dead-letter queues.
+    """
+
+    batch_size: int = 100
+    max_batching_window: Duration = Duration.seconds(20)
+    max_receive_count: int = 5
+    retention_period: Duration = Duration.days(14)
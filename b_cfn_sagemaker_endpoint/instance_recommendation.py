@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aws_cdk.core import Duration
+
+from b_cfn_sagemaker_endpoint.invocation_payload import InvocationPayload
+from b_cfn_sagemaker_endpoint.latency_gate import LatencyGate
+
+
+@dataclass(frozen=True)
+class InstanceCandidate:
+    """
+    Instance type benchmarked by ``InstanceRecommendation``.
+
+    Properties
+    ==========
+
+    ``instance_type``
+        ML compute instance type, e.g. "ml.c5.xlarge".
+    ``hourly_price``
+        On-demand price of a single instance per hour, in the region of the endpoint. Only relative
+        prices of candidates matter, e.g. USD or savings plan rates.
+    """
+
+    instance_type: str
+    hourly_price: float
+
+    def __post_init__(self):
+        if self.hourly_price <= 0:
+            raise ValueError('Hourly price must be positive.')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'instance_type': self.instance_type, 'hourly_price': self.hourly_price}
+
+
+@dataclass(frozen=True)
+class InstanceRecommendation:
+    """
+    Instance type and count recommendation of every new model artifact.
+
+    Before each endpoint update, every candidate is deployed, in parallel, to its own short-lived
+    endpoint ("<endpoint name>-rec-<index>") serving the new model artifacts on a single instance.
+    ``payloads`` are replayed against each candidate at ``concurrency``, measuring its throughput,
+    latencies and requests per dollar. The candidate with the most requests per dollar, within
+    ``p99_threshold`` and ``max_error_rate``, is recommended. Results are persisted per model
+    artifact versions under ``prefix`` of the models bucket, hence repeated uploads of the same
+    artifacts reuse them. Errored candidates are not persisted, hence they are benchmarked again.
+    Applied copies of endpoint configurations are not deleted with the stack.
+
+    Properties
+    ==========
+
+    ``candidates``
+        Benchmarked instance types with their prices. At most 10.
+    ``apply``
+        Updates the endpoint to a copy of the endpoint configuration, that the endpoint is about to be
+        updated to, with the recommended instance type and count. Otherwise, the recommendation is only
+        reported. Can not be combined with auto scaling or version pinning.
+    ``target_throughput``
+        Requests per second, that the endpoint must serve. The recommended instance count is the
+        number of recommended instances that serve it. None keeps the configured instance counts.
+    ``p99_threshold``
+        Maximum 99th percentile of round trip latencies of invocations of a recommended candidate,
+        as measured by the refresh function, like the latency gate's thresholds.
+    ``max_error_rate``
+        Maximum share (between 0 and 1) of failed invocations of a recommended candidate.
+    ``payloads``
+        Invocation payloads replayed in a round robin. Default is the endpoint's warm-up payloads.
+    ``concurrency``
+        Number of concurrent invocations of each candidate.
+    ``requests``
+        Total number of invocations of each candidate.
+    ``timeout``
+        Maximum duration of candidate endpoints' startup, their load tests and their deletion. The last
+        ``LatencyGate.CLEANUP_TIME`` of it is reserved for in-flight invocations and the deletion.
+    ``prefix``
+        Key prefix of persisted results in the models bucket.
+    """
+
+    MAX_CANDIDATES = 10
+    # Shares the refresh function's budget with the latency gate.
+    MAX_TIMEOUT = LatencyGate.MAX_TIMEOUT
+
+    candidates: List[InstanceCandidate]
+    apply: bool = False
+    target_throughput: Optional[float] = None
+    p99_threshold: Optional[Duration] = None
+    max_error_rate: float = 0.0
+    payloads: Optional[List[InvocationPayload]] = None
+    concurrency: int = 4
+    requests: int = 200
+    timeout: Duration = Duration.minutes(10)
+    prefix: str = 'instance-recommendations/'
+
+    def __post_init__(self):
+        if not 1 <= len(self.candidates) <= self.MAX_CANDIDATES:
+            raise ValueError(f'Between 1 and {self.MAX_CANDIDATES} instance candidates must be given.')
+
+        if self.target_throughput is not None and self.target_throughput <= 0:
+            raise ValueError('Target throughput must be positive.')
+
+        if not 0 <= self.max_error_rate <= 1:
+            raise ValueError('Max error rate must be between 0 and 1.')
+
+        if not 1 <= self.concurrency <= self.requests:
+            raise ValueError('Concurrency must be at least 1 and must not exceed the number of requests.')
+
+        if not LatencyGate.CLEANUP_TIME.to_seconds() < self.timeout.to_seconds() <= self.MAX_TIMEOUT.to_seconds():
+            raise ValueError(
+                f'Timeout must be longer than {LatencyGate.CLEANUP_TIME.to_minutes()} minutes '
+                f'and can not exceed {self.MAX_TIMEOUT.to_minutes()} minutes.'
+            )
+
+        if not self.prefix.endswith('/'):
+            raise ValueError('Prefix must end with "/".')
+
+    def to_settings(self, name_prefix: str, bucket_name: str) -> Dict[str, Any]:
+        """
+        Returns the recommendation's settings, as read by the refresh function.
+
+        :param name_prefix: Name prefix of candidate endpoints and endpoint configurations.
+        :param bucket_name: Name of the bucket, that results are persisted to.
+
+        :return: Settings with the threshold in milliseconds and timeout in seconds.
+        """
+
+        return {
+            'name_prefix': name_prefix,
+            'bucket': bucket_name,
+            'prefix': self.prefix,
+            'candidates': [candidate.to_dict() for candidate in self.candidates],
+            'apply': self.apply,
+            'target_throughput': self.target_throughput,
+            'p99': self.p99_threshold.to_milliseconds() if self.p99_threshold else None,
+            'max_error_rate': self.max_error_rate,
+            'payloads': [payload.to_dict() for payload in self.payloads] if self.payloads else None,
+            'concurrency': self.concurrency,
+            'requests': self.requests,
+            'timeout': self.timeout.to_seconds(),
+        }
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class InvocationPayload:
+    """
+    Synthetic SageMaker endpoint invocation payload, e.g. used to warm up models.
+
+    Properties
+    ==========
+
+    ``body``
+        Invocation request body.
+    ``content_type``
+        MIME type of the request body.
+    ``accept``
+        Optional. Desired MIME type of the inference response.
+    """
+
+    body: str = '{}'
+    content_type: str = 'application/json'
+    accept: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'body': self.body, 'content_type': self.content_type, 'accept': self.accept}
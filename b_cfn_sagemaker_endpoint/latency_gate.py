@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aws_cdk.core import Duration
+
+from b_cfn_sagemaker_endpoint.invocation_payload import InvocationPayload
+
+
+@dataclass(frozen=True)
+class LatencyGate:
+    """
+    Latency-gated promotion of refreshed models.
+
+    Before each endpoint update, the new endpoint configuration is deployed to a short-lived staging
+    endpoint, named after the endpoint with a "-staging" suffix. ``payloads`` are replayed against it
+    at ``concurrency`` and the endpoint is updated only if the measured latency percentiles and error
+    rate stay within the thresholds. Otherwise, the update is skipped and the endpoint keeps serving
+    its current models. The staging endpoint is deleted after every load test.
+
+    Thresholds apply to client round trip latencies of invocations, as measured by the refresh
+    function: SageMaker's overhead (``OverheadLatency``) and the network round trip on top of the
+    model's own ``ModelLatency``. Hence they are not comparable to ``ModelLatency`` alarms, e.g. of
+    traffic shifting, and must leave room for the overhead. The gate has to finish within the
+    refresh function's timeout, including the staging endpoint's startup.
+
+    Properties
+    ==========
+
+    ``p50_threshold``
+        Maximum median round trip latency of invocations. None disables this threshold.
+    ``p95_threshold``
+        Maximum 95th percentile of round trip latencies of invocations. None disables this threshold.
+    ``p99_threshold``
+        Maximum 99th percentile of round trip latencies of invocations. None disables this threshold.
+    ``max_error_rate``
+        Maximum share (between 0 and 1) of failed invocations, including model errors.
+    ``payloads``
+        Invocation payloads replayed in a round robin. Default is the endpoint's warm-up payloads.
+    ``concurrency``
+        Number of concurrent invocations.
+    ``requests``
+        Total number of invocations.
+    ``timeout``
+        Maximum duration of the staging endpoint's startup, the load test and the staging endpoint's
+        deletion. The last ``CLEANUP_TIME`` of it is reserved for in-flight invocations and the deletion.
+    """
+
+    # Leaves time of the refresh function's 15 minutes timeout for the endpoint update itself.
+    MAX_TIMEOUT = Duration.minutes(12)
+    # Mirrors ``StagingEndpoint.CLEANUP_TIME`` of the refresh function.
+    CLEANUP_TIME = Duration.minutes(2)
+
+    p50_threshold: Optional[Duration] = None
+    p95_threshold: Optional[Duration] = None
+    p99_threshold: Optional[Duration] = Duration.seconds(1)
+    max_error_rate: float = 0.0
+    payloads: Optional[List[InvocationPayload]] = None
+    concurrency: int = 4
+    requests: int = 200
+    timeout: Duration = Duration.minutes(10)
+
+    def __post_init__(self):
+        if not any((self.p50_threshold, self.p95_threshold, self.p99_threshold)):
+            raise ValueError('At least one latency threshold must be set.')
+
+        if not 0 <= self.max_error_rate <= 1:
+            raise ValueError('Max error rate must be between 0 and 1.')
+
+        if not 1 <= self.concurrency <= self.requests:
+            raise ValueError('Concurrency must be at least 1 and must not exceed the number of requests.')
+
+        if not self.CLEANUP_TIME.to_seconds() < self.timeout.to_seconds() <= self.MAX_TIMEOUT.to_seconds():
+            raise ValueError(
+                f'Timeout must be longer than {self.CLEANUP_TIME.to_minutes()} minutes '
+                f'and can not exceed {self.MAX_TIMEOUT.to_minutes()} minutes.'
+            )
+
+    def to_settings(self, staging_endpoint_name: str) -> Dict[str, Any]:
+        """
+        Returns the gate's settings, as read by the refresh function.
+
+        :param staging_endpoint_name: Name of the staging endpoint.
+
+        :return: Settings with thresholds in milliseconds and timeout in seconds.
+        """
+
+        return {
+            'staging_endpoint_name': staging_endpoint_name,
+            'p50': self.p50_threshold.to_milliseconds() if self.p50_threshold else None,
+            'p95': self.p95_threshold.to_milliseconds() if self.p95_threshold else None,
+            'p99': self.p99_threshold.to_milliseconds() if self.p99_threshold else None,
+            'max_error_rate': self.max_error_rate,
+            'payloads': [payload.to_dict() for payload in self.payloads] if self.payloads else None,
+            'concurrency': self.concurrency,
+            'requests': self.requests,
+            'timeout': self.timeout.to_seconds(),
+        }
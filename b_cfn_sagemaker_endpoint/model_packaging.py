@@ -0,0 +1,300 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import stat
+import struct
+import tarfile
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Deque, Iterable, Iterator, List, Optional, Tuple
+
+import jsii
+from aws_cdk.aws_s3_assets import AssetOptions
+from aws_cdk.core import AssetHashType, BundlingOptions, DockerImage, ILocalBundling
+
+# Files and directories that are not packaged by default.
+DEFAULT_EXCLUDE = ('*.pyc', '*.pyo', '__pycache__', '*.dist-info', '*.egg-info')
+
+# Size of independently compressed blocks of the uncompressed tar stream.
+BLOCK_SIZE = 1024 * 1024
+
+# Deflate window size, i.e. the size of the previous block's tail that primes each block's compressor.
+DICTIONARY_SIZE = 32 * 1024
+
+# Bumped whenever the archive layout changes, so that cached archives are rebuilt.
+FORMAT_VERSION = 1
+
+
+def package_model(
+        source_path: str,
+        output_path: str,
+        exclude: Iterable[str] = DEFAULT_EXCLUDE,
+        compression_level: int = 6,
+        workers: Optional[int] = None,
+        block_size: int = BLOCK_SIZE,
+        cache: bool = True
+) -> str:
+    """
+    Packages a model directory as a deterministic ``model.tar.gz`` archive, without Docker.
+
+    Files are archived in a stable order with fixed mtimes, owners and normalized permissions, hence
+    identical contents produce byte-identical archives on any machine. The tar stream is compressed
+    in blocks in parallel, while both the archive and its SHA-256 hash are written in a single
+    streaming pass. The archive is not rebuilt if none of the source files changed since the last
+    packaging, as recorded in an ``<output_path>.json`` sidecar file.
+
+    :param source_path: Model directory.
+    :param output_path: Path of the created archive.
+    :param exclude: Glob patterns of excluded files and directories. Patterns are matched against
+        names, except for patterns starting with "/", that are matched against paths relative to
+        the model directory.
+    :param compression_level: Gzip compression level.
+    :param workers: Number of compression threads. By default, the number of CPUs.
+    :param block_size: Size of independently compressed blocks.
+    :param cache: Skips packaging of unchanged model directories.
+
+    :return: SHA-256 hash of the archive.
+    """
+
+    exclude = tuple(exclude)
+    files = list(_walk(source_path, exclude))
+    fingerprint = _fingerprint(files, exclude, compression_level, block_size)
+
+    sidecar_path = f'{output_path}.json'
+    if cache and os.path.isfile(output_path) and os.path.isfile(sidecar_path):
+        with open(sidecar_path) as file:
+            sidecar = json.load(file)
+        if sidecar.get('fingerprint') == fingerprint:
+            return sidecar['sha256']
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    temporary_path = f'{output_path}.tmp'
+    try:
+        with open(temporary_path, 'wb') as output:
+            with ParallelGzipWriter(output, compression_level, workers, block_size) as writer:
+                with tarfile.open(fileobj=writer, mode='w|', format=tarfile.PAX_FORMAT) as archive:
+                    for path, arcname, _ in files:
+                        _add(archive, path, arcname)
+            sha256 = writer.sha256
+        os.replace(temporary_path, output_path)
+    finally:
+        # Removes the partially written archive, if packaging failed.
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    with open(sidecar_path, 'w') as file:
+        json.dump({'fingerprint': fingerprint, 'sha256': sha256}, file)
+
+    return sha256
+
+
+class ParallelGzipWriter:
+    """
+    Write-only file object, that compresses written data as a single gzip member in parallel.
+
+    Data is split into fixed size blocks, each compressed as raw deflate data by a thread pool,
+    with the previous block's tail as a preset dictionary. Compressed blocks are written in order,
+    hence the output is deterministic and independent of the number of threads. The gzip header
+    carries no file name nor modification time.
+
+    :param output: Binary file object the compressed data is written to.
+    :param compression_level: Gzip compression level.
+    :param workers: Number of compression threads. By default, the number of CPUs.
+    :param block_size: Size of independently compressed blocks.
+    """
+
+    def __init__(
+            self,
+            output: BinaryIO,
+            compression_level: int = 6,
+            workers: Optional[int] = None,
+            block_size: int = BLOCK_SIZE
+    ):
+        self.__output = output
+        self.__compression_level = compression_level
+        self.__workers = workers or os.cpu_count() or 1
+        self.__block_size = block_size
+        self.__executor = ThreadPoolExecutor(max_workers=self.__workers)
+        # Bounds memory usage to a few blocks per thread.
+        self.__futures: Deque[Future] = deque()
+        self.__buffer = bytearray()
+        self.__dictionary = b''
+        self.__crc = 0
+        self.__size = 0
+        self.__hash = hashlib.sha256()
+
+        self.__write_output(b'\x1f\x8b\x08\x00' + struct.pack('<I', 0) + b'\x00\xff')
+
+    @property
+    def sha256(self) -> str:
+        return self.__hash.hexdigest()
+
+    def write(self, data: bytes) -> int:
+        self.__buffer += data
+        self.__crc = zlib.crc32(data, self.__crc)
+        self.__size += len(data)
+        while len(self.__buffer) >= self.__block_size:
+            self.__submit(bytes(self.__buffer[:self.__block_size]), last=False)
+            del self.__buffer[:self.__block_size]
+
+        return len(data)
+
+    def close(self) -> None:
+        self.__submit(bytes(self.__buffer), last=True)
+        self.__buffer = bytearray()
+        while self.__futures:
+            self.__write_output(self.__futures.popleft().result())
+        self.__executor.shutdown()
+
+        self.__write_output(struct.pack('<II', self.__crc, self.__size & 0xFFFFFFFF))
+
+    def __enter__(self) -> 'ParallelGzipWriter':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __submit(self, block: bytes, last: bool) -> None:
+        self.__futures.append(self.__executor.submit(
+            _compress_block,
+            block,
+            self.__dictionary,
+            self.__compression_level,
+            last
+        ))
+        self.__dictionary = (self.__dictionary + block)[-DICTIONARY_SIZE:]
+
+        while len(self.__futures) > self.__workers * 2:
+            self.__write_output(self.__futures.popleft().result())
+
+    def __write_output(self, data: bytes) -> None:
+        self.__output.write(data)
+        self.__hash.update(data)
+
+
+@jsii.implements(ILocalBundling)
+class ModelAssetBundling:
+    """
+    Local bundling of a packaged model, that places its archive as ``<model_name>/model.tar.gz``.
+
+    :param archive_path: Path of the packaged model archive.
+    :param model_name: Model directory name.
+    """
+
+    def __init__(self, archive_path: str, model_name: str):
+        self.__archive_path = archive_path
+        self.__model_name = model_name
+
+    def try_bundle(self, output_dir: str, options: Optional[BundlingOptions] = None, **kwargs: Any) -> bool:
+        model_path = os.path.join(output_dir, self.__model_name)
+        os.makedirs(model_path, exist_ok=True)
+        shutil.copyfile(self.__archive_path, os.path.join(model_path, 'model.tar.gz'))
+        return True
+
+
+def model_asset_options(
+        source_path: str,
+        model_name: str,
+        cache_path: Optional[str] = None,
+        **kwargs: Any
+) -> AssetOptions:
+    """
+    Creates asset options that bundle model files as "``model_name``/model.tar.gz" without Docker.
+
+    The model is packaged at synth time and its archive hash becomes the asset hash, hence
+    unchanged models are neither repackaged nor uploaded again.
+
+    :param source_path: Model directory.
+    :param model_name: Model directory name in the bundled asset.
+    :param cache_path: Directory of packaged archives. By default, a directory in the system's
+        temporary directory.
+    :param kwargs: Other ``package_model()`` arguments.
+
+    :return: Bundled asset options.
+    """
+
+    source_path = os.path.abspath(source_path)
+    cache_path = cache_path or os.path.join(tempfile.gettempdir(), 'b-cfn-sagemaker-endpoint')
+    archive_path = os.path.join(
+        cache_path,
+        hashlib.sha256(f'{source_path}:{model_name}'.encode()).hexdigest()[:16],
+        'model.tar.gz'
+    )
+    sha256 = package_model(source_path, archive_path, **kwargs)
+
+    return AssetOptions(
+        asset_hash_type=AssetHashType.CUSTOM,
+        asset_hash=hashlib.sha256(f'{model_name}/{sha256}'.encode()).hexdigest(),
+        bundling=BundlingOptions(
+            # Never pulled, since the model is always bundled locally.
+            image=DockerImage.from_registry('scratch'),
+            local=ModelAssetBundling(archive_path, model_name)
+        )
+    )
+
+
+def _compress_block(block: bytes, dictionary: bytes, compression_level: int, last: bool) -> bytes:
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary) \
+        if dictionary else zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # Sync flush ends each block on a byte boundary, so that blocks form a single deflate stream.
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _walk(source_path: str, exclude: Tuple[str, ...]) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """
+    Lists model directory entries in a stable order, skipping excluded ones.
+
+    :return: Tuples of entry path, its archive name and stat result.
+    """
+
+    def excluded(name: str, arcname: str) -> bool:
+        return any(
+            fnmatch.fnmatchcase(f'/{arcname}', pattern) if pattern.startswith('/')
+            else fnmatch.fnmatchcase(name, pattern)
+            for pattern in exclude
+        )
+
+    def walk(path: str, prefix: str) -> Iterator[Tuple[str, str, os.stat_result]]:
+        for name in sorted(os.listdir(path)):
+            entry_path = os.path.join(path, name)
+            arcname = f'{prefix}{name}'
+            if excluded(name, arcname):
+                continue
+
+            entry_stat = os.lstat(entry_path)
+            yield entry_path, arcname, entry_stat
+            if stat.S_ISDIR(entry_stat.st_mode):
+                yield from walk(entry_path, f'{arcname}/')
+
+    return walk(source_path, '')
+
+
+def _fingerprint(
+        files: List[Tuple[str, str, os.stat_result]],
+        exclude: Tuple[str, ...],
+        compression_level: int,
+        block_size: int
+) -> str:
+    fingerprint = hashlib.sha256(json.dumps([FORMAT_VERSION, exclude, compression_level, block_size]).encode())
+    for _, arcname, entry_stat in files:
+        fingerprint.update(f'{arcname}:{entry_stat.st_mode}:{entry_stat.st_size}:{entry_stat.st_mtime_ns}\n'.encode())
+
+    return fingerprint.hexdigest()
+
+
+def _add(archive: tarfile.TarFile, path: str, arcname: str) -> None:
+    info = archive.gettarinfo(path, arcname)
+    info.mtime = 0
+    info.uid = info.gid = 0
+    info.uname = info.gname = ''
+    info.mode = 0o755 if info.isdir() or info.mode & stat.S_IXUSR else 0o644
+
+    if info.isfile():
+        with open(path, 'rb') as file:
+            archive.addfile(info, file)
+    else:
+        archive.addfile(info)
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
+from typing import Dict, List, Optional
 
 from aws_cdk.aws_sagemaker import CfnModelProps, CfnModel
-from aws_cdk.core import Construct
+from aws_cdk.core import Construct, Token
 
 
 @dataclass(frozen=True)
@@ -21,11 +22,21 @@ class ModelProps:
         property has no effect as ``ModelProps.model_name`` is used instead.
     ``custom_id``
         Optional. Custom CDK resource id. By default id is generated automatically.
+    ``uncompressed_model_data_url``
+        Optional. S3 URL prefix (``s3://bucket/prefix/``) of the primary container's uncompressed
+        model data. Instances load model files directly from the prefix, without downloading and
+        decompressing a ``model.tar.gz`` archive, which shortens both refreshes and scale-outs of
+        large models. Can not be combined with the container's ``model_data_url``.
     """
 
+    MULTI_MODEL_MODE = 'MultiModel'
+    # Directory of the inference code within model data, where framework containers look for it by default.
+    CODE_DIRECTORY = '/opt/ml/model/code'
+
     model_name: str
     props: CfnModelProps
     custom_id: str = None
+    uncompressed_model_data_url: Optional[str] = None
 
     def __post_init__(self):
         if self.props.model_name and self.model_name != self.props.model_name:
@@ -34,11 +45,82 @@ class ModelProps:
                 'matches ``CfnModelProps.model_name``.'
             )
 
+        if self.uncompressed_model_data_url:
+            if not Token.is_unresolved(self.uncompressed_model_data_url) and not (
+                    self.uncompressed_model_data_url.startswith('s3://')
+                    and self.uncompressed_model_data_url.endswith('/')
+            ):
+                raise ValueError('Uncompressed model data URL must be an S3 URL prefix, i.e. "s3://bucket/prefix/".')
+
+            containers = self.__containers()
+            if not containers or containers[0].model_data_url or containers[0].mode == self.MULTI_MODEL_MODE:
+                raise ValueError(
+                    'Uncompressed model data requires a single model primary container without ``model_data_url``.'
+                )
+
     def __hash__(self):
         return hash(self.model_name)
 
+    @property
+    def model_data_urls(self) -> List[str]:
+        """
+        Returns S3 URLs of model artifacts referenced by the model's single model containers.
+        Uncompressed model data is referenced by its S3 URL prefix, that ends with "/".
+
+        :return: Model artifacts S3 URLs.
+        """
+
+        urls = [
+            container.model_data_url
+            for container in self.__containers()
+            if container.model_data_url and container.mode != self.MULTI_MODEL_MODE
+        ]
+        if self.uncompressed_model_data_url:
+            urls.append(self.uncompressed_model_data_url)
+
+        return urls
+
+    @property
+    def multi_model_data_urls(self) -> List[str]:
+        """
+        Returns S3 URL prefixes of model artifacts referenced by the model's multi-model containers.
+
+        :return: Model artifacts S3 URL prefixes.
+        """
+
+        return [
+            container.model_data_url
+            for container in self.__containers()
+            if container.model_data_url and container.mode == self.MULTI_MODEL_MODE
+        ]
+
+    @property
+    def entry_points(self) -> Dict[str, str]:
+        """
+        Returns paths of inference scripts (``SAGEMAKER_PROGRAM`` environment variable) within model
+        data of single model containers, that load the inference code from model data, i.e. "code/".
+
+        :return: Mapping of model data URLs and paths of their inference scripts.
+        """
+
+        entry_points = {}
+        for index, container in enumerate(self.__containers()):
+            url = container.model_data_url or (self.uncompressed_model_data_url if index == 0 else None)
+            environment = container.environment
+            if not url or container.mode == self.MULTI_MODEL_MODE or not isinstance(environment, dict):
+                continue
+
+            program = environment.get('SAGEMAKER_PROGRAM')
+            if not isinstance(program, str) or Token.is_unresolved(program):
+                continue
+
+            if environment.get('SAGEMAKER_SUBMIT_DIRECTORY', self.CODE_DIRECTORY) == self.CODE_DIRECTORY:
+                entry_points[url] = f'code/{program}'
+
+        return entry_points
+
     def bind(self, scope: Construct) -> CfnModel:
-        return CfnModel(
+        model = CfnModel(
             scope,
             self.custom_id or f'{self.model_name}-model',
             containers=self.props.containers,
@@ -50,3 +132,20 @@ class ModelProps:
             tags=self.props.tags,
             vpc_config=self.props.vpc_config,
         )
+
+        if self.uncompressed_model_data_url:
+            # Not supported by ``CfnModel.ContainerDefinitionProperty`` of CDK v1.
+            container_path = 'PrimaryContainer' if self.props.primary_container else 'Containers.0'
+            model.add_property_override(f'{container_path}.ModelDataSource', {
+                'S3DataSource': {
+                    'S3Uri': self.uncompressed_model_data_url,
+                    'S3DataType': 'S3Prefix',
+                    'CompressionType': 'None',
+                }
+            })
+
+        return model
+
+    def __containers(self) -> List[CfnModel.ContainerDefinitionProperty]:
+        containers = [self.props.primary_container, *(self.props.containers or [])]
+        return [container for container in containers if isinstance(container, CfnModel.ContainerDefinitionProperty)]
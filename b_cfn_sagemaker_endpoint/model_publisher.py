@@ -0,0 +1,344 @@
+import argparse
+import base64
+import hashlib
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+from b_cfn_sagemaker_endpoint.model_packaging import package_model
+
+# Default size of uploaded parts. S3 requires every part, but the last one, to be at least 5 MiB.
+DEFAULT_PART_SIZE = 64 * 1024 * 1024
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# S3 limit of parts per multipart upload.
+MAX_PARTS = 10000
+
+# Error codes of throttled or transiently failed S3 requests, that are worth retrying.
+RETRYABLE_ERROR_CODES = (
+    'SlowDown',
+    'Throttling',
+    'ThrottlingException',
+    'RequestTimeout',
+    'InternalError',
+    'ServiceUnavailable',
+    '500',
+    '503',
+)
+
+
+@dataclass(frozen=True)
+class PublishResult:
+    """
+    Summary of a published model.
+
+    Properties
+    ==========
+
+    ``key``
+        Object key of the published model.
+    ``etag``
+        ETag of the published model, as returned by S3.
+    ``checksum``
+        Composite SHA-256 checksum of the published model's parts.
+    ``size``
+        Size of the published model archive in bytes.
+    ``parts_uploaded``
+        Number of uploaded parts.
+    ``parts_skipped``
+        Number of parts, that were already uploaded by a previous, interrupted publish.
+    ``unchanged``
+        Whether the published model was identical to the existing object, hence not uploaded at all.
+    ``elapsed``
+        Publish duration in seconds.
+    """
+
+    key: str
+    etag: str
+    checksum: str
+    size: int
+    parts_uploaded: int
+    parts_skipped: int
+    unchanged: bool
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """
+        Upload throughput in bytes per second.
+        """
+
+        return self.size / self.elapsed if self.elapsed else 0.0
+
+
+class ModelPublisher:
+    """
+    Publishes model archives to a models bucket, so that each publish triggers exactly one
+    endpoint refresh.
+
+    Archives are uploaded as multipart uploads directly to the final key. S3 creates the object
+    atomically only once the upload is completed, hence the previous model stays in place during
+    the upload, the ``BucketEvent`` filter sees a single ``ObjectCreated:CompleteMultipartUpload``
+    event of a complete object, and no delete event is ever emitted. Parts are uploaded with SHA-256
+    checksums, that S3 verifies and, unlike ETags, keeps independent of the bucket encryption. An
+    identical existing object is not uploaded again, while parts of an interrupted publish, whose
+    checksums match, are reused instead of being uploaded again. Only throttled and transiently
+    failed part uploads are retried.
+
+    :param s3_client: ``boto3`` S3 client.
+    :param bucket_name: Models bucket name.
+    :param part_size: Size of uploaded parts in bytes.
+    :param concurrency: Number of parts uploaded in parallel.
+    :param max_attempts: Maximum number of attempts to upload a single part, if it is throttled or fails
+        transiently.
+    :param backoff: Delay before the first retry in seconds, doubled on each subsequent retry.
+    :param sleep: Function that sleeps for the given number of seconds.
+    """
+
+    def __init__(
+            self,
+            s3_client: Any,
+            bucket_name: str,
+            part_size: int = DEFAULT_PART_SIZE,
+            concurrency: int = 8,
+            max_attempts: int = 5,
+            backoff: float = 1.0,
+            sleep: Callable[[float], None] = time.sleep
+    ):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f'Part size must be at least {MIN_PART_SIZE} bytes.')
+
+        self.__s3_client = s3_client
+        self.__bucket_name = bucket_name
+        self.__part_size = part_size
+        self.__concurrency = concurrency
+        self.__max_attempts = max_attempts
+        self.__backoff = backoff
+        self.__sleep = sleep
+
+    def publish(self, source_path: str, key: str) -> PublishResult:
+        """
+        Publishes a model directory, packaged as ``model.tar.gz``, or a model archive.
+
+        :param source_path: Model directory or archive path.
+        :param key: Object key of the published model.
+
+        :return: Publish summary.
+        """
+
+        if not os.path.isdir(source_path):
+            return self.__publish_file(source_path, key)
+
+        with tempfile.TemporaryDirectory() as temporary_path:
+            archive_path = os.path.join(temporary_path, 'model.tar.gz')
+            package_model(source_path, archive_path, cache=False)
+            return self.__publish_file(archive_path, key)
+
+    def __publish_file(self, path: str, key: str) -> PublishResult:
+        started_at = time.monotonic()
+        size = os.path.getsize(path)
+        part_size = max(self.__part_size, math.ceil(size / MAX_PARTS))
+        part_count = max(math.ceil(size / part_size), 1)
+
+        with ThreadPoolExecutor(max_workers=self.__concurrency) as executor:
+            digests = list(executor.map(
+                lambda part_number: hashlib.sha256(self.__read_part(path, part_size, part_number)).digest(),
+                range(1, part_count + 1)
+            ))
+            checksums = [base64.b64encode(digest).decode() for digest in digests]
+            checksum = f'{base64.b64encode(hashlib.sha256(b"".join(digests)).digest()).decode()}-{part_count}'
+
+            existing = self.__existing_object(key)
+            if existing and existing.get('ChecksumSHA256') == checksum:
+                print(f'Skipping upload of "{key}", identical model is already published.')
+                return PublishResult(
+                    key,
+                    existing['ETag'],
+                    checksum,
+                    size,
+                    0,
+                    part_count,
+                    True,
+                    time.monotonic() - started_at
+                )
+
+            upload_id, uploaded_parts = self.__resume_upload(key)
+            # Uploaded parts are reused only if their content matches, while their ETags, that are not
+            # MD5 digests e.g. in SSE-KMS encrypted buckets, are used as returned by S3.
+            etags = {
+                part_number: uploaded_parts[part_number]['ETag']
+                for part_number, part_checksum in enumerate(checksums, 1)
+                if uploaded_parts.get(part_number, {}).get('ChecksumSHA256') == part_checksum
+            }
+            missing_part_numbers = [part_number for part_number in range(1, part_count + 1) if part_number not in etags]
+            if etags:
+                print(f'Resuming upload of "{key}", {len(etags)} parts already uploaded.')
+
+            etags.update(zip(missing_part_numbers, executor.map(
+                lambda part_number: self.__upload_part(
+                    path,
+                    part_size,
+                    part_number,
+                    checksums[part_number - 1],
+                    key,
+                    upload_id
+                ),
+                missing_part_numbers
+            )))
+
+        response = self.__s3_client.complete_multipart_upload(
+            Bucket=self.__bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': part_number, 'ETag': etags[part_number], 'ChecksumSHA256': part_checksum}
+                for part_number, part_checksum in enumerate(checksums, 1)
+            ]}
+        )
+
+        result = PublishResult(
+            key,
+            response['ETag'],
+            checksum,
+            size,
+            len(missing_part_numbers),
+            part_count - len(missing_part_numbers),
+            False,
+            time.monotonic() - started_at
+        )
+        print(f'Published "{key}": {size} bytes in {result.elapsed:.1f} s ({result.throughput / 2 ** 20:.1f} MiB/s).')
+
+        return result
+
+    def __existing_object(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.__s3_client.head_object(Bucket=self.__bucket_name, Key=key, ChecksumMode='ENABLED')
+        except ClientError as ex:
+            if ex.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+
+    def __resume_upload(self, key: str) -> Tuple[str, Dict[int, Dict[str, Any]]]:
+        """
+        Finds the latest interrupted upload of the key, that has SHA-256 part checksums, or starts a new one.
+
+        :return: Upload id and its uploaded parts by part number.
+        """
+
+        uploads = [
+            upload for upload in self.__s3_client.list_multipart_uploads(
+                Bucket=self.__bucket_name,
+                Prefix=key
+            ).get('Uploads', [])
+            if upload['Key'] == key and upload.get('ChecksumAlgorithm') == 'SHA256'
+        ]
+        if not uploads:
+            upload_id = self.__s3_client.create_multipart_upload(
+                Bucket=self.__bucket_name,
+                Key=key,
+                ChecksumAlgorithm='SHA256'
+            )['UploadId']
+            return upload_id, {}
+
+        upload_id = max(uploads, key=lambda upload: upload['Initiated'])['UploadId']
+        parts = {}
+        arguments = {'Bucket': self.__bucket_name, 'Key': key, 'UploadId': upload_id}
+        while True:
+            response = self.__s3_client.list_parts(**arguments)
+            parts.update({part['PartNumber']: part for part in response.get('Parts', [])})
+            if not response.get('IsTruncated'):
+                return upload_id, parts
+            arguments['PartNumberMarker'] = response['NextPartNumberMarker']
+
+    def __upload_part(
+            self,
+            path: str,
+            part_size: int,
+            part_number: int,
+            checksum: str,
+            key: str,
+            upload_id: str
+    ) -> str:
+        """
+        Uploads a part, retrying throttled and transiently failed attempts with an exponential backoff.
+
+        :return: ETag of the uploaded part.
+        """
+
+        body = self.__read_part(path, part_size, part_number)
+        for attempt in range(1, self.__max_attempts + 1):
+            try:
+                return self.__s3_client.upload_part(
+                    Bucket=self.__bucket_name,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body,
+                    ChecksumAlgorithm='SHA256',
+                    ChecksumSHA256=checksum
+                )['ETag']
+            except (ClientError, ConnectionError, HTTPClientError) as ex:
+                if attempt == self.__max_attempts or not self.__is_retryable(ex):
+                    raise
+                delay = self.__backoff * 2 ** (attempt - 1)
+                print(f'Failed to upload part {part_number}: {repr(ex)}. Retrying in {delay} s.')
+                self.__sleep(delay)
+
+    @staticmethod
+    def __is_retryable(ex: Exception) -> bool:
+        if isinstance(ex, ClientError):
+            return ex.response['Error']['Code'] in RETRYABLE_ERROR_CODES
+        return True
+
+    @staticmethod
+    def __read_part(path: str, part_size: int, part_number: int) -> bytes:
+        with open(path, 'rb') as file:
+            file.seek((part_number - 1) * part_size)
+            return file.read(part_size)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    ``b-sagemaker-publish`` command entry point.
+
+    :param argv: Command line arguments. By default, ``sys.argv`` arguments.
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='b-sagemaker-publish',
+        description='Publishes a model directory or archive to a SageMaker models bucket.'
+    )
+    parser.add_argument('source', help='Model directory, packaged as model.tar.gz, or model archive path.')
+    parser.add_argument('--bucket', required=True, help='Models bucket name.')
+    parser.add_argument('--key', required=True, help='Object key of the published model, e.g. model/model.tar.gz.')
+    parser.add_argument(
+        '--part-size',
+        type=int,
+        default=DEFAULT_PART_SIZE // 2 ** 20,
+        help='Size of uploaded parts in MiB.'
+    )
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of parts uploaded in parallel.')
+    parser.add_argument('--max-attempts', type=int, default=5, help='Maximum number of attempts to upload a part.')
+    arguments = parser.parse_args(argv)
+
+    import boto3
+    from botocore.config import Config
+
+    s3_client = boto3.client('s3', config=Config(max_pool_connections=arguments.concurrency))
+    ModelPublisher(
+        s3_client,
+        arguments.bucket,
+        part_size=arguments.part_size * 2 ** 20,
+        concurrency=arguments.concurrency,
+        max_attempts=arguments.max_attempts
+    ).publish(arguments.source, arguments.key)
+
+
+if __name__ == '__main__':
+    main()
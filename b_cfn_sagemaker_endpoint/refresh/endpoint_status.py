@@ -0,0 +1,31 @@
+from aws_cdk.aws_events import Rule, EventPattern, IRuleTarget
+from aws_cdk.aws_sagemaker import CfnEndpoint
+from aws_cdk.core import Construct
+
+
+def create_endpoint_in_service_rule(scope: Construct, endpoint: CfnEndpoint, target: IRuleTarget) -> Rule:
+    """
+    Creates an EventBridge rule that sends SageMaker endpoint's state change events to the target,
+    once the endpoint is back in service.
+
+    :param scope: Construct scope.
+    :param endpoint: SageMaker endpoint resource.
+    :param target: Rule target, i.e. the refresh function or its intake queue.
+
+    :return: EventBridge rule.
+    """
+
+    return Rule(
+        scope=scope,
+        id='EndpointInServiceRule',
+        description='Sends SageMaker endpoint in service events to its refresh function.',
+        event_pattern=EventPattern(
+            source=['aws.sagemaker'],
+            detail_type=['SageMaker Endpoint State Change'],
+            detail={
+                'EndpointName': [endpoint.attr_endpoint_name],
+                'EndpointStatus': ['IN_SERVICE'],
+            }
+        ),
+        targets=[target]
+    )
@@ -1,9 +1,21 @@
 import os
+from typing import Optional
 
-from aws_cdk.aws_iam import PolicyStatement, Effect
-from aws_cdk.aws_lambda import Function, Runtime, Code
+from aws_cdk.aws_events_targets import SqsQueue
+from aws_cdk.aws_iam import Effect, PolicyStatement
+from aws_cdk.aws_lambda import Function, Code
+from aws_cdk.aws_lambda_event_sources import SqsEventSource
+from aws_cdk.aws_s3 import IBucket
 from aws_cdk.aws_sagemaker import CfnEndpoint, CfnEndpointConfig
-from aws_cdk.core import Construct, Stack, Duration
+from aws_cdk.aws_sqs import Queue, DeadLetterQueue
+from aws_cdk.aws_ssm import IStringParameter, ParameterTier, StringParameter
+from aws_cdk.core import ArnFormat, Construct, Duration, Stack
+
+from b_cfn_sagemaker_endpoint.event_intake import EventIntake
+from b_cfn_sagemaker_endpoint.refresh.endpoint_status import create_endpoint_in_service_rule
+from b_cfn_sagemaker_endpoint.refresh.settings import RefreshSettings
+from b_cfn_sagemaker_endpoint.refresh.state_machine import RefreshStateMachine
+from b_cfn_sagemaker_endpoint.refresh_function_props import RefreshFunctionProps
 
 
 class RefreshFunction(Function):
@@ -21,8 +33,12 @@ class RefreshFunction(Function):
     :param endpoint: SageMaker endpoint resource.
     :param endpoint_config_a: SageMaker endpoint configuration A resource. See README.
     :param endpoint_config_b: SageMaker endpoint configuration B resource. See README.
-    :param wait_time: Time to wait before endpoint is updated. It is useful to wait before
-        handling s3 bucket events as there can be multiple other in-flight events coming.
+    :param models_bucket: Source S3 bucket for models data.
+    :param settings: Endpoint refresh settings. See ``RefreshSettings``.
+    :param event_intake: Enables lossless, batched intake of bucket events via an SQS queue.
+        Bucket events must then be bound to ``intake_queue`` instead of the function itself.
+    :param function_props: Function's runtime, architecture and memory settings.
+    :param model_generation_parameter: SSM parameter, that the endpoint's model generation is published to.
     """
 
     from . import source
@@ -35,44 +51,22 @@ class RefreshFunction(Function):
             endpoint: CfnEndpoint,
             endpoint_config_a: CfnEndpointConfig,
             endpoint_config_b: CfnEndpointConfig,
-            wait_time: float
+            models_bucket: IBucket,
+            settings: RefreshSettings,
+            event_intake: EventIntake = None,
+            function_props: RefreshFunctionProps = None,
+            model_generation_parameter: IStringParameter = None
     ):
-        current_stack = Stack.of(scope)
-        region = current_stack.region
-        account = current_stack.account
-        endpoint_name = endpoint.attr_endpoint_name
-        endpoint_config_a_name = endpoint_config_a.attr_endpoint_config_name
-        endpoint_config_b_name = endpoint_config_b.attr_endpoint_config_name
+        function_props = function_props or RefreshFunctionProps()
         super().__init__(
             scope,
             id,
             code=Code.from_asset(self.SOURCE_PATH),
             handler='index.handler',
-            runtime=Runtime.PYTHON_3_8,
-            environment={
-                'WAIT_TIME': str(wait_time),
-                'SAGEMAKER_ENDPOINT_NAME': endpoint.endpoint_name,
-                'SAGEMAKER_ENDPOINT_CONFIG_A_NAME': endpoint_config_a_name,
-                'SAGEMAKER_ENDPOINT_CONFIG_B_NAME': endpoint_config_b_name,
-            },
+            runtime=function_props.runtime,
+            architecture=function_props.architecture,
+            memory_size=function_props.memory_size,
             function_name=id,
-            initial_policy=[
-                PolicyStatement(
-                    actions=[
-                        'sagemaker:DescribeEndpoint',
-                        'sagemaker:UpdateEndpoint',
-                        'sagemaker:CreateEndpointConfig',
-                        'sagemaker:DescribeEndpointConfig',
-                        'sagemaker:DeleteEndpointConfig',
-                    ],
-                    effect=Effect.ALLOW,
-                    resources=[
-                        f'arn:aws:sagemaker:{region}:{account}:endpoint/{endpoint_name}',
-                        f'arn:aws:sagemaker:{region}:{account}:endpoint-config/{endpoint_config_a_name}',
-                        f'arn:aws:sagemaker:{region}:{account}:endpoint-config/{endpoint_config_b_name}',
-                    ]
-                )
-            ],
             timeout=Duration.minutes(15),
             max_event_age=Duration.minutes(2),
             # This lambda function's concurrency must be limited to only single execution at a given
@@ -81,3 +75,139 @@ class RefreshFunction(Function):
             reserved_concurrent_executions=1,
             retry_attempts=0
         )
+
+        environment = settings.bind(self, self, endpoint, endpoint_config_a, endpoint_config_b, models_bucket)
+        for key, value in environment.items():
+            self.add_environment(key, value)
+
+        if settings.requires_state or event_intake:
+            state_parameter = StringParameter(
+                scope=self,
+                id='RefreshState',
+                description='SageMaker endpoint refresh state. Managed by the refresh function.',
+                string_value='{}',
+                # Intake sequencers, debounce, pending refresh and pinned generations share the state document.
+                tier=ParameterTier.ADVANCED
+            )
+            state_parameter.grant_read(self)
+            state_parameter.grant_write(self)
+            self.add_environment('REFRESH_STATE_PARAMETER_NAME', state_parameter.parameter_name)
+
+        if model_generation_parameter:
+            model_generation_parameter.grant_read(self)
+            model_generation_parameter.grant_write(self)
+            self.add_environment('MODEL_GENERATION_PARAMETER_NAME', model_generation_parameter.parameter_name)
+
+        self.__intake_queue: Optional[Queue] = None
+        self.__debounce_queue: Optional[Queue] = None
+        self.__state_machine: Optional[RefreshStateMachine] = None
+
+        if settings.debounce:
+            self.__enable_debounce()
+
+        if settings.state_machine:
+            self.__enable_state_machine(id)
+
+        if event_intake:
+            self.__enable_event_intake(event_intake)
+
+        # E.g. updates requested while the endpoint is busy are deferred until it is back in service. State
+        # change events are queued, since asynchronous invocations of this single concurrency function
+        # are dropped, once they are older than its maximum event age.
+        if settings.requires_endpoint_status or model_generation_parameter:
+            status_queue = self.__intake_queue or self.__debounce_queue or self.__create_status_queue()
+            create_endpoint_in_service_rule(scope=self, endpoint=endpoint, target=SqsQueue(status_queue))
+
+    @property
+    def intake_queue(self) -> Optional[Queue]:
+        """
+        Returns bucket events intake queue, if event intake is enabled.
+
+        :return: Intake queue.
+        """
+
+        return self.__intake_queue
+
+    @property
+    def state_machine(self) -> Optional[RefreshStateMachine]:
+        """
+        Returns refresh state machine, if Step Functions refresh orchestration is enabled.
+
+        :return: Refresh state machine.
+        """
+
+        return self.__state_machine
+
+    def __enable_state_machine(self, function_name: str) -> None:
+        state_machine_name = f'{function_name}StateMachine'
+        self.__state_machine = RefreshStateMachine(
+            scope=self,
+            id='RefreshStateMachine',
+            function=self,
+            state_machine_name=state_machine_name
+        )
+
+        # The state machine invokes this function, hence its ARN is composed from its name,
+        # instead of being referenced, to avoid a circular dependency.
+        current_stack = Stack.of(self)
+        state_machine_arn = current_stack.format_arn(
+            service='states',
+            resource='stateMachine',
+            resource_name=state_machine_name,
+            arn_format=ArnFormat.COLON_RESOURCE_NAME
+        )
+        self.add_to_role_policy(PolicyStatement(
+            actions=['states:StartExecution'],
+            effect=Effect.ALLOW,
+            resources=[state_machine_arn]
+        ))
+        self.add_environment('STATE_MACHINE_ARN', state_machine_arn)
+
+    def __enable_debounce(self) -> None:
+        # Queue visibility timeout must not be lower than the function's timeout.
+        debounce_queue = Queue(
+            scope=self,
+            id='DebounceQueue',
+            visibility_timeout=Duration.minutes(15)
+        )
+        debounce_queue.grant_send_messages(self)
+        self.add_event_source(SqsEventSource(debounce_queue))
+
+        self.add_environment('DEBOUNCE_QUEUE_URL', debounce_queue.queue_url)
+        self.__debounce_queue = debounce_queue
+
+    def __create_status_queue(self) -> Queue:
+        # Queue visibility timeout must not be lower than the function's timeout.
+        status_queue = Queue(
+            scope=self,
+            id='EndpointStatusQueue',
+            visibility_timeout=Duration.minutes(15)
+        )
+        self.add_event_source(SqsEventSource(status_queue))
+
+        return status_queue
+
+    def __enable_event_intake(self, event_intake: EventIntake) -> None:
+        dead_letter_queue = Queue(
+            scope=self,
+            id='IntakeDeadLetterQueue',
+            retention_period=event_intake.retention_period
+        )
+        # Queue visibility timeout must not be lower than the function's timeout.
+        self.__intake_queue = Queue(
+            scope=self,
+            id='IntakeQueue',
+            visibility_timeout=Duration.minutes(15),
+            retention_period=event_intake.retention_period,
+            dead_letter_queue=DeadLetterQueue(
+                max_receive_count=event_intake.max_receive_count,
+                queue=dead_letter_queue
+            )
+        )
+        self.add_event_source(SqsEventSource(
+            self.__intake_queue,
+            batch_size=event_intake.batch_size,
+            max_batching_window=event_intake.max_batching_window
+        ))
+
+        self.add_environment('EVENT_INTAKE_ENABLED', 'true')
@@ -0,0 +1,257 @@
+import json
+import re
+from typing import Iterable, Optional, Set, Tuple
+
+from aws_cdk.aws_events_targets import SqsQueue
+from aws_cdk.aws_iam import PolicyStatement, Effect
+from aws_cdk.aws_lambda import Function, Code
+from aws_cdk.aws_lambda_event_sources import SqsEventSource
+from aws_cdk.aws_s3 import IBucket
+from aws_cdk.aws_sagemaker import CfnEndpoint, CfnEndpointConfig
+from aws_cdk.aws_sqs import Queue, DeadLetterQueue
+from aws_cdk.aws_ssm import IStringParameter, ParameterTier, StringParameter
+from aws_cdk.core import ArnFormat, Construct, Stack, Duration
+
+from b_cfn_sagemaker_endpoint.bucket_event import BucketEvent
+from b_cfn_sagemaker_endpoint.event_intake import EventIntake
+from b_cfn_sagemaker_endpoint.refresh.endpoint_status import create_endpoint_in_service_rule
+from b_cfn_sagemaker_endpoint.refresh.function import RefreshFunction
+from b_cfn_sagemaker_endpoint.refresh.settings import RefreshSettings
+from b_cfn_sagemaker_endpoint.refresh_function_props import RefreshFunctionProps
+
+
+class RefreshRouter(Function):
+    """
+    Stack-scoped lambda function that handles update/refresh of many SageMaker model(-s) endpoints.
+
+    Instead of a dedicated ``RefreshFunction`` per endpoint, each endpoint registers its route: bucket
+    events rules, endpoint name, A & B configuration names and refresh settings, stored as a separate
+    SSM parameter under a common path. Bucket events of all endpoints are sent to a single intake queue.
+    The router matches them to routes and forwards them to a FIFO dispatch queue, grouped by endpoint.
+    Each dispatch message is handled by its own invocation, hence updates of a single endpoint are
+    serialized, while unrelated endpoints are refreshed by parallel invocations, each within its own
+    timeout. Use ``RefreshRouter.of()`` to get the stack's router.
+
+    :param scope: Construct scope.
+    :param id: Scoped id of the resource.
+    :param function_props: Function's runtime, architecture and memory settings.
+    """
+
+    ID = 'BSagemakerEndpointRefreshRouter'
+    ROUTES_PATH_PREFIX = '/b-sagemaker-endpoint-refresh'
+    # Maximum size (in bytes) of an advanced tier SSM parameter value, that holds a route.
+    MAX_ROUTE_SIZE = 8192
+    # Size (in bytes) reserved for each deploy-time value of a route, e.g. a resource name or URL.
+    ROUTE_TOKEN_SIZE = 128
+
+    def __init__(self, scope: Construct, id: str, function_props: RefreshFunctionProps = None):
+        self.__function_props = function_props or RefreshFunctionProps()
+        super().__init__(
+            scope,
+            id,
+            code=Code.from_asset(RefreshFunction.SOURCE_PATH),
+            handler='router.handler',
+            runtime=self.__function_props.runtime,
+            architecture=self.__function_props.architecture,
+            memory_size=self.__function_props.memory_size,
+            timeout=Duration.minutes(15),
+        )
+
+        self.__routes_path = f'{self.ROUTES_PATH_PREFIX}/{self.node.addr}/routes'
+        self.__bound_events: Set[Tuple[Optional[str], ...]] = set()
+
+        event_intake = EventIntake()
+
+        # Queues visibility timeouts must not be lower than the function's timeout.
+        self.__intake_queue = Queue(
+            scope=self,
+            id='IntakeQueue',
+            visibility_timeout=Duration.minutes(15),
+            retention_period=event_intake.retention_period,
+            dead_letter_queue=DeadLetterQueue(
+                max_receive_count=event_intake.max_receive_count,
+                queue=Queue(self, 'IntakeDeadLetterQueue', retention_period=event_intake.retention_period)
+            )
+        )
+        self.__dispatch_queue = Queue(
+            scope=self,
+            id='DispatchQueue',
+            fifo=True,
+            content_based_deduplication=True,
+            visibility_timeout=Duration.minutes(15),
+            retention_period=event_intake.retention_period,
+            dead_letter_queue=DeadLetterQueue(
+                max_receive_count=event_intake.max_receive_count,
+                queue=Queue(self, 'DispatchDeadLetterQueue', fifo=True, retention_period=event_intake.retention_period)
+            )
+        )
+        self.__intake_queue.grant_send_messages(self)
+        self.__dispatch_queue.grant_send_messages(self)
+        self.add_event_source(SqsEventSource(
+            self.__intake_queue,
+            batch_size=event_intake.batch_size,
+            max_batching_window=event_intake.max_batching_window
+        ))
+        # A single message per invocation fans endpoints out, since Lambda invokes FIFO
+        # message groups in parallel, while messages of each group are handled in order.
+        self.add_event_source(SqsEventSource(
+            self.__dispatch_queue,
+            batch_size=1,
+            report_batch_item_failures=True
+        ))
+
+        current_stack = Stack.of(self)
+        self.add_to_role_policy(PolicyStatement(
+            actions=['ssm:GetParametersByPath'],
+            effect=Effect.ALLOW,
+            resources=[
+                # Parameter paths start with "/", hence they are a part of the resource.
+                current_stack.format_arn(
+                    service='ssm',
+                    resource=f'parameter{self.__routes_path}',
+                    arn_format=ArnFormat.NO_RESOURCE_NAME
+                ),
+                current_stack.format_arn(
+                    service='ssm',
+                    resource=f'parameter{self.__routes_path}/*',
+                    arn_format=ArnFormat.NO_RESOURCE_NAME
+                ),
+            ]
+        ))
+
+        self.add_environment('ROUTES_PATH', self.__routes_path)
+        self.add_environment('DISPATCH_QUEUE_URL', self.__dispatch_queue.queue_url)
+
+    @classmethod
+    def of(cls, scope: Construct, function_props: RefreshFunctionProps = None) -> 'RefreshRouter':
+        """
+        Returns the stack's refresh router, creating it on the first call.
+
+        :param scope: Any construct of the stack.
+        :param function_props: Router function's runtime settings. All endpoints of the stack
+            must use the same settings, if any.
+
+        :return: Stack-scoped refresh router.
+        """
+
+        current_stack = Stack.of(scope)
+        router = current_stack.node.try_find_child(cls.ID)
+        if router is None:
+            return cls(current_stack, cls.ID, function_props)
+
+        if function_props and function_props != router.function_props:
+            raise ValueError('Refresh router function props must be identical for all endpoints of the stack.')
+
+        return router
+
+    @property
+    def function_props(self) -> RefreshFunctionProps:
+        return self.__function_props
+
+    @property
+    def intake_queue(self) -> Queue:
+        return self.__intake_queue
+
+    def register(
+            self,
+            scope: Construct,
+            endpoint: CfnEndpoint,
+            endpoint_config_a: CfnEndpointConfig,
+            endpoint_config_b: CfnEndpointConfig,
+            models_bucket: IBucket,
+            bucket_events: Iterable[BucketEvent],
+            settings: RefreshSettings,
+            model_generation_parameter: IStringParameter = None,
+            route_events: Iterable[BucketEvent] = None
+    ) -> None:
+        """
+        Registers an endpoint to be refreshed by the router.
+
+        Bucket events are always handled via the router's lossless intake, while refresh settings
+        have the same meaning as the ones of ``RefreshFunction``.
+
+        :param scope: Endpoint's construct scope. Route resources are created in it.
+        :param endpoint: SageMaker endpoint resource.
+        :param endpoint_config_a: SageMaker endpoint configuration A resource.
+        :param endpoint_config_b: SageMaker endpoint configuration B resource.
+        :param models_bucket: Source S3 bucket for models data.
+        :param bucket_events: Models data bucket events.
+        :param settings: Endpoint refresh settings.
+        :param model_generation_parameter: SSM parameter, that the endpoint's model generation is published to.
+        :param route_events: Bucket events, that the router matches to the endpoint, e.g. events of
+            exactly its model keys, while the broader ``bucket_events`` are shared by many endpoints.
+            Default is ``bucket_events``.
+
+        :return: No return.
+        """
+
+        route_id = scope.node.addr
+        bucket_events = list(bucket_events)
+        route_events = list(route_events) if route_events is not None else bucket_events
+
+        state_parameter = StringParameter(
+            scope=scope,
+            id='RefreshState',
+            description='SageMaker endpoint refresh state. Managed by the refresh router.',
+            string_value='{}',
+            # Intake sequencers, debounce, pending refresh and pinned generations share the state document.
+            # The router always deduplicates bucket events by their sequencers, hence it always keeps the state.
+            tier=ParameterTier.ADVANCED
+        )
+        state_parameter.grant_read(self)
+        state_parameter.grant_write(self)
+
+        route = {
+            'ROUTE_ID': route_id,
+            # Serialized as strings, since JSON serialization of the stack omits None values.
+            'ROUTE_RULES': [
+                {
+                    'bucket': models_bucket.bucket_name,
+                    'prefix': event.key_prefix or '',
+                    'suffix': event.key_suffix or '',
+                }
+                for event in route_events
+            ],
+            **settings.bind(scope, self, endpoint, endpoint_config_a, endpoint_config_b, models_bucket),
+            'REFRESH_STATE_PARAMETER_NAME': state_parameter.parameter_name,
+            'EVENT_INTAKE_ENABLED': 'true',
+        }
+
+        if model_generation_parameter:
+            model_generation_parameter.grant_read(self)
+            model_generation_parameter.grant_write(self)
+            route['MODEL_GENERATION_PARAMETER_NAME'] = model_generation_parameter.parameter_name
+
+        if settings.debounce:
+            # Debounce ticks are routed back to the endpoint via the intake queue.
+            route['DEBOUNCE_QUEUE_URL'] = self.__intake_queue.queue_url
+
+        if settings.requires_endpoint_status or model_generation_parameter:
+            # E.g. updates requested while the endpoint is busy are deferred until it is back in service.
+            create_endpoint_in_service_rule(scope=scope, endpoint=endpoint, target=SqsQueue(self.__intake_queue))
+
+        # Deploy-time values are unknown at synth, hence each of them is sized as the reserved maximum.
+        route_size = len(re.sub(r'\$\{Token\[[^\]]+\]\}', '-' * self.ROUTE_TOKEN_SIZE, json.dumps(route)).encode())
+        if route_size > self.MAX_ROUTE_SIZE:
+            raise ValueError(
+                f'Refresh route takes up to {route_size} bytes, while its SSM parameter is limited to '
+                f'{self.MAX_ROUTE_SIZE} bytes. Use fewer bucket events or refresh settings.'
+            )
+
+        StringParameter(
+            scope=scope,
+            id='RefreshRoute',
+            description='SageMaker endpoint refresh route. Read by the refresh router.',
+            parameter_name=f'{self.__routes_path}/{route_id}',
+            string_value=Stack.of(self).to_json_string(route),
+            # Routes of endpoints with many bucket events and refresh settings exceed the standard tier's 4 KB.
+            tier=ParameterTier.ADVANCED
+        )
+
+        for event in bucket_events:
+            # S3 rejects identical notification configurations, while the router
+            # dispatches each bucket event to every matching route anyway.
+            binding = (models_bucket.node.addr, str(event.event_type), event.key_prefix, event.key_suffix)
+            if binding not in self.__bound_events:
+                self.__bound_events.add(binding)
+                event.bind(models_bucket, self.__intake_queue)
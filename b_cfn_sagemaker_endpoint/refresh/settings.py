@@ -0,0 +1,418 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from aws_cdk.aws_iam import PolicyStatement, Effect
+from aws_cdk.aws_lambda import Function
+from aws_cdk.aws_s3 import IBucket
+from aws_cdk.aws_sagemaker import CfnEndpoint, CfnEndpointConfig
+from aws_cdk.aws_ssm import ParameterTier, StringParameter
+from aws_cdk.core import Construct, Stack
+
+from b_cfn_sagemaker_endpoint.artifact_validation import ArtifactValidation
+from b_cfn_sagemaker_endpoint.instance_recommendation import InstanceRecommendation
+from b_cfn_sagemaker_endpoint.invocation_payload import InvocationPayload
+from b_cfn_sagemaker_endpoint.latency_gate import LatencyGate
+from b_cfn_sagemaker_endpoint.model_props import ModelProps
+from b_cfn_sagemaker_endpoint.version_pinning import VersionPinning
+
+
+@dataclass(frozen=True)
+class RefreshSettings:
+    """
+    Endpoint refresh settings, shared by ``RefreshFunction`` and ``RefreshRouter``.
+
+    Settings are bound to the function that refreshes the endpoint as a mapping of environment
+    variable names to their values. See ``SagemakerEndpoint`` for detailed description of each.
+    Invocation payloads, that would exceed the function's 4 KB environment, are kept in an SSM
+    parameter instead, that the function reads.
+
+    Properties
+    ==========
+
+    ``wait_time``
+        Time to wait before endpoint is updated.
+    ``debounce``
+        Enables debounce mode.
+    ``manifest_key``
+        Enables manifest mode.
+    ``model_artifact_urls``
+        Enables skipping of no-op updates. S3 URLs of single model containers' artifacts, or
+        S3 URL prefixes, that end with "/", of uncompressed model data.
+    ``multi_model_data_urls``
+        S3 URL prefixes of multi-model containers' artifacts. New artifacts under these prefixes
+        are warmed up as target models, instead of updating the endpoint.
+    ``warm_up``
+        Enables post-update readiness and warm-up stage.
+    ``warm_up_payloads``
+        Synthetic invocation payloads used to warm up models.
+    ``state_machine``
+        Enables Step Functions refresh orchestration.
+    ``deployment_config``
+        Endpoint deployment configuration (``CfnEndpoint.DeploymentConfigProperty``), that every
+        endpoint update is started with, e.g. blue/green traffic shifting and auto-rollback alarms.
+    ``retain_variant_properties``
+        Retains current variant properties, e.g. auto scaled instance counts, on endpoint updates.
+    ``latency_gate``
+        Enables latency-gated promotion of new endpoint configurations.
+    ``instance_recommendation``
+        Enables instance type and count recommendation of new model artifacts.
+    ``version_pinning``
+        Enables immutable, version-pinned endpoint configurations per refresh.
+    ``artifact_validation``
+        Enables pre-flight validation of model artifacts.
+    ``models_props``
+        Models of endpoint configuration A, that version pinning clones and artifact validation checks.
+    ``defer_busy_updates``
+        Defers updates requested while the endpoint is busy until it is back in service.
+    ``track_uploads``
+        Tracks uploads until the endpoint serves them, e.g. for refresh monitoring.
+    """
+
+    # Maximum SQS message delay.
+    MAX_DEBOUNCE_WAIT_TIME = 900
+    # Maximum size (in bytes) of an advanced tier SSM parameter value, that holds invocation payloads.
+    MAX_PAYLOADS_SIZE = 8192
+
+    wait_time: float = 60
+    debounce: bool = False
+    manifest_key: Optional[str] = None
+    model_artifact_urls: Optional[List[str]] = None
+    multi_model_data_urls: Optional[List[str]] = None
+    warm_up: bool = False
+    warm_up_payloads: Optional[List[InvocationPayload]] = None
+    state_machine: bool = False
+    deployment_config: Optional[Any] = None
+    retain_variant_properties: bool = False
+    latency_gate: Optional[LatencyGate] = None
+    instance_recommendation: Optional[InstanceRecommendation] = None
+    version_pinning: Optional[VersionPinning] = None
+    artifact_validation: Optional[ArtifactValidation] = None
+    models_props: Optional[List[ModelProps]] = None
+    defer_busy_updates: bool = True
+    track_uploads: bool = False
+
+    def __post_init__(self):
+        if self.debounce and self.state_machine:
+            raise ValueError('Debounce mode can not be enabled together with the state machine, that debounces itself.')
+
+        if self.debounce and self.wait_time > self.MAX_DEBOUNCE_WAIT_TIME:
+            raise ValueError(f'Debounce wait time can not exceed {self.MAX_DEBOUNCE_WAIT_TIME} seconds.')
+
+    @property
+    def requires_state(self) -> bool:
+        """
+        Tells whether any of the settings keeps the refresh state across invocations. Event intake,
+        that is not a setting, keeps it as well.
+
+        :return: True, if the refresh state parameter is required.
+        """
+
+        return bool(
+            self.debounce
+            or self.state_machine
+            or self.warm_up
+            or self.model_artifact_urls is not None
+            or self.version_pinning
+            or self.defer_busy_updates
+            or self.track_uploads
+        )
+
+    @property
+    def requires_endpoint_status(self) -> bool:
+        """
+        Tells whether any of the settings handles endpoint state change events. Model generation
+        publishing, that is not a setting, handles them as well.
+
+        :return: True, if the endpoint's in service events must be sent to the refresh function.
+        """
+
+        # The refresh state machine warms the endpoint up by polling it, instead of state change events.
+        return self.defer_busy_updates or self.track_uploads or (self.warm_up and not self.state_machine)
+
+    def bind(
+            self,
+            scope: Construct,
+            function: Function,
+            endpoint: CfnEndpoint,
+            endpoint_config_a: CfnEndpointConfig,
+            endpoint_config_b: CfnEndpointConfig,
+            models_bucket: IBucket
+    ) -> Dict[str, str]:
+        """
+        Grants the function permissions required to refresh the endpoint.
+
+        :param scope: Construct scope of the endpoint's settings resources, e.g. its invocation payloads parameter.
+        :param function: Function that refreshes the endpoint.
+        :param endpoint: SageMaker endpoint resource.
+        :param endpoint_config_a: SageMaker endpoint configuration A resource.
+        :param endpoint_config_b: SageMaker endpoint configuration B resource.
+        :param models_bucket: Source S3 bucket for models data.
+
+        :return: Settings as a mapping of environment variable names to their values.
+        """
+
+        current_stack = Stack.of(function)
+        partition = current_stack.partition
+
+        def sagemaker_arn(resource: str, resource_name: str) -> str:
+            return current_stack.format_arn(service='sagemaker', resource=resource, resource_name=resource_name)
+
+        endpoint_name = endpoint.attr_endpoint_name
+        endpoint_config_a_name = endpoint_config_a.attr_endpoint_config_name
+        endpoint_config_b_name = endpoint_config_b.attr_endpoint_config_name
+        endpoint_arn = sagemaker_arn('endpoint', endpoint_name)
+
+        function.add_to_role_policy(PolicyStatement(
+            actions=[
+                'sagemaker:DescribeEndpoint',
+                'sagemaker:UpdateEndpoint',
+                'sagemaker:CreateEndpointConfig',
+                'sagemaker:DescribeEndpointConfig',
+                'sagemaker:DeleteEndpointConfig',
+            ],
+            effect=Effect.ALLOW,
+            resources=[
+                endpoint_arn,
+                sagemaker_arn('endpoint-config', endpoint_config_a_name),
+                sagemaker_arn('endpoint-config', endpoint_config_b_name),
+            ]
+        ))
+
+        environment = {
+            'WAIT_TIME': str(self.wait_time),
+            'SAGEMAKER_ENDPOINT_NAME': endpoint.endpoint_name,
+            'SAGEMAKER_ENDPOINT_CONFIG_A_NAME': endpoint_config_a_name,
+            'SAGEMAKER_ENDPOINT_CONFIG_B_NAME': endpoint_config_b_name,
+        }
+
+        if self.manifest_key:
+            models_bucket.grant_read(function)
+            environment['MANIFEST_BUCKET_NAME'] = models_bucket.bucket_name
+            environment['MANIFEST_KEY'] = self.manifest_key
+
+        if self.model_artifact_urls is not None:
+            archive_urls = [url for url in self.model_artifact_urls if not url.endswith('/')]
+            if archive_urls:
+                function.add_to_role_policy(PolicyStatement(
+                    actions=['s3:GetObject', 's3:GetObjectVersion'],
+                    effect=Effect.ALLOW,
+                    resources=[url.replace('s3://', f'arn:{partition}:s3:::', 1) for url in archive_urls]
+                ))
+            prefix_urls = [url for url in self.model_artifact_urls if url.endswith('/')]
+            if prefix_urls:
+                # Uncompressed model data is versioned by its objects listing.
+                function.add_to_role_policy(PolicyStatement(
+                    actions=['s3:ListBucket'],
+                    effect=Effect.ALLOW,
+                    resources=list(dict.fromkeys(
+                        f'arn:{partition}:s3:::{url.replace("s3://", "", 1).partition("/")[0]}' for url in prefix_urls
+                    ))
+                ))
+            environment['MODEL_ARTIFACT_URLS'] = current_stack.to_json_string(self.model_artifact_urls)
+
+        if self.multi_model_data_urls:
+            environment['MULTI_MODEL_DATA_URLS'] = current_stack.to_json_string(self.multi_model_data_urls)
+
+        if self.multi_model_data_urls or self.warm_up:
+            function.add_to_role_policy(PolicyStatement(
+                actions=['sagemaker:InvokeEndpoint'],
+                effect=Effect.ALLOW,
+                resources=[endpoint_arn]
+            ))
+
+        if self.warm_up:
+            environment['WARM_UP_ENABLED'] = 'true'
+
+        payloads = self.__invocation_payloads()
+        if payloads:
+            payloads_parameter = StringParameter(
+                scope=scope,
+                id='InvocationPayloads',
+                description='SageMaker endpoint invocation payloads. Read by the refresh function.',
+                string_value=payloads,
+                tier=ParameterTier.ADVANCED
+            )
+            payloads_parameter.grant_read(function)
+            environment['INVOCATION_PAYLOADS_PARAMETER_NAME'] = payloads_parameter.parameter_name
+
+        if self.deployment_config:
+            # Auto-rollback alarms are described by SageMaker on behalf of the caller.
+            function.add_to_role_policy(PolicyStatement(
+                actions=['cloudwatch:DescribeAlarms'],
+                effect=Effect.ALLOW,
+                resources=['*']
+            ))
+            environment['DEPLOYMENT_CONFIG'] = current_stack.to_json_string(self.deployment_config)
+
+        if self.retain_variant_properties:
+            environment['RETAIN_VARIANT_PROPERTIES'] = 'true'
+
+        if self.defer_busy_updates:
+            environment['DEFER_BUSY_UPDATES'] = 'true'
+
+        if self.latency_gate:
+            staging_endpoint_name = f'{endpoint_name}-staging'
+            staging_endpoint_arn = sagemaker_arn('endpoint', staging_endpoint_name)
+            function.add_to_role_policy(PolicyStatement(
+                actions=[
+                    'sagemaker:CreateEndpoint',
+                    'sagemaker:DescribeEndpoint',
+                    'sagemaker:DeleteEndpoint',
+                ],
+                effect=Effect.ALLOW,
+                resources=[
+                    staging_endpoint_arn,
+                    sagemaker_arn('endpoint-config', endpoint_config_a_name),
+                    sagemaker_arn('endpoint-config', endpoint_config_b_name),
+                ]
+            ))
+            function.add_to_role_policy(PolicyStatement(
+                actions=['sagemaker:InvokeEndpoint'],
+                effect=Effect.ALLOW,
+                resources=[staging_endpoint_arn]
+            ))
+            environment['LATENCY_GATE'] = current_stack.to_json_string(
+                # Payloads are read from the invocation payloads parameter.
+                {**self.latency_gate.to_settings(staging_endpoint_name), 'payloads': None}
+            )
+
+        if self.instance_recommendation:
+            # Each candidate is served by an endpoint and an endpoint configuration of the same name,
+            # while applied recommendations are endpoint configurations, that the endpoint is updated to.
+            name_prefix = f'{endpoint_name}-rec-'
+            function.add_to_role_policy(PolicyStatement(
+                actions=[
+                    'sagemaker:CreateEndpointConfig',
+                    'sagemaker:DeleteEndpointConfig',
+                    'sagemaker:CreateEndpoint',
+                    'sagemaker:DescribeEndpoint',
+                    'sagemaker:DeleteEndpoint',
+                    'sagemaker:InvokeEndpoint',
+                    *(['sagemaker:UpdateEndpoint'] if self.instance_recommendation.apply else []),
+                ],
+                effect=Effect.ALLOW,
+                resources=[
+                    sagemaker_arn('endpoint', f'{name_prefix}*'),
+                    sagemaker_arn('endpoint-config', f'{name_prefix}*'),
+                ]
+            ))
+            models_bucket.grant_read_write(function, f'{self.instance_recommendation.prefix}*')
+            environment['INSTANCE_RECOMMENDATION'] = current_stack.to_json_string(
+                # Payloads are read from the invocation payloads parameter.
+                {**self.instance_recommendation.to_settings(name_prefix, models_bucket.bucket_name), 'payloads': None}
+            )
+
+        if self.version_pinning:
+            # Each generation's endpoint configuration and models are named after it.
+            name_prefix = f'{endpoint_name}-v'
+            function.add_to_role_policy(PolicyStatement(
+                actions=['sagemaker:DescribeModel'],
+                effect=Effect.ALLOW,
+                resources=[
+                    sagemaker_arn('model', props.model_name)
+                    for props in self.models_props or []
+                ]
+            ))
+            function.add_to_role_policy(PolicyStatement(
+                actions=[
+                    'sagemaker:CreateModel',
+                    'sagemaker:DeleteModel',
+                    'sagemaker:CreateEndpointConfig',
+                    'sagemaker:DescribeEndpointConfig',
+                    'sagemaker:DeleteEndpointConfig',
+                    'sagemaker:CreateEndpoint',
+                    'sagemaker:UpdateEndpoint',
+                ],
+                effect=Effect.ALLOW,
+                resources=[
+                    sagemaker_arn('model', f'{name_prefix}*'),
+                    sagemaker_arn('endpoint-config', f'{name_prefix}*'),
+                ]
+            ))
+            execution_role_arns = [props.props.execution_role_arn for props in self.models_props or []]
+            if execution_role_arns:
+                function.add_to_role_policy(PolicyStatement(
+                    actions=['iam:PassRole'],
+                    effect=Effect.ALLOW,
+                    resources=list(dict.fromkeys(execution_role_arns)),
+                    conditions={'StringEquals': {'iam:PassedToService': 'sagemaker.amazonaws.com'}}
+                ))
+            source_urls = [url for props in self.models_props or [] for url in props.model_data_urls]
+            if source_urls:
+                # Exact versions of model artifacts are copied, including their tags.
+                function.add_to_role_policy(PolicyStatement(
+                    actions=[
+                        's3:GetObject',
+                        's3:GetObjectVersion',
+                        's3:GetObjectTagging',
+                        's3:GetObjectVersionTagging',
+                        's3:ListBucket',
+                    ],
+                    effect=Effect.ALLOW,
+                    resources=list(dict.fromkeys(
+                        resource
+                        for url in source_urls
+                        for resource in (
+                            f'arn:{partition}:s3:::{url.replace("s3://", "", 1).partition("/")[0]}',
+                            url.replace('s3://', f'arn:{partition}:s3:::', 1) + ('*' if url.endswith('/') else ''),
+                        )
+                    ))
+                ))
+            models_bucket.grant_read_write(function, f'{self.version_pinning.prefix}*')
+            environment['VERSION_PINNING'] = current_stack.to_json_string(
+                self.version_pinning.to_settings(name_prefix, models_bucket.bucket_name)
+            )
+
+        if self.artifact_validation:
+            validated_urls = [url for props in self.models_props or [] for url in props.model_data_urls]
+            if validated_urls:
+                # Archives are streamed, while entries of uncompressed model data are read one by one.
+                function.add_to_role_policy(PolicyStatement(
+                    actions=['s3:GetObject'],
+                    effect=Effect.ALLOW,
+                    resources=list(dict.fromkeys(
+                        url.replace('s3://', f'arn:{partition}:s3:::', 1) + ('*' if url.endswith('/') else '')
+                        for url in validated_urls
+                    ))
+                ))
+            environment['ARTIFACT_VALIDATION'] = current_stack.to_json_string(
+                self.artifact_validation.to_settings(self.models_props or [])
+            )
+
+        return environment
+
+    def __invocation_payloads(self) -> Optional[str]:
+        """
+        Serializes invocation payloads of the warm-up, the latency gate and the instance recommendation.
+        Identical payload lists are stored once, e.g. if the latency gate replays the warm-up payloads.
+
+        :return: Payloads document, that maps each of them to its index in ``sets``, or None, if none has payloads.
+        """
+
+        owners = {
+            'warm_up': self.warm_up_payloads,
+            'latency_gate': self.latency_gate.payloads if self.latency_gate else None,
+            'instance_recommendation': self.instance_recommendation.payloads if self.instance_recommendation else None,
+        }
+        sets: List[List[Dict[str, Any]]] = []
+        document: Dict[str, Any] = {'sets': sets}
+        for owner, payloads in owners.items():
+            if payloads:
+                payload_set = [payload.to_dict() for payload in payloads]
+                if payload_set not in sets:
+                    sets.append(payload_set)
+                document[owner] = sets.index(payload_set)
+
+        if not sets:
+            return None
+
+        serialized = json.dumps(document)
+        size = len(serialized.encode())
+        if size > self.MAX_PAYLOADS_SIZE:
+            raise ValueError(
+                f'Invocation payloads take {size} bytes, while their SSM parameter is limited to '
+                f'{self.MAX_PAYLOADS_SIZE} bytes. Use fewer or smaller payloads.'
+            )
+
+        return serialized
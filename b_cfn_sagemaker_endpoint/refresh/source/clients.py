@@ -0,0 +1,23 @@
+from typing import Any, Dict
+
+CLIENTS: Dict[str, Any] = {}
+
+
+def get(service_name: str) -> Any:
+    """
+    Returns a ``boto3`` client of the service, created once per lambda container.
+
+    ``boto3`` itself is imported lazily, on the first client creation, so that modes and handlers
+    that do not call a service do not pay for loading its client.
+
+    :param service_name: AWS service name, e.g. ``sagemaker``.
+
+    :return: ``boto3`` client.
+    """
+
+    client = CLIENTS.get(service_name)
+    if client is None:
+        import boto3
+        client = CLIENTS[service_name] = boto3.client(service_name)
+
+    return client
@@ -0,0 +1,96 @@
+import json
+import math
+import time
+from typing import Any, Callable, Dict, Optional
+
+from state import StateStore
+
+
+class Debouncer:
+    """
+    Debounces endpoint refresh requests without blocking the caller.
+
+    Each pushed request moves a single pending refresh deadline to ``now + wait_time``
+    and schedules a tick message, delayed by ``wait_time``, that carries this deadline.
+    When a tick is delivered, the refresh fires only if the tick carries the latest
+    deadline, i.e. no other request was pushed after it. Therefore, a burst of requests
+    results in a single refresh, started once the quiet period after the last request ends.
+
+    :param state_store: Refresh state store.
+    :param sqs_client: ``boto3`` SQS client.
+    :param queue_url: URL of the queue that delivers delayed tick messages.
+    :param wait_time: Quiet period (in seconds) before the refresh is fired.
+    :param clock: Function that returns current time in seconds.
+    :param tick_fields: Additional fields of tick messages.
+    """
+
+    # Maximum SQS message delay.
+    MAX_WAIT_TIME = 900
+
+    def __init__(
+            self,
+            state_store: StateStore,
+            sqs_client: Any,
+            queue_url: str,
+            wait_time: float,
+            clock: Callable[[], float] = time.time,
+            tick_fields: Optional[Dict[str, Any]] = None
+    ):
+        if wait_time > self.MAX_WAIT_TIME:
+            raise ValueError(f'Debounce wait time can not exceed {self.MAX_WAIT_TIME} seconds.')
+
+        self.__state_store = state_store
+        self.__sqs_client = sqs_client
+        self.__queue_url = queue_url
+        self.__wait_time = wait_time
+        self.__clock = clock
+        self.__tick_fields = tick_fields or {}
+
+    def push(self) -> float:
+        """
+        Pushes back the pending refresh deadline and schedules its tick.
+
+        :return: New pending refresh deadline.
+        """
+
+        deadline = self.__clock() + self.__wait_time
+
+        state = self.__state_store.load()
+        state['deadline'] = deadline
+        self.__state_store.save(state)
+
+        self.__sqs_client.send_message(
+            QueueUrl=self.__queue_url,
+            MessageBody=json.dumps({**self.__tick_fields, 'deadline': deadline}),
+            DelaySeconds=math.ceil(self.__wait_time)
+        )
+        print(f'Refresh deadline pushed back to {deadline}.')
+
+        return deadline
+
+    def tick(self, deadline: float, fire: Callable[[], Any]) -> bool:
+        """
+        Handles a delivered tick message.
+
+        The pending deadline is cleared only after ``fire`` succeeds, so a failed refresh
+        is retried with the redelivered tick.
+
+        :param deadline: Deadline carried by the tick message.
+        :param fire: Function that performs the refresh.
+
+        :return: True if the refresh was fired, False if the tick is stale.
+        """
+
+        state = self.__state_store.load()
+        if state.get('deadline') != deadline:
+            print(f'Skipping stale tick of deadline {deadline}.')
+            return False
+
+        fire()
+
+        state = self.__state_store.load()
+        if state.get('deadline') == deadline:
+            state['deadline'] = None
+            self.__state_store.save(state)
+
+        return True
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from state import StateStore
+
+UPDATING = 'UPDATING'
+IN_SERVICE = 'IN_SERVICE'
+
+
+class ModelGeneration:
+    """
+    Publishes the model generation of the endpoint, read by clients' response caches.
+
+    The generation is a monotonically increasing number, advanced on every A/B configuration swap,
+    together with the endpoint configuration name and a fingerprint of model artifact versions it
+    was swapped to. While the endpoint is being updated, it serves either model, hence the generation
+    is published as ``UPDATING`` and responses must not be cached. Once the endpoint is back in
+    service with the new configuration, the generation is published as ``IN_SERVICE``. If the update
+    was rolled back instead, the generation is advanced once more, since the served model is not the
+    one of the previous generation either. Uploads of target models of multi-model containers, that
+    are served without an endpoint update, advance the generation in place as well.
+
+    Status of an ``UPDATING`` generation is reconciled with the endpoint on every refresh function
+    invocation, hence a lost or late state change event can not keep responses uncached.
+
+    :param state_store: Store of the model generation document.
+    """
+
+    def __init__(self, state_store: StateStore):
+        self.__state_store = state_store
+
+    def advance(self, endpoint_config_name: str, versions: Optional[Dict[str, Optional[str]]] = None) -> int:
+        """
+        Advances the generation once the endpoint started being updated.
+
+        :param endpoint_config_name: Name of the endpoint configuration the endpoint is being updated to.
+        :param versions: Versions of model artifacts, if skipping of no-op updates is enabled.
+
+        :return: New generation.
+        """
+
+        artifacts = None
+        if versions is not None:
+            artifacts = hashlib.sha256(json.dumps(versions, sort_keys=True).encode()).hexdigest()
+
+        generation = self.__save(self.__state_store.load(), endpoint_config_name, UPDATING, artifacts)
+        print(f'Model generation advanced to {generation}.')
+
+        return generation
+
+    def advance_in_place(self) -> int:
+        """
+        Advances the generation without an endpoint update, e.g. once target models are uploaded.
+
+        :return: New generation.
+        """
+
+        document = self.__state_store.load()
+        generation = self.__save(
+            document,
+            document.get('endpoint_config_name'),
+            document.get('status', IN_SERVICE),
+            document.get('artifacts')
+        )
+        print(f'Model generation advanced in place to {generation}.')
+
+        return generation
+
+    def is_updating(self) -> bool:
+        """
+        Tells whether the generation is published as ``UPDATING``, i.e. waits for the endpoint.
+
+        :return: Whether the generation is updating.
+        """
+
+        return self.__state_store.load().get('status', IN_SERVICE) == UPDATING
+
+    def in_service(self, endpoint_description: Dict[str, Any]) -> None:
+        """
+        Publishes the generation as ``IN_SERVICE`` once the endpoint update is finished.
+
+        :param endpoint_description: Response of ``describe_endpoint()``.
+
+        :return: No return.
+        """
+
+        if endpoint_description['EndpointStatus'] != 'InService':
+            return
+
+        document = self.__state_store.load()
+        if document.get('status', IN_SERVICE) == IN_SERVICE:
+            return
+
+        endpoint_config_name = endpoint_description['EndpointConfigName']
+        if document.get('endpoint_config_name') == endpoint_config_name:
+            document.update(status=IN_SERVICE, updated_at=time.time())
+            self.__state_store.save(document)
+            print(f'Model generation {document["generation"]} is in service.')
+            return
+
+        generation = self.__save(document, endpoint_config_name, IN_SERVICE, None)
+        print(f'Endpoint update was rolled back, model generation advanced to {generation}.')
+
+    def __save(
+            self,
+            document: Dict[str, Any],
+            endpoint_config_name: Optional[str],
+            status: str,
+            artifacts: Optional[str]
+    ) -> int:
+        generation = document.get('generation', 0) + 1
+        self.__state_store.save({
+            'generation': generation,
+            'endpoint_config_name': endpoint_config_name,
+            'artifacts': artifacts,
+            'status': status,
+            'updated_at': time.time(),
+        })
+
+        return generation
@@ -1,49 +1,230 @@
 import json
 import os
 import time
-from typing import Any, Dict
-
-import boto3
-
-
-def handler(event: Dict[str, Any], context: Any) -> None:
-    print(f'S3 event received: {json.dumps(event)}')
-
-    wait_time = float(os.environ['WAIT_TIME'])
-    endpoint_name = os.environ['SAGEMAKER_ENDPOINT_NAME']
-    endpoint_config_a_name = os.environ['SAGEMAKER_ENDPOINT_CONFIG_A_NAME']
-    endpoint_config_b_name = os.environ['SAGEMAKER_ENDPOINT_CONFIG_B_NAME']
-    print(
-        'Using the following environment variables: '
-        f'{wait_time=} '
-        f'{endpoint_name=} '
-        f'{endpoint_config_a_name=} '
-        f'{endpoint_config_b_name=} '
-    )
-
-    # Wait for any other bucket objects to be uploaded.
-    # NOTE: Waiting here until all files are uploaded to s3 bucket is necessary before
-    #   calling ``update_endpoint()`` function. Since multiple files will not be uploaded
-    #   to the bucket at the same time. Therefore, premature ``update_endpoint`` call
-    #   might fail to pull all the required files from s3.
-    print('Waiting on standby...')
-    time.sleep(wait_time)
-
-    sagemaker_client = boto3.client('sagemaker')
-
-    endpoint_description = sagemaker_client.describe_endpoint(EndpointName=endpoint_name)
-    active_endpoint_config_name = endpoint_description['EndpointConfigName']
-    print(f'Currently active endpoint configuration name: "{active_endpoint_config_name}"')
-    # Handles A & B endpoint configurations names swapping. See ``RefreshFunction`` docs
-    # or README for more information about it.
-    new_endpoint_config_name = {
-        endpoint_config_a_name: endpoint_config_b_name,
-        endpoint_config_b_name: endpoint_config_a_name,
-    }[active_endpoint_config_name]
-
-    sagemaker_client.update_endpoint(
-        EndpointName=endpoint_name,
-        EndpointConfigName=new_endpoint_config_name,
-        RetainAllVariantProperties=False
-    )
-    print(f'Endpoint started being updated to a new endpoint configuration: "{new_endpoint_config_name}"')
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+import clients
+from intake import IntakeFilter, unwrap_records
+from metrics import Metrics, UploadTracker, event_time
+from pending import PendingRefresh
+from pipeline import RefreshComponents, RefreshPipeline
+from target import RefreshTarget
+
+if TYPE_CHECKING:
+    from debounce import Debouncer
+    from orchestration import RefreshExecutions
+
+# Settings are read from the environment once per lambda container.
+TARGET: Optional[RefreshTarget] = None
+
+
+def handler(event: Dict[str, Any], context: Any) -> Optional[Dict[str, Any]]:
+    print(f'Event received: {json.dumps(event)}')
+
+    global TARGET
+    if TARGET is None:
+        TARGET = RefreshTarget.from_environment(os.environ).with_invocation_payloads(clients.get('ssm'))
+
+    if 'step' in event:
+        # Refresh state machine steps. See ``RefreshStateMachine``.
+        from orchestration import run_step
+        return run_step(TARGET, event['step'], event['execution'])
+
+    # Endpoint state change events are delivered by EventBridge directly, without records.
+    s3_records, ticks = unwrap_records(event.get('Records', [event] if 'detail-type' in event else []))
+    process(TARGET, s3_records, ticks)
+    return None
+
+
+def process(target: RefreshTarget, s3_records: List[Dict[str, Any]], ticks: List[Dict[str, Any]]) -> None:
+    """
+    Handles S3 bucket event records and debounce ticks of a single endpoint.
+
+    :param target: Refreshed endpoint's settings.
+    :param s3_records: S3 bucket event records.
+    :param ticks: Debounce and endpoint status tick messages.
+
+    :return: No return.
+    """
+
+    print(f'Using the following settings: {target}')
+
+    metrics = Metrics(target.endpoint_name)
+    try:
+        process_with_metrics(target, s3_records, ticks, metrics)
+    except Exception:
+        metrics.put('RefreshFailures', 1, 'Count')
+        raise
+    finally:
+        metrics.flush()
+
+
+def process_with_metrics(
+        target: RefreshTarget,
+        s3_records: List[Dict[str, Any]],
+        ticks: List[Dict[str, Any]],
+        metrics: Metrics
+) -> None:
+    """
+    Handles S3 bucket event records and ticks of a single endpoint, collecting refresh pipeline metrics.
+
+    :param target: Refreshed endpoint's settings.
+    :param s3_records: S3 bucket event records.
+    :param ticks: Debounce and endpoint status tick messages.
+    :param metrics: Refresh pipeline metrics.
+
+    :return: No return.
+    """
+
+    components = RefreshComponents.from_target(target)
+    sagemaker_client = components.sagemaker_client
+    state_store = components.state_store
+    pending_refresh = PendingRefresh(state_store) if target.defer_busy_updates else None
+    upload_tracker = UploadTracker(state_store) if state_store else None
+    pipeline = RefreshPipeline(target, components, metrics)
+    manifest_gate = components.manifest_gate
+    model_generation = components.model_generation
+    pending_warm_up = components.pending_warm_up
+    version_pinner = components.version_pinner
+
+    refresh_executions: Optional['RefreshExecutions'] = None
+    if target.state_machine_arn:
+        from orchestration import RefreshExecutions
+        refresh_executions = RefreshExecutions(state_store, clients.get('stepfunctions'), target.state_machine_arn)
+
+    def put_upload_to_in_service(in_service_at: float) -> None:
+        uploaded_at = upload_tracker.in_service() if upload_tracker else None
+        if uploaded_at is not None:
+            metrics.put('UploadToInService', (in_service_at - uploaded_at) * 1000)
+
+    def refresh() -> None:
+        plan = pipeline.resolve()
+        if plan:
+            pipeline.update(plan)
+
+    status_ticks = [tick for tick in ticks if 'endpoint_status' in tick]
+    ticks = [tick for tick in ticks if 'deadline' in tick]
+
+    if version_pinner:
+        # Pinned copies are written to the models bucket by the refresh itself.
+        s3_records = [record for record in s3_records if not version_pinner.is_pinned_copy(record)]
+
+    intake_filter = IntakeFilter(state_store) if target.event_intake_enabled else None
+    if intake_filter:
+        # Records of a single batch are coalesced into a single refresh decision.
+        s3_records = intake_filter.new_records(s3_records)
+
+    received_at = time.time()
+    for record in s3_records:
+        if record.get('eventTime'):
+            metrics.put('EventAge', (received_at - event_time(record)) * 1000)
+
+    # Records that require an endpoint update.
+    update_records = s3_records
+    if target.multi_model_data_urls:
+        from multi_model import MultiModelWarmer
+        warmer = MultiModelWarmer(
+            clients.get('sagemaker-runtime'),
+            target.endpoint_name,
+            target.multi_model_data_urls,
+            target.warm_up_payloads
+        )
+        # New target models of multi-model containers are loaded on invocation, without an endpoint update.
+        target_models, update_records = warmer.split(s3_records)
+        warmer.warm(target_models)
+        if target_models and model_generation:
+            # Served target models may have changed, e.g. by an overwrite, hence cached responses are not reused.
+            model_generation.advance_in_place()
+
+    if upload_tracker:
+        upload_tracker.received(update_records)
+
+    if refresh_executions:
+        if update_records:
+            # The state machine waits and updates the endpoint. In manifest mode it waits for
+            # every listed object instead of a fixed delay, in version pinning mode it does not wait.
+            refresh_executions.start(0 if manifest_gate or version_pinner else target.wait_time)
+    elif target.debounce_queue_url:
+        from debounce import Debouncer
+        debouncer = Debouncer(
+            state_store=state_store,
+            sqs_client=clients.get('sqs'),
+            queue_url=target.debounce_queue_url,
+            wait_time=target.wait_time,
+            # In shared refresh router mode ticks are routed back to the endpoint by its route id.
+            tick_fields={'route': target.route_id} if target.route_id else None
+        )
+        handle_debounced(update_records, ticks, debouncer, refresh)
+    elif update_records and manifest_gate:
+        # Endpoint is updated as soon as every object listed in the manifest is present.
+        refresh()
+    elif update_records and version_pinner:
+        # Artifacts are copied to immutable keys before the update, hence overwrites can not race it.
+        refresh()
+    elif update_records:
+        # Wait for any other bucket objects to be uploaded.
+        # NOTE: Waiting here until all files are uploaded to s3 bucket is necessary before
+        #   calling ``update_endpoint()`` function. Since multiple files will not be uploaded
+        #   to the bucket at the same time. Therefore, premature ``update_endpoint`` call
+        #   might fail to pull all the required files from s3.
+        print('Waiting on standby...')
+        time.sleep(target.wait_time)
+        refresh()
+
+    in_service_ticks = [tick for tick in status_ticks if tick['endpoint_status'] == 'IN_SERVICE']
+    for tick in in_service_ticks:
+        put_upload_to_in_service(event_time(tick) if tick.get('time') else time.time())
+
+    description = None
+    if (in_service_ticks and pending_warm_up) or (model_generation and model_generation.is_updating()):
+        # Ticks may be late or lost, hence the endpoint's actual configuration is checked.
+        description = sagemaker_client.describe_endpoint(EndpointName=target.endpoint_name)
+
+    if description and model_generation:
+        model_generation.in_service(description)
+
+    if description and pending_warm_up and description['EndpointStatus'] == 'InService':
+        if pending_warm_up.endpoint_config_name():
+            # Cleared first, since warm-up is best effort and must not block a deferred refresh.
+            pending_warm_up.clear()
+            for variant_latencies in components.endpoint_warmer.warm(description).values():
+                for latency in variant_latencies:
+                    metrics.put('WarmUpLatency', latency * 1000)
+
+    if in_service_ticks and pending_refresh and pending_refresh.is_pending():
+        print('Endpoint is back in service, starting the deferred refresh.')
+        if refresh_executions:
+            refresh_executions.start(0)
+        else:
+            refresh()
+
+    if intake_filter and s3_records:
+        intake_filter.commit(s3_records)
+
+
+def handle_debounced(
+        s3_records: List[Dict[str, Any]],
+        ticks: List[Dict[str, Any]],
+        debouncer: 'Debouncer',
+        refresh: Callable[[], Any]
+) -> None:
+    """
+    Handles both S3 bucket event records and delayed debounce ticks.
+
+    S3 bucket event records push back the pending refresh deadline, while debounce ticks (delivered
+    via SQS) fire the refresh once the quiet period after the last bucket event ends.
+
+    :param s3_records: S3 bucket event records.
+    :param ticks: Debounce tick messages.
+    :param debouncer: Refresh requests debouncer.
+    :param refresh: Function that refreshes the endpoint.
+
+    :return: No return.
+    """
+
+    if s3_records:
+        debouncer.push()
+
+    for tick in ticks:
+        debouncer.tick(tick['deadline'], refresh)
+
@@ -0,0 +1,161 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from state import StateStore
+
+ENDPOINT_STATE_CHANGE = 'SageMaker Endpoint State Change'
+
+
+def unwrap_records(records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Splits lambda event records into S3 bucket event records and ticks.
+
+    S3 bucket events are either delivered directly or wrapped into SQS messages of the intake queue.
+    Ticks are either delayed debounce ticks, that carry a ``deadline``, or endpoint status ticks,
+    that carry an ``endpoint_status`` of a SageMaker endpoint state change event.
+
+    :param records: Lambda event records.
+
+    :return: Tuple of S3 event records and tick messages.
+    """
+
+    s3_records = []
+    ticks = []
+    for record in records:
+        body = json.loads(record['body']) if record.get('eventSource') == 'aws:sqs' else record
+        if body.get('detail-type') == ENDPOINT_STATE_CHANGE:
+            ticks.append({
+                'endpoint_name': body['detail']['EndpointName'],
+                'endpoint_status': body['detail']['EndpointStatus'],
+                'time': body.get('time'),
+            })
+        elif 'deadline' in body:
+            ticks.append(body)
+        elif body is record:
+            s3_records.append(record)
+        else:
+            # S3 test events, sent when notifications are configured, have no records.
+            s3_records.extend(body.get('Records', []))
+
+    return s3_records, ticks
+
+
+def is_later_sequencer(sequencer: str, other: Optional[str]) -> bool:
+    """
+    Tells whether an S3 event sequencer reports a later event of the same object than the other one.
+
+    Sequencers differ in length and are not numbers: the shorter one is right-padded with zeros,
+    and then both are compared as strings, e.g. "0056" is later than "00551".
+
+    :param sequencer: S3 event sequencer.
+    :param other: Other S3 event sequencer of the same object, if any.
+
+    :return: True, if the sequencer is later than the other one, or there is no other one.
+    """
+
+    if not other:
+        return True
+
+    length = max(len(sequencer), len(other))
+    return sequencer.ljust(length, '0') > other.ljust(length, '0')
+
+
+# Size (in bytes) of the state document left for other refresh state, e.g. upload tracking and debounce.
+STATE_HEADROOM = 1024
+
+
+class IntakeFilter:
+    """
+    Drops S3 bucket event records that were already handled.
+
+    Delivery via the intake queue is at-least-once, hence the same record can be received more
+    than once. Every object key's latest handled sequencer is kept in the refresh state. A record
+    is new only if its sequencer is greater than the handled one, i.e. it reports a later upload
+    of the same object. Records are marked as handled only via ``commit()``, once the refresh
+    decision they lead to succeeds, so records of a failed batch are handled again on its retry.
+
+    :param state_store: Refresh state store.
+    :param max_tracked_keys: Maximum number of object keys whose sequencers are kept. The least
+        recently handled keys are forgotten first, so their redelivered records are treated as new.
+        Fewer keys are kept, if the refresh state would not fit into its parameter otherwise.
+    """
+
+    def __init__(self, state_store: StateStore, max_tracked_keys: int = 100):
+        self.__state_store = state_store
+        self.__max_tracked_keys = max_tracked_keys
+
+    def new_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Filters out already handled and duplicate records.
+
+        :param records: S3 event records.
+
+        :return: Records that report new uploads.
+        """
+
+        handled = self.__handled(self.__state_store.load())
+        new = []
+        for record in records:
+            sequencer = self.__sequencer(record)
+            if sequencer is None:
+                new.append(record)
+                continue
+
+            key = self.__key_hash(record)
+            if not is_later_sequencer(sequencer, handled.get(key)):
+                continue
+
+            handled[key] = sequencer
+            new.append(record)
+
+        duplicates = len(records) - len(new)
+        if duplicates:
+            print(f'Dropped {duplicates} already handled S3 event record(-s).')
+
+        return new
+
+    def commit(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Marks records as handled.
+
+        :param records: Handled S3 event records.
+
+        :return: No return.
+        """
+
+        state = self.__state_store.load()
+        handled = self.__handled(state)
+        for record in records:
+            sequencer = self.__sequencer(record)
+            if sequencer is None:
+                continue
+
+            key = self.__key_hash(record)
+            previous = handled.pop(key, None)
+            handled[key] = sequencer if is_later_sequencer(sequencer, previous) else previous
+
+        state['sequencers'] = handled
+        # The state document is shared with other refresh state, hence keys are forgotten until it fits.
+        while handled and (
+                len(handled) > self.__max_tracked_keys
+                or not self.__state_store.fits(state, STATE_HEADROOM)
+        ):
+            handled.pop(next(iter(handled)))
+
+        self.__state_store.save(state)
+
+    @staticmethod
+    def __handled(state: Dict[str, Any]) -> Dict[str, str]:
+        # Sequencers handled before they were kept as strings are forgotten, since they lost their length.
+        return {key: value for key, value in state.get('sequencers', {}).items() if isinstance(value, str)}
+
+    @staticmethod
+    def __sequencer(record: Dict[str, Any]) -> Optional[str]:
+        return record.get('s3', {}).get('object', {}).get('sequencer') or None
+
+    @staticmethod
+    def __key_hash(record: Dict[str, Any]) -> str:
+        # Short hash keeps the state document small, even for long object keys.
+        s3 = record['s3']
+        return hashlib.sha1(f'{s3["bucket"]["name"]}/{s3["object"]["key"]}'.encode()).hexdigest()[:12]
@@ -0,0 +1,39 @@
+import time
+from typing import Any, Dict
+
+from botocore.exceptions import ClientError
+
+DEFAULT_PAYLOADS = [{'body': '{}', 'content_type': 'application/json', 'accept': None}]
+
+
+def invoke(runtime_client: Any, endpoint_name: str, payload: Dict[str, Any], **kwargs) -> float:
+    """
+    Invokes the endpoint with a synthetic payload, e.g. to warm up its models.
+
+    The model container may reject a synthetic payload with a ``ModelError``. It is ignored, since
+    the model was loaded and executed by then anyway.
+
+    :param runtime_client: ``boto3`` SageMaker runtime client.
+    :param endpoint_name: SageMaker endpoint name.
+    :param payload: Invocation payload, i.e. ``InvocationPayload.to_dict()``.
+    :param kwargs: Other ``invoke_endpoint()`` arguments, e.g. ``TargetModel`` or ``TargetVariant``.
+
+    :return: Invocation latency in seconds.
+    """
+
+    if payload.get('accept'):
+        kwargs['Accept'] = payload['accept']
+
+    started_at = time.perf_counter()
+    try:
+        runtime_client.invoke_endpoint(
+            EndpointName=endpoint_name,
+            Body=payload['body'].encode(),
+            ContentType=payload['content_type'],
+            **kwargs
+        )
+    except ClientError as ex:
+        if ex.response['Error']['Code'] != 'ModelError':
+            raise
+
+    return time.perf_counter() - started_at
@@ -0,0 +1,427 @@
+import math
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from botocore.exceptions import ClientError
+
+from invocation import DEFAULT_PAYLOADS
+from metrics import Metrics
+
+# Gated latency percentiles, keyed by their threshold settings.
+PERCENTILES = {'p50': 50, 'p95': 95, 'p99': 99}
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Returns the nearest-rank percentile of the values.
+
+    :param values: Measured values.
+    :param rank: Percentile rank, between 0 and 100.
+
+    :return: Percentile value, or 0, if there are no values.
+    """
+
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+@dataclass(frozen=True)
+class LatencyReport:
+    """
+    Client round trip latencies of invocations of a single load test.
+
+    Latencies are measured by the caller, hence they include SageMaker's ``OverheadLatency`` and the
+    network round trip on top of the endpoint's ``ModelLatency``.
+    """
+
+    latencies: List[float]
+    errors: int
+    first_error: Optional[str] = None
+    concurrency: int = 1
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+
+    @property
+    def throughput(self) -> float:
+        """
+        Returns sustained invocations per second. Since the load generator keeps ``concurrency``
+        invocations in flight, it is the concurrency over the mean latency (Little's law).
+        """
+
+        total = sum(self.latencies)
+        return self.concurrency * len(self.latencies) / total if total > 0 else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def percentiles(self) -> Dict[str, float]:
+        """
+        Returns gated latency percentiles.
+
+        :return: Mapping of percentile names (``p50``, ``p95``, ``p99``) and latencies in seconds.
+        """
+
+        return {name: percentile(self.latencies, rank) for name, rank in PERCENTILES.items()}
+
+    def violations(self, settings: Dict[str, Any]) -> List[str]:
+        """
+        Compares the report against the latency gate thresholds.
+
+        :param settings: Latency gate settings, i.e. ``LatencyGate.to_settings()``, with thresholds in milliseconds.
+
+        :return: Descriptions of exceeded thresholds. Empty, if the report is within all of them.
+        """
+
+        violations = []
+        if not self.latencies:
+            violations.append('no invocation succeeded')
+
+        for name, latency in self.percentiles().items():
+            threshold = settings.get(name)
+            if threshold is not None and latency * 1000 > threshold:
+                violations.append(f'{name} latency {latency * 1000:.0f} ms exceeds {threshold:g} ms')
+
+        max_error_rate = settings.get('max_error_rate', 0.0)
+        if self.error_rate > max_error_rate:
+            violations.append(f'error rate {self.error_rate:.2%} exceeds {max_error_rate:.2%}')
+
+        return violations
+
+
+class LoadGenerator:
+    """
+    Replays invocation payloads against an endpoint at a fixed concurrency.
+
+    Each of ``concurrency`` workers sends payloads in a round robin, until ``requests`` invocations
+    are sent in total or the deadline passes. Any invocation error, including a ``ModelError`` of the
+    model container, counts as a failed request, while requests not sent by the deadline are not counted.
+
+    :param runtime_client: ``boto3`` SageMaker runtime client, or ``LocalRuntimeClient``.
+    :param endpoint_name: SageMaker endpoint name.
+    :param payloads: Invocation payloads, i.e. ``InvocationPayload.to_dict()``. By default, a single
+        empty JSON object.
+    :param concurrency: Number of concurrent invocations.
+    :param requests: Total number of invocations.
+    :param clock: Function that returns a monotonic time in seconds.
+    :param deadline: Clock time, after which no further invocations are sent. None sends all of them.
+    """
+
+    def __init__(
+            self,
+            runtime_client: Any,
+            endpoint_name: str,
+            payloads: Optional[List[Dict[str, Any]]] = None,
+            concurrency: int = 4,
+            requests: int = 200,
+            clock: Callable[[], float] = time.perf_counter,
+            deadline: Optional[float] = None
+    ):
+        self.__runtime_client = runtime_client
+        self.__endpoint_name = endpoint_name
+        self.__payloads = payloads or DEFAULT_PAYLOADS
+        self.__concurrency = max(1, min(concurrency, requests))
+        self.__requests = requests
+        self.__clock = clock
+        self.__deadline = deadline
+
+    def run(self) -> LatencyReport:
+        """
+        Sends invocations until all of them are sent or the deadline passes, and waits for their responses.
+
+        :return: Load test report.
+        """
+
+        shares = [
+            range(worker, self.__requests, self.__concurrency)
+            for worker in range(self.__concurrency)
+        ]
+        with ThreadPoolExecutor(max_workers=self.__concurrency) as executor:
+            results = [result for worker in executor.map(self.__run_worker, shares) for result in worker]
+
+        latencies = [result for result in results if isinstance(result, float)]
+        errors = [result for result in results if isinstance(result, Exception)]
+        return LatencyReport(
+            latencies=latencies,
+            errors=len(errors),
+            first_error=repr(errors[0]) if errors else None,
+            concurrency=self.__concurrency
+        )
+
+    def __run_worker(self, indexes: range) -> List[Union[float, Exception]]:
+        results = []
+        for index in indexes:
+            if self.__deadline is not None and self.__clock() >= self.__deadline:
+                break
+            results.append(self.__invoke(self.__payloads[index % len(self.__payloads)]))
+        return results
+
+    def __invoke(self, payload: Dict[str, Any]) -> Union[float, Exception]:
+        kwargs = {'Accept': payload['accept']} if payload.get('accept') else {}
+        started_at = self.__clock()
+        try:
+            self.__runtime_client.invoke_endpoint(
+                EndpointName=self.__endpoint_name,
+                Body=payload['body'].encode(),
+                ContentType=payload['content_type'],
+                **kwargs
+            )
+        except Exception as ex:
+            return ex
+
+        return float(self.__clock() - started_at)
+
+
+class LocalRuntimeClient:
+    """
+    Stand-in of the SageMaker runtime client, that invokes a locally running model serving container.
+
+    SageMaker containers serve inferences on ``POST /invocations``, e.g. a container started with
+    ``docker run -p 8080:8080 <image> serve``. It allows to run ``LoadGenerator`` and the latency
+    gate thresholds against a model before it is uploaded.
+
+    :param url: Container's base URL, e.g. "http://localhost:8080".
+    :param timeout: Invocation timeout in seconds.
+    """
+
+    def __init__(self, url: str, timeout: float = 60):
+        self.__url = url.rstrip('/')
+        self.__timeout = timeout
+
+    def invoke_endpoint(
+            self,
+            EndpointName: str,
+            Body: bytes,
+            ContentType: str = 'application/json',
+            Accept: str = None,
+            **kwargs
+    ) -> Dict[str, Any]:
+        headers = {'Content-Type': ContentType}
+        if Accept:
+            headers['Accept'] = Accept
+
+        request = urllib.request.Request(f'{self.__url}/invocations', data=Body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.__timeout) as response:
+                return {'Body': response.read(), 'ContentType': response.headers.get('Content-Type')}
+        except urllib.error.HTTPError as ex:
+            raise ClientError(
+                {
+                    'Error': {'Code': 'ModelError', 'Message': f'Received {ex.code} from the model container.'},
+                    'ResponseMetadata': {'HTTPStatusCode': 424},
+                },
+                'InvokeEndpoint'
+            ) from ex
+
+
+class StagingEndpoint:
+    """
+    Short-lived endpoint, that serves an endpoint configuration without receiving any actual traffic.
+
+    :param sagemaker_client: ``boto3`` SageMaker client.
+    :param endpoint_name: Staging endpoint name.
+    :param clock: Function that returns a monotonic time in seconds.
+    :param sleep: Function that blocks for the given number of seconds.
+    """
+
+    MIN_BACKOFF = 5
+    MAX_BACKOFF = 30
+    # Reserved before the deadline for the last in-flight invocations (60 seconds timeout) and the deletion.
+    CLEANUP_TIME = 120
+
+    def __init__(
+            self,
+            sagemaker_client: Any,
+            endpoint_name: str,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], Any] = time.sleep
+    ):
+        self.__sagemaker_client = sagemaker_client
+        self.__endpoint_name = endpoint_name
+        self.__clock = clock
+        self.__sleep = sleep
+
+    @property
+    def endpoint_name(self) -> str:
+        return self.__endpoint_name
+
+    def start(self, endpoint_config_name: str, deadline: float) -> None:
+        """
+        Creates the staging endpoint and blocks until it is ``InService``.
+
+        :param endpoint_config_name: Endpoint configuration name.
+        :param deadline: Clock time, by which the endpoint must be in service.
+
+        :return: No return.
+        """
+
+        print(f'Creating staging endpoint "{self.__endpoint_name}" of "{endpoint_config_name}".')
+        try:
+            self.__sagemaker_client.create_endpoint(
+                EndpointName=self.__endpoint_name,
+                EndpointConfigName=endpoint_config_name
+            )
+        except ClientError as ex:
+            if 'already existing' not in str(ex):
+                raise
+
+            # Left over by an interrupted run, e.g. a timed out function.
+            print(f'Staging endpoint "{self.__endpoint_name}" already exists, replacing it.')
+            self.delete()
+            self.__wait(deadline, lambda description: description is None)
+            self.__sagemaker_client.create_endpoint(
+                EndpointName=self.__endpoint_name,
+                EndpointConfigName=endpoint_config_name
+            )
+
+        def in_service(description: Optional[Dict[str, Any]]) -> bool:
+            status = description['EndpointStatus'] if description else 'Missing'
+            if status in ('Failed', 'OutOfService', 'Missing'):
+                raise RuntimeError(
+                    f'Staging endpoint "{self.__endpoint_name}" did not start, status: "{status}". '
+                    f'Reason: {(description or {}).get("FailureReason")}.'
+                )
+            return status == 'InService'
+
+        self.__wait(deadline, in_service)
+
+    def delete(self, deadline: Optional[float] = None) -> None:
+        """
+        Deletes the staging endpoint, if it exists.
+
+        :param deadline: Clock time, until which the deletion is awaited, since an endpoint can not be
+            created under the same name while the previous one is still ``Deleting``. None only starts
+            the deletion.
+
+        :return: No return.
+        """
+
+        description = self.__describe()
+        if description and description['EndpointStatus'] != 'Deleting':
+            try:
+                self.__sagemaker_client.delete_endpoint(EndpointName=self.__endpoint_name)
+                print(f'Staging endpoint "{self.__endpoint_name}" is being deleted.')
+            except ClientError as ex:
+                if 'Could not find' not in str(ex):
+                    raise
+
+        if description and deadline is not None:
+            try:
+                self.__wait(deadline, lambda current: current is None)
+            except TimeoutError:
+                # The next start replaces the endpoint once its deletion completes.
+                print(f'Staging endpoint "{self.__endpoint_name}" is still being deleted.')
+
+    def __wait(self, deadline: float, done: Callable[[Optional[Dict[str, Any]]], bool]) -> None:
+        backoff = self.MIN_BACKOFF
+        while not done(self.__describe()):
+            remaining = deadline - self.__clock()
+            if remaining <= 0:
+                raise TimeoutError(f'Staging endpoint "{self.__endpoint_name}" timed out.')
+
+            self.__sleep(min(backoff, remaining))
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    def __describe(self) -> Optional[Dict[str, Any]]:
+        try:
+            return self.__sagemaker_client.describe_endpoint(EndpointName=self.__endpoint_name)
+        except ClientError as ex:
+            if 'Could not find' in str(ex):
+                return None
+            raise
+
+
+class LatencyGate:
+    """
+    Load-tests a new endpoint configuration before the endpoint is updated to it.
+
+    The configuration is deployed to a ``StagingEndpoint``, that serves the new model artifacts on
+    the same instances as the endpoint would. Payloads are replayed against it at the target
+    concurrency and the measured p50, p95 and p99 latencies and the error rate are compared against
+    the thresholds. The staging endpoint is deleted afterwards, whether the configuration is
+    promoted or not.
+
+    :param sagemaker_client: ``boto3`` SageMaker client.
+    :param runtime_client: ``boto3`` SageMaker runtime client.
+    :param settings: Latency gate settings, i.e. ``LatencyGate.to_settings()``.
+    :param payloads: Fallback invocation payloads, e.g. warm-up payloads, if the settings have none.
+    :param clock: Function that returns a monotonic time in seconds, used for both timeouts and latencies.
+    :param sleep: Function that blocks for the given number of seconds.
+    """
+
+    def __init__(
+            self,
+            sagemaker_client: Any,
+            runtime_client: Any,
+            settings: Dict[str, Any],
+            payloads: Optional[List[Dict[str, Any]]] = None,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], Any] = time.sleep
+    ):
+        self.__runtime_client = runtime_client
+        self.__settings = settings
+        self.__payloads = settings.get('payloads') or payloads
+        self.__staging_endpoint = StagingEndpoint(sagemaker_client, settings['staging_endpoint_name'], clock, sleep)
+        self.__clock = clock
+
+    def promotes(self, endpoint_config_name: str, metrics: Metrics) -> bool:
+        """
+        Load-tests the endpoint configuration and decides whether the endpoint is updated to it.
+
+        :param endpoint_config_name: Endpoint configuration name the endpoint would be updated to.
+        :param metrics: Refresh pipeline metrics, that measured latencies are added to.
+
+        :return: True, if the configuration is within all thresholds.
+        """
+
+        report = self.check(endpoint_config_name)
+        for name, latency in report.percentiles().items():
+            metrics.put(f'LatencyGate{name.upper()}', latency * 1000)
+        metrics.put('LatencyGateErrorRate', report.error_rate * 100, 'Percent')
+
+        formatted = ', '.join(f'{name} {latency * 1000:.0f} ms' for name, latency in report.percentiles().items())
+        print(f'Latency gate of "{endpoint_config_name}": {formatted}, {report.errors}/{report.requests} errors.')
+        if report.first_error:
+            print(f'First failed invocation: {report.first_error}.')
+
+        violations = report.violations(self.__settings)
+        if violations:
+            metrics.put('LatencyGateRejections', 1, 'Count')
+            print(f'Endpoint configuration "{endpoint_config_name}" is rejected: {"; ".join(violations)}.')
+            return False
+
+        return True
+
+    def check(self, endpoint_config_name: str) -> LatencyReport:
+        """
+        Deploys the endpoint configuration to the staging endpoint and load-tests it.
+
+        :param endpoint_config_name: Endpoint configuration name.
+
+        :return: Load test report.
+        """
+
+        deadline = self.__clock() + self.__settings.get('timeout', 600)
+        load_deadline = deadline - StagingEndpoint.CLEANUP_TIME
+        try:
+            self.__staging_endpoint.start(endpoint_config_name, load_deadline)
+            return LoadGenerator(
+                self.__runtime_client,
+                self.__staging_endpoint.endpoint_name,
+                self.__payloads,
+                concurrency=self.__settings.get('concurrency', 4),
+                requests=self.__settings.get('requests', 200),
+                clock=self.__clock,
+                deadline=load_deadline
+            ).run()
+        finally:
+            self.__staging_endpoint.delete(deadline)
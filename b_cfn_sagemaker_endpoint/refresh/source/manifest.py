@@ -0,0 +1,125 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from botocore.exceptions import ClientError
+
+
+class ManifestGate:
+    """
+    Gates endpoint refresh on a manifest of expected model data objects.
+
+    The manifest is a JSON object, uploaded to the models bucket, that lists every object the
+    refreshed endpoint depends on, together with its expected size and ETag:
+
+    .. code-block:: json
+
+        {
+            "objects": [
+                {"key": "active_model/model.tar.gz", "size": 1024, "etag": "9b2cf535f27731c974343645a3985328"}
+            ]
+        }
+
+    Both ``size`` and ``etag`` are optional. Listed objects are checked in parallel via
+    ``head_object()`` calls and the gate opens as soon as all of them match.
+
+    :param s3_client: ``boto3`` S3 client.
+    :param bucket_name: Models bucket name.
+    :param manifest_key: Manifest object key.
+    :param timeout: Maximum time (in seconds) to wait for all listed objects to match.
+    :param max_workers: Maximum number of parallel ``head_object()`` calls.
+    :param clock: Function that returns current time in seconds.
+    :param sleep: Function that blocks for the given number of seconds.
+    """
+
+    MIN_BACKOFF = 0.5
+    MAX_BACKOFF = 5.0
+
+    def __init__(
+            self,
+            s3_client: Any,
+            bucket_name: str,
+            manifest_key: str,
+            timeout: float,
+            max_workers: int = 16,
+            clock: Callable[[], float] = time.time,
+            sleep: Callable[[float], Any] = time.sleep
+    ):
+        self.__s3_client = s3_client
+        self.__bucket_name = bucket_name
+        self.__manifest_key = manifest_key
+        self.__timeout = timeout
+        self.__max_workers = max_workers
+        self.__clock = clock
+        self.__sleep = sleep
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Reads expected objects from the manifest.
+
+        :return: List of expected objects.
+        """
+
+        response = self.__s3_client.get_object(Bucket=self.__bucket_name, Key=self.__manifest_key)
+        manifest = json.loads(response['Body'].read())
+        return manifest['objects']
+
+    def mismatched(self, objects: List[Dict[str, Any]]) -> List[str]:
+        """
+        Checks expected objects in parallel.
+
+        :param objects: Expected objects listed in the manifest.
+
+        :return: Keys of objects that are either missing or do not match yet.
+        """
+
+        if not objects:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.__max_workers, len(objects))) as executor:
+            matches = list(executor.map(self.__matches, objects))
+
+        return [expected['key'] for expected, match in zip(objects, matches) if not match]
+
+    def wait(self) -> None:
+        """
+        Blocks until all objects listed in the manifest match, polling with an exponential backoff.
+
+        :return: No return.
+        """
+
+        started_at = self.__clock()
+        backoff = self.MIN_BACKOFF
+        while True:
+            mismatched = self.mismatched(self.load())
+            if not mismatched:
+                print(f'All objects listed in manifest "{self.__manifest_key}" are present.')
+                return
+
+            elapsed = self.__clock() - started_at
+            if elapsed >= self.__timeout:
+                raise TimeoutError(
+                    f'Objects listed in manifest "{self.__manifest_key}" did not match '
+                    f'in {self.__timeout} seconds: {mismatched}.'
+                )
+
+            print(f'Waiting for {len(mismatched)} manifest object(-s) to be uploaded: {mismatched}.')
+            self.__sleep(min(backoff, self.__timeout - elapsed))
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    def __matches(self, expected: Dict[str, Any]) -> bool:
+        try:
+            actual = self.__s3_client.head_object(Bucket=self.__bucket_name, Key=expected['key'])
+        except ClientError as ex:
+            if ex.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+        if 'size' in expected and actual['ContentLength'] != expected['size']:
+            return False
+
+        if 'etag' in expected and actual['ETag'].strip('"') != expected['etag'].strip('"'):
+            return False
+
+        return True
@@ -0,0 +1,174 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from state import StateStore
+
+NAMESPACE = 'BSagemakerEndpointRefresh'
+
+
+class Metrics:
+    """
+    Collects refresh pipeline metrics and emits them in CloudWatch Embedded Metric Format (EMF).
+
+    Metrics are printed as a single structured log line, that CloudWatch Logs turns into metrics
+    with ``EndpointName`` dimension and, once the endpoint configuration is known, also with
+    ``EndpointName`` & ``EndpointConfigName`` dimensions.
+
+    :param endpoint_name: SageMaker endpoint name, or other value of the ``dimension_name`` dimension.
+    :param namespace: CloudWatch metrics namespace.
+    :param emit: Function that writes the EMF document to the logs.
+    :param dimension_name: Name of the main dimension, e.g. ``TransformName`` of batch transform metrics.
+    """
+
+    def __init__(
+            self,
+            endpoint_name: str,
+            namespace: str = NAMESPACE,
+            emit: Callable[[str], Any] = print,
+            dimension_name: str = 'EndpointName'
+    ):
+        self.__namespace = namespace
+        self.__emit = emit
+        self.__dimension_name = dimension_name
+        self.__dimensions = {dimension_name: endpoint_name}
+        self.__values: Dict[str, Tuple[str, List[float]]] = {}
+
+    def set_endpoint_config_name(self, endpoint_config_name: str) -> None:
+        self.__dimensions['EndpointConfigName'] = endpoint_config_name
+
+    def put(self, name: str, value: float, unit: str = 'Milliseconds') -> None:
+        self.__values.setdefault(name, (unit, []))[1].append(value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Measures the latency of the wrapped block in milliseconds.
+
+        :param name: Metric name.
+        """
+
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put(name, (time.perf_counter() - started_at) * 1000)
+
+    def flush(self) -> None:
+        """
+        Emits all collected metrics as a single EMF document and resets them.
+
+        :return: No return.
+        """
+
+        if not self.__values:
+            return
+
+        dimension_sets = [[self.__dimension_name]]
+        if 'EndpointConfigName' in self.__dimensions:
+            dimension_sets.append([self.__dimension_name, 'EndpointConfigName'])
+
+        document = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.__namespace,
+                    'Dimensions': dimension_sets,
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, (unit, _) in self.__values.items()],
+                }],
+            },
+            **self.__dimensions,
+            # EMF accepts at most 100 values per metric.
+            **{name: values[-100:] for name, (_, values) in self.__values.items()},
+        }
+        self.__emit(json.dumps(document))
+        self.__values = {}
+
+
+class UploadTracker:
+    """
+    Tracks uploads across invocations, from their receipt until the endpoint serves them.
+
+    Received uploads are accumulated in the refresh state, until an endpoint update coalesces them.
+    The newest upload time of the update is then kept until the endpoint is back in service.
+
+    :param state_store: Refresh state store.
+    :param clock: Function that returns current time in seconds.
+    """
+
+    def __init__(self, state_store: StateStore, clock: Callable[[], float] = time.time):
+        self.__state_store = state_store
+        self.__clock = clock
+
+    def received(self, s3_records: List[Dict[str, Any]]) -> None:
+        """
+        Accumulates received uploads.
+
+        :param s3_records: S3 bucket event records.
+
+        :return: No return.
+        """
+
+        if not s3_records:
+            return
+
+        state = self.__state_store.load()
+        uploads = state.get('uploads') or {'count': 0, 'first_received_at': self.__clock(), 'last_uploaded_at': None}
+        uploads['count'] += len(s3_records)
+        upload_times = [event_time(record) for record in s3_records if record.get('eventTime')]
+        uploads['last_uploaded_at'] = max([*upload_times, uploads['last_uploaded_at'] or 0]) or None
+        state['uploads'] = uploads
+        self.__state_store.save(state)
+
+    def updated(self) -> Dict[str, Any]:
+        """
+        Marks accumulated uploads as coalesced into an endpoint update.
+
+        :return: Coalesced uploads, i.e. their ``count``, ``first_received_at`` and ``last_uploaded_at``.
+        """
+
+        state = self.__state_store.load()
+        uploads = state.pop('uploads', None) or {'count': 0, 'first_received_at': None, 'last_uploaded_at': None}
+        state['updated_upload_at'] = uploads['last_uploaded_at']
+        self.__state_store.save(state)
+        return uploads
+
+    def skipped(self) -> None:
+        """
+        Drops accumulated uploads that did not result in an endpoint update.
+
+        :return: No return.
+        """
+
+        state = self.__state_store.load()
+        if state.pop('uploads', None) is not None:
+            self.__state_store.save(state)
+
+    def in_service(self) -> Optional[float]:
+        """
+        Marks the last update as served.
+
+        :return: Newest upload time of the last update, if it was not served yet.
+        """
+
+        state = self.__state_store.load()
+        updated_upload_at = state.pop('updated_upload_at', None)
+        if updated_upload_at is not None:
+            self.__state_store.save(state)
+
+        return updated_upload_at
+
+
+def event_time(event: Dict[str, Any]) -> float:
+    """
+    Parses time of an S3 event record (``eventTime``) or an EventBridge event (``time``).
+
+    :param event: Event or event record.
+
+    :return: Event time in seconds.
+    """
+
+    value = event.get('eventTime') or event['time']
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
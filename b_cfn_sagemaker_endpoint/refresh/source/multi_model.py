@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote_plus
+
+from invocation import DEFAULT_PAYLOADS, invoke
+from versions import parse_s3_url
+
+
+class MultiModelWarmer:
+    """
+    Loads target models of a multi-model endpoint, instead of updating the endpoint.
+
+    Artifacts of multi-model containers are loaded lazily, on the first invocation of a target
+    model. Hence, a new artifact under a container's model data prefix needs no endpoint update at
+    all. It is invoked with synthetic payloads instead, so that the first actual request does not
+    pay the model load latency.
+
+    An overwritten artifact of an already loaded target model is not reloaded, since SageMaker
+    serves its cached copy until it is evicted. New versions of target models must therefore be
+    uploaded under new keys, e.g. ``<model>/v2.tar.gz``, and requested by their new names.
+
+    :param runtime_client: ``boto3`` SageMaker runtime client.
+    :param endpoint_name: SageMaker endpoint name.
+    :param model_data_urls: S3 URL prefixes (``s3://bucket/prefix/``) of multi-model containers.
+    :param payloads: Warm-up invocation payloads. By default, a single empty JSON object.
+    :param max_workers: Maximum number of parallel ``invoke_endpoint()`` calls.
+    """
+
+    def __init__(
+            self,
+            runtime_client: Any,
+            endpoint_name: str,
+            model_data_urls: List[str],
+            payloads: Optional[List[Dict[str, Any]]] = None,
+            max_workers: int = 16
+    ):
+        self.__runtime_client = runtime_client
+        self.__endpoint_name = endpoint_name
+        self.__prefixes = [parse_s3_url(url) for url in model_data_urls]
+        self.__payloads = payloads or DEFAULT_PAYLOADS
+        self.__max_workers = max_workers
+
+    def split(self, s3_records: List[Dict[str, Any]]) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Splits S3 bucket event records into target models and the remaining records.
+
+        :param s3_records: S3 bucket event records.
+
+        :return: Tuple of target model names and records of objects outside multi-model prefixes.
+        """
+
+        target_models = []
+        remaining = []
+        for record in s3_records:
+            target_model = self.__target_model(
+                record['s3']['bucket']['name'],
+                unquote_plus(record['s3']['object']['key'])
+            )
+            if target_model:
+                target_models.append(target_model)
+            else:
+                remaining.append(record)
+
+        return list(dict.fromkeys(target_models)), remaining
+
+    def warm(self, target_models: List[str]) -> None:
+        """
+        Invokes each target model with every warm-up payload, loading target models in parallel.
+
+        :param target_models: Target model names, i.e. artifact keys relative to a model data prefix.
+
+        :return: No return.
+        """
+
+        if not target_models:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.__max_workers, len(target_models))) as executor:
+            # Consuming results re-raises any invocation errors.
+            list(executor.map(self.__warm, target_models))
+
+    def __warm(self, target_model: str) -> None:
+        for payload in self.__payloads:
+            invoke(self.__runtime_client, self.__endpoint_name, payload, TargetModel=target_model)
+
+        print(f'Target model warmed up: "{target_model}".')
+
+    def __target_model(self, bucket: str, key: str) -> Optional[str]:
+        for prefix_bucket, prefix in self.__prefixes:
+            if bucket != prefix_bucket:
+                continue
+
+            prefix = prefix.rstrip('/') + '/' if prefix else ''
+            if key.startswith(prefix) and len(key) > len(prefix):
+                return key[len(prefix):]
+
+        return None
@@ -0,0 +1,174 @@
+import json
+import math
+import time
+from typing import Any, Callable, Dict
+
+from metrics import Metrics
+from pipeline import RefreshComponents, RefreshPipeline
+from state import StateStore
+from swap import FAILED, IN_SERVICE, next_backoff, update_status
+from target import RefreshTarget
+
+# Refresh state machine step actions, as returned by the ``resolve`` step.
+UPDATE = 'update'
+SKIP = 'skip'
+
+
+class RefreshExecutions:
+    """
+    Starts refresh state machine executions, debouncing them.
+
+    Like ``Debouncer``, each started execution moves a single pending refresh deadline to
+    ``now + wait_time`` and carries it. The state machine waits until this deadline and proceeds
+    only if the execution still carries the latest deadline, i.e. no other execution was started
+    after it. Therefore, a burst of requests results in a single endpoint update.
+
+    :param state_store: Refresh state store.
+    :param sfn_client: ``boto3`` Step Functions client.
+    :param state_machine_arn: Refresh state machine ARN.
+    :param clock: Function that returns current time in seconds.
+    """
+
+    def __init__(
+            self,
+            state_store: StateStore,
+            sfn_client: Any,
+            state_machine_arn: str,
+            clock: Callable[[], float] = time.time
+    ):
+        self.__state_store = state_store
+        self.__sfn_client = sfn_client
+        self.__state_machine_arn = state_machine_arn
+        self.__clock = clock
+
+    def start(self, wait_time: float) -> float:
+        """
+        Pushes back the pending refresh deadline and starts its execution.
+
+        :param wait_time: Quiet period (in seconds) before the endpoint is updated.
+
+        :return: New pending refresh deadline.
+        """
+
+        deadline = self.__clock() + wait_time
+
+        state = self.__state_store.load()
+        state['deadline'] = deadline
+        self.__state_store.save(state)
+
+        self.__sfn_client.start_execution(
+            stateMachineArn=self.__state_machine_arn,
+            input=json.dumps({'deadline': deadline, 'wait_seconds': math.ceil(wait_time)})
+        )
+        print(f'Refresh execution started, deadline: {deadline}.')
+
+        return deadline
+
+
+class RefreshSteps:
+    """
+    Steps of the refresh state machine. Each step is a separate refresh function invocation,
+    that takes the execution's state and returns it updated.
+
+    - ``resolve`` - decides whether the endpoint is updated and resolves its new configuration
+      (see ``RefreshPipeline.resolve()``);
+    - ``update`` - starts the endpoint update, or defers it, if the endpoint became busy;
+    - ``poll`` - reports the update status and the next polling backoff.
+
+    :param target: Refreshed endpoint's settings.
+    :param components: Refresh pipeline components.
+    :param metrics: Refresh pipeline metrics.
+    """
+
+    def __init__(self, target: RefreshTarget, components: RefreshComponents, metrics: Metrics):
+        self.__target = target
+        self.__components = components
+        self.__metrics = metrics
+        self.__pipeline = RefreshPipeline(target, components, metrics)
+
+    def run(self, step: str, execution: Dict[str, Any]) -> Dict[str, Any]:
+        steps = {
+            'resolve': self.resolve,
+            'update': self.update,
+            'poll': self.poll,
+        }
+        return steps[step](execution)
+
+    def resolve(self, execution: Dict[str, Any]) -> Dict[str, Any]:
+        if self.__components.state_store.load().get('deadline') != execution['deadline']:
+            print(f'Skipping superseded refresh of deadline {execution["deadline"]}.')
+            return {**execution, 'action': SKIP}
+
+        plan = self.__pipeline.resolve()
+        if plan is None:
+            self.__clear_deadline(execution['deadline'])
+            return {**execution, 'action': SKIP}
+
+        return {**execution, 'action': UPDATE, **plan}
+
+    def update(self, execution: Dict[str, Any]) -> Dict[str, Any]:
+        updated = self.__pipeline.update(execution)
+        self.__clear_deadline(execution['deadline'])
+        if not updated:
+            return {**execution, 'action': SKIP}
+
+        return {**execution, 'backoff': next_backoff()}
+
+    def poll(self, execution: Dict[str, Any]) -> Dict[str, Any]:
+        endpoint_config_name = execution['endpoint_config_name']
+        self.__metrics.set_endpoint_config_name(endpoint_config_name)
+        with self.__metrics.timer('DescribeEndpointLatency'):
+            description = self.__components.sagemaker_client.describe_endpoint(
+                EndpointName=self.__target.endpoint_name
+            )
+
+        status = update_status(description, endpoint_config_name)
+        print(f'Endpoint update status: "{status}", endpoint status: "{description["EndpointStatus"]}".')
+
+        if self.__components.model_generation:
+            # Published once the endpoint is back in service, either updated or rolled back.
+            self.__components.model_generation.in_service(description)
+
+        if status == FAILED:
+            self.__metrics.put('RefreshFailures', 1, 'Count')
+            return {
+                **execution,
+                'status': status,
+                'failure_reason': description.get('FailureReason') or 'Endpoint update was rolled back.'
+            }
+
+        if status == IN_SERVICE and self.__components.endpoint_warmer:
+            for variant_latencies in self.__components.endpoint_warmer.warm(description).values():
+                for latency in variant_latencies:
+                    self.__metrics.put('WarmUpLatency', latency * 1000)
+
+        return {**execution, 'status': status, 'backoff': next_backoff(execution['backoff'])}
+
+    def __clear_deadline(self, deadline: float) -> None:
+        state_store = self.__components.state_store
+        state = state_store.load()
+        if state.get('deadline') == deadline:
+            state['deadline'] = None
+            state_store.save(state)
+
+
+def run_step(target: RefreshTarget, step: str, execution: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs a single refresh state machine step.
+
+    :param target: Refreshed endpoint's settings.
+    :param step: Step name. See ``RefreshSteps``.
+    :param execution: State of the state machine execution.
+
+    :return: Updated state of the state machine execution.
+    """
+
+    metrics = Metrics(target.endpoint_name)
+    steps = RefreshSteps(target, RefreshComponents.from_target(target), metrics)
+    try:
+        return steps.run(step, execution)
+    except Exception:
+        metrics.put('RefreshFailures', 1, 'Count')
+        raise
+    finally:
+        metrics.flush()
@@ -0,0 +1,33 @@
+from state import StateStore
+
+
+class PendingRefresh:
+    """
+    Tracks an endpoint refresh deferred while the endpoint is busy.
+
+    ``update_endpoint()`` fails while the endpoint is still being updated. Instead, a refresh requested
+    in the meantime marks the endpoint as dirty in the refresh state. Once the endpoint is back in
+    service, as reported by its state change event, exactly one follow-up refresh is started, no
+    matter how many refreshes were requested in the meantime. The mark is cleared only after the
+    follow-up refresh succeeds, so a failed one is retried with the redelivered event.
+
+    :param state_store: Refresh state store.
+    """
+
+    def __init__(self, state_store: StateStore):
+        self.__state_store = state_store
+
+    def is_pending(self) -> bool:
+        return bool(self.__state_store.load().get('pending_refresh'))
+
+    def mark(self) -> None:
+        self.__set(True)
+
+    def clear(self) -> None:
+        self.__set(False)
+
+    def __set(self, pending: bool) -> None:
+        state = self.__state_store.load()
+        if bool(state.get('pending_refresh')) != pending:
+            state['pending_refresh'] = pending
+            self.__state_store.save(state)
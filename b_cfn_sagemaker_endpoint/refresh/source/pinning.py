@@ -0,0 +1,297 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from state import StateStore
+from swap import ENDPOINT_CONFIG_KEYS
+from versions import parse_s3_url
+
+# Model settings, that are copied from the described template model.
+MODEL_KEYS = (
+    'PrimaryContainer',
+    'Containers',
+    'InferenceExecutionConfig',
+    'ExecutionRoleArn',
+    'VpcConfig',
+    'EnableNetworkIsolation',
+)
+
+
+class VersionPinner:
+    """
+    Creates immutable, version-pinned endpoint configurations, one generation per refresh.
+
+    Instead of swapping the endpoint between A & B configurations, that reference mutable model
+    artifacts, each refresh clones the template endpoint configuration (configuration A, managed by
+    CloudFormation) and its models into a new generation. Every model artifact of the generation is
+    pinned: the exact version (S3 ``VersionId``, or ``ETag`` of unversioned buckets) read by the
+    refresh is copied server-side to a version-addressed key, that is never overwritten, and the
+    generation's models reference these copies. Uploads during the endpoint update therefore can not
+    change the models being deployed.
+
+    Generations are recorded in the refresh state. Once a new generation is created, the oldest ones
+    beyond the retention count are deleted, together with their pinned artifacts that no retained
+    generation references. The generation the endpoint is currently serving is always retained.
+
+    :param sagemaker_client: ``boto3`` SageMaker client.
+    :param s3_client: ``boto3`` S3 client.
+    :param state_store: Refresh state store.
+    :param settings: Pinning settings, i.e. ``VersionPinning.to_settings()``.
+    :param template_endpoint_config_name: Endpoint configuration, whose models are cloned.
+    :param max_workers: Maximum number of parallel object copies of uncompressed model data.
+    """
+
+    def __init__(
+            self,
+            sagemaker_client: Any,
+            s3_client: Any,
+            state_store: StateStore,
+            settings: Dict[str, Any],
+            template_endpoint_config_name: str,
+            max_workers: int = 16
+    ):
+        self.__sagemaker_client = sagemaker_client
+        self.__s3_client = s3_client
+        self.__state_store = state_store
+        self.__settings = settings
+        self.__template_endpoint_config_name = template_endpoint_config_name
+        self.__max_workers = max_workers
+
+    def is_pinned_copy(self, record: Dict[str, Any]) -> bool:
+        """
+        Tells whether an S3 bucket event record is of a pinned copy, that must not trigger a refresh.
+
+        :param record: S3 bucket event record.
+
+        :return: True, if the record's object is a pinned copy.
+        """
+
+        return (
+            record['s3']['bucket']['name'] == self.__settings['bucket']
+            and record['s3']['object']['key'].startswith(self.__settings['prefix'])
+        )
+
+    def pin(self, active_endpoint_config_name: str) -> str:
+        """
+        Creates a new generation of the template endpoint configuration with pinned model artifacts,
+        and deletes generations beyond the retention count.
+
+        :param active_endpoint_config_name: Endpoint configuration the endpoint currently serves.
+
+        :return: Name of the new generation's endpoint configuration.
+        """
+
+        state = self.__state_store.load()
+        pinned = state.get('pinned', {})
+        generation = pinned.get('generation', 0) + 1
+        endpoint_config_name = f'{self.__settings["name_prefix"]}{generation}'
+
+        template = self.__sagemaker_client.describe_endpoint_config(
+            EndpointConfigName=self.__template_endpoint_config_name
+        )
+        template_model_names = list(dict.fromkeys(variant['ModelName'] for variant in template['ProductionVariants']))
+        model_names = {
+            template_model_name: f'{endpoint_config_name}-{index}'
+            for index, template_model_name in enumerate(template_model_names)
+        }
+
+        record = {
+            'generation': generation,
+            'endpoint_config_name': endpoint_config_name,
+            'model_names': list(model_names.values()),
+            'artifact_urls': [],
+        }
+        # Recorded first, hence a generation left incomplete by a failure is deleted later on.
+        pinned['generation'] = generation
+        pinned['generations'] = [*pinned.get('generations', []), record]
+        state['pinned'] = pinned
+        self.__state_store.save(state)
+
+        for template_model_name, model_name in model_names.items():
+            description = self.__sagemaker_client.describe_model(ModelName=template_model_name)
+            arguments = {key: description[key] for key in MODEL_KEYS if description.get(key)}
+            for container in [arguments.get('PrimaryContainer'), *arguments.get('Containers', [])]:
+                if container:
+                    record['artifact_urls'] += self.__pin_container(container)
+            self.__save_record(record)
+            self.__sagemaker_client.create_model(ModelName=model_name, **arguments)
+
+        variants = [
+            {**variant, 'ModelName': model_names[variant['ModelName']]}
+            for variant in template['ProductionVariants']
+        ]
+        arguments = {key: template[key] for key in ENDPOINT_CONFIG_KEYS if template.get(key)}
+        self.__sagemaker_client.create_endpoint_config(
+            EndpointConfigName=endpoint_config_name,
+            ProductionVariants=variants,
+            **arguments
+        )
+        print(f'Endpoint configuration generation {generation} is created: "{endpoint_config_name}".')
+
+        self.__collect(active_endpoint_config_name)
+
+        return endpoint_config_name
+
+    def discard(self, endpoint_config_name: str) -> None:
+        """
+        Deletes a generation, that the endpoint was not updated to, e.g. rejected by the latency gate.
+
+        :param endpoint_config_name: Name of the generation's endpoint configuration.
+
+        :return: No return.
+        """
+
+        state = self.__state_store.load()
+        generations = state.get('pinned', {}).get('generations', [])
+        discarded = [record for record in generations if record['endpoint_config_name'] == endpoint_config_name]
+        self.__delete(generations, discarded)
+        print(f'Endpoint configuration "{endpoint_config_name}" is discarded.')
+
+    def __collect(self, active_endpoint_config_name: str) -> None:
+        generations = self.__state_store.load()['pinned']['generations']
+        retained = generations[-self.__settings['retained_generations']:]
+        collected = [
+            record for record in generations
+            if record not in retained and record['endpoint_config_name'] != active_endpoint_config_name
+        ]
+        if collected:
+            self.__delete(generations, collected)
+            print(f'Deleted endpoint configuration generations: {[record["generation"] for record in collected]}.')
+
+    def __delete(self, generations: List[Dict[str, Any]], deleted: List[Dict[str, Any]]) -> None:
+        for record in deleted:
+            self.__ignore_missing(
+                self.__sagemaker_client.delete_endpoint_config,
+                EndpointConfigName=record['endpoint_config_name']
+            )
+            for model_name in record['model_names']:
+                self.__ignore_missing(self.__sagemaker_client.delete_model, ModelName=model_name)
+
+        # Pinned artifacts are version-addressed, hence unchanged artifacts are shared by generations.
+        kept = [record for record in generations if record not in deleted]
+        referenced = {url for record in kept for url in record['artifact_urls']}
+        for url in {url for record in deleted for url in record['artifact_urls']} - referenced:
+            self.__delete_artifact(url)
+
+        state = self.__state_store.load()
+        state['pinned']['generations'] = kept
+        self.__state_store.save(state)
+
+    def __save_record(self, record: Dict[str, Any]) -> None:
+        state = self.__state_store.load()
+        state['pinned']['generations'] = [
+            record if item['generation'] == record['generation'] else item
+            for item in state['pinned']['generations']
+        ]
+        self.__state_store.save(state)
+
+    def __pin_container(self, container: Dict[str, Any]) -> List[str]:
+        # Target models of multi-model containers are loaded on invocation, hence they are not pinned.
+        if container.get('Mode') == 'MultiModel':
+            return []
+
+        urls = []
+        if container.get('ModelDataUrl'):
+            container['ModelDataUrl'] = self.__pin_object(container['ModelDataUrl'])
+            urls.append(container['ModelDataUrl'])
+
+        data_source = container.get('ModelDataSource', {}).get('S3DataSource')
+        if data_source:
+            if data_source['S3Uri'].endswith('/'):
+                data_source['S3Uri'] = self.__pin_prefix(data_source['S3Uri'])
+            else:
+                data_source['S3Uri'] = self.__pin_object(data_source['S3Uri'])
+            urls.append(data_source['S3Uri'])
+
+        return urls
+
+    def __pin_object(self, url: str) -> str:
+        bucket, key = parse_s3_url(url)
+        response = self.__s3_client.head_object(Bucket=bucket, Key=key)
+        etag = response['ETag'].strip('"')
+        version_id = response.get('VersionId')
+        if version_id == 'null':
+            version_id = None
+
+        pinned_key = self.__pinned_key(url, version_id or etag, key)
+        if not self.__exists(pinned_key):
+            source = {'Bucket': bucket, 'Key': key}
+            if version_id:
+                source['VersionId'] = version_id
+            # Fails, if the artifact is overwritten in the meantime. The overwrite triggers a refresh itself.
+            self.__s3_client.copy(source, self.__settings['bucket'], pinned_key, ExtraArgs={'CopySourceIfMatch': etag})
+            print(f'Pinned "{url}" version "{version_id or etag}".')
+
+        return f's3://{self.__settings["bucket"]}/{pinned_key}'
+
+    def __pin_prefix(self, url: str) -> str:
+        bucket, prefix = parse_s3_url(url)
+        objects = self.__list(bucket, prefix)
+        version = hashlib.sha256()
+        for key, etag in sorted(objects.items()):
+            version.update(f'{key[len(prefix):]}:{etag}\n'.encode())
+
+        pinned_prefix = self.__pinned_key(url, version.hexdigest(), prefix)
+        # A partially copied prefix, e.g. of a timed out refresh, is completed.
+        pinned = self.__list(self.__settings['bucket'], pinned_prefix)
+        missing = [(key, etag) for key, etag in objects.items() if pinned_prefix + key[len(prefix):] not in pinned]
+
+        def copy(item: Tuple[str, str]) -> None:
+            key, etag = item
+            self.__s3_client.copy(
+                {'Bucket': bucket, 'Key': key},
+                self.__settings['bucket'],
+                pinned_prefix + key[len(prefix):],
+                ExtraArgs={'CopySourceIfMatch': etag}
+            )
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.__max_workers, len(missing))) as executor:
+                list(executor.map(copy, missing))
+            print(f'Pinned "{url}" version "{version.hexdigest()}", copied {len(missing)} objects.')
+
+        return f's3://{self.__settings["bucket"]}/{pinned_prefix}'
+
+    def __pinned_key(self, url: str, version: str, key: str) -> str:
+        digest = hashlib.sha256(f'{url}@{version}'.encode()).hexdigest()[:32]
+        return f'{self.__settings["prefix"]}{digest}/{key}'
+
+    def __exists(self, key: str) -> bool:
+        try:
+            self.__s3_client.head_object(Bucket=self.__settings['bucket'], Key=key)
+        except ClientError as ex:
+            if ex.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+        return True
+
+    def __list(self, bucket: str, prefix: str) -> Dict[str, str]:
+        objects = {}
+        arguments = {'Bucket': bucket, 'Prefix': prefix}
+        while True:
+            response = self.__s3_client.list_objects_v2(**arguments)
+            objects.update({item['Key']: item['ETag'].strip('"') for item in response.get('Contents', [])})
+            if not response.get('IsTruncated'):
+                return objects
+            arguments['ContinuationToken'] = response['NextContinuationToken']
+
+    def __delete_artifact(self, url: str) -> None:
+        bucket, key = parse_s3_url(url)
+        keys = list(self.__list(bucket, key)) if key.endswith('/') else [key]
+        # At most 1000 keys per request.
+        for start in range(0, len(keys), 1000):
+            self.__s3_client.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': item} for item in keys[start:start + 1000]], 'Quiet': True}
+            )
+
+    @staticmethod
+    def __ignore_missing(delete: Any, **kwargs) -> None:
+        try:
+            delete(**kwargs)
+        except ClientError as ex:
+            if 'Could not find' not in str(ex):
+                raise
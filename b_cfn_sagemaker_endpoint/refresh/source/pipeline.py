@@ -0,0 +1,294 @@
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+import clients
+from metrics import Metrics, UploadTracker
+from pending import PendingRefresh
+from state import StateStore
+from swap import BUSY_STATUSES, next_endpoint_config_name, update_endpoint_arguments
+from target import RefreshTarget
+
+if TYPE_CHECKING:
+    from generation import ModelGeneration
+    from latency_gate import LatencyGate
+    from manifest import ManifestGate
+    from pinning import VersionPinner
+    from readiness import EndpointWarmer, PendingWarmUp
+    from recommendation import InstanceRecommender
+    from validation import ArtifactValidator
+    from versions import ArtifactVersions
+
+
+@dataclass(frozen=True)
+class RefreshComponents:
+    """
+    Refresh pipeline components of an endpoint. Optional components are None, unless their feature is enabled.
+    The state store is None, unless any feature keeps the refresh state.
+    """
+
+    sagemaker_client: Any
+    state_store: Optional[StateStore] = None
+    manifest_gate: Optional['ManifestGate'] = None
+    artifact_versions: Optional['ArtifactVersions'] = None
+    artifact_validator: Optional['ArtifactValidator'] = None
+    endpoint_warmer: Optional['EndpointWarmer'] = None
+    pending_warm_up: Optional['PendingWarmUp'] = None
+    latency_gate: Optional['LatencyGate'] = None
+    instance_recommender: Optional['InstanceRecommender'] = None
+    model_generation: Optional['ModelGeneration'] = None
+    version_pinner: Optional['VersionPinner'] = None
+
+    @classmethod
+    def from_target(cls, target: RefreshTarget) -> 'RefreshComponents':
+        sagemaker_client = clients.get('sagemaker')
+        state_store = None
+        if target.state_parameter_name:
+            state_store = StateStore(clients.get('ssm'), target.state_parameter_name, tier='Advanced')
+
+        manifest_gate = None
+        if target.manifest_key:
+            from manifest import ManifestGate
+            # In manifest mode the wait time is the maximum time to wait for all listed objects.
+            manifest_gate = ManifestGate(
+                clients.get('s3'),
+                target.manifest_bucket_name,
+                target.manifest_key,
+                timeout=target.wait_time
+            )
+
+        artifact_versions = None
+        if target.model_artifact_urls:
+            from versions import ArtifactVersions
+            artifact_versions = ArtifactVersions(clients.get('s3'), state_store, target.model_artifact_urls)
+
+        artifact_validator = None
+        if target.artifact_validation:
+            from validation import ArtifactValidator
+            artifact_validator = ArtifactValidator(clients.get('s3'), target.artifact_validation)
+
+        endpoint_warmer = None
+        pending_warm_up = None
+        if target.warm_up_enabled:
+            from readiness import EndpointWarmer, PendingWarmUp
+            endpoint_warmer = EndpointWarmer(
+                clients.get('sagemaker-runtime'),
+                target.endpoint_name,
+                target.warm_up_payloads
+            )
+            # The refresh state machine warms the endpoint up by polling it, instead of state change events.
+            if not target.state_machine_arn:
+                pending_warm_up = PendingWarmUp(state_store)
+
+        latency_gate = None
+        if target.latency_gate:
+            from latency_gate import LatencyGate
+            latency_gate = LatencyGate(
+                sagemaker_client,
+                clients.get('sagemaker-runtime'),
+                target.latency_gate,
+                target.warm_up_payloads
+            )
+
+        instance_recommender = None
+        if target.instance_recommendation:
+            from recommendation import InstanceRecommender
+            instance_recommender = InstanceRecommender(
+                sagemaker_client,
+                clients.get('sagemaker-runtime'),
+                clients.get('s3'),
+                target.instance_recommendation,
+                target.warm_up_payloads
+            )
+
+        model_generation = None
+        if target.model_generation_parameter_name:
+            from generation import ModelGeneration
+            model_generation = ModelGeneration(StateStore(clients.get('ssm'), target.model_generation_parameter_name))
+
+        version_pinner = None
+        if target.version_pinning:
+            from pinning import VersionPinner
+            version_pinner = VersionPinner(
+                sagemaker_client,
+                clients.get('s3'),
+                state_store,
+                target.version_pinning,
+                target.endpoint_config_a_name
+            )
+
+        return cls(
+            sagemaker_client=sagemaker_client,
+            state_store=state_store,
+            manifest_gate=manifest_gate,
+            artifact_versions=artifact_versions,
+            artifact_validator=artifact_validator,
+            endpoint_warmer=endpoint_warmer,
+            pending_warm_up=pending_warm_up,
+            latency_gate=latency_gate,
+            instance_recommender=instance_recommender,
+            model_generation=model_generation,
+            version_pinner=version_pinner
+        )
+
+
+class RefreshPipeline:
+    """
+    Endpoint refresh, shared by the refresh function and the refresh state machine steps.
+
+    - ``resolve`` - decides whether the endpoint is updated and resolves its new configuration: waits
+      for the manifest, skips unchanged or invalid model artifacts, pins a new generation, applies
+      the instance recommendation and load-tests the configuration;
+    - ``update`` - starts the endpoint update and records it.
+
+    A busy endpoint defers the refresh in either of them, if busy updates are deferred: a single
+    follow-up refresh is started once the endpoint is back in service. Otherwise, the refresh is skipped.
+
+    :param target: Refreshed endpoint's settings.
+    :param components: Refresh pipeline components.
+    :param metrics: Refresh pipeline metrics.
+    """
+
+    def __init__(self, target: RefreshTarget, components: RefreshComponents, metrics: Metrics):
+        self.__target = target
+        self.__components = components
+        self.__metrics = metrics
+        self.__pending_refresh = PendingRefresh(components.state_store) if target.defer_busy_updates else None
+        self.__upload_tracker = UploadTracker(components.state_store) if components.state_store else None
+
+    def resolve(self) -> Optional[Dict[str, Any]]:
+        """
+        Decides whether the endpoint is updated and resolves the endpoint configuration it is updated to.
+
+        :return: Update plan, i.e. ``endpoint_config_name``, ``pinned_endpoint_config_name`` and model
+            artifact ``versions``, or None, if the update is skipped or deferred.
+        """
+
+        components = self.__components
+        if components.manifest_gate:
+            components.manifest_gate.wait()
+
+        versions = None
+        if components.artifact_versions:
+            versions = components.artifact_versions.current()
+            changed = components.artifact_versions.changed(versions)
+            if not changed:
+                print('Skipping endpoint update, none of the model artifacts changed.')
+                self.__skipped()
+                return None
+
+            print(f'Model artifacts changed: {changed}.')
+
+        if components.artifact_validator and not components.artifact_validator.passes(self.__metrics):
+            print('Skipping endpoint update, model artifacts did not pass validation.')
+            self.__skipped()
+            return None
+
+        with self.__metrics.timer('DescribeEndpointLatency'):
+            description = components.sagemaker_client.describe_endpoint(EndpointName=self.__target.endpoint_name)
+        pinned_endpoint_config_name = None
+        if components.version_pinner and description['EndpointStatus'] not in BUSY_STATUSES:
+            pinned_endpoint_config_name = components.version_pinner.pin(description['EndpointConfigName'])
+        # Handles A & B endpoint configurations names swapping. See ``RefreshFunction`` docs
+        # or README for more information about it.
+        endpoint_config_name = next_endpoint_config_name(
+            description,
+            self.__target.endpoint_config_a_name,
+            self.__target.endpoint_config_b_name,
+            pinned_endpoint_config_name
+        )
+        if endpoint_config_name is None:
+            self.__busy(description)
+            return None
+
+        print(f'Currently active endpoint configuration name: "{description["EndpointConfigName"]}"')
+
+        if components.instance_recommender:
+            # The endpoint is updated to the recommended configuration, if the recommendation is applied.
+            endpoint_config_name = components.instance_recommender.recommended_endpoint_config_name(
+                endpoint_config_name,
+                description['EndpointConfigName'],
+                versions,
+                self.__metrics
+            )
+
+        if components.latency_gate and not components.latency_gate.promotes(endpoint_config_name, self.__metrics):
+            print('Skipping endpoint update, the new endpoint configuration did not pass the latency gate.')
+            if pinned_endpoint_config_name:
+                components.version_pinner.discard(pinned_endpoint_config_name)
+            self.__skipped()
+            return None
+
+        return {
+            'endpoint_config_name': endpoint_config_name,
+            'pinned_endpoint_config_name': pinned_endpoint_config_name,
+            'versions': versions,
+        }
+
+    def update(self, plan: Dict[str, Any]) -> bool:
+        """
+        Starts the endpoint update to the resolved endpoint configuration.
+
+        :param plan: Update plan, as returned by ``resolve()``.
+
+        :return: True, if the update is started, or False, if the endpoint became busy and the update is deferred.
+        """
+
+        components = self.__components
+        endpoint_config_name = plan['endpoint_config_name']
+        try:
+            with self.__metrics.timer('UpdateEndpointLatency'):
+                components.sagemaker_client.update_endpoint(**update_endpoint_arguments(
+                    self.__target.endpoint_name,
+                    endpoint_config_name,
+                    self.__target.deployment_config,
+                    self.__target.retain_variant_properties
+                ))
+        except ClientError:
+            # The endpoint may have become busy since it was described, e.g. by a system update.
+            description = components.sagemaker_client.describe_endpoint(EndpointName=self.__target.endpoint_name)
+            if description['EndpointStatus'] not in BUSY_STATUSES:
+                raise
+
+            if plan.get('pinned_endpoint_config_name'):
+                components.version_pinner.discard(plan['pinned_endpoint_config_name'])
+            self.__busy(description)
+            return False
+
+        print(f'Endpoint started being updated to a new endpoint configuration: "{endpoint_config_name}"')
+
+        if self.__pending_refresh:
+            self.__pending_refresh.clear()
+        if components.artifact_versions:
+            components.artifact_versions.commit(plan['versions'])
+        if components.model_generation:
+            components.model_generation.advance(endpoint_config_name, plan['versions'])
+
+        self.__metrics.set_endpoint_config_name(endpoint_config_name)
+        if self.__upload_tracker:
+            uploads = self.__upload_tracker.updated()
+            self.__metrics.put('EventsCoalesced', uploads['count'], 'Count')
+            debounced = self.__target.debounce_queue_url or self.__target.state_machine_arn
+            if debounced and uploads['first_received_at']:
+                self.__metrics.put('DebounceWait', (time.time() - uploads['first_received_at']) * 1000)
+
+        if components.pending_warm_up:
+            # The endpoint is warmed up by its in service state change event, instead of waiting for it.
+            components.pending_warm_up.mark(endpoint_config_name)
+
+        return True
+
+    def __busy(self, description: Dict[str, Any]) -> None:
+        if not self.__pending_refresh:
+            print(f'Endpoint is busy, status: "{description["EndpointStatus"]}". Skipping the update.')
+            self.__skipped()
+            return
+
+        print(f'Endpoint is busy, status: "{description["EndpointStatus"]}". Deferring the update.')
+        self.__pending_refresh.mark()
+
+    def __skipped(self) -> None:
+        if self.__upload_tracker:
+            self.__upload_tracker.skipped()
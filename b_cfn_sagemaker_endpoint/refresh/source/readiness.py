@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from invocation import DEFAULT_PAYLOADS, invoke
+from state import StateStore
+
+
+class PendingWarmUp:
+    """
+    Tracks a warm-up of an updated endpoint, deferred until it is back in service.
+
+    Waiting for an update to complete would block the single concurrency refresh function for
+    several minutes. Instead, the update marks a pending warm-up in the refresh state, and the
+    endpoint's in service state change event warms it up.
+
+    :param state_store: Refresh state store.
+    """
+
+    def __init__(self, state_store: StateStore):
+        self.__state_store = state_store
+
+    def endpoint_config_name(self) -> Optional[str]:
+        """
+        Returns the endpoint configuration the endpoint was updated to, if its warm-up is pending.
+        """
+
+        return self.__state_store.load().get('pending_warm_up')
+
+    def mark(self, endpoint_config_name: str) -> None:
+        self.__set(endpoint_config_name)
+
+    def clear(self) -> None:
+        self.__set(None)
+
+    def __set(self, endpoint_config_name: Optional[str]) -> None:
+        state = self.__state_store.load()
+        if state.get('pending_warm_up') != endpoint_config_name:
+            state['pending_warm_up'] = endpoint_config_name
+            self.__state_store.save(state)
+
+
+class EndpointWarmer:
+    """
+    Warm-up stage of a refreshed endpoint.
+
+    After ``update_endpoint()`` the endpoint is served by fresh containers that still have to lazily
+    load models and compile their inference paths. Once the endpoint is back ``InService``, this
+    stage sends synthetic payloads to every production variant, so that the first actual requests
+    do not pay these latencies.
+
+    :param runtime_client: ``boto3`` SageMaker runtime client.
+    :param endpoint_name: SageMaker endpoint name.
+    :param payloads: Warm-up invocation payloads. By default, a single empty JSON object.
+    """
+
+    def __init__(
+            self,
+            runtime_client: Any,
+            endpoint_name: str,
+            payloads: Optional[List[Dict[str, Any]]] = None
+    ):
+        self.__runtime_client = runtime_client
+        self.__endpoint_name = endpoint_name
+        self.__payloads = payloads or DEFAULT_PAYLOADS
+
+    def warm(self, description: Dict[str, Any]) -> Dict[str, List[float]]:
+        """
+        Sends every warm-up payload to every production variant of the endpoint, variants in parallel.
+
+        :param description: Endpoint description.
+
+        :return: Mapping of variant names and their warm-up latencies in seconds.
+        """
+
+        variant_names = [variant['VariantName'] for variant in description.get('ProductionVariants', [])]
+        if not variant_names:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=len(variant_names)) as executor:
+            latencies = dict(zip(variant_names, executor.map(self.__warm, variant_names)))
+
+        for variant_name, variant_latencies in latencies.items():
+            formatted = ', '.join(f'{latency * 1000:.0f}' for latency in variant_latencies)
+            print(f'Variant "{variant_name}" warm-up latencies (ms): {formatted}.')
+
+        return latencies
+
+    def __warm(self, variant_name: str) -> List[float]:
+        return [
+            invoke(self.__runtime_client, self.__endpoint_name, payload, TargetVariant=variant_name)
+            for payload in self.__payloads
+        ]
@@ -0,0 +1,325 @@
+import hashlib
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from latency_gate import LoadGenerator, StagingEndpoint
+from metrics import Metrics
+from swap import ENDPOINT_CONFIG_KEYS
+
+
+class InstanceRecommender:
+    """
+    Benchmarks new model artifacts across candidate instance types and recommends the most cost
+    efficient one.
+
+    Each candidate is deployed, in parallel, to its own short-lived endpoint of a candidate endpoint
+    configuration: a copy of the endpoint configuration the endpoint is about to be updated to, with
+    every production variant on a single instance of the candidate type. Payloads are replayed
+    against each candidate and its throughput, latencies and requests per dollar (throughput over
+    the candidate's hourly price) are measured. The recommended candidate is the one with the most
+    requests per dollar, among candidates within the latency threshold and the error rate. If a
+    target throughput is set, the instance count is recommended too.
+
+    Results are persisted as S3 objects named after a fingerprint of model artifact versions, hence
+    a repeated upload of the same artifacts reuses them. Errored candidates are not persisted, hence
+    they are benchmarked again by the next refresh of the same artifacts. If enabled, the recommended
+    instance type and count are applied to a copy of the endpoint configuration, that the endpoint is
+    updated to instead. Copies alternate between two names ("<name prefix>applied-a" and "-b"), hence
+    the one the endpoint serves is never replaced, while endpoint configurations managed by
+    CloudFormation are left intact. Copies are not managed by CloudFormation either, hence they are
+    not deleted with the stack.
+
+    :param sagemaker_client: ``boto3`` SageMaker client.
+    :param runtime_client: ``boto3`` SageMaker runtime client.
+    :param s3_client: ``boto3`` S3 client.
+    :param settings: Recommendation settings, i.e. ``InstanceRecommendation.to_settings()``.
+    :param payloads: Fallback invocation payloads, e.g. warm-up payloads, if the settings have none.
+    :param clock: Function that returns a monotonic time in seconds.
+    :param sleep: Function that blocks for the given number of seconds.
+    """
+
+    def __init__(
+            self,
+            sagemaker_client: Any,
+            runtime_client: Any,
+            s3_client: Any,
+            settings: Dict[str, Any],
+            payloads: Optional[List[Dict[str, Any]]] = None,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], Any] = time.sleep
+    ):
+        self.__sagemaker_client = sagemaker_client
+        self.__runtime_client = runtime_client
+        self.__s3_client = s3_client
+        self.__settings = settings
+        self.__payloads = settings.get('payloads') or payloads
+        self.__clock = clock
+        self.__sleep = sleep
+
+    def recommend(
+            self,
+            endpoint_config_name: str,
+            versions: Optional[Dict[str, Optional[str]]],
+            metrics: Metrics
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Recommends an instance type and count of the endpoint configuration, benchmarking its
+        candidates, unless results of the same artifact versions are persisted already.
+
+        :param endpoint_config_name: Endpoint configuration name the endpoint is about to be updated to.
+        :param versions: Versions of model artifacts. See ``ArtifactVersions``.
+        :param metrics: Refresh pipeline metrics.
+
+        :return: Recommendation, i.e. ``instance_type`` and ``instance_count``, or None, if no
+            candidate meets the thresholds.
+        """
+
+        if versions is None:
+            print('Skipping instance recommendation, model artifact versions are unknown.')
+            return None
+
+        artifacts = hashlib.sha256(json.dumps(versions, sort_keys=True).encode()).hexdigest()
+        key = f'{self.__settings["prefix"]}{artifacts}.json'
+
+        results = self.__load(key) or {'artifacts': artifacts, 'candidates': []}
+        # Errored candidates are never persisted, hence they are benchmarked again by the next refresh,
+        # e.g. if they failed on a transient error.
+        benchmarked = {
+            candidate['instance_type']: candidate
+            for candidate in results['candidates']
+            if 'error' not in candidate
+        }
+        missing = [
+            index for index, candidate in enumerate(self.__settings['candidates'])
+            if candidate['instance_type'] not in benchmarked
+        ]
+        if benchmarked:
+            print(f'Reusing instance benchmark results of artifacts "{artifacts}".')
+        if missing:
+            with metrics.timer('InstanceBenchmarkDuration'):
+                candidates = self.__benchmark(endpoint_config_name, missing)
+            succeeded = [candidate for candidate in candidates if 'error' not in candidate]
+            if succeeded:
+                results['candidates'] = [*benchmarked.values(), *succeeded]
+                results['recommendation'] = self.__select(results['candidates'])
+                self.__s3_client.put_object(
+                    Bucket=self.__settings['bucket'],
+                    Key=key,
+                    Body=json.dumps(results, indent=4).encode(),
+                    ContentType='application/json'
+                )
+            benchmarked.update({candidate['instance_type']: candidate for candidate in candidates})
+
+        candidates = [benchmarked[candidate['instance_type']] for candidate in self.__settings['candidates']]
+        for candidate in candidates:
+            formatted = candidate.get('error') or (
+                f'{candidate["throughput"]:.1f} requests/s, p50 {candidate["p50"]:.0f} ms, '
+                f'p99 {candidate["p99"]:.0f} ms, {candidate["requests_per_dollar"]:.0f} requests/$'
+            )
+            print(f'Instance type "{candidate["instance_type"]}": {formatted}.')
+
+        recommendation = self.__select(candidates)
+        if recommendation is None:
+            print('No instance type candidate meets the thresholds.')
+            return None
+
+        instance_count = recommendation['instance_count'] or 'unchanged'
+        print(f'Recommended instance type: "{recommendation["instance_type"]}", instance count: {instance_count}.')
+        metrics.put('RecommendedRequestsPerDollar', recommendation['requests_per_dollar'], 'None')
+
+        return recommendation
+
+    def recommended_endpoint_config_name(
+            self,
+            endpoint_config_name: str,
+            active_endpoint_config_name: str,
+            versions: Optional[Dict[str, Optional[str]]],
+            metrics: Metrics
+    ) -> str:
+        """
+        Recommends an instance type and count of the endpoint configuration (see ``recommend()``)
+        and, if enabled, applies them to a copy of it.
+
+        :param endpoint_config_name: Endpoint configuration name the endpoint is about to be updated to.
+        :param active_endpoint_config_name: Endpoint configuration name the endpoint currently serves.
+        :param versions: Versions of model artifacts. See ``ArtifactVersions``.
+        :param metrics: Refresh pipeline metrics.
+
+        :return: Name of the endpoint configuration to update the endpoint to: the copy with the
+            recommended instances, or the given one, if the recommendation is not applied.
+        """
+
+        recommendation = self.recommend(endpoint_config_name, versions, metrics)
+        if recommendation is None or not self.__settings.get('apply'):
+            return endpoint_config_name
+
+        return self.__apply(endpoint_config_name, active_endpoint_config_name, recommendation, metrics)
+
+    def __load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.__s3_client.get_object(Bucket=self.__settings['bucket'], Key=key)
+        except ClientError as ex:
+            if ex.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+
+        return json.loads(response['Body'].read())
+
+    def __benchmark(self, endpoint_config_name: str, indexes: List[int]) -> List[Dict[str, Any]]:
+        description = self.__sagemaker_client.describe_endpoint_config(EndpointConfigName=endpoint_config_name)
+        candidates = self.__settings['candidates']
+        with ThreadPoolExecutor(max_workers=len(indexes)) as executor:
+            return list(executor.map(
+                lambda index: self.__benchmark_candidate(description, index, candidates[index]),
+                indexes
+            ))
+
+    def __benchmark_candidate(
+            self,
+            description: Dict[str, Any],
+            index: int,
+            candidate: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        name = f'{self.__settings["name_prefix"]}{index}'
+        result = {'instance_type': candidate['instance_type'], 'hourly_price': candidate['hourly_price']}
+
+        deadline = self.__clock() + self.__settings.get('timeout', 600)
+        load_deadline = deadline - StagingEndpoint.CLEANUP_TIME
+        self.__delete_endpoint_config(name)
+        staging_endpoint = StagingEndpoint(self.__sagemaker_client, name, self.__clock, self.__sleep)
+        try:
+            self.__sagemaker_client.create_endpoint_config(**endpoint_config_arguments(
+                description,
+                name,
+                candidate['instance_type'],
+                instance_count=1
+            ))
+            staging_endpoint.start(name, load_deadline)
+            report = LoadGenerator(
+                self.__runtime_client,
+                name,
+                self.__payloads,
+                concurrency=self.__settings.get('concurrency', 4),
+                requests=self.__settings.get('requests', 200),
+                clock=self.__clock,
+                deadline=load_deadline
+            ).run()
+        except Exception as ex:
+            # E.g. the instance type is not supported by the model container or its quota is exceeded.
+            return {**result, 'error': repr(ex)}
+        finally:
+            staging_endpoint.delete(deadline)
+            self.__delete_endpoint_config(name)
+
+        percentiles = report.percentiles()
+        return {
+            **result,
+            'throughput': report.throughput,
+            'p50': percentiles['p50'] * 1000,
+            'p99': percentiles['p99'] * 1000,
+            'error_rate': report.error_rate,
+            'requests_per_dollar': report.throughput * 3600 / candidate['hourly_price'],
+        }
+
+    def __select(self, candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        p99_threshold = self.__settings.get('p99')
+        eligible = [
+            candidate for candidate in candidates
+            if 'error' not in candidate
+            and candidate['throughput'] > 0
+            and candidate['error_rate'] <= self.__settings.get('max_error_rate', 0.0)
+            and (p99_threshold is None or candidate['p99'] <= p99_threshold)
+        ]
+        if not eligible:
+            return None
+
+        best = max(eligible, key=lambda candidate: candidate['requests_per_dollar'])
+        target_throughput = self.__settings.get('target_throughput')
+        return {
+            'instance_type': best['instance_type'],
+            # Per-instance throughput is assumed to scale linearly with the instance count.
+            'instance_count': math.ceil(target_throughput / best['throughput']) if target_throughput else None,
+            'requests_per_dollar': best['requests_per_dollar'],
+        }
+
+    def __apply(
+            self,
+            endpoint_config_name: str,
+            active_endpoint_config_name: str,
+            recommendation: Dict[str, Any],
+            metrics: Metrics
+    ) -> str:
+        description = self.__sagemaker_client.describe_endpoint_config(EndpointConfigName=endpoint_config_name)
+        applied_endpoint_config_name = next(
+            f'{self.__settings["name_prefix"]}applied-{slot}'
+            for slot in ('a', 'b')
+            if f'{self.__settings["name_prefix"]}applied-{slot}' != active_endpoint_config_name
+        )
+        arguments = endpoint_config_arguments(
+            description,
+            applied_endpoint_config_name,
+            recommendation['instance_type'],
+            recommendation['instance_count']
+        )
+        if arguments['ProductionVariants'] == description['ProductionVariants']:
+            print(f'Endpoint configuration "{endpoint_config_name}" already uses the recommended instances.')
+            return endpoint_config_name
+
+        # Endpoint configurations are immutable, hence the inactive copy is recreated under the same name.
+        self.__delete_endpoint_config(applied_endpoint_config_name)
+        self.__sagemaker_client.create_endpoint_config(**arguments)
+        metrics.put('InstanceRecommendationsApplied', 1, 'Count')
+        print(
+            f'Endpoint configuration "{applied_endpoint_config_name}" is created from "{endpoint_config_name}" '
+            f'with the recommended instances.'
+        )
+
+        return applied_endpoint_config_name
+
+    def __delete_endpoint_config(self, endpoint_config_name: str) -> None:
+        try:
+            self.__sagemaker_client.delete_endpoint_config(EndpointConfigName=endpoint_config_name)
+        except ClientError as ex:
+            if 'Could not find' not in str(ex):
+                raise
+
+
+def endpoint_config_arguments(
+        description: Dict[str, Any],
+        endpoint_config_name: str,
+        instance_type: str,
+        instance_count: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Creates ``create_endpoint_config()`` arguments of a described configuration on other instances.
+
+    :param description: Endpoint configuration description, as returned by ``describe_endpoint_config()``.
+    :param endpoint_config_name: Name of the created endpoint configuration.
+    :param instance_type: Instance type of every instance-backed production variant.
+    :param instance_count: Initial instance count of every instance-backed production variant.
+        By default, counts of the described configuration are kept.
+
+    :return: Keyword arguments of ``create_endpoint_config()``.
+    """
+
+    variants = []
+    for variant in description['ProductionVariants']:
+        variant = dict(variant)
+        # Serverless variants have no instances.
+        if 'InstanceType' in variant:
+            variant['InstanceType'] = instance_type
+            if instance_count:
+                variant['InitialInstanceCount'] = instance_count
+        variants.append(variant)
+
+    arguments = {'EndpointConfigName': endpoint_config_name, 'ProductionVariants': variants}
+    for key in ENDPOINT_CONFIG_KEYS:
+        if description.get(key):
+            arguments[key] = description[key]
+
+    return arguments
@@ -0,0 +1,192 @@
+import json
+import os
+import time
+import traceback
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import unquote_plus
+
+import clients
+import index
+from intake import unwrap_records
+from target import RefreshTarget
+
+
+class RouteTable:
+    """
+    Lookup table of endpoints refreshed by the shared refresh router.
+
+    Each endpoint's route is a separate SSM parameter under a common path. Route holds the same
+    settings as a dedicated refresh function's environment, plus ``ROUTE_ID`` and ``ROUTE_RULES``,
+    a list of ``{"bucket", "prefix", "suffix"}`` rules of bucket events it handles. Routes
+    are cached for ``ttl`` seconds, so newly deployed endpoints are picked up by warm containers.
+
+    :param ssm_client: ``boto3`` SSM client.
+    :param path: SSM parameters path of routes.
+    :param ttl: Time (in seconds) to cache routes for.
+    :param clock: Function that returns current time in seconds.
+    """
+
+    def __init__(self, ssm_client: Any, path: str, ttl: float = 60, clock: Callable[[], float] = time.time):
+        self.__ssm_client = ssm_client
+        self.__path = path
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__routes: Dict[str, Dict[str, Any]] = {}
+        self.__loaded_at: Optional[float] = None
+
+    def get(self, route_id: str) -> Optional[Dict[str, Any]]:
+        return self.__load().get(route_id)
+
+    def match(self, bucket_name: str, key: str) -> List[str]:
+        """
+        Finds routes of a bucket object.
+
+        :param bucket_name: Bucket name.
+        :param key: Object key.
+
+        :return: Ids of matching routes.
+        """
+
+        return [
+            route_id
+            for route_id, route in self.__load().items()
+            if any(
+                bucket_name == rule['bucket'] and key.startswith(rule['prefix']) and key.endswith(rule['suffix'])
+                for rule in route['ROUTE_RULES']
+            )
+        ]
+
+    def match_endpoint(self, endpoint_name: str) -> List[str]:
+        """
+        Finds routes of an endpoint.
+
+        :param endpoint_name: SageMaker endpoint name.
+
+        :return: Ids of matching routes.
+        """
+
+        return [
+            route_id
+            for route_id, route in self.__load().items()
+            if route['SAGEMAKER_ENDPOINT_NAME'] == endpoint_name
+        ]
+
+    def __load(self) -> Dict[str, Dict[str, Any]]:
+        if self.__loaded_at is not None and self.__clock() - self.__loaded_at < self.__ttl:
+            return self.__routes
+
+        routes = {}
+        kwargs = {'Path': self.__path, 'Recursive': False}
+        while True:
+            response = self.__ssm_client.get_parameters_by_path(**kwargs)
+            for parameter in response['Parameters']:
+                route = json.loads(parameter['Value'])
+                routes[route['ROUTE_ID']] = route
+
+            if not response.get('NextToken'):
+                break
+            kwargs['NextToken'] = response['NextToken']
+
+        self.__routes = routes
+        self.__loaded_at = self.__clock()
+        return self.__routes
+
+
+ROUTE_TABLE: Optional[RouteTable] = None
+
+
+def handler(event: Dict[str, Any], context: Any) -> Optional[Dict[str, Any]]:
+    print(f'Event received: {json.dumps(event)}')
+
+    global ROUTE_TABLE
+    if ROUTE_TABLE is None:
+        ROUTE_TABLE = RouteTable(clients.get('ssm'), os.environ['ROUTES_PATH'])
+
+    records = event.get('Records', [])
+    if records and records[0].get('eventSourceARN', '').endswith('.fifo'):
+        return dispatch(records, ROUTE_TABLE)
+
+    route(records, ROUTE_TABLE, clients.get('sqs'), os.environ['DISPATCH_QUEUE_URL'])
+
+
+def route(records: List[Dict[str, Any]], route_table: RouteTable, sqs_client: Any, dispatch_queue_url: str) -> None:
+    """
+    Routes intake queue records to their endpoints.
+
+    Records of each endpoint are sent as a single message to the FIFO dispatch queue, grouped by
+    the endpoint's route id. Each message is dispatched by its own invocation, hence updates of a
+    single endpoint are serialized, while unrelated endpoints are refreshed in parallel.
+
+    :param records: Intake queue records, i.e. S3 bucket events, endpoint state change events and debounce ticks.
+    :param route_table: Routes lookup table.
+    :param sqs_client: ``boto3`` SQS client.
+    :param dispatch_queue_url: FIFO dispatch queue URL.
+
+    :return: No return.
+    """
+
+    s3_records, ticks = unwrap_records(records)
+
+    messages = defaultdict(lambda: {'records': [], 'ticks': []})
+    for record in s3_records:
+        bucket_name = record['s3']['bucket']['name']
+        key = unquote_plus(record['s3']['object']['key'])
+        route_ids = route_table.match(bucket_name, key)
+        if not route_ids:
+            print(f'No route found for object "{key}" of bucket "{bucket_name}".')
+
+        for route_id in route_ids:
+            messages[route_id]['records'].append(record)
+
+    for tick in ticks:
+        # Endpoint status ticks are routed by the endpoint name, while debounce ticks carry their route id.
+        route_ids = [tick['route']] if 'route' in tick else route_table.match_endpoint(tick['endpoint_name'])
+        for route_id in route_ids:
+            messages[route_id]['ticks'].append(tick)
+
+    for route_id, message in messages.items():
+        sqs_client.send_message(
+            QueueUrl=dispatch_queue_url,
+            MessageBody=json.dumps({'route': route_id, **message}, sort_keys=True),
+            MessageGroupId=route_id
+        )
+        print(f'Dispatched {len(message["records"])} record(-s) and {len(message["ticks"])} tick(-s) to "{route_id}".')
+
+
+def dispatch(records: List[Dict[str, Any]], route_table: RouteTable) -> Dict[str, Any]:
+    """
+    Refreshes endpoints of dispatch queue records.
+
+    A failure of one endpoint does not fail the others. Failed records, together with any later
+    records of the same endpoint, are reported back to be retried in order.
+
+    :param records: FIFO dispatch queue records.
+    :param route_table: Routes lookup table.
+
+    :return: Partial batch response.
+    """
+
+    failures = []
+    failed_groups = set()
+    for record in records:
+        group = record['attributes']['MessageGroupId']
+        if group in failed_groups:
+            failures.append({'itemIdentifier': record['messageId']})
+            continue
+
+        message = json.loads(record['body'])
+        route = route_table.get(message['route'])
+        if route is None:
+            print(f'Dropping message of unknown route "{message["route"]}".')
+            continue
+
+        try:
+            target = RefreshTarget.from_environment(route).with_invocation_payloads(clients.get('ssm'))
+            index.process(target, message['records'], message['ticks'])
+        except Exception:
+            traceback.print_exc()
+            failed_groups.add(group)
+            failures.append({'itemIdentifier': record['messageId']})
+
+    return {'batchItemFailures': failures}
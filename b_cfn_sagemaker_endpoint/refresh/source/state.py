@@ -0,0 +1,49 @@
+import json
+from typing import Any, Dict
+
+
+class StateStore:
+    """
+    Small JSON document store of the endpoint refresh state, backed by a single SSM parameter.
+
+    :param ssm_client: ``boto3`` SSM client.
+    :param parameter_name: Name of the SSM parameter that holds the state document.
+    :param tier: SSM parameter tier, that limits the size of the state document.
+    """
+
+    # Maximum sizes (in bytes) of parameter values per parameter tier.
+    MAX_SIZES = {'Standard': 4096, 'Advanced': 8192}
+
+    def __init__(self, ssm_client: Any, parameter_name: str, tier: str = 'Standard'):
+        self.__ssm_client = ssm_client
+        self.__parameter_name = parameter_name
+        self.__tier = tier
+
+    def load(self) -> Dict[str, Any]:
+        response = self.__ssm_client.get_parameter(Name=self.__parameter_name)
+        return json.loads(response['Parameter']['Value'] or '{}')
+
+    def save(self, state: Dict[str, Any]) -> None:
+        self.__ssm_client.put_parameter(
+            Name=self.__parameter_name,
+            Value=self.__serialize(state),
+            Type='String',
+            Tier=self.__tier,
+            Overwrite=True
+        )
+
+    def fits(self, state: Dict[str, Any], headroom: int = 0) -> bool:
+        """
+        Tells whether a state document fits into the parameter.
+
+        :param state: State document.
+        :param headroom: Size (in bytes) that must be left for other state, written later on.
+
+        :return: True, if the state document can be saved.
+        """
+
+        return len(self.__serialize(state).encode()) + headroom <= self.MAX_SIZES[self.__tier]
+
+    @staticmethod
+    def __serialize(state: Dict[str, Any]) -> str:
+        return json.dumps(state, sort_keys=True)
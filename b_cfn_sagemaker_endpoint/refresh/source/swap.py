@@ -0,0 +1,126 @@
+from typing import Any, Dict, Optional
+
+# Endpoint statuses that do not allow an update to be started.
+BUSY_STATUSES = ('Creating', 'Updating', 'SystemUpdating', 'RollingBack')
+
+# Endpoint statuses that an update does not recover from.
+FAILED_STATUSES = ('Failed', 'OutOfService')
+
+# Update statuses, as reported by ``update_status()``.
+IN_SERVICE = 'InService'
+UPDATING = 'Updating'
+FAILED = 'Failed'
+
+# Endpoint configuration settings, that are copied from a described configuration to its copies.
+ENDPOINT_CONFIG_KEYS = (
+    'DataCaptureConfig',
+    'KmsKeyId',
+    'AsyncInferenceConfig',
+    'ExplainerConfig',
+)
+
+# Bounds of the update status polling backoff, in seconds.
+MIN_BACKOFF = 5
+MAX_BACKOFF = 60
+
+
+def next_endpoint_config_name(
+        description: Dict[str, Any],
+        endpoint_config_a_name: str,
+        endpoint_config_b_name: str,
+        pinned_endpoint_config_name: Optional[str] = None
+) -> Optional[str]:
+    """
+    Resolves the endpoint configuration to swap the endpoint to. See ``RefreshFunction`` docs
+    or README for more information about A & B endpoint configurations swapping.
+
+    :param description: Endpoint description, as returned by ``describe_endpoint()``.
+    :param endpoint_config_a_name: SageMaker endpoint configuration A name.
+    :param endpoint_config_b_name: SageMaker endpoint configuration B name.
+    :param pinned_endpoint_config_name: Version-pinned (see ``VersionPinner``) or recommended (see
+        ``InstanceRecommender``) endpoint configuration, that is resolved instead of the inactive A/B
+        configuration.
+
+    :return: Name of the inactive endpoint configuration, or None, if the endpoint is busy,
+        e.g. still being updated, and can not be updated now.
+    """
+
+    if description['EndpointStatus'] in BUSY_STATUSES:
+        return None
+
+    if pinned_endpoint_config_name:
+        return pinned_endpoint_config_name
+
+    # An endpoint serving neither of them, e.g. a recommended configuration, is swapped back to A.
+    return {
+        endpoint_config_a_name: endpoint_config_b_name,
+        endpoint_config_b_name: endpoint_config_a_name,
+    }.get(description['EndpointConfigName'], endpoint_config_a_name)
+
+
+def update_endpoint_arguments(
+        endpoint_name: str,
+        endpoint_config_name: str,
+        deployment_config: Optional[Dict[str, Any]] = None,
+        retain_variant_properties: bool = False
+) -> Dict[str, Any]:
+    """
+    Creates ``update_endpoint()`` arguments of an A/B configuration swap.
+
+    :param endpoint_name: SageMaker endpoint name.
+    :param endpoint_config_name: Name of the endpoint configuration to swap the endpoint to.
+    :param deployment_config: Endpoint deployment configuration, e.g. blue/green traffic shifting
+        and auto-rollback alarms. By default, all traffic is shifted at once.
+    :param retain_variant_properties: Retains current variant properties, e.g. instance counts set
+        by auto scaling. By default, variants are reset to properties of the new configuration.
+
+    :return: Keyword arguments of ``update_endpoint()``.
+    """
+
+    arguments = {
+        'EndpointName': endpoint_name,
+        'EndpointConfigName': endpoint_config_name,
+        'RetainAllVariantProperties': retain_variant_properties,
+    }
+    if deployment_config:
+        arguments['DeploymentConfig'] = deployment_config
+
+    return arguments
+
+
+def update_status(description: Dict[str, Any], endpoint_config_name: str) -> str:
+    """
+    Classifies the progress of an update to the given endpoint configuration.
+
+    An endpoint, that is back in service with any other configuration, has been rolled back,
+    hence its update failed.
+
+    :param description: Endpoint description, as returned by ``describe_endpoint()``.
+    :param endpoint_config_name: Name of the endpoint configuration the endpoint is being updated to.
+
+    :return: One of ``IN_SERVICE``, ``UPDATING`` or ``FAILED``.
+    """
+
+    status = description['EndpointStatus']
+    if status in FAILED_STATUSES:
+        return FAILED
+
+    if status == 'InService':
+        return IN_SERVICE if description['EndpointConfigName'] == endpoint_config_name else FAILED
+
+    return UPDATING
+
+
+def next_backoff(backoff: Optional[float] = None) -> float:
+    """
+    Doubles the update status polling backoff, within ``MIN_BACKOFF`` and ``MAX_BACKOFF`` bounds.
+
+    :param backoff: Current backoff in seconds. None before the first poll.
+
+    :return: Next backoff in seconds.
+    """
+
+    if backoff is None:
+        return MIN_BACKOFF
+
+    return min(max(backoff * 2, MIN_BACKOFF), MAX_BACKOFF)
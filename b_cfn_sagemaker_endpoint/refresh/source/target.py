@@ -0,0 +1,116 @@
+import json
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class RefreshTarget:
+    """
+    Refreshed endpoint's settings.
+
+    Settings are read from a mapping of environment variable names to their values. It is either
+    the refresh function's environment or, in shared refresh router mode, an endpoint's route.
+    Invocation payloads are read from their SSM parameter by ``with_invocation_payloads()``.
+    """
+
+    endpoint_name: str
+    endpoint_config_a_name: str
+    endpoint_config_b_name: str
+    wait_time: float
+    state_parameter_name: Optional[str] = None
+    debounce_queue_url: Optional[str] = None
+    manifest_bucket_name: Optional[str] = None
+    manifest_key: Optional[str] = None
+    event_intake_enabled: bool = False
+    model_artifact_urls: Optional[List[str]] = None
+    route_id: Optional[str] = None
+    multi_model_data_urls: List[str] = field(default_factory=list)
+    warm_up_payloads: Optional[List[Dict[str, Any]]] = None
+    warm_up_enabled: bool = False
+    state_machine_arn: Optional[str] = None
+    deployment_config: Optional[Dict[str, Any]] = None
+    retain_variant_properties: bool = False
+    model_generation_parameter_name: Optional[str] = None
+    latency_gate: Optional[Dict[str, Any]] = None
+    instance_recommendation: Optional[Dict[str, Any]] = None
+    version_pinning: Optional[Dict[str, Any]] = None
+    artifact_validation: Optional[Dict[str, Any]] = None
+    invocation_payloads_parameter_name: Optional[str] = None
+    defer_busy_updates: bool = False
+
+    @classmethod
+    def from_environment(cls, environment: Mapping[str, str]) -> 'RefreshTarget':
+        return cls(
+            endpoint_name=environment['SAGEMAKER_ENDPOINT_NAME'],
+            endpoint_config_a_name=environment['SAGEMAKER_ENDPOINT_CONFIG_A_NAME'],
+            endpoint_config_b_name=environment['SAGEMAKER_ENDPOINT_CONFIG_B_NAME'],
+            wait_time=float(environment['WAIT_TIME']),
+            state_parameter_name=environment.get('REFRESH_STATE_PARAMETER_NAME'),
+            debounce_queue_url=environment.get('DEBOUNCE_QUEUE_URL'),
+            manifest_bucket_name=environment.get('MANIFEST_BUCKET_NAME'),
+            manifest_key=environment.get('MANIFEST_KEY'),
+            event_intake_enabled=environment.get('EVENT_INTAKE_ENABLED') == 'true',
+            model_artifact_urls=json.loads(environment.get('MODEL_ARTIFACT_URLS', 'null')),
+            route_id=environment.get('ROUTE_ID'),
+            multi_model_data_urls=json.loads(environment.get('MULTI_MODEL_DATA_URLS', '[]')),
+            warm_up_enabled=environment.get('WARM_UP_ENABLED') == 'true',
+            state_machine_arn=environment.get('STATE_MACHINE_ARN'),
+            deployment_config=pascal_case_keys(json.loads(environment.get('DEPLOYMENT_CONFIG', 'null'))),
+            retain_variant_properties=environment.get('RETAIN_VARIANT_PROPERTIES') == 'true',
+            model_generation_parameter_name=environment.get('MODEL_GENERATION_PARAMETER_NAME'),
+            latency_gate=json.loads(environment.get('LATENCY_GATE', 'null')),
+            instance_recommendation=json.loads(environment.get('INSTANCE_RECOMMENDATION', 'null')),
+            version_pinning=json.loads(environment.get('VERSION_PINNING', 'null')),
+            artifact_validation=json.loads(environment.get('ARTIFACT_VALIDATION', 'null')),
+            invocation_payloads_parameter_name=environment.get('INVOCATION_PAYLOADS_PARAMETER_NAME'),
+            defer_busy_updates=environment.get('DEFER_BUSY_UPDATES') == 'true',
+        )
+
+    def with_invocation_payloads(self, ssm_client: Any) -> 'RefreshTarget':
+        """
+        Reads invocation payloads of the warm-up, the latency gate and the instance recommendation
+        from their SSM parameter.
+
+        :param ssm_client: ``boto3`` SSM client.
+
+        :return: Settings with invocation payloads, or the same settings, if there are none.
+        """
+
+        if not self.invocation_payloads_parameter_name:
+            return self
+
+        response = ssm_client.get_parameter(Name=self.invocation_payloads_parameter_name)
+        document = json.loads(response['Parameter']['Value'])
+
+        def payloads(owner: str) -> Optional[List[Dict[str, Any]]]:
+            return document['sets'][document[owner]] if owner in document else None
+
+        return replace(
+            self,
+            warm_up_payloads=payloads('warm_up'),
+            latency_gate=(
+                {**self.latency_gate, 'payloads': payloads('latency_gate')} if self.latency_gate else None
+            ),
+            instance_recommendation=(
+                {**self.instance_recommendation, 'payloads': payloads('instance_recommendation')}
+                if self.instance_recommendation else None
+            ),
+        )
+
+
+def pascal_case_keys(value: Any) -> Any:
+    """
+    Converts keys of CDK properties (serialized in camel case) to SageMaker API keys (Pascal case).
+
+    :param value: Deserialized JSON value.
+
+    :return: Value with converted keys of all nested objects.
+    """
+
+    if isinstance(value, dict):
+        return {key[:1].upper() + key[1:]: pascal_case_keys(item) for key, item in value.items()}
+
+    if isinstance(value, list):
+        return [pascal_case_keys(item) for item in value]
+
+    return value
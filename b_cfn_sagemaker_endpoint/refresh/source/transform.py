@@ -0,0 +1,206 @@
+import copy
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import unquote_plus
+
+from botocore.exceptions import ClientError
+
+import clients
+from intake import is_later_sequencer, unwrap_records
+from metrics import Metrics, event_time
+
+NAMESPACE = 'BSagemakerBatchTransform'
+TRANSFORM_JOB_STATE_CHANGE = 'SageMaker Transform Job State Change'
+
+# Jobs are read from the environment once per lambda container.
+JOBS: Optional['TransformJobs'] = None
+
+
+def handler(event: Dict[str, Any], context: Any) -> None:
+    global JOBS
+    if JOBS is None:
+        JOBS = TransformJobs.from_environment(os.environ)
+
+    if event.get('detail-type') == TRANSFORM_JOB_STATE_CHANGE:
+        print(f'Event received: {json.dumps(event)}')
+        JOBS.finished(event['detail']['TransformJobName'])
+        return
+
+    # Input events are delivered in batches via the intake queue.
+    s3_records, _ = unwrap_records(event.get('Records', []))
+    print(f'Received {len(s3_records)} input events.')
+    JOBS.start(s3_records)
+
+
+class TransformJobs:
+    """
+    Starts batch transform jobs of uploaded input files and reports their metrics.
+
+    Input files, received within a single batch of the intake queue, are coalesced into a single job.
+    The job reads them via a manifest file, written next to the jobs' outputs. Job names are derived
+    from the input files and their S3 sequencers, hence a redelivered batch does not start the same
+    job twice, while a later upload of the same file starts a new one.
+
+    :param sagemaker_client: ``boto3`` SageMaker client.
+    :param s3_client: ``boto3`` S3 client.
+    :param job_name_prefix: Prefix of transform job names.
+    :param model_name: Name of the SageMaker model used by the jobs.
+    :param output_url: S3 URL prefix (``s3://bucket/prefix/``) of jobs' outputs.
+    :param template: ``create_transform_job()`` arguments shared by all jobs, e.g. transform resources.
+    :param clock: Function that returns current time in seconds.
+    """
+
+    def __init__(
+            self,
+            sagemaker_client: Any,
+            s3_client: Any,
+            job_name_prefix: str,
+            model_name: str,
+            output_url: str,
+            template: Optional[Dict[str, Any]] = None,
+            clock: Callable[[], float] = time.time
+    ):
+        self.__sagemaker_client = sagemaker_client
+        self.__s3_client = s3_client
+        self.__job_name_prefix = job_name_prefix
+        self.__model_name = model_name
+        self.__output_url = output_url
+        self.__template = template or {}
+        self.__clock = clock
+
+    @classmethod
+    def from_environment(cls, environment: Mapping[str, str]) -> 'TransformJobs':
+        return cls(
+            sagemaker_client=clients.get('sagemaker'),
+            s3_client=clients.get('s3'),
+            job_name_prefix=environment['TRANSFORM_JOB_NAME_PREFIX'],
+            model_name=environment['TRANSFORM_MODEL_NAME'],
+            output_url=environment['TRANSFORM_OUTPUT_URL'],
+            template=json.loads(environment.get('TRANSFORM_JOB_TEMPLATE', '{}')),
+        )
+
+    def start(self, s3_records: List[Dict[str, Any]]) -> List[str]:
+        """
+        Starts a transform job per input bucket of the received input files.
+
+        :param s3_records: S3 bucket event records of uploaded input files.
+
+        :return: Names of started jobs.
+        """
+
+        # Only the latest upload of each object is transformed.
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for record in s3_records:
+            key = unquote_plus(record['s3']['object']['key'])
+            if key.endswith('/'):
+                # Folder placeholders have no content to transform.
+                continue
+            object_id = (record['s3']['bucket']['name'], key)
+            sequencer = record['s3']['object'].get('sequencer', '')
+            if object_id not in latest or is_later_sequencer(
+                    sequencer,
+                    latest[object_id]['s3']['object'].get('sequencer')
+            ):
+                latest[object_id] = record
+
+        buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (bucket, key), record in sorted(latest.items()):
+            buckets.setdefault(bucket, {})[key] = record
+
+        job_names = []
+        for bucket, records in buckets.items():
+            job_name = self.__start(bucket, records)
+            if job_name:
+                job_names.append(job_name)
+
+        return job_names
+
+    def finished(self, job_name: str) -> None:
+        """
+        Reports metrics of a finished transform job.
+
+        :param job_name: Transform job name.
+
+        :return: No return.
+        """
+
+        description = self.__sagemaker_client.describe_transform_job(TransformJobName=job_name)
+        status = description['TransformJobStatus']
+        print(f'Transform job "{job_name}" finished with status "{status}".')
+
+        metrics = self.__metrics()
+        if status == 'Completed':
+            metrics.put('TransformJobsCompleted', 1, 'Count')
+        else:
+            metrics.put('TransformJobsFailed', 1, 'Count')
+            print(f'Transform job "{job_name}" failure reason: {description.get("FailureReason")}.')
+
+        started_at = description.get('TransformStartTime')
+        ended_at = description.get('TransformEndTime')
+        if started_at and ended_at:
+            duration = (ended_at - started_at).total_seconds()
+            metrics.put('TransformJobDuration', duration * 1000)
+
+            tags = self.__sagemaker_client.list_tags(ResourceArn=description['TransformJobArn']).get('Tags', [])
+            input_bytes = next((float(tag['Value']) for tag in tags if tag['Key'] == 'InputBytes'), None)
+            if status == 'Completed' and input_bytes is not None and duration > 0:
+                metrics.put('TransformThroughput', input_bytes / duration, 'Bytes/Second')
+
+        metrics.flush()
+
+    def __start(self, bucket: str, records: Dict[str, Dict[str, Any]]) -> Optional[str]:
+        keys = sorted(records)
+        fingerprint = hashlib.sha256(json.dumps([
+            [bucket, key, records[key]['s3']['object'].get('sequencer')] for key in keys
+        ]).encode()).hexdigest()
+        job_name = f'{self.__job_name_prefix}-{fingerprint[:16]}'
+        input_bytes = sum(record['s3']['object'].get('size', 0) for record in records.values())
+
+        # Manifest lists keys relative to its prefix, i.e. the bucket root.
+        manifest_bucket, _, manifest_prefix = self.__output_url.replace('s3://', '', 1).partition('/')
+        manifest_key = f'{manifest_prefix}manifests/{job_name}.manifest'
+        self.__s3_client.put_object(
+            Bucket=manifest_bucket,
+            Key=manifest_key,
+            Body=json.dumps([{'prefix': f's3://{bucket}/'}, *keys]).encode()
+        )
+
+        arguments = copy.deepcopy(self.__template)
+        arguments['TransformJobName'] = job_name
+        arguments['ModelName'] = self.__model_name
+        arguments.setdefault('TransformInput', {})['DataSource'] = {
+            'S3DataSource': {'S3DataType': 'ManifestFile', 'S3Uri': f's3://{manifest_bucket}/{manifest_key}'}
+        }
+        arguments.setdefault('TransformOutput', {})['S3OutputPath'] = f'{self.__output_url}{job_name}/'
+        arguments['Tags'] = [
+            {'Key': 'InputObjects', 'Value': str(len(keys))},
+            {'Key': 'InputBytes', 'Value': str(input_bytes)},
+        ]
+
+        try:
+            self.__sagemaker_client.create_transform_job(**arguments)
+        except ClientError as ex:
+            if ex.response['Error']['Code'] == 'ValidationException' and 'unique' in str(ex).lower():
+                print(f'Transform job "{job_name}" was already started.')
+                return None
+            raise
+
+        print(f'Transform job "{job_name}" started with {len(keys)} input files ({input_bytes} bytes).')
+
+        metrics = self.__metrics()
+        metrics.put('TransformJobsStarted', 1, 'Count')
+        metrics.put('TransformInputObjects', len(keys), 'Count')
+        metrics.put('TransformInputBytes', input_bytes, 'Bytes')
+        now = self.__clock()
+        for record in records.values():
+            if record.get('eventTime'):
+                metrics.put('CoalescingWait', (now - event_time(record)) * 1000)
+        metrics.flush()
+
+        return job_name
+
+    def __metrics(self) -> Metrics:
+        return Metrics(self.__job_name_prefix, namespace=NAMESPACE, dimension_name='TransformName')
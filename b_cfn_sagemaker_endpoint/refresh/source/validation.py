@@ -0,0 +1,199 @@
+import ast
+import gzip
+import posixpath
+import tarfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from metrics import Metrics
+from versions import parse_s3_url
+
+# Size of chunks the rest of a gzip stream is drained in, to verify its checksum.
+CHUNK_SIZE = 1024 * 1024
+
+# Maximum size of a Python source, that is read into memory to be compiled.
+MAX_SOURCE_SIZE = 10 * 1024 * 1024
+
+
+class ArtifactValidator:
+    """
+    Validates model artifacts before the endpoint is updated, rejecting corrupt ones in seconds,
+    instead of after an endpoint update, that provisions instances for several minutes and fails.
+
+    Each model archive is streamed from S3 through gzip and tar decoders, without staging it on
+    disk, hence truncated or corrupt archives fail on their gzip checksum or tar structure. The
+    archive must contain files, must not exceed the size limits (compressed, and uncompressed as
+    declared by tar headers), its entries must stay within the model directory and the required
+    entries, e.g. the inference script (``SAGEMAKER_PROGRAM``), must be present. Required entries of
+    uncompressed model data are checked under its S3 URL prefix.
+
+    The smoke test compiles every Python source of the inference code and checks, that the
+    inference script defines the required functions, e.g. ``model_fn``. Sources are not executed,
+    since the refresh function has none of the model container's dependencies installed.
+
+    :param s3_client: ``boto3`` S3 client.
+    :param settings: Validation settings, i.e. ``ArtifactValidation.to_settings()``.
+    :param max_workers: Maximum number of artifacts validated in parallel.
+    """
+
+    def __init__(self, s3_client: Any, settings: Dict[str, Any], max_workers: int = 4):
+        self.__s3_client = s3_client
+        self.__settings = settings
+        self.__max_workers = max_workers
+
+    def passes(self, metrics: Metrics) -> bool:
+        """
+        Validates all model artifacts, reporting problems and results.
+
+        :param metrics: Refresh pipeline metrics.
+
+        :return: True, if all artifacts are valid.
+        """
+
+        with metrics.timer('ArtifactValidationDuration'):
+            problems = self.validate()
+
+        for url, problem in problems.items():
+            print(f'Model artifact "{url}" is invalid: {problem}.')
+        if problems:
+            metrics.put('ArtifactRejections', 1, 'Count')
+
+        return not problems
+
+    def validate(self) -> Dict[str, str]:
+        """
+        Validates all model artifacts in parallel.
+
+        :return: Mapping of URLs of invalid artifacts and their problems. Empty, if all are valid.
+        """
+
+        artifacts = self.__settings['artifacts']
+        if not artifacts:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.__max_workers, len(artifacts))) as executor:
+            problems = list(executor.map(self.problem, artifacts))
+
+        return {artifact['url']: problem for artifact, problem in zip(artifacts, problems) if problem}
+
+    def problem(self, artifact: Dict[str, Any]) -> Optional[str]:
+        """
+        Validates a single model artifact.
+
+        :param artifact: Artifact's ``url``, ``required_entries`` and ``entry_point``, i.e. the
+            archive path of the inference script.
+
+        :return: Description of the artifact's problem, or None, if it is valid.
+        """
+
+        try:
+            if artifact['url'].endswith('/'):
+                return self.__prefix_problem(artifact)
+            return self.__archive_problem(artifact)
+        except ClientError as ex:
+            if ex.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return 'artifact does not exist'
+            raise
+
+    def __archive_problem(self, artifact: Dict[str, Any]) -> Optional[str]:
+        bucket, key = parse_s3_url(artifact['url'])
+        response = self.__s3_client.get_object(Bucket=bucket, Key=key)
+        try:
+            return self.__stream_problem(artifact, response)
+        finally:
+            # Releases the connection of a partially read body, e.g. of an archive rejected early.
+            response['Body'].close()
+
+    def __stream_problem(self, artifact: Dict[str, Any], response: Dict[str, Any]) -> Optional[str]:
+        max_size = self.__settings.get('max_size')
+        if max_size and response['ContentLength'] > max_size:
+            return f'archive size {response["ContentLength"]} bytes exceeds {max_size} bytes'
+
+        required = {self.__normalize(entry) for entry in artifact.get('required_entries', [])}
+        entry_point = artifact.get('entry_point')
+        if entry_point:
+            required.add(self.__normalize(entry_point))
+
+        entries = set()
+        files = 0
+        uncompressed_size = 0
+        max_uncompressed_size = self.__settings.get('max_uncompressed_size')
+        stream = gzip.GzipFile(fileobj=response['Body'], mode='rb')
+        try:
+            with tarfile.open(fileobj=stream, mode='r|') as archive:
+                for member in archive:
+                    name = self.__normalize(member.name)
+                    if member.name.startswith('/') or name == '..' or name.startswith('../'):
+                        return f'entry "{member.name}" is outside of the model directory'
+
+                    entries.add(name)
+                    files += int(member.isfile())
+                    uncompressed_size += member.size
+                    if max_uncompressed_size and uncompressed_size > max_uncompressed_size:
+                        return f'uncompressed size exceeds {max_uncompressed_size} bytes'
+
+                    if member.isfile() and name.endswith('.py') and self.__settings.get('smoke_test'):
+                        problem = self.__source_problem(
+                            name,
+                            archive.extractfile(member).read(MAX_SOURCE_SIZE),
+                            name == self.__normalize(entry_point or '')
+                        )
+                        if problem:
+                            return problem
+
+            # Tar end-of-archive marker may precede the end of the gzip stream, that holds its checksum.
+            while stream.read(CHUNK_SIZE):
+                pass
+        except (OSError, EOFError, tarfile.TarError, zlib.error) as ex:
+            return f'archive is corrupt or truncated: {ex!r}'
+
+        if not files:
+            return 'archive has no files'
+
+        missing = sorted(required - entries)
+        if missing:
+            return f'required entries are missing: {missing}'
+
+        return None
+
+    def __prefix_problem(self, artifact: Dict[str, Any]) -> Optional[str]:
+        bucket, prefix = parse_s3_url(artifact['url'])
+        entry_point = artifact.get('entry_point')
+        for entry in [*artifact.get('required_entries', []), *([entry_point] if entry_point else [])]:
+            try:
+                self.__s3_client.head_object(Bucket=bucket, Key=prefix + self.__normalize(entry))
+            except ClientError as ex:
+                if ex.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                    return f'required entry "{entry}" is missing'
+                raise
+
+        if entry_point and self.__settings.get('smoke_test'):
+            response = self.__s3_client.get_object(Bucket=bucket, Key=prefix + self.__normalize(entry_point))
+            return self.__source_problem(entry_point, response['Body'].read(MAX_SOURCE_SIZE), True)
+
+        return None
+
+    def __source_problem(self, name: str, source: bytes, is_entry_point: bool) -> Optional[str]:
+        try:
+            tree = ast.parse(source, filename=name)
+            compile(tree, name, 'exec')
+        except (SyntaxError, ValueError) as ex:
+            return f'"{name}" does not compile: {ex!r}'
+
+        if not is_entry_point:
+            return None
+
+        defined = {node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+        missing = [function for function in self.__settings.get('entry_point_functions', []) if function not in defined]
+        if missing:
+            return f'inference script "{name}" does not define functions: {missing}'
+
+        return None
+
+    @staticmethod
+    def __normalize(name: str) -> str:
+        # Archives packaged from a directory name entries either "./code/..." or "code/...".
+        return posixpath.normpath(name).lstrip('/')
@@ -0,0 +1,120 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from state import StateStore
+
+
+class ArtifactVersions:
+    """
+    Tracks content versions of model artifacts referenced by the endpoint's models.
+
+    An artifact's version is its content identity: its SHA-256 checksum, if it was uploaded with
+    one, or its ``ETag`` otherwise. S3 ``VersionId`` is not compared, since every upload gets a new
+    one, even of byte-identical content. ``ETag`` of SSE-KMS encrypted objects differs per upload,
+    hence such artifacts are detected as unchanged only if uploaded with SHA-256 checksums.
+    Uncompressed model data, referenced by an S3 URL prefix, is versioned by a hash of all its
+    objects' keys and ETags, hence a change of any file under the prefix is detected.
+    Versions of the artifacts the endpoint was last updated with are kept in the refresh state,
+    hence a re-upload of byte-identical artifacts does not result in an update.
+
+    :param s3_client: ``boto3`` S3 client.
+    :param state_store: Refresh state store.
+    :param artifact_urls: S3 URLs (``s3://bucket/key``) of model artifacts, or S3 URL prefixes
+        (``s3://bucket/prefix/``) of uncompressed model data.
+    :param max_workers: Maximum number of parallel ``head_object()`` calls.
+    """
+
+    def __init__(self, s3_client: Any, state_store: StateStore, artifact_urls: List[str], max_workers: int = 16):
+        self.__s3_client = s3_client
+        self.__state_store = state_store
+        self.__artifact_urls = list(dict.fromkeys(artifact_urls))
+        self.__max_workers = max_workers
+
+    def current(self) -> Dict[str, Optional[str]]:
+        """
+        Reads current versions of all artifacts in parallel.
+
+        :return: Mapping of artifact URLs and their versions. Missing artifacts have no version.
+        """
+
+        if not self.__artifact_urls:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.__max_workers, len(self.__artifact_urls))) as executor:
+            versions = list(executor.map(self.__version, self.__artifact_urls))
+
+        return dict(zip(self.__artifact_urls, versions))
+
+    def changed(self, current: Dict[str, Optional[str]]) -> List[str]:
+        """
+        Compares current versions with the versions the endpoint was last updated with.
+
+        :param current: Current artifact versions.
+
+        :return: URLs of changed artifacts.
+        """
+
+        deployed = self.__state_store.load().get('artifacts', {})
+        return [url for url, version in current.items() if version is None or deployed.get(url) != version]
+
+    def commit(self, current: Dict[str, Optional[str]]) -> None:
+        """
+        Records versions the endpoint was updated with.
+
+        :param current: Current artifact versions.
+
+        :return: No return.
+        """
+
+        state = self.__state_store.load()
+        state['artifacts'] = current
+        self.__state_store.save(state)
+
+    def __version(self, url: str) -> Optional[str]:
+        bucket, key = parse_s3_url(url)
+        if key.endswith('/'):
+            return self.__prefix_version(bucket, key)
+
+        try:
+            response = self.__s3_client.head_object(Bucket=bucket, Key=key, ChecksumMode='ENABLED')
+        except ClientError as ex:
+            if ex.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+        return response.get('ChecksumSHA256') or response['ETag'].strip('"')
+
+    def __prefix_version(self, bucket: str, prefix: str) -> Optional[str]:
+        objects = []
+        arguments = {'Bucket': bucket, 'Prefix': prefix}
+        while True:
+            response = self.__s3_client.list_objects_v2(**arguments)
+            objects += [(item['Key'], item['ETag'].strip('"')) for item in response.get('Contents', [])]
+            if not response.get('IsTruncated'):
+                break
+            arguments['ContinuationToken'] = response['NextContinuationToken']
+
+        if not objects:
+            return None
+
+        version = hashlib.sha256()
+        for key, etag in sorted(objects):
+            version.update(f'{key[len(prefix):]}:{etag}\n'.encode())
+
+        return version.hexdigest()
+
+
+def parse_s3_url(url: str) -> Tuple[str, str]:
+    """
+    Splits an S3 URL into bucket name and object key.
+
+    :param url: S3 URL, i.e. ``s3://bucket/key``.
+
+    :return: Tuple of bucket name and object key.
+    """
+
+    bucket, _, key = url.replace('s3://', '', 1).partition('/')
+    return bucket, key
@@ -0,0 +1,114 @@
+from aws_cdk.aws_lambda import IFunction
+from aws_cdk.aws_stepfunctions import (
+    Choice,
+    Condition,
+    Errors,
+    Fail,
+    JsonPath,
+    StateMachine,
+    Succeed,
+    TaskInput,
+    Wait,
+    WaitTime,
+)
+from aws_cdk.aws_stepfunctions_tasks import LambdaInvoke
+from aws_cdk.core import Construct, Duration
+
+
+class RefreshStateMachine(Construct):
+    """
+    Step Functions state machine that orchestrates a single endpoint refresh.
+
+    Each execution waits for the quiet period after the last bucket event, resolves the inactive A/B
+    endpoint configuration, starts the endpoint update and polls the endpoint with an exponential
+    backoff until it is ``InService`` (``Updated`` succeed state) or the update fails (``UpdateFailed``
+    fail state). Executions, that were superseded by later ones, found nothing to update or deferred
+    the update of a busy endpoint, end in the ``Skipped`` succeed state. Steps are separate invocations
+    of the refresh function, hence neither waiting nor polling is billed as the function's run time.
+    The ``resolve`` step, though, runs the latency gate and the instance recommendation, if enabled,
+    which take up to their timeouts (at most 12 minutes) of a single invocation.
+
+    :param scope: Construct scope.
+    :param id: Scoped id of the resource.
+    :param function: Refresh function that runs the state machine steps.
+    :param state_machine_name: State machine name.
+    """
+
+    # Maximum duration of a single refresh, including the quiet period.
+    TIMEOUT = Duration.hours(3)
+
+    def __init__(self, scope: Construct, id: str, function: IFunction, state_machine_name: str):
+        super().__init__(scope, id)
+
+        def step(step_id: str, name: str) -> LambdaInvoke:
+            task = LambdaInvoke(
+                scope=self,
+                id=step_id,
+                lambda_function=function,
+                payload=TaskInput.from_object({'step': name, 'execution': JsonPath.entire_payload}),
+                payload_response_only=True
+            )
+            # The refresh function's concurrency is limited to a single execution.
+            task.add_retry(
+                errors=['Lambda.TooManyRequestsException'],
+                interval=Duration.seconds(5),
+                max_attempts=10,
+                backoff_rate=1.5
+            )
+            task.add_catch(refresh_failed, errors=[Errors.ALL], result_path='$.error')
+            return task
+
+        refresh_failed = Fail(
+            scope=self,
+            id='RefreshFailed',
+            error='RefreshFailed',
+            cause='Refresh step failed. See the execution history for details.'
+        )
+        update_failed = Fail(
+            scope=self,
+            id='UpdateFailed',
+            error='EndpointUpdateFailed',
+            cause='Endpoint update did not succeed. See the execution history for the failure reason.'
+        )
+
+        wait_for_update = Wait(
+            scope=self,
+            id='WaitForUpdate',
+            time=WaitTime.seconds_path('$.backoff')
+        )
+        poll = step('DescribeEndpoint', 'poll').next(
+            Choice(scope=self, id='UpdateStatus')
+            .when(Condition.string_equals('$.status', 'InService'), Succeed(scope=self, id='Updated'))
+            .when(Condition.string_equals('$.status', 'Failed'), update_failed)
+            .otherwise(wait_for_update)
+        )
+        skipped = Succeed(scope=self, id='Skipped')
+        update = step('UpdateEndpoint', 'update').next(
+            Choice(scope=self, id='UpdateStarted')
+            .when(Condition.string_equals('$.action', 'skip'), skipped)
+            .otherwise(wait_for_update.next(poll))
+        )
+
+        definition = Wait(
+            scope=self,
+            id='WaitForQuietPeriod',
+            time=WaitTime.seconds_path('$.wait_seconds')
+        ).next(
+            step('ResolveEndpointConfig', 'resolve')
+        ).next(
+            Choice(scope=self, id='ShouldUpdate')
+            .when(Condition.string_equals('$.action', 'update'), update)
+            .otherwise(skipped)
+        )
+
+        self.__state_machine = StateMachine(
+            scope=self,
+            id='StateMachine',
+            definition=definition,
+            state_machine_name=state_machine_name,
+            timeout=self.TIMEOUT
+        )
+
+    @property
+    def state_machine(self) -> StateMachine:
+        return self.__state_machine
@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+
+from aws_cdk.aws_lambda import Architecture, Runtime
+
+
+@dataclass(frozen=True)
+class RefreshFunctionProps:
+    """
+    Refresh function's runtime settings.
+
+    The refresh function is invoked rarely, hence almost every invocation is a cold start. Its
+    source code initializes clients and settings once per container and imports mode specific
+    modules lazily, while an ``ARM_64`` architecture and more memory (which also means more CPU)
+    further reduce the cold start time. See ``b_cfn_sagemaker_endpoint_tests/benchmark``.
+
+    Properties
+    ==========
+
+    ``runtime``
+        Python runtime of the function.
+    ``architecture``
+        Instruction set architecture of the function, e.g. ``Architecture.ARM_64``.
+    ``memory_size``
+        Amount of memory, in MB, allocated to the function.
+    """
+
+    runtime: Runtime = Runtime.PYTHON_3_8
+    architecture: Architecture = Architecture.X86_64
+    memory_size: int = 128
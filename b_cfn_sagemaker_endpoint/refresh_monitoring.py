@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from aws_cdk.aws_cloudwatch import (
+    Alarm,
+    AlarmWidget,
+    ComparisonOperator,
+    Dashboard,
+    GraphWidget,
+    IAlarmAction,
+    Metric,
+    TreatMissingData,
+)
+from aws_cdk.core import Construct, Duration
+
+
+@dataclass(frozen=True)
+class RefreshMonitoring:
+    """
+    CloudWatch dashboard and alarms of the endpoint refresh pipeline.
+
+    The refresh function always emits its metrics in CloudWatch Embedded Metric Format. This
+    opt-in monitoring adds a dashboard of them and alarms on slow or failing refreshes.
+
+    Properties
+    ==========
+
+    ``dashboard``
+        Creates a CloudWatch dashboard of refresh pipeline metrics.
+    ``upload_to_in_service_threshold``
+        Maximum time from the last upload until the endpoint serves it, before the alarm goes off.
+    ``alarm_actions``
+        Optional. Actions to perform when alarms go off, e.g. SNS topic notifications.
+    """
+
+    # Must match the refresh function's metrics namespace.
+    NAMESPACE = 'BSagemakerEndpointRefresh'
+
+    dashboard: bool = True
+    upload_to_in_service_threshold: Duration = Duration.minutes(30)
+    alarm_actions: Optional[List[IAlarmAction]] = None
+
+    def bind(self, scope: Construct, endpoint_name: str) -> List[Alarm]:
+        """
+        Creates the endpoint's refresh pipeline alarms and, optionally, dashboard.
+
+        :param scope: Construct scope.
+        :param endpoint_name: SageMaker endpoint name.
+
+        :return: Created alarms.
+        """
+
+        def metric(name: str, statistic: str = 'Average') -> Metric:
+            return Metric(
+                namespace=self.NAMESPACE,
+                metric_name=name,
+                dimensions_map={'EndpointName': endpoint_name},
+                statistic=statistic,
+                period=Duration.minutes(5)
+            )
+
+        alarms = [
+            Alarm(
+                scope=scope,
+                id='UploadToInServiceAlarm',
+                alarm_description='Endpoint takes too long to serve uploaded models.',
+                metric=metric('UploadToInService', 'Maximum'),
+                threshold=self.upload_to_in_service_threshold.to_milliseconds(),
+                comparison_operator=ComparisonOperator.GREATER_THAN_THRESHOLD,
+                evaluation_periods=1,
+                treat_missing_data=TreatMissingData.NOT_BREACHING
+            ),
+            Alarm(
+                scope=scope,
+                id='RefreshFailuresAlarm',
+                alarm_description='Endpoint refresh failed.',
+                metric=metric('RefreshFailures', 'Sum'),
+                threshold=1,
+                comparison_operator=ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+                evaluation_periods=1,
+                treat_missing_data=TreatMissingData.NOT_BREACHING
+            ),
+        ]
+        for alarm in alarms:
+            if self.alarm_actions:
+                alarm.add_alarm_action(*self.alarm_actions)
+
+        if self.dashboard:
+            dashboard = Dashboard(scope=scope, id='RefreshDashboard')
+            dashboard.add_widgets(
+                GraphWidget(
+                    title='Upload to in service (ms)',
+                    left=[metric('UploadToInService', 'Maximum'), metric('UploadToInService', 'p50')]
+                ),
+                GraphWidget(
+                    title='Event age at receipt (ms)',
+                    left=[metric('EventAge', 'p50'), metric('EventAge', 'p99')]
+                ),
+                GraphWidget(
+                    title='Debounce wait (ms)',
+                    left=[metric('DebounceWait'), metric('DebounceWait', 'Maximum')]
+                ),
+            )
+            dashboard.add_widgets(
+                GraphWidget(
+                    title='SageMaker API latency (ms)',
+                    left=[metric('DescribeEndpointLatency', 'p99'), metric('UpdateEndpointLatency', 'p99')]
+                ),
+                GraphWidget(
+                    title='Events coalesced per update',
+                    left=[metric('EventsCoalesced'), metric('EventsCoalesced', 'SampleCount')]
+                ),
+                GraphWidget(
+                    title='Warm-up latency (ms)',
+                    left=[metric('WarmUpLatency', 'p50'), metric('WarmUpLatency', 'Maximum')]
+                ),
+            )
+            dashboard.add_widgets(*[AlarmWidget(title=alarm.node.id, alarm=alarm) for alarm in alarms])
+
+        return alarms
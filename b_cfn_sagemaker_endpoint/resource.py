@@ -1,12 +1,29 @@
-from typing import Iterable, List, Dict
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional
 
-from aws_cdk.aws_s3 import Bucket, EventType, NotificationKeyFilter
+from aws_cdk.aws_s3 import Bucket
 from aws_cdk.aws_sagemaker import CfnEndpointConfigProps, CfnEndpointProps, CfnEndpoint, CfnEndpointConfig, CfnModel
-from aws_cdk.core import Construct
+from aws_cdk.aws_ssm import StringParameter
+from aws_cdk.core import Construct, Token
 
+from b_cfn_sagemaker_endpoint.artifact_validation import ArtifactValidation
+from b_cfn_sagemaker_endpoint.async_inference import AsyncInference, AsyncInferenceResources
+from b_cfn_sagemaker_endpoint.batch_transform import BatchTransform
 from b_cfn_sagemaker_endpoint.bucket_event import BucketEvent
+from b_cfn_sagemaker_endpoint.event_intake import EventIntake
+from b_cfn_sagemaker_endpoint.instance_recommendation import InstanceCandidate, InstanceRecommendation
+from b_cfn_sagemaker_endpoint.invocation_payload import InvocationPayload
+from b_cfn_sagemaker_endpoint.latency_gate import LatencyGate
 from b_cfn_sagemaker_endpoint.model_props import ModelProps
 from b_cfn_sagemaker_endpoint.refresh.function import RefreshFunction
+from b_cfn_sagemaker_endpoint.refresh.router import RefreshRouter
+from b_cfn_sagemaker_endpoint.refresh.settings import RefreshSettings
+from b_cfn_sagemaker_endpoint.refresh_function_props import RefreshFunctionProps
+from b_cfn_sagemaker_endpoint.refresh_monitoring import RefreshMonitoring
+from b_cfn_sagemaker_endpoint.traffic_shifting import TrafficShifting
+from b_cfn_sagemaker_endpoint.transform_settings import TransformSettings
+from b_cfn_sagemaker_endpoint.variant_auto_scaling import VariantAutoScaling
+from b_cfn_sagemaker_endpoint.version_pinning import VersionPinning
 
 
 class SagemakerEndpoint(Construct):
@@ -26,10 +43,89 @@ class SagemakerEndpoint(Construct):
     :param models_props: SageMaker models properties.
     :param models_bucket: Source S3 bucket for models data.
     :param bucket_events: Models data bucket events. By default, models bucket ``OBJECT_CREATED``
-        events are handled, only for "*.tar.gz" files.
+        events are handled, only for "*.tar.gz" files, or only for the manifest object in manifest mode.
+        If any model has ``uncompressed_model_data_url``, only events of models' data archives and
+        prefixes are handled (see ``BucketEvent.for_model_data()``), and ``debounce``, ``event_intake``,
+        ``state_machine``, ``shared_refresh`` or ``manifest_key`` is required to coalesce them.
     :param wait_time: Time to wait before endpoint is updated. It is useful to wait before
         handling s3 bucket events as there can be multiple other in-flight events coming.
         Default is 60 seconds.
+    :param debounce: Enables non-blocking debounce of endpoint refreshes. Each bucket event pushes
+        back a single pending refresh deadline by ``wait_time`` and the endpoint is updated once
+        the quiet period ends, without the refresh function sleeping. Default is False.
+    :param manifest_key: Enables manifest mode. Key of a models data manifest object, written by the
+        uploader, that lists expected objects with their sizes and ETags. The endpoint is updated as
+        soon as all listed objects are present, without any fixed delay, while ``wait_time`` becomes
+        the maximum time to wait for them. Default is None.
+    :param event_intake: Enables lossless, batched intake of bucket events. Bucket events are queued
+        in SQS, handled in batches, deduplicated by their S3 sequencers and coalesced into a single
+        refresh decision per batch. Default is None, i.e. bucket events invoke the refresh function
+        directly and events older than 2 minutes are discarded.
+    :param skip_unchanged_models: Skips no-op endpoint updates. Content versions (SHA-256 checksum or
+        ``ETag``) of model artifacts referenced by ``models_props`` containers are recorded on each update
+        and the endpoint is updated only if at least one of them changed. Default is False.
+    :param shared_refresh: Registers the endpoint to the stack-scoped ``RefreshRouter`` instead of
+        creating a dedicated refresh function. The router always uses lossless event intake, hence
+        ``event_intake`` can not be set in this mode. Default is False.
+    :param warm_up_payloads: Synthetic invocation payloads used to warm up models. New artifacts of
+        ``MultiModel`` mode containers never trigger an endpoint update. Instead, each uploaded
+        target model is loaded by invoking it with these payloads. Overwritten target models are
+        not reloaded, hence new versions must be uploaded under new keys. Default is a single empty
+        JSON object payload.
+    :param warm_up: Enables post-update warm-up stage. Once an updated endpoint is back ``InService``,
+        as reported by its state change event, the refresh function sends ``warm_up_payloads`` to
+        every production variant, reporting their latencies. Default is False.
+    :param state_machine: Enables Step Functions refresh orchestration. Instead of sleeping through
+        ``wait_time`` and updating the endpoint in a single invocation, the refresh function starts a
+        ``RefreshStateMachine`` execution, that debounces bucket events, updates the endpoint and polls
+        it until it is ``InService`` or the update fails. Can not be combined with ``debounce`` or
+        ``shared_refresh``. Default is False.
+    :param traffic_shifting: Blue/green traffic shifting policy (canary or linear) with auto-rollback
+        alarms on ``ModelLatency`` and ``Invocation5XXErrors`` of each production variant, that every
+        A/B configuration swap is started with. Can not be combined with ``endpoint_props``
+        ``deployment_config``, that is otherwise applied on every swap. Default is None, i.e. all
+        traffic is shifted at once.
+    :param auto_scaling: Registers production variants as scalable targets with target tracking policies
+        on ``InvocationsPerInstance``. Endpoint refreshes then retain the current instance counts,
+        instead of resetting them to ``initial_instance_count``. Default is None.
+    :param async_inference: Enables asynchronous inference mode. Creates output and failure locations,
+        success and error notification topics, and scales production variants on the queue backlog
+        per instance, down to zero instances. Endpoint refreshes retain the current instance counts,
+        while queued requests are served once the updated endpoint is back in service. Can not be
+        combined with ``auto_scaling``, ``warm_up`` or multi-model containers, nor with
+        ``endpoint_config_props`` ``async_inference_config``. Default is None.
+    :param latency_gate: Enables latency-gated promotion of refreshed models. Each new endpoint
+        configuration is deployed to a short-lived staging endpoint and load-tested, and the endpoint
+        is updated only if latency percentiles and the error rate stay within the gate's thresholds.
+        Can not be combined with ``async_inference``. Default is None.
+    :param instance_recommendation: Enables instance type and count recommendation of new model
+        artifacts. Before each endpoint update, the new artifacts are benchmarked across candidate
+        instance types, and the most cost efficient one within thresholds is reported or, if enabled,
+        applied to a copy of the endpoint configuration the endpoint is updated to. Requires
+        ``skip_unchanged_models``, since results are persisted per model artifact versions. Can not be
+        combined with ``async_inference``, nor, if applied, with ``auto_scaling`` or ``version_pinning``.
+        Applied copies of the endpoint configuration are not deleted with the stack. Default is None.
+    :param version_pinning: Enables immutable, version-pinned endpoint configurations. Instead of
+        swapping A & B configurations, each refresh creates a new generation of the endpoint
+        configuration and its models, that reference server-side copies of the exact versions of
+        model artifacts, updates the endpoint to it right away, without waiting ``wait_time``, and
+        deletes generations beyond the retention count. Generations are not deleted together with the
+        stack (see README). Default is None.
+    :param artifact_validation: Enables pre-flight validation of model artifacts. Before each
+        endpoint update, model archives are streamed from S3 and checked for integrity, size limits
+        and required entries, including the inference script (``SAGEMAKER_PROGRAM``), and the update
+        is skipped, if any of them is invalid. Default is None.
+    :param monitoring: Enables CloudWatch dashboard and alarms of the refresh pipeline metrics, that
+        the refresh function emits in CloudWatch Embedded Metric Format. Default is None.
+    :param model_generation: Publishes the endpoint's model generation, advanced by every endpoint
+        refresh, to ``model_generation_parameter``, that ``ResponseCache`` of endpoint clients reads.
+        Default is False.
+    :param defer_busy_updates: Defers updates requested while the endpoint is busy, e.g. still being
+        updated, and starts a single follow-up update once it is back ``InService``. Otherwise, such
+        updates are skipped. The refresh state parameter, and the endpoint status queue and rule are
+        only created, if this or another feature that reads them is enabled. Default is True.
+    :param function_props: Refresh function's (or, in shared refresh mode, the router's) runtime,
+        architecture and memory settings. Default is Python 3.8 on ``X86_64`` with 128 MB of memory.
     """
 
     def __init__(
@@ -41,7 +137,26 @@ class SagemakerEndpoint(Construct):
             models_props: Iterable[ModelProps],
             models_bucket: Bucket,
             bucket_events: Iterable[BucketEvent] = None,
-            wait_time: float = 60
+            wait_time: float = 60,
+            debounce: bool = False,
+            manifest_key: str = None,
+            event_intake: EventIntake = None,
+            skip_unchanged_models: bool = False,
+            shared_refresh: bool = False,
+            warm_up_payloads: Iterable[InvocationPayload] = None,
+            warm_up: bool = False,
+            state_machine: bool = False,
+            traffic_shifting: TrafficShifting = None,
+            auto_scaling: VariantAutoScaling = None,
+            async_inference: AsyncInference = None,
+            latency_gate: LatencyGate = None,
+            instance_recommendation: InstanceRecommendation = None,
+            version_pinning: VersionPinning = None,
+            artifact_validation: ArtifactValidation = None,
+            monitoring: RefreshMonitoring = None,
+            model_generation: bool = False,
+            defer_busy_updates: bool = True,
+            function_props: RefreshFunctionProps = None
     ):
         if endpoint_props.endpoint_config_name != endpoint_config_props.endpoint_config_name:
             raise ValueError(
@@ -49,23 +164,137 @@ class SagemakerEndpoint(Construct):
                 '`endpoint_props` and the `endpoint_config_props` properties.'
             )
 
-        if bucket_events is None:
-            bucket_events = [
-                BucketEvent(EventType.OBJECT_CREATED, [NotificationKeyFilter(suffix='.tar.gz')])
-            ]
+        if shared_refresh and event_intake:
+            raise ValueError('Event intake can not be configured for a shared refresh router.')
+
+        if traffic_shifting and endpoint_props.deployment_config:
+            raise ValueError('Traffic shifting can not be configured together with the endpoint deployment config.')
+
+        if shared_refresh and state_machine:
+            raise ValueError('State machine orchestration can not be configured for a shared refresh router.')
+
+        if async_inference and (auto_scaling or endpoint_config_props.async_inference_config):
+            raise ValueError('Async inference mode can not be configured together with other auto scaling or config.')
+
+        if latency_gate and (async_inference or endpoint_config_props.async_inference_config):
+            raise ValueError('Latency gate can not be configured in async inference mode.')
+
+        if instance_recommendation and (async_inference or endpoint_config_props.async_inference_config):
+            raise ValueError('Instance recommendation can not be configured in async inference mode.')
+
+        if instance_recommendation and instance_recommendation.apply and (auto_scaling or version_pinning):
+            # Retained variant properties ignore recommended instance counts, and a scalable target's instance
+            # type can not change, while pinned generations are retained by the configuration the endpoint serves.
+            raise ValueError(
+                'Applied instance recommendations can not be configured together with auto scaling or version pinning.'
+            )
+
+        if instance_recommendation and not skip_unchanged_models:
+            raise ValueError('Instance recommendation requires skipping of unchanged models, to version its results.')
+
+        if latency_gate or instance_recommendation:
+            # The refresh function waits in the same invocation, unless the wait is debounced, orchestrated
+            # or skipped. In manifest mode, it waits up to ``wait_time`` for the listed objects.
+            blocking_wait_time = (
+                wait_time if manifest_key or not (debounce or state_machine or version_pinning) else 0
+            )
+            budget = (
+                blocking_wait_time
+                + (latency_gate.timeout.to_seconds() if latency_gate else 0)
+                + (instance_recommendation.timeout.to_seconds() if instance_recommendation else 0)
+            )
+            if budget > LatencyGate.MAX_TIMEOUT.to_seconds():
+                raise ValueError(
+                    f'Wait time, latency gate and instance recommendation timeouts can not exceed '
+                    f'{LatencyGate.MAX_TIMEOUT.to_minutes()} minutes in total.'
+                )
+
+        endpoint_name = endpoint_props.endpoint_name
+        if (
+                (latency_gate or instance_recommendation)
+                and endpoint_name
+                and not Token.is_unresolved(endpoint_name)
+                and len(endpoint_name) > 55
+        ):
+            raise ValueError('Endpoint name can not be longer than 55 characters, to name its staging endpoints.')
+
+        if version_pinning and endpoint_name and not Token.is_unresolved(endpoint_name) and len(endpoint_name) > 50:
+            raise ValueError('Endpoint name can not be longer than 50 characters, to name its pinned generations.')
+
+        models_props = list(models_props)
+        if (
+                any(url.endswith('/') for props in models_props for url in props.model_data_urls)
+                and bucket_events is None
+                and not (debounce or event_intake or state_machine or shared_refresh or manifest_key)
+        ):
+            # Refresh function invocations never overlap, hence in the default mode each uploaded file
+            # would sleep through ``wait_time`` and update the endpoint, while later events expire.
+            raise ValueError(
+                'Uncompressed model data requires debounce, event intake, state machine, shared refresh '
+                'or manifest mode, to coalesce uploads of its files into a single refresh.'
+            )
+
+        if artifact_validation and not any(props.model_data_urls for props in models_props):
+            raise ValueError('Artifact validation requires model data of single model containers.')
+
+        # In shared refresh mode, default bucket events are shared by endpoints of the same bucket,
+        # hence the router matches them to the endpoint by its exact model keys.
+        route_events = None
+        if bucket_events is None and manifest_key:
+            bucket_events = [BucketEvent.for_key(manifest_key)]
+        elif bucket_events is None:
+            bucket_events = BucketEvent.for_model_data(
+                model_data_urls=[url for props in models_props for url in props.model_data_urls],
+                multi_model_data_urls=[url for props in models_props for url in props.multi_model_data_urls]
+            )
+            route_events = BucketEvent.for_model_keys(
+                model_data_urls=[url for props in models_props for url in props.model_data_urls],
+                multi_model_data_urls=[url for props in models_props for url in props.multi_model_data_urls]
+            )
+
+        settings = RefreshSettings(
+            wait_time=wait_time,
+            debounce=debounce,
+            manifest_key=manifest_key,
+            model_artifact_urls=[
+                url for props in models_props for url in props.model_data_urls
+            ] if skip_unchanged_models else None,
+            multi_model_data_urls=[url for props in models_props for url in props.multi_model_data_urls],
+            warm_up=warm_up,
+            warm_up_payloads=list(warm_up_payloads) if warm_up_payloads is not None else None,
+            state_machine=state_machine,
+            defer_busy_updates=defer_busy_updates,
+            # Upload to in service time is tracked in the refresh state.
+            track_uploads=bool(monitoring)
+        )
+
+        if async_inference and (settings.warm_up or settings.multi_model_data_urls):
+            raise ValueError('Warm-up invocations are not supported in async inference mode.')
 
         super().__init__(scope, id)
 
         self.__models = {props: props.bind(self) for props in models_props}
+        self.__async_inference: Optional[AsyncInferenceResources] = None
+        async_inference_config = endpoint_config_props.async_inference_config
+        if async_inference:
+            self.__async_inference = async_inference.bind(
+                scope=self,
+                execution_role_arns=[props.props.execution_role_arn for props in models_props]
+            )
+            # Both A & B configurations share identical output locations.
+            async_inference_config = self.__async_inference.config
+
         endpoint_config_a = self.__create_endpoint_config(
             resource_id=f'{id}AConfig',
             name=f'{endpoint_config_props.endpoint_config_name}-a',
-            props=endpoint_config_props
+            props=endpoint_config_props,
+            async_inference_config=async_inference_config
         )
         endpoint_config_b = self.__create_endpoint_config(
             resource_id=f'{id}BConfig',
             name=f'{endpoint_config_props.endpoint_config_name}-b',
-            props=endpoint_config_props
+            props=endpoint_config_props,
+            async_inference_config=async_inference_config
         )
         endpoint_config_a.node.add_dependency(*self.__models.values())
         endpoint_config_b.node.add_dependency(*self.__models.values())
@@ -83,17 +312,75 @@ class SagemakerEndpoint(Construct):
         )
         self.__endpoint.node.add_dependency(endpoint_config_a, endpoint_config_b, *self.__models.values())
 
+        self.__model_generation_parameter: Optional[StringParameter] = None
+        if model_generation:
+            # Advanced by every endpoint refresh. Invalidates response caches of endpoint clients.
+            self.__model_generation_parameter = StringParameter(
+                scope=self,
+                id='ModelGeneration',
+                description='SageMaker endpoint model generation. Managed by the endpoint refresh.',
+                string_value='{}'
+            )
+
+        if monitoring:
+            monitoring.bind(self, self.__endpoint.attr_endpoint_name)
+
+        variant_names = [variant.variant_name for variant in endpoint_config_props.production_variants]
+        deployment_config = endpoint_props.deployment_config
+        if traffic_shifting:
+            deployment_config = traffic_shifting.bind(
+                scope=self,
+                endpoint_name=self.__endpoint.attr_endpoint_name,
+                variant_names=variant_names
+            )
+        if auto_scaling:
+            for variant_name in auto_scaling.variant_names or variant_names:
+                auto_scaling.bind(self, self.__endpoint.attr_endpoint_name, variant_name)
+
+        if async_inference:
+            for variant_name in variant_names:
+                async_inference.bind_scaling(self, self.__endpoint.attr_endpoint_name, variant_name)
+
+        settings = replace(
+            settings,
+            deployment_config=deployment_config,
+            retain_variant_properties=bool(auto_scaling or async_inference),
+            latency_gate=latency_gate,
+            instance_recommendation=instance_recommendation,
+            version_pinning=version_pinning,
+            artifact_validation=artifact_validation,
+            models_props=models_props if version_pinning or artifact_validation else None
+        )
+
+        if shared_refresh:
+            RefreshRouter.of(self, function_props).register(
+                scope=self,
+                endpoint=self.__endpoint,
+                endpoint_config_a=endpoint_config_a,
+                endpoint_config_b=endpoint_config_b,
+                models_bucket=models_bucket,
+                bucket_events=bucket_events,
+                settings=settings,
+                model_generation_parameter=self.__model_generation_parameter,
+                route_events=route_events
+            )
+            return
+
         update_endpoint_function = RefreshFunction(
             scope=self,
             id=f'{id}RefreshFunction',
             endpoint=self.__endpoint,
             endpoint_config_a=endpoint_config_a,
             endpoint_config_b=endpoint_config_b,
-            wait_time=wait_time
+            models_bucket=models_bucket,
+            settings=settings,
+            event_intake=event_intake,
+            function_props=function_props,
+            model_generation_parameter=self.__model_generation_parameter
         )
         update_endpoint_function.node.add_dependency(self.__endpoint)
         for event in bucket_events:
-            event.bind(models_bucket, update_endpoint_function)
+            event.bind(models_bucket, update_endpoint_function.intake_queue or update_endpoint_function)
 
     @property
     def endpoint_name(self) -> str:
@@ -103,6 +390,27 @@ class SagemakerEndpoint(Construct):
     def attr_endpoint_name(self) -> str:
         return self.__endpoint.attr_endpoint_name
 
+    @property
+    def model_generation_parameter(self) -> Optional[StringParameter]:
+        """
+        Returns the SSM parameter of the endpoint's model generation, advanced by every endpoint refresh,
+        if model generation publishing is enabled. Grant clients read access to it to use ``ResponseCache``.
+
+        :return: Model generation parameter.
+        """
+
+        return self.__model_generation_parameter
+
+    @property
+    def async_inference(self) -> Optional[AsyncInferenceResources]:
+        """
+        Returns output locations and notification topics, if async inference mode is enabled.
+
+        :return: Async inference resources.
+        """
+
+        return self.__async_inference
+
     @property
     def models_props(self) -> Dict[ModelProps, CfnModel]:
         """
@@ -123,11 +431,17 @@ class SagemakerEndpoint(Construct):
 
         return list(self.__models.values())
 
-    def __create_endpoint_config(self, resource_id: str, name: str, props: CfnEndpointConfigProps) -> CfnEndpointConfig:
+    def __create_endpoint_config(
+            self,
+            resource_id: str,
+            name: str,
+            props: CfnEndpointConfigProps,
+            async_inference_config: Any
+    ) -> CfnEndpointConfig:
         return CfnEndpointConfig(
             scope=self,
             id=resource_id,
-            async_inference_config=props.async_inference_config,
+            async_inference_config=async_inference_config,
             data_capture_config=props.data_capture_config,
             endpoint_config_name=name,
             kms_key_id=props.kms_key_id,
@@ -138,6 +452,20 @@ class SagemakerEndpoint(Construct):
 
 __all__ = [
     'SagemakerEndpoint',
+    'ArtifactValidation',
+    'AsyncInference',
+    'BatchTransform',
     'ModelProps',
-    'BucketEvent'
+    'BucketEvent',
+    'EventIntake',
+    'InstanceCandidate',
+    'InstanceRecommendation',
+    'InvocationPayload',
+    'LatencyGate',
+    'RefreshMonitoring',
+    'RefreshFunctionProps',
+    'TrafficShifting',
+    'TransformSettings',
+    'VariantAutoScaling',
+    'VersionPinning',
 ]
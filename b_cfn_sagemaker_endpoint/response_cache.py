@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+# Returned by ``ResponseCache.get()`` on a cache miss, since ``None`` is a valid JSON response.
+MISSING = object()
+
+
+class ResponseCache:
+    """
+    LRU/TTL cache of JSON endpoint responses, keyed by payload hash and model generation.
+
+    Every endpoint refresh advances the endpoint's model generation, published by the refresh
+    function to ``SagemakerEndpoint.model_generation_parameter``. The generation is re-read at most
+    every ``generation_ttl`` seconds and, once it changes, all cached responses are dropped, hence a
+    response is never served for a model other than the one it was computed by. While the endpoint
+    is being updated, it serves either model, hence responses are neither cached nor served from the
+    cache. Note, that a response may still be served for up to ``generation_ttl`` seconds after an
+    update started, while the previous model is still serving.
+
+    :param ssm_client: ``boto3`` SSM client.
+    :param model_generation_parameter_name: Name of the endpoint's model generation parameter.
+    :param max_entries: Maximum number of cached responses. Least recently used ones are evicted first.
+    :param ttl: Maximum age (in seconds) of cached responses.
+    :param generation_ttl: Time (in seconds) a read model generation is reused for.
+    :param clock: Function that returns current time in seconds.
+    """
+
+    def __init__(
+            self,
+            ssm_client: Any,
+            model_generation_parameter_name: str,
+            max_entries: int = 1024,
+            ttl: float = 300,
+            generation_ttl: float = 10,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        self.__ssm_client = ssm_client
+        self.__parameter_name = model_generation_parameter_name
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        self.__generation_ttl = generation_ttl
+        self.__clock = clock
+        self.__entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self.__generation: Optional[Hashable] = None
+        self.__generation_read_at = float('-inf')
+        self.__generation_expires_at = float('-inf')
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation(self) -> Optional[Hashable]:
+        """
+        Returns the endpoint's current model generation, reading it if the last read one expired.
+
+        :return: Model generation, or None, if the endpoint is being updated or the generation
+            can not be read, hence responses must not be cached.
+        """
+
+        with self.__lock:
+            now = self.__clock()
+            if now < self.__generation_expires_at:
+                return self.__generation
+
+        # The parameter is read without the lock, hence cached responses are served meanwhile.
+        generation = self.__read_generation()
+
+        with self.__lock:
+            if now < self.__generation_read_at:
+                # A concurrent, later read was already applied.
+                return self.__generation
+
+            if generation != self.__generation:
+                # Responses of previous generations can never be served again.
+                self.__entries.clear()
+            self.__generation = generation
+            self.__generation_read_at = now
+            self.__generation_expires_at = now + self.__generation_ttl
+
+            return generation
+
+    def get(self, payload: Any, generation: Optional[Hashable]) -> Any:
+        """
+        Returns the cached response of the payload.
+
+        :param payload: JSON serializable payload.
+        :param generation: Model generation, as returned by ``generation()``.
+
+        :return: Deserialized JSON response, or ``MISSING``, if the response is not cached.
+        """
+
+        if generation is None:
+            return MISSING
+
+        key = self.__key(payload)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if generation != self.__generation or entry is None or entry[0] <= self.__clock():
+                self.misses += 1
+                return MISSING
+
+            self.__entries.move_to_end(key)
+            self.hits += 1
+
+        # Each caller receives its own copy of the response.
+        return json.loads(entry[1])
+
+    def put(self, payload: Any, generation: Optional[Hashable], response: Any) -> None:
+        """
+        Caches the response of the payload, computed by the given model generation.
+
+        :param payload: JSON serializable payload.
+        :param generation: Model generation read before the endpoint was invoked.
+        :param response: Deserialized JSON response.
+
+        :return: No return.
+        """
+
+        if generation is None:
+            return
+
+        key = self.__key(payload)
+        with self.__lock:
+            # The generation might have changed while the endpoint was invoked.
+            if generation != self.__generation:
+                return
+
+            self.__entries[key] = (self.__clock() + self.__ttl, json.dumps(response))
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+
+    def __read_generation(self) -> Optional[Hashable]:
+        try:
+            response = self.__ssm_client.get_parameter(Name=self.__parameter_name)
+            document = json.loads(response['Parameter']['Value'] or '{}')
+        except Exception as ex:
+            print(f'Failed to read model generation, responses are not cached: {repr(ex)}.')
+            return None
+
+        if document.get('status', 'IN_SERVICE') != 'IN_SERVICE':
+            return None
+
+        return document.get('generation', 0), document.get('endpoint_config_name'), document.get('artifacts')
+
+    @staticmethod
+    def __key(payload: Any) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from aws_cdk.aws_cloudwatch import Alarm, ComparisonOperator, IAlarm, Metric, TreatMissingData
+from aws_cdk.aws_sagemaker import CfnEndpoint
+from aws_cdk.core import Construct, Duration
+
+
+@dataclass(frozen=True)
+class TrafficShifting:
+    """
+    Blue/green traffic shifting policy with alarm-based auto-rollback, applied on every endpoint refresh.
+
+    Each A/B configuration swap provisions a new (green) fleet and shifts traffic to it from the
+    old (blue) fleet, either in a canary step or in linear steps. If any rollback alarm goes off
+    before all traffic is shifted and the termination wait ends, SageMaker shifts all traffic
+    back to the blue fleet.
+
+    Properties
+    ==========
+
+    ``traffic_routing``
+        Traffic routing configuration. See ``canary()`` and ``linear()``.
+    ``termination_wait``
+        Time to keep monitoring rollback alarms, after all traffic is shifted, before the blue fleet
+        is terminated.
+    ``maximum_execution_timeout``
+        Optional. Maximum duration of the whole blue/green deployment.
+    ``model_latency_threshold``
+        Rolls the update back once the average ``ModelLatency`` of any production variant exceeds it.
+        None disables this alarm.
+    ``invocation_5xx_errors_threshold``
+        Rolls the update back once ``Invocation5XXErrors`` of any production variant per minute reach
+        it. None disables this alarm.
+    ``alarms``
+        Optional. Additional alarms that roll the update back.
+    """
+
+    traffic_routing: CfnEndpoint.TrafficRoutingConfigProperty
+    termination_wait: Duration = Duration.minutes(5)
+    maximum_execution_timeout: Optional[Duration] = None
+    model_latency_threshold: Optional[Duration] = Duration.seconds(1)
+    invocation_5xx_errors_threshold: Optional[int] = 1
+    alarms: Optional[List[IAlarm]] = None
+
+    @classmethod
+    def canary(cls, size_percent: int = 10, wait: Duration = Duration.minutes(5), **kwargs) -> 'TrafficShifting':
+        """
+        Shifts ``size_percent`` of traffic first and, after ``wait``, the rest of it.
+
+        :param size_percent: Percentage of the new fleet capacity that receives traffic first.
+        :param wait: Time to wait before the rest of traffic is shifted.
+        :param kwargs: Other properties.
+
+        :return: Traffic shifting policy.
+        """
+
+        return cls(
+            traffic_routing=CfnEndpoint.TrafficRoutingConfigProperty(
+                type='CANARY',
+                canary_size=CfnEndpoint.CapacitySizeProperty(type='CAPACITY_PERCENT', value=size_percent),
+                wait_interval_in_seconds=int(wait.to_seconds())
+            ),
+            **kwargs
+        )
+
+    @classmethod
+    def linear(cls, step_percent: int = 20, interval: Duration = Duration.minutes(2), **kwargs) -> 'TrafficShifting':
+        """
+        Shifts traffic in steps of ``step_percent``, one step every ``interval``.
+
+        :param step_percent: Percentage of the new fleet capacity shifted in each step.
+        :param interval: Time to wait between steps.
+        :param kwargs: Other properties.
+
+        :return: Traffic shifting policy.
+        """
+
+        return cls(
+            traffic_routing=CfnEndpoint.TrafficRoutingConfigProperty(
+                type='LINEAR',
+                linear_step_size=CfnEndpoint.CapacitySizeProperty(type='CAPACITY_PERCENT', value=step_percent),
+                wait_interval_in_seconds=int(interval.to_seconds())
+            ),
+            **kwargs
+        )
+
+    def bind(
+            self,
+            scope: Construct,
+            endpoint_name: str,
+            variant_names: Iterable[str]
+    ) -> CfnEndpoint.DeploymentConfigProperty:
+        """
+        Creates the endpoint's rollback alarms.
+
+        :param scope: Construct scope.
+        :param endpoint_name: SageMaker endpoint name.
+        :param variant_names: Names of the endpoint's production variants.
+
+        :return: Endpoint deployment configuration.
+        """
+
+        def metric(name: str, variant_name: str, statistic: str) -> Metric:
+            return Metric(
+                namespace='AWS/SageMaker',
+                metric_name=name,
+                dimensions_map={'EndpointName': endpoint_name, 'VariantName': variant_name},
+                statistic=statistic,
+                period=Duration.minutes(1)
+            )
+
+        alarms = list(self.alarms or [])
+        for variant_name in variant_names:
+            if self.model_latency_threshold is not None:
+                alarms.append(Alarm(
+                    scope=scope,
+                    id=f'{variant_name}ModelLatencyAlarm',
+                    alarm_description=f'Model latency of "{variant_name}" variant regressed.',
+                    metric=metric('ModelLatency', variant_name, 'Average'),
+                    # Model latency is reported in microseconds.
+                    threshold=self.model_latency_threshold.to_milliseconds() * 1000,
+                    comparison_operator=ComparisonOperator.GREATER_THAN_THRESHOLD,
+                    evaluation_periods=1,
+                    treat_missing_data=TreatMissingData.NOT_BREACHING
+                ))
+
+            if self.invocation_5xx_errors_threshold is not None:
+                alarms.append(Alarm(
+                    scope=scope,
+                    id=f'{variant_name}Invocation5XXErrorsAlarm',
+                    alarm_description=f'Model of "{variant_name}" variant fails invocations.',
+                    metric=metric('Invocation5XXErrors', variant_name, 'Sum'),
+                    threshold=self.invocation_5xx_errors_threshold,
+                    comparison_operator=ComparisonOperator.GREATER_THAN_OR_EQUAL_TO_THRESHOLD,
+                    evaluation_periods=1,
+                    treat_missing_data=TreatMissingData.NOT_BREACHING
+                ))
+
+        return CfnEndpoint.DeploymentConfigProperty(
+            blue_green_update_policy=CfnEndpoint.BlueGreenUpdatePolicyProperty(
+                traffic_routing_configuration=self.traffic_routing,
+                termination_wait_in_seconds=int(self.termination_wait.to_seconds()),
+                maximum_execution_timeout_in_seconds=(
+                    int(self.maximum_execution_timeout.to_seconds()) if self.maximum_execution_timeout else None
+                )
+            ),
+            auto_rollback_configuration=CfnEndpoint.AutoRollbackConfigProperty(
+                alarms=[CfnEndpoint.AlarmProperty(alarm_name=alarm.alarm_name) for alarm in alarms]
+            ) if alarms else None
+        )
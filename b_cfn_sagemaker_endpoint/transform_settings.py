@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class TransformSettings:
+    """
+    Batch transform job settings, that every job of ``BatchTransform`` is started with.
+
+    More info at: https://docs.aws.amazon.com/sagemaker/latest/APIReference/API_CreateTransformJob.html
+
+    Properties
+    ==========
+
+    ``instance_type``
+        ML compute instance type of transform jobs.
+    ``instance_count``
+        Number of ML compute instances of each transform job.
+    ``max_concurrent_transforms``
+        Maximum number of parallel requests sent to each instance. By default, SageMaker
+        uses the container's ``/execution-parameters`` or 1.
+    ``max_payload_in_mb``
+        Maximum size (in MB) of a single request payload, i.e. a mini-batch of records.
+    ``split_type``
+        How input files are split into records: ``None``, ``Line``, ``RecordIO`` or ``TFRecord``.
+    ``batch_strategy``
+        Number of records per request: ``SingleRecord`` or ``MultiRecord``, i.e. as many records
+        as fit into ``max_payload_in_mb``.
+    ``content_type``
+        MIME type of input data.
+    ``compression_type``
+        Compression of input files: ``None`` or ``Gzip``.
+    ``accept``
+        MIME type of output data.
+    ``assemble_with``
+        How results of a single input file are assembled: ``None`` or ``Line``.
+    ``environment``
+        Environment variables of the model containers.
+    ``max_retries``
+        Number of retries of a failed request to the container.
+    """
+
+    # SageMaker limit of ``MaxConcurrentTransforms`` * ``MaxPayloadInMB``.
+    MAX_TOTAL_PAYLOAD_IN_MB = 100
+
+    instance_type: str = 'ml.m5.large'
+    instance_count: int = 1
+    max_concurrent_transforms: Optional[int] = None
+    max_payload_in_mb: Optional[int] = None
+    split_type: Optional[str] = None
+    batch_strategy: Optional[str] = None
+    content_type: Optional[str] = None
+    compression_type: Optional[str] = None
+    accept: Optional[str] = None
+    assemble_with: Optional[str] = None
+    environment: Optional[Dict[str, str]] = None
+    max_retries: Optional[int] = None
+
+    def __post_init__(self):
+        if self.split_type not in (None, 'None', 'Line', 'RecordIO', 'TFRecord'):
+            raise ValueError('Split type must be one of "None", "Line", "RecordIO" or "TFRecord".')
+
+        if self.batch_strategy not in (None, 'SingleRecord', 'MultiRecord'):
+            raise ValueError('Batch strategy must be either "SingleRecord" or "MultiRecord".')
+
+        if self.batch_strategy == 'MultiRecord' and self.split_type in (None, 'None'):
+            raise ValueError('Multi-record batch strategy requires input files to be split into records.')
+
+        max_payload_in_mb = self.max_payload_in_mb
+        if max_payload_in_mb is not None and not 0 <= max_payload_in_mb <= self.MAX_TOTAL_PAYLOAD_IN_MB:
+            raise ValueError(f'Max payload must be between 0 and {self.MAX_TOTAL_PAYLOAD_IN_MB} MB.')
+
+        if (
+                self.max_concurrent_transforms is not None
+                and self.max_payload_in_mb
+                and self.max_concurrent_transforms * self.max_payload_in_mb > self.MAX_TOTAL_PAYLOAD_IN_MB
+        ):
+            raise ValueError(
+                f'Max concurrent transforms times max payload must not exceed {self.MAX_TOTAL_PAYLOAD_IN_MB} MB.'
+            )
+
+    def to_job_template(self) -> Dict[str, Any]:
+        """
+        Returns ``create_transform_job()`` arguments shared by all jobs.
+
+        :return: Transform job arguments, without job name, model, input data source and output path.
+        """
+
+        template = {
+            'TransformResources': {'InstanceType': self.instance_type, 'InstanceCount': self.instance_count},
+            'TransformInput': _without_none({
+                'ContentType': self.content_type,
+                'CompressionType': self.compression_type,
+                'SplitType': self.split_type,
+            }),
+            'TransformOutput': _without_none({
+                'Accept': self.accept,
+                'AssembleWith': self.assemble_with,
+            }),
+            'MaxConcurrentTransforms': self.max_concurrent_transforms,
+            'MaxPayloadInMB': self.max_payload_in_mb,
+            'BatchStrategy': self.batch_strategy,
+            'Environment': self.environment,
+            'ModelClientConfig': {'InvocationsMaxRetries': self.max_retries} if self.max_retries is not None else None,
+        }
+
+        return _without_none(template)
+
+
+def _without_none(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in values.items() if value is not None}
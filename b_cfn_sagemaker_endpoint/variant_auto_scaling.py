@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from aws_cdk.aws_applicationautoscaling import PredefinedMetric, ScalableTarget, ServiceNamespace
+from aws_cdk.core import Construct, Duration
+
+
+@dataclass(frozen=True)
+class VariantAutoScaling:
+    """
+    Target tracking auto scaling of endpoint's production variants.
+
+    Each production variant is registered as an Application Auto Scaling scalable target, that
+    scales its instance count to keep the average number of invocations per instance at the
+    target value. Scalable targets are bound to the endpoint and its variant names, which are
+    identical in both A & B configurations, hence they stay valid after configuration swaps.
+    Endpoint refreshes retain the current instance counts instead of resetting them to the
+    initial instance counts.
+
+    Properties
+    ==========
+
+    ``min_capacity``
+        Minimum instance count of each variant.
+    ``max_capacity``
+        Maximum instance count of each variant.
+    ``invocations_per_instance``
+        Target average number of invocations per instance per minute.
+    ``scale_in_cooldown``
+        Time to wait after a scale-in activity before another one can start.
+    ``scale_out_cooldown``
+        Time to wait after a scale-out activity before another one can start.
+    ``variant_names``
+        Optional. Names of scaled production variants. By default, all variants are scaled.
+    """
+
+    min_capacity: int = 1
+    max_capacity: int = 4
+    invocations_per_instance: float = 1000
+    scale_in_cooldown: Duration = Duration.minutes(5)
+    scale_out_cooldown: Duration = Duration.minutes(1)
+    variant_names: Optional[List[str]] = None
+
+    def __post_init__(self):
+        if self.min_capacity < 1 or self.max_capacity < self.min_capacity:
+            raise ValueError('Auto scaling capacity must satisfy: 1 <= min_capacity <= max_capacity.')
+
+    def bind(self, scope: Construct, endpoint_name: str, variant_name: str) -> ScalableTarget:
+        """
+        Registers a production variant as a scalable target with a target tracking policy.
+
+        :param scope: Construct scope.
+        :param endpoint_name: SageMaker endpoint name.
+        :param variant_name: Production variant name.
+
+        :return: Scalable target of the variant.
+        """
+
+        scalable_target = ScalableTarget(
+            scope=scope,
+            id=f'{variant_name}ScalableTarget',
+            service_namespace=ServiceNamespace.SAGEMAKER,
+            resource_id=f'endpoint/{endpoint_name}/variant/{variant_name}',
+            scalable_dimension='sagemaker:variant:DesiredInstanceCount',
+            min_capacity=self.min_capacity,
+            max_capacity=self.max_capacity
+        )
+        scalable_target.scale_to_track_metric(
+            'InvocationsPerInstance',
+            target_value=self.invocations_per_instance,
+            predefined_metric=PredefinedMetric.SAGEMAKER_VARIANT_INVOCATIONS_PER_INSTANCE,
+            scale_in_cooldown=self.scale_in_cooldown,
+            scale_out_cooldown=self.scale_out_cooldown
+        )
+
+        return scalable_target
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from typing import Any, Dict
+
+
+@dataclass(frozen=True)
+class VersionPinning:
+    """
+    Immutable, version-pinned endpoint configurations, created by every endpoint refresh.
+
+    Instead of swapping the endpoint between A & B configurations, each refresh clones configuration A
+    and its models into a new generation, named after the endpoint with a "-v<generation>" suffix.
+    The exact version of every model artifact is copied to a version-addressed key under ``prefix``
+    of the models bucket, that the generation's models reference. Once a new generation is created,
+    generations beyond ``retained_generations`` are deleted, together with pinned artifacts that no
+    retained generation references.
+
+    Generations are created by the refresh function, hence they are not deleted together with the
+    stack: the remaining generations and pinned artifacts must be deleted once the stack is deleted.
+
+    Properties
+    ==========
+
+    ``retained_generations``
+        Number of the most recent generations, that are kept. At least 2, i.e. the new generation and
+        the one the endpoint is updated from, which auto-rollback returns to.
+    ``prefix``
+        Key prefix of pinned model artifacts in the models bucket.
+    """
+
+    retained_generations: int = 3
+    prefix: str = 'pinned-models/'
+
+    def __post_init__(self):
+        if self.retained_generations < 2:
+            raise ValueError('At least 2 generations must be retained.')
+
+        if not self.prefix.endswith('/'):
+            raise ValueError('Prefix must end with "/".')
+
+    def to_settings(self, name_prefix: str, bucket_name: str) -> Dict[str, Any]:
+        """
+        Returns the pinning's settings, as read by the refresh function.
+
+        :param name_prefix: Name prefix of generations' endpoint configurations and models.
+        :param bucket_name: Name of the bucket, that model artifacts are pinned to.
+
+        :return: Settings.
+        """
+
+        return {
+            'name_prefix': name_prefix,
+            'bucket': bucket_name,
+            'prefix': self.prefix,
+            'retained_generations': self.retained_generations,
+        }
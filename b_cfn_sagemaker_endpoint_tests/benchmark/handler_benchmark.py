@@ -0,0 +1,208 @@
+"""
+Refresh function's startup benchmark.
+
+Measures, against in-memory ``boto3`` client stand-ins, so that only the function's own code is timed:
+
+- ``import_ms`` - time to import the handler module in a fresh interpreter;
+- ``cold_init_ms`` - time to import the handler module and handle the first event in a fresh interpreter;
+- ``invocation_ms`` / ``invocation_p95_ms`` - overhead of a single warm handler invocation.
+
+Results can be saved and compared against a saved baseline, failing on regressions:
+
+    python -m b_cfn_sagemaker_endpoint_tests.benchmark.handler_benchmark --output baseline.json
+    python -m b_cfn_sagemaker_endpoint_tests.benchmark.handler_benchmark --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from b_cfn_sagemaker_endpoint_tests.unit import REFRESH_SOURCE_PATH
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENVIRONMENT = {
+    'WAIT_TIME': '0',
+    'SAGEMAKER_ENDPOINT_NAME': 'endpoint',
+    'SAGEMAKER_ENDPOINT_CONFIG_A_NAME': 'endpoint-config-a',
+    'SAGEMAKER_ENDPOINT_CONFIG_B_NAME': 'endpoint-config-b',
+    'REFRESH_STATE_PARAMETER_NAME': 'state',
+    'DEFER_BUSY_UPDATES': 'true',
+    'EVENT_INTAKE_ENABLED': 'true',
+}
+
+COLD_START_SCRIPT = '''
+import contextlib, io, json, time
+started_at = time.perf_counter()
+import index
+imported_at = time.perf_counter()
+from b_cfn_sagemaker_endpoint_tests.benchmark.handler_benchmark import stub_clients, event
+stub_clients()
+stubbed_at = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    index.handler(event(0), None)
+finished_at = time.perf_counter()
+print(json.dumps({
+    'import': imported_at - started_at,
+    'cold_init': (imported_at - started_at) + (finished_at - stubbed_at),
+}))
+'''
+
+
+def stub_clients() -> None:
+    """
+    Replaces ``boto3`` clients of the refresh function with in-memory stand-ins.
+
+    :return: No return.
+    """
+
+    import clients
+    from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeS3Client, FakeSagemakerClient, FakeSsmClient
+
+    stubs = {
+        'sagemaker': FakeSagemakerClient(ENVIRONMENT['SAGEMAKER_ENDPOINT_NAME'], 'endpoint-config-a'),
+        'ssm': FakeSsmClient(),
+        's3': FakeS3Client(),
+    }
+    clients.get = lambda name: stubs[name]
+
+
+def event(index: int) -> Dict[str, Any]:
+    """
+    Creates an intake queue event of a single model upload.
+
+    :param index: Upload index, that makes each upload new.
+
+    :return: Lambda SQS event.
+    """
+
+    from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import s3_event, sqs_event
+
+    return sqs_event(s3_event('active_model/model.tar.gz', sequencer=f'{index + 1:X}'))
+
+
+def measure_cold_start(runs: int) -> Dict[str, List[float]]:
+    """
+    Measures import and cold init times, each run in a fresh interpreter.
+
+    :param runs: Number of interpreters to start.
+
+    :return: Mapping of measurement names and their values in seconds.
+    """
+
+    environment = {
+        **os.environ,
+        **ENVIRONMENT,
+        'PYTHONPATH': os.pathsep.join([REFRESH_SOURCE_PATH, REPOSITORY_PATH]),
+        'PYTHONDONTWRITEBYTECODE': '1',
+    }
+    results = {'import': [], 'cold_init': []}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', COLD_START_SCRIPT],
+            env=environment,
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout
+        measurements = json.loads(output.strip().splitlines()[-1])
+        for name, value in measurements.items():
+            results[name].append(value)
+
+    return results
+
+
+def measure_invocations(invocations: int) -> List[float]:
+    """
+    Measures warm handler invocations in the current interpreter.
+
+    :param invocations: Number of invocations.
+
+    :return: Invocation times in seconds.
+    """
+
+    os.environ.update(ENVIRONMENT)
+
+    import index
+    stub_clients()
+
+    events = [event(index) for index in range(invocations)]
+    durations = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for invocation_event in events:
+            started_at = time.perf_counter()
+            index.handler(invocation_event, None)
+            durations.append(time.perf_counter() - started_at)
+
+    return durations
+
+
+def run(cold_runs: int, invocations: int) -> Dict[str, float]:
+    cold_start = measure_cold_start(cold_runs)
+    durations = sorted(measure_invocations(invocations))
+
+    return {
+        'import_ms': statistics.median(cold_start['import']) * 1000,
+        'cold_init_ms': statistics.median(cold_start['cold_init']) * 1000,
+        'invocation_ms': statistics.median(durations) * 1000,
+        'invocation_p95_ms': durations[int(len(durations) * 0.95) - 1] * 1000,
+    }
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """
+    Compares results against a baseline.
+
+    :param results: Current results.
+    :param baseline: Baseline results.
+    :param tolerance: Maximum allowed ratio of a current result to its baseline.
+
+    :return: Descriptions of regressed results.
+    """
+
+    return [
+        f'{name}: {value:.2f} ms, baseline {baseline[name]:.2f} ms ({value / baseline[name]:.2f}x)'
+        for name, value in results.items()
+        if baseline.get(name) and value > baseline[name] * tolerance
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Refresh function startup benchmark.')
+    parser.add_argument('--cold-runs', type=int, default=10, help='Number of fresh interpreters to start.')
+    parser.add_argument('--invocations', type=int, default=200, help='Number of warm handler invocations.')
+    parser.add_argument('--output', help='Path of a JSON file to save results to.')
+    parser.add_argument('--baseline', help='Path of a JSON file of baseline results to compare against.')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='Allowed slowdown ratio against the baseline.')
+    arguments = parser.parse_args()
+
+    results = run(arguments.cold_runs, arguments.invocations)
+    for name, value in results.items():
+        print(f'{name}: {value:.2f}')
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            regressions = compare(results, json.load(file), arguments.tolerance)
+
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
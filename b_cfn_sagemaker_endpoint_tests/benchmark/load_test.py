@@ -0,0 +1,81 @@
+"""
+Latency gate load test.
+
+Runs the refresh function's latency gate load generator and thresholds against a locally running
+model serving container (``POST /invocations``), or against a deployed endpoint, before the
+model is uploaded. Reports p50, p95 and p99 latencies and the error rate, and exits with a
+non-zero status if any threshold is exceeded:
+
+    docker run -p 8080:8080 <image> serve
+    python -m b_cfn_sagemaker_endpoint_tests.benchmark.load_test --url http://localhost:8080 --p99 250
+    python -m b_cfn_sagemaker_endpoint_tests.benchmark.load_test --endpoint-name my-endpoint --payloads payloads.json
+
+Payloads file is a JSON list of ``InvocationPayload`` objects, i.e. ``body``, ``content_type``
+and optional ``accept`` keys.
+"""
+
+import argparse
+import json
+import sys
+
+from b_cfn_sagemaker_endpoint_tests.unit import REFRESH_SOURCE_PATH  # noqa: F401, adds the refresh source to the path.
+
+from latency_gate import LoadGenerator, LocalRuntimeClient  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Latency gate load test.')
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help='Base URL of a local model serving container.')
+    target.add_argument('--endpoint-name', help='Name of a deployed SageMaker endpoint.')
+    parser.add_argument('--payloads', help='Path of a JSON file of invocation payloads. Default is "{}".')
+    parser.add_argument('--concurrency', type=int, default=4, help='Number of concurrent invocations.')
+    parser.add_argument('--requests', type=int, default=200, help='Total number of invocations.')
+    parser.add_argument('--p50', type=float, help='Median latency threshold in milliseconds.')
+    parser.add_argument('--p95', type=float, help='95th percentile latency threshold in milliseconds.')
+    parser.add_argument('--p99', type=float, help='99th percentile latency threshold in milliseconds.')
+    parser.add_argument('--max-error-rate', type=float, default=0.0, help='Maximum share of failed invocations.')
+    arguments = parser.parse_args()
+
+    payloads = None
+    if arguments.payloads:
+        with open(arguments.payloads) as file:
+            payloads = [
+                {'body': payload['body'], 'content_type': payload['content_type'], 'accept': payload.get('accept')}
+                for payload in json.load(file)
+            ]
+
+    if arguments.url:
+        runtime_client = LocalRuntimeClient(arguments.url)
+    else:
+        import boto3
+        runtime_client = boto3.client('sagemaker-runtime')
+
+    report = LoadGenerator(
+        runtime_client,
+        arguments.endpoint_name or 'local',
+        payloads,
+        concurrency=arguments.concurrency,
+        requests=arguments.requests
+    ).run()
+
+    for name, latency in report.percentiles().items():
+        print(f'{name}: {latency * 1000:.1f} ms')
+    print(f'errors: {report.errors}/{report.requests}')
+    if report.first_error:
+        print(f'first error: {report.first_error}')
+
+    violations = report.violations({
+        'p50': arguments.p50,
+        'p95': arguments.p95,
+        'p99': arguments.p99,
+        'max_error_rate': arguments.max_error_rate,
+    })
+    for violation in violations:
+        print(f'FAILED: {violation}')
+
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,546 @@
+"""
+Offline refresh simulation.
+
+Drives the refresh function's handler with synthetic S3 event streams, in virtual time, against
+in-process stand-ins of the SageMaker control plane, SQS and Step Functions. Handler invocations,
+SQS message delays, state machine waits and endpoint updates all take virtual time, hence hours of
+refresh behavior are simulated in seconds. Like the deployed refresh function, a single invocation
+runs at a time: bucket events wait in the asynchronous invocation queue and are dropped once older
+than the maximum event age, SQS messages wait in their queue, while throttled state machine steps
+are retried. Each scenario is run in each refresh mode (``sleep``, ``debounce``, ``state_machine``)
+and reports:
+
+- ``updates_per_burst`` - endpoint updates per burst of uploads;
+- ``lost_uploads`` - uploads, that no endpoint update was started after, i.e. never served;
+- ``expired_events`` - bucket events dropped from the asynchronous invocation queue;
+- ``upload_to_update_p50_s`` / ``upload_to_update_max_s`` - time from an upload until an
+  endpoint update, that serves it, is started;
+- ``upload_to_in_service_max_s`` - time from an upload until the endpoint serves it;
+- ``invocations`` / ``billed_s`` - handler invocations and their total duration;
+- ``failed_invocations`` - handler invocations that raised an error.
+
+    python -m b_cfn_sagemaker_endpoint_tests.benchmark.refresh_simulation
+    python -m b_cfn_sagemaker_endpoint_tests.benchmark.refresh_simulation --scenario during_update --output results.json
+"""
+
+import argparse
+import collections
+import contextlib
+import functools
+import heapq
+import io
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from b_cfn_sagemaker_endpoint_tests.unit import REFRESH_SOURCE_PATH  # noqa: F401, adds the refresh source to the path.
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeS3Client,
+    FakeSagemakerRuntimeClient,
+    FakeSsmClient,
+    endpoint_state_change_event,
+    s3_event,
+)
+
+# Virtual time starts at 2022-01-01T00:00:00Z.
+EPOCH = 1640995200.0
+
+ENDPOINT_NAME = 'endpoint'
+
+ENVIRONMENT = {
+    'SAGEMAKER_ENDPOINT_NAME': ENDPOINT_NAME,
+    'SAGEMAKER_ENDPOINT_CONFIG_A_NAME': 'endpoint-config-a',
+    'SAGEMAKER_ENDPOINT_CONFIG_B_NAME': 'endpoint-config-b',
+    'REFRESH_STATE_PARAMETER_NAME': 'state',
+    'DEFER_BUSY_UPDATES': 'true',
+}
+
+# Maximum age of queued asynchronous invocation events, as configured by ``RefreshFunction``.
+MAX_EVENT_AGE = 120
+
+# Retries of throttled state machine steps, as configured by ``RefreshStateMachine``.
+THROTTLING_RETRY_INTERVAL = 5
+THROTTLING_RETRY_ATTEMPTS = 10
+THROTTLING_RETRY_BACKOFF = 1.5
+
+# Environment of each refresh mode, on top of ``ENVIRONMENT``.
+MODES = {
+    'sleep': {},
+    'debounce': {'DEBOUNCE_QUEUE_URL': 'debounce-queue'},
+    'state_machine': {'STATE_MACHINE_ARN': 'arn:aws:states:us-east-1:123456789012:stateMachine:refresh'},
+}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """
+    Synthetic stream of model uploads.
+
+    Properties
+    ==========
+
+    ``name``
+        Scenario name.
+    ``uploads``
+        Upload times, in seconds since the scenario start, and uploaded object keys.
+    ``bursts``
+        Number of bursts of uploads, each expected to result in a single endpoint update.
+    """
+
+    name: str
+    uploads: List[Tuple[float, str]]
+    bursts: int
+
+
+def burst(bursts: int = 3, files: int = 20, spacing: float = 0.5, interval: float = 3600) -> Scenario:
+    """
+    Bursts of many files, e.g. sharded weights, uploaded an hour apart.
+    """
+
+    return Scenario(
+        name='burst',
+        uploads=[
+            (index * interval + file * spacing, f'active_model/shard-{file}.tar.gz')
+            for index in range(bursts)
+            for file in range(files)
+        ],
+        bursts=bursts
+    )
+
+
+def interleaved(duration: float = 300, spacing: float = 20) -> Scenario:
+    """
+    Two models uploaded alternately, each upload within the wait time of the previous one.
+    """
+
+    return Scenario(
+        name='interleaved',
+        uploads=[
+            (index * spacing, f'{("encoder", "decoder")[index % 2]}/model.tar.gz')
+            for index in range(int(duration // spacing))
+        ],
+        bursts=1
+    )
+
+
+def during_update(wait_time: float = 60, files: int = 5) -> Scenario:
+    """
+    A burst of uploads followed by another burst while the endpoint is being updated.
+    """
+
+    second_burst_at = wait_time + 120
+    return Scenario(
+        name='during_update',
+        uploads=[
+            *[(file * 1.0, f'active_model/shard-{file}.tar.gz') for file in range(files)],
+            *[(second_burst_at + file * 1.0, f'active_model/shard-{file}.tar.gz') for file in range(files)],
+        ],
+        bursts=2
+    )
+
+
+SCENARIOS: Dict[str, Callable[[], Scenario]] = {
+    'burst': burst,
+    'interleaved': interleaved,
+    'during_update': during_update,
+}
+
+
+class VirtualScheduler:
+    """
+    Runs tasks as threads in virtual time, strictly one at a time.
+
+    A task runs until it sleeps or finishes, then the task or wakeup due next is run, moving
+    virtual time to its due time. Therefore, concurrent tasks, e.g. an invocation and a state machine
+    execution, interleave at their waits, like in real time, while every run is deterministic and
+    takes no real time to wait.
+
+    :param start: Virtual time to start at, in seconds.
+    """
+
+    def __init__(self, start: float = EPOCH):
+        self.now = start
+        self.__queue: List[Tuple[float, int, Callable[[], None]]] = []
+        self.__sequence = itertools.count()
+        # Held by whichever task or the scheduler loop is running.
+        self.__baton = threading.Semaphore(0)
+
+    def time(self) -> float:
+        return self.now
+
+    def at(self, due: float, task: Callable[[], Any]) -> None:
+        """
+        Schedules a task.
+
+        :param due: Virtual time to start the task at.
+        :param task: Function, that is run as a separate thread.
+
+        :return: No return.
+        """
+
+        heapq.heappush(self.__queue, (due, next(self.__sequence), lambda: self.__start(task)))
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Suspends the calling task for the given number of virtual seconds.
+        """
+
+        wakeup = threading.Event()
+        heapq.heappush(self.__queue, (self.now + seconds, next(self.__sequence), lambda: self.__resume(wakeup)))
+        self.__baton.release()
+        wakeup.wait()
+
+    def run(self, until: float) -> None:
+        """
+        Runs scheduled tasks in virtual time order.
+
+        :param until: Virtual time to stop at, even if tasks are still scheduled.
+
+        :return: No return.
+        """
+
+        while self.__queue and self.__queue[0][0] <= until:
+            due, _, callback = heapq.heappop(self.__queue)
+            self.now = max(self.now, due)
+            callback()
+
+    def __start(self, task: Callable[[], Any]) -> None:
+        def target() -> None:
+            try:
+                task()
+            finally:
+                self.__baton.release()
+
+        threading.Thread(target=target, daemon=True).start()
+        self.__baton.acquire()
+
+    def __resume(self, wakeup: threading.Event) -> None:
+        wakeup.set()
+        self.__baton.acquire()
+
+
+class SimulatedSagemakerClient:
+    """
+    Stand-in of the SageMaker control plane, whose endpoint updates take virtual time. An
+    ``IN_SERVICE`` state change event is delivered to the refresh function after each update.
+
+    :param scheduler: Virtual time scheduler.
+    :param update_duration: Duration of an endpoint update in seconds.
+    :param on_in_service: Function that delivers an endpoint state change event.
+    """
+
+    def __init__(self, scheduler: VirtualScheduler, update_duration: float, on_in_service: Callable[[], Any]):
+        self.__scheduler = scheduler
+        self.__update_duration = update_duration
+        self.__on_in_service = on_in_service
+        self.__endpoint_config_name = ENVIRONMENT['SAGEMAKER_ENDPOINT_CONFIG_A_NAME']
+        self.__in_service_at = 0.0
+        self.updates: List[Dict[str, Any]] = []
+
+    def describe_endpoint(self, EndpointName: str) -> Dict[str, Any]:
+        return {
+            'EndpointName': EndpointName,
+            'EndpointConfigName': self.__endpoint_config_name,
+            'EndpointStatus': 'InService' if self.__scheduler.now >= self.__in_service_at else 'Updating',
+            'ProductionVariants': [{'VariantName': 'AllTraffic', 'CurrentInstanceCount': 1}],
+        }
+
+    def update_endpoint(self, EndpointName: str, EndpointConfigName: str, **kwargs) -> Dict[str, Any]:
+        if self.__scheduler.now < self.__in_service_at:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'Cannot update in-progress endpoint.'}},
+                'UpdateEndpoint'
+            )
+
+        self.__endpoint_config_name = EndpointConfigName
+        self.__in_service_at = self.__scheduler.now + self.__update_duration
+        self.updates.append({'started_at': self.__scheduler.now, 'in_service_at': self.__in_service_at})
+        self.__scheduler.at(self.__in_service_at, self.__on_in_service)
+        return {}
+
+
+class SimulatedSqsClient:
+    """
+    Stand-in of SQS, that delivers each message to the refresh function after its delay.
+
+    :param scheduler: Virtual time scheduler.
+    :param deliver: Function that invokes the refresh function with a lambda event.
+    """
+
+    def __init__(self, scheduler: VirtualScheduler, deliver: Callable[[Dict[str, Any]], Any]):
+        self.__scheduler = scheduler
+        self.__deliver = deliver
+        self.__message_ids = itertools.count()
+
+    def send_message(self, QueueUrl: str, MessageBody: str, DelaySeconds: int = 0, **kwargs) -> Dict[str, Any]:
+        message_id = str(next(self.__message_ids))
+        event = {'Records': [{'eventSource': 'aws:sqs', 'messageId': message_id, 'body': MessageBody}]}
+        self.__scheduler.at(self.__scheduler.now + DelaySeconds, lambda: self.__deliver(event))
+        return {'MessageId': message_id}
+
+
+class SimulatedSfnClient:
+    """
+    Stand-in of Step Functions, that runs ``RefreshStateMachine`` executions: each step is a
+    refresh function invocation, while waits take virtual time.
+
+    :param scheduler: Virtual time scheduler.
+    :param invoke: Function that invokes the refresh function with a lambda event.
+    """
+
+    def __init__(self, scheduler: VirtualScheduler, invoke: Callable[[Dict[str, Any]], Any]):
+        self.__scheduler = scheduler
+        self.__invoke = invoke
+        self.executions = 0
+
+    def start_execution(self, stateMachineArn: str, input: str, **kwargs) -> Dict[str, Any]:
+        self.executions += 1
+        self.__scheduler.at(self.__scheduler.now, functools.partial(self.__run, json.loads(input)))
+        return {'executionArn': f'{stateMachineArn}:{self.executions}'}
+
+    def __run(self, execution: Dict[str, Any]) -> None:
+        self.__scheduler.sleep(execution['wait_seconds'])
+        execution = self.__invoke({'step': 'resolve', 'execution': execution})
+        if execution is None or execution['action'] != 'update':
+            return
+
+        execution = self.__invoke({'step': 'update', 'execution': execution})
+        while execution is not None:
+            self.__scheduler.sleep(execution['backoff'])
+            execution = self.__invoke({'step': 'poll', 'execution': execution})
+            if execution is not None and execution['status'] != 'Updating':
+                return
+
+
+class Simulation:
+    """
+    A single run of a scenario in a refresh mode.
+
+    The refresh function's reserved concurrency is a single invocation. Bucket events are invoked
+    asynchronously, without retries, hence they are queued while another invocation runs and dropped,
+    once older than ``MAX_EVENT_AGE``. SQS messages (debounce ticks, endpoint state change events) are
+    queued without expiry, while state machine steps are throttled and retried like Step Functions do.
+
+    :param scenario: Uploads to simulate.
+    :param mode: Refresh mode, one of ``MODES``.
+    :param wait_time: Refresh wait time in seconds.
+    :param update_duration: Duration of an endpoint update in seconds.
+    """
+
+    def __init__(self, scenario: Scenario, mode: str, wait_time: float = 60, update_duration: float = 600):
+        self.__scenario = scenario
+        self.__mode = mode
+        self.__wait_time = wait_time
+        self.__scheduler = VirtualScheduler()
+        self.__sagemaker_client = SimulatedSagemakerClient(
+            self.__scheduler,
+            update_duration,
+            # Endpoint state change events are queued in SQS in every mode.
+            on_in_service=lambda: self.__invoke_queued(
+                endpoint_state_change_event(ENDPOINT_NAME, 'IN_SERVICE', time=self.__timestamp())
+            )
+        )
+        self.__clients = {
+            'sagemaker': self.__sagemaker_client,
+            'ssm': FakeSsmClient(),
+            's3': FakeS3Client(),
+            'sagemaker-runtime': FakeSagemakerRuntimeClient(),
+            'sqs': SimulatedSqsClient(self.__scheduler, self.__invoke_queued),
+            'stepfunctions': SimulatedSfnClient(self.__scheduler, self.__invoke_sync),
+        }
+        self.__durations: List[float] = []
+        self.__failures: List[str] = []
+        # Events waiting for the single concurrent invocation: enqueue time, whether it expires, event.
+        self.__queue: Deque[Tuple[float, bool, Dict[str, Any]]] = collections.deque()
+        self.__busy = False
+        self.__expired_events = 0
+
+    def run(self) -> Dict[str, float]:
+        """
+        Runs the scenario until every refresh settles.
+
+        :return: Mapping of measurement names and their values.
+        """
+
+        for offset, key in self.__scenario.uploads:
+            self.__scheduler.at(EPOCH + offset, functools.partial(self.__upload, key))
+
+        with self.__patched():
+            horizon = EPOCH + max(offset for offset, _ in self.__scenario.uploads) + 24 * 3600
+            self.__scheduler.run(until=horizon)
+
+        return self.__measure()
+
+    def __upload(self, key: str) -> None:
+        self.__clients['s3'].put_object(Bucket='models', Key=key, Body=b'model')
+        sequencer = f'{int((self.__scheduler.now - EPOCH) * 1000):016X}'
+        event = s3_event(key, sequencer=sequencer, event_time=self.__timestamp())
+        self.__queue.append((self.__scheduler.now, True, event))
+        self.__dispatch()
+
+    def __invoke_queued(self, event: Dict[str, Any]) -> None:
+        self.__queue.append((self.__scheduler.now, False, event))
+        self.__dispatch()
+
+    def __invoke_sync(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        delay = THROTTLING_RETRY_INTERVAL
+        for _ in range(THROTTLING_RETRY_ATTEMPTS):
+            if not self.__busy:
+                return self.__invoke(event)
+            self.__scheduler.sleep(delay)
+            delay *= THROTTLING_RETRY_BACKOFF
+
+        if not self.__busy:
+            return self.__invoke(event)
+        self.__failures.append('Lambda.TooManyRequestsException')
+        return None
+
+    def __dispatch(self) -> None:
+        """
+        Starts the oldest queued event, that did not expire, unless an invocation is running.
+        """
+
+        while self.__queue and not self.__busy:
+            enqueued_at, expires, event = self.__queue.popleft()
+            if expires and self.__scheduler.now - enqueued_at > MAX_EVENT_AGE:
+                self.__expired_events += 1
+                continue
+            self.__busy = True
+            self.__scheduler.at(self.__scheduler.now, functools.partial(self.__invoke, event))
+
+    def __invoke(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        import index
+
+        self.__busy = True
+        started_at = self.__scheduler.now
+        try:
+            return index.handler(event, None)
+        except Exception as ex:
+            # Failed invocations are not retried.
+            self.__failures.append(repr(ex))
+            return None
+        finally:
+            self.__durations.append(self.__scheduler.now - started_at)
+            self.__busy = False
+            self.__dispatch()
+
+    def __timestamp(self) -> str:
+        return datetime.fromtimestamp(self.__scheduler.now, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    @contextlib.contextmanager
+    def __patched(self) -> Iterator[None]:
+        import clients
+        import debounce
+        import index
+        import orchestration
+        from metrics import UploadTracker
+
+        patches = [
+            (clients, 'get', lambda name: self.__clients[name]),
+            (index, 'TARGET', None),
+            (time, 'time', self.__scheduler.time),
+            (time, 'sleep', self.__scheduler.sleep),
+            # Clocks bound as default arguments are replaced by the virtual clock.
+            (debounce, 'Debouncer', functools.partial(debounce.Debouncer, clock=self.__scheduler.time)),
+            (index, 'UploadTracker', functools.partial(UploadTracker, clock=self.__scheduler.time)),
+            (
+                orchestration,
+                'RefreshExecutions',
+                functools.partial(orchestration.RefreshExecutions, clock=self.__scheduler.time)
+            ),
+        ]
+        originals = [(module, name, getattr(module, name)) for module, name, _ in patches]
+        environment = dict(os.environ)
+        try:
+            for module, name, value in patches:
+                setattr(module, name, value)
+            os.environ.update({**ENVIRONMENT, **MODES[self.__mode], 'WAIT_TIME': str(self.__wait_time)})
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield
+        finally:
+            for module, name, value in originals:
+                setattr(module, name, value)
+            os.environ.clear()
+            os.environ.update(environment)
+
+    def __measure(self) -> Dict[str, float]:
+        updates = self.__sagemaker_client.updates
+        to_update = []
+        to_in_service = []
+        lost_uploads = 0
+        for offset, _ in self.__scenario.uploads:
+            uploaded_at = EPOCH + offset
+            update = next((update for update in updates if update['started_at'] >= uploaded_at), None)
+            if update is None:
+                lost_uploads += 1
+                continue
+            to_update.append(update['started_at'] - uploaded_at)
+            to_in_service.append(update['in_service_at'] - uploaded_at)
+
+        return {
+            'updates': len(updates),
+            'updates_per_burst': len(updates) / self.__scenario.bursts,
+            'lost_uploads': lost_uploads,
+            'expired_events': self.__expired_events,
+            'upload_to_update_p50_s': statistics.median(to_update) if to_update else 0.0,
+            'upload_to_update_max_s': max(to_update, default=0.0),
+            'upload_to_in_service_max_s': max(to_in_service, default=0.0),
+            'invocations': len(self.__durations),
+            'billed_s': sum(self.__durations),
+            'failed_invocations': len(self.__failures),
+        }
+
+
+def run(scenarios: List[str], modes: List[str], wait_time: float, update_duration: float) -> Dict[str, Any]:
+    return {
+        scenario: {
+            mode: Simulation(SCENARIOS[scenario](), mode, wait_time, update_duration).run()
+            for mode in modes
+        }
+        for scenario in scenarios
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Offline refresh simulation.')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='Scenario to run. Default is all.')
+    parser.add_argument('--mode', action='append', choices=list(MODES), help='Refresh mode to run. Default is all.')
+    parser.add_argument('--wait-time', type=float, default=60, help='Refresh wait time in seconds.')
+    parser.add_argument('--update-duration', type=float, default=600, help='Endpoint update duration in seconds.')
+    parser.add_argument('--output', help='Path of a JSON file to save results to.')
+    arguments = parser.parse_args()
+
+    started_at = time.perf_counter()
+    results = run(
+        arguments.scenario or list(SCENARIOS),
+        arguments.mode or list(MODES),
+        arguments.wait_time,
+        arguments.update_duration
+    )
+
+    columns = list(next(iter(next(iter(results.values())).values())))
+    print(' '.join([f'{"scenario":<14}', f'{"mode":<14}', *columns]))
+    for scenario, modes in results.items():
+        for mode, measurements in modes.items():
+            values = [f'{measurements[column]:>{len(column)}.1f}' for column in columns]
+            print(' '.join([f'{scenario:<14}', f'{mode:<14}', *values]))
+    print(f'Simulated in {time.perf_counter() - started_at:.1f} s.')
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,7 +10,7 @@ from b_cfn_s3_large_deployment.deployment_source import AssetDeploymentSource
 from b_cfn_s3_large_deployment.resource import S3LargeDeploymentResource
 
 from b_cfn_sagemaker_endpoint import SagemakerEndpoint, ModelProps, BucketEvent
-from b_cfn_sagemaker_endpoint_tests.integration.utils.model_assets_utils import create_asset_options
+from b_cfn_sagemaker_endpoint.model_packaging import DEFAULT_EXCLUDE, model_asset_options
 
 
 class Infrastructure(TestingStack):
@@ -37,11 +37,19 @@ class Infrastructure(TestingStack):
             sources=[
                 AssetDeploymentSource(
                     path=os.path.join(os.path.dirname(__file__), 'data/models/v1'),
-                    options=create_asset_options(model_name='v1')
+                    options=model_asset_options(
+                        source_path=os.path.join(os.path.dirname(__file__), 'data/models/v1'),
+                        model_name='v1',
+                        exclude=(*DEFAULT_EXCLUDE, '/__init__.py')
+                    )
                 ),
                 AssetDeploymentSource(
                     path=os.path.join(os.path.dirname(__file__), 'data/models/v2'),
-                    options=create_asset_options(model_name='v2')
+                    options=model_asset_options(
+                        source_path=os.path.join(os.path.dirname(__file__), 'data/models/v2'),
+                        model_name='v2',
+                        exclude=(*DEFAULT_EXCLUDE, '/__init__.py')
+                    )
                 )
             ],
             destination_bucket=test_bucket,
@@ -58,7 +66,11 @@ class Infrastructure(TestingStack):
             sources=[
                 AssetDeploymentSource(
                     path=os.path.join(os.path.dirname(__file__), 'data/models/v1'),
-                    options=create_asset_options(model_name='active_model')
+                    options=model_asset_options(
+                        source_path=os.path.join(os.path.dirname(__file__), 'data/models/v1'),
+                        model_name='active_model',
+                        exclude=(*DEFAULT_EXCLUDE, '/__init__.py')
+                    )
                 )
             ],
             destination_bucket=test_bucket,
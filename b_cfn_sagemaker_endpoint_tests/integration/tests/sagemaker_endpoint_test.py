@@ -1,9 +1,12 @@
-import json
+import asyncio
+import os
 import time
 from typing import Any, Dict
 
 from b_aws_testing_framework.credentials import Credentials
 
+from b_cfn_sagemaker_endpoint.endpoint_client import EndpointClient
+from b_cfn_sagemaker_endpoint.model_publisher import ModelPublisher
 from b_cfn_sagemaker_endpoint_tests.integration.infrastructure import Infrastructure
 
 
@@ -18,13 +21,10 @@ def test_sagemaker_endpoint_update_EXPECT_updated_model_result():
 
     boto_session = Credentials().boto_session
 
+    endpoint_client = EndpointClient(test_endpoint_name, boto_session.client('sagemaker-runtime'))
+
     def invoke_endpoint(body: str = None) -> Dict[str, Any]:
-        sagemaker_runtime_client = boto_session.client('sagemaker-runtime')
-        response = sagemaker_runtime_client.invoke_endpoint(
-            EndpointName=test_endpoint_name,
-            Body=body or 'Nothing in particular.'
-        )
-        return json.loads(response['Body'].read().decode())
+        return asyncio.run(endpoint_client.invoke(body or 'Nothing in particular.'))
 
     result = invoke_endpoint()
     message = result['message']
@@ -38,16 +38,11 @@ def test_sagemaker_endpoint_update_EXPECT_updated_model_result():
     }
     next_model_name = model_names_swap_map[initial_model_name]
 
-    # Replace previous model files with the new.
-    s3_resource = boto_session.resource('s3')
-    models_bucket = s3_resource.Bucket(test_models_bucket_name)
-    copy_source = {
-        'Bucket': models_bucket.name,
-        'Key': f'models/{next_model_name}/model.tar.gz'
-    }
-    model_destination_key = 'active_model/model.tar.gz'
-    models_bucket.Object(model_destination_key).delete()
-    models_bucket.copy(copy_source, model_destination_key)
+    # Replace previous model files with the new, in a single atomic upload.
+    ModelPublisher(boto_session.client('s3'), test_models_bucket_name).publish(
+        os.path.join(os.path.dirname(__file__), '..', 'data', 'models', next_model_name),
+        'active_model/model.tar.gz'
+    )
 
     wait_time = test_endpoint_refresh_wait_time + 60
     force_print(f'Waiting {wait_time} seconds for endpoint refresh to initiate its update...')
@@ -0,0 +1,13 @@
+import os
+import sys
+from importlib.util import find_spec
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+# Refresh function's source is deployed as a flat lambda package, hence its modules import each
+# other as top-level modules. Locate it without importing the CDK based package itself.
+PACKAGE_PATH = find_spec('b_cfn_sagemaker_endpoint').submodule_search_locations[0]
+REFRESH_SOURCE_PATH = os.path.join(PACKAGE_PATH, 'refresh', 'source')
+
+if REFRESH_SOURCE_PATH not in sys.path:
+    sys.path.insert(0, REFRESH_SOURCE_PATH)
@@ -0,0 +1,48 @@
+from typing import Any, Dict
+
+import pytest
+
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeS3Client,
+    FakeSsmClient,
+    FakeSagemakerClient,
+    FakeSagemakerRuntimeClient,
+    FakeSfnClient
+)
+
+ENDPOINT_NAME = 'endpoint'
+ENDPOINT_CONFIG_A_NAME = 'endpoint-config-a'
+ENDPOINT_CONFIG_B_NAME = 'endpoint-config-b'
+
+
+@pytest.fixture
+def clients(monkeypatch) -> Dict[str, Any]:
+    """
+    Configures refresh function's environment and replaces ``boto3`` clients with in-memory stand-ins.
+
+    :return: Mapping of service names and their client stand-ins.
+    """
+
+    import clients as refresh_clients
+    import index
+
+    clients = {
+        'sagemaker': FakeSagemakerClient(ENDPOINT_NAME, ENDPOINT_CONFIG_A_NAME),
+        'ssm': FakeSsmClient(),
+        's3': FakeS3Client(),
+        'sagemaker-runtime': FakeSagemakerRuntimeClient(),
+        'stepfunctions': FakeSfnClient(),
+    }
+
+    monkeypatch.setattr(refresh_clients, 'get', lambda name: clients[name])
+    # Settings are cached once per lambda container, while each test configures its own environment.
+    monkeypatch.setattr(index, 'TARGET', None)
+    monkeypatch.setattr(index.time, 'sleep', lambda seconds: None)
+    monkeypatch.setenv('WAIT_TIME', '60')
+    monkeypatch.setenv('SAGEMAKER_ENDPOINT_NAME', ENDPOINT_NAME)
+    monkeypatch.setenv('SAGEMAKER_ENDPOINT_CONFIG_A_NAME', ENDPOINT_CONFIG_A_NAME)
+    monkeypatch.setenv('SAGEMAKER_ENDPOINT_CONFIG_B_NAME', ENDPOINT_CONFIG_B_NAME)
+    monkeypatch.setenv('REFRESH_STATE_PARAMETER_NAME', 'state')
+    monkeypatch.setenv('DEFER_BUSY_UPDATES', 'true')
+
+    return clients
@@ -0,0 +1,212 @@
+import gzip
+import io
+import json
+import tarfile
+from typing import Any, Dict, List, Optional
+
+import pytest
+from aws_cdk.aws_sagemaker import CfnModel, CfnModelProps
+
+import index
+from b_cfn_sagemaker_endpoint.artifact_validation import ArtifactValidation
+from b_cfn_sagemaker_endpoint.model_props import ModelProps
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeS3Client, s3_event
+from validation import ArtifactValidator
+
+MODEL_KEY = 'active_model/model.tar.gz'
+MODEL_URL = f's3://models/{MODEL_KEY}'
+
+INFERENCE_SCRIPT = b'''
+import torch
+
+
+def model_fn(model_dir):
+    return torch.jit.load(f'{model_dir}/model.pt')
+'''
+
+
+class NonSeekableBody:
+    """
+    Streaming body stand-in, that can only be read sequentially, like ``botocore`` streaming bodies.
+    """
+
+    def __init__(self, body: bytes):
+        self.__stream = io.BytesIO(body)
+
+    def read(self, size: int = -1) -> bytes:
+        return self.__stream.read(size)
+
+    def close(self) -> None:
+        self.__stream.close()
+
+
+class StreamingS3Client(FakeS3Client):
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        response = super().get_object(Bucket, Key, **kwargs)
+        return {**response, 'Body': NonSeekableBody(response['Body'].read())}
+
+
+@pytest.fixture
+def clients(clients, monkeypatch) -> Dict[str, Any]:
+    clients['s3'] = StreamingS3Client()
+    clients['s3'].put_object(Bucket='models', Key=MODEL_KEY, Body=archive())
+    monkeypatch.setenv('ARTIFACT_VALIDATION', json.dumps(settings(smoke_test=True, entry_point_functions=['model_fn'])))
+    return clients
+
+
+def archive(files: Optional[Dict[str, bytes]] = None) -> bytes:
+    """
+    Packages files into a model archive, like ``tar -czf model.tar.gz -C model .`` does.
+    """
+
+    if files is None:
+        files = {'model.pt': b'weights' * 1000, 'code/inference.py': INFERENCE_SCRIPT}
+
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as stream, tarfile.open(fileobj=stream, mode='w') as tar:
+        for name, body in files.items():
+            info = tarfile.TarInfo(f'./{name}')
+            info.size = len(body)
+            tar.addfile(info, io.BytesIO(body))
+    return buffer.getvalue()
+
+
+def model_props(environment: Dict[str, str], url: str = MODEL_URL) -> ModelProps:
+    return ModelProps(
+        model_name='model',
+        props=CfnModelProps(
+            execution_role_arn='arn:aws:iam::123456789012:role/model',
+            primary_container=CfnModel.ContainerDefinitionProperty(
+                image='image',
+                model_data_url=url,
+                environment=environment
+            )
+        )
+    )
+
+
+def settings(**kwargs) -> Dict[str, Any]:
+    return ArtifactValidation(**kwargs).to_settings([model_props({'SAGEMAKER_PROGRAM': 'inference.py'})])
+
+
+def _problem(s3_client: FakeS3Client, body: bytes, **kwargs) -> Optional[str]:
+    s3_client.put_object(Bucket='models', Key=MODEL_KEY, Body=body)
+    validator = ArtifactValidator(s3_client, settings(**kwargs))
+    return validator.validate().get(MODEL_URL)
+
+
+def _emf_documents(output: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_handler_WITH_valid_artifact_EXPECT_endpoint_updated(clients, capsys):
+    index.handler(s3_event(MODEL_KEY), None)
+
+    assert [update['EndpointConfigName'] for update in clients['sagemaker'].updates] == ['endpoint-config-b']
+    document, = _emf_documents(capsys.readouterr().out)
+    assert 'ArtifactValidationDuration' in document
+    assert 'ArtifactRejections' not in document
+
+
+def test_handler_WITH_truncated_artifact_EXPECT_update_skipped(clients, capsys):
+    clients['s3'].put_object(Bucket='models', Key=MODEL_KEY, Body=archive()[:-100])
+
+    index.handler(s3_event(MODEL_KEY), None)
+
+    assert clients['sagemaker'].updates == []
+    output = capsys.readouterr().out
+    assert 'archive is corrupt or truncated' in output
+    document, = _emf_documents(output)
+    assert document['ArtifactRejections'] == [1]
+
+
+def test_handler_WITH_state_machine_and_invalid_artifact_EXPECT_execution_skipped(clients, monkeypatch):
+    monkeypatch.setenv('STATE_MACHINE_ARN', 'arn:aws:states:eu-west-1:123456789012:stateMachine:refresh')
+    clients['s3'].put_object(Bucket='models', Key=MODEL_KEY, Body=b'<html>Not a model</html>')
+
+    index.handler(s3_event(MODEL_KEY), None)
+    execution, = clients['stepfunctions'].executions
+    execution = index.handler({'step': 'resolve', 'execution': execution['input']}, None)
+
+    assert execution['action'] == 'skip'
+    assert clients['sagemaker'].updates == []
+
+
+def test_validate_WITH_corrupt_archives_EXPECT_rejected(clients):
+    s3_client = clients['s3']
+    corrupt = bytearray(archive())
+    corrupt[len(corrupt) // 2] ^= 0xFF
+
+    assert _problem(s3_client, archive()) is None
+    assert 'corrupt or truncated' in _problem(s3_client, bytes(corrupt))
+    assert 'corrupt or truncated' in _problem(s3_client, gzip.compress(b'not a tar archive' * 100))
+    assert _problem(s3_client, archive({})) == 'archive has no files'
+    assert 'outside of the model directory' in _problem(s3_client, archive({'../escape.py': b''}))
+
+    s3_client.delete_object(Bucket='models', Key=MODEL_KEY)
+    assert ArtifactValidator(s3_client, settings()).validate() == {MODEL_URL: 'artifact does not exist'}
+
+
+def test_validate_WITH_missing_entries_or_exceeded_limits_EXPECT_rejected(clients):
+    s3_client = clients['s3']
+    body = archive()
+
+    assert "['code/inference.py']" in _problem(s3_client, archive({'model.pt': b'weights'}))
+    assert "['code/requirements.txt']" in _problem(s3_client, body, required_entries=['code/requirements.txt'])
+    assert 'exceeds 100 bytes' in _problem(s3_client, body, max_size=100)
+    assert 'uncompressed size exceeds' in _problem(s3_client, body, max_uncompressed_size=1000)
+    assert _problem(s3_client, body, max_size=len(body), max_uncompressed_size=10_000) is None
+
+
+def test_validate_WITH_smoke_test_EXPECT_sources_compiled_and_entry_point_checked(clients):
+    s3_client = clients['s3']
+    smoke_test = {'smoke_test': True, 'entry_point_functions': ['model_fn']}
+    broken = archive({'code/inference.py': INFERENCE_SCRIPT, 'code/utils.py': b'def broken(:\n'})
+    incomplete = archive({'code/inference.py': b'def predict_fn(data, model):\n    return model(data)\n'})
+
+    assert '"code/utils.py" does not compile' in _problem(s3_client, broken, **smoke_test)
+    assert "does not define functions: ['model_fn']" in _problem(s3_client, incomplete, **smoke_test)
+    # Sources are compiled, but never executed, hence missing dependencies do not matter.
+    assert _problem(s3_client, archive(), **smoke_test) is None
+    assert _problem(s3_client, broken) is None
+
+
+def test_validate_WITH_uncompressed_model_data_EXPECT_required_entries_checked(clients):
+    s3_client = clients['s3']
+    s3_client.put_object(Bucket='models', Key='llm/code/inference.py', Body=INFERENCE_SCRIPT)
+    validation = ArtifactValidation(required_entries=['config.json'], smoke_test=True)
+    props = ModelProps(
+        model_name='model',
+        props=CfnModelProps(
+            execution_role_arn='arn:aws:iam::123456789012:role/model',
+            containers=[CfnModel.ContainerDefinitionProperty(
+                image='image',
+                environment={'SAGEMAKER_PROGRAM': 'inference.py'}
+            )]
+        ),
+        uncompressed_model_data_url='s3://models/llm/'
+    )
+    validator = ArtifactValidator(s3_client, validation.to_settings([props]))
+
+    assert validator.validate() == {'s3://models/llm/': 'required entry "config.json" is missing'}
+
+    s3_client.put_object(Bucket='models', Key='llm/config.json', Body=b'{}')
+    assert validator.validate() == {}
+
+
+def test_artifact_validation_props_EXPECT_entry_points_of_code_in_model_data():
+    in_model_data = model_props({'SAGEMAKER_PROGRAM': 'serve.py'})
+    submitted = model_props({
+        'SAGEMAKER_PROGRAM': 'serve.py',
+        'SAGEMAKER_SUBMIT_DIRECTORY': 's3://code/sourcedir.tar.gz',
+    }, url='s3://models/other/model.tar.gz')
+
+    artifacts = ArtifactValidation().to_settings([in_model_data, submitted])['artifacts']
+
+    assert [artifact['entry_point'] for artifact in artifacts] == ['code/serve.py', None]
+
+    with pytest.raises(ValueError):
+        ArtifactValidation(max_size=0)
+
+    with pytest.raises(ValueError):
+        ArtifactValidation(entry_point_functions=['model_fn'])
@@ -0,0 +1,37 @@
+import pytest
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import s3_event
+from swap import update_endpoint_arguments
+
+
+def test_update_endpoint_arguments_EXPECT_variant_properties_reset_by_default():
+    assert update_endpoint_arguments('endpoint', 'endpoint-config-b') == {
+        'EndpointName': 'endpoint',
+        'EndpointConfigName': 'endpoint-config-b',
+        'RetainAllVariantProperties': False,
+    }
+
+
+def test_handler_WITH_auto_scaling_EXPECT_instance_counts_retained_on_every_swap(clients, monkeypatch):
+    monkeypatch.setenv('RETAIN_VARIANT_PROPERTIES', 'true')
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    updates = clients['sagemaker'].updates
+    assert [update['EndpointConfigName'] for update in updates] == ['endpoint-config-b', 'endpoint-config-a']
+    assert all(update['RetainAllVariantProperties'] for update in updates)
+
+
+@pytest.mark.parametrize('instance_count', [0, 5])
+def test_handler_WITH_scaled_variant_EXPECT_instance_count_retained_through_swap(clients, monkeypatch, instance_count):
+    monkeypatch.setenv('RETAIN_VARIANT_PROPERTIES', 'true')
+    # E.g. an async inference endpoint scaled to zero, or any endpoint scaled out under peak load.
+    clients['sagemaker'].endpoints['endpoint']['ProductionVariants'][0]['CurrentInstanceCount'] = instance_count
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    description = clients['sagemaker'].describe_endpoint(EndpointName='endpoint')
+    assert description['EndpointConfigName'] == 'endpoint-config-b'
+    assert description['ProductionVariants'][0]['CurrentInstanceCount'] == instance_count
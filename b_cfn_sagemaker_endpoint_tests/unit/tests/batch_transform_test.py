@@ -0,0 +1,148 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import pytest
+from aws_cdk.aws_s3 import Bucket
+from aws_cdk.aws_sagemaker import CfnModel, CfnModelProps
+from aws_cdk.core import App, Stack
+
+import transform
+from b_cfn_sagemaker_endpoint import BatchTransform, ModelProps
+from b_cfn_sagemaker_endpoint.transform_settings import TransformSettings
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import s3_event, sqs_event
+
+OUTPUT_URL = 's3://outputs/transform-output/'
+
+
+@pytest.fixture
+def clients(clients, monkeypatch) -> Dict[str, Any]:
+    monkeypatch.setattr(transform, 'JOBS', None)
+    monkeypatch.setenv('TRANSFORM_JOB_NAME_PREFIX', 'scoring')
+    monkeypatch.setenv('TRANSFORM_MODEL_NAME', 'model')
+    monkeypatch.setenv('TRANSFORM_OUTPUT_URL', OUTPUT_URL)
+    monkeypatch.setenv('TRANSFORM_JOB_TEMPLATE', json.dumps(TransformSettings(
+        max_concurrent_transforms=4,
+        max_payload_in_mb=6,
+        split_type='Line',
+        batch_strategy='MultiRecord'
+    ).to_job_template()))
+    return clients
+
+
+def _emf_documents(output: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+
+
+def _state_change_event(job_name: str) -> Dict[str, Any]:
+    return {
+        'source': 'aws.sagemaker',
+        'detail-type': 'SageMaker Transform Job State Change',
+        'detail': {'TransformJobName': job_name},
+    }
+
+
+def test_handler_WITH_batch_of_input_files_EXPECT_single_job_of_manifest(clients):
+    event = sqs_event(
+        s3_event('in/part-1.jsonl', bucket='inputs'),
+        s3_event('in/part+2.jsonl', 'in/', bucket='inputs'),
+        s3_event('in/part-1.jsonl', bucket='inputs', sequencer='0B'),
+    )
+
+    transform.handler(event, None)
+
+    job, = clients['sagemaker'].transform_jobs.values()
+    assert job['TransformJobName'].startswith('scoring-')
+    assert job['ModelName'] == 'model'
+    assert job['MaxConcurrentTransforms'] == 4 and job['BatchStrategy'] == 'MultiRecord'
+    assert job['TransformInput']['SplitType'] == 'Line'
+    assert job['TransformOutput']['S3OutputPath'] == f'{OUTPUT_URL}{job["TransformJobName"]}/'
+    assert {tag['Key']: tag['Value'] for tag in job['Tags']} == {'InputObjects': '2', 'InputBytes': '2'}
+
+    manifest_url = job['TransformInput']['DataSource']['S3DataSource']['S3Uri']
+    assert manifest_url == f'{OUTPUT_URL}manifests/{job["TransformJobName"]}.manifest'
+    manifest = json.loads(clients['s3'].objects['outputs'][manifest_url.replace('s3://outputs/', '')])
+    assert manifest == [{'prefix': 's3://inputs/'}, 'in/part 2.jsonl', 'in/part-1.jsonl']
+
+
+def test_handler_WITH_redelivered_batch_EXPECT_job_started_once(clients, capsys):
+    event = sqs_event(s3_event('in/part-1.jsonl', bucket='inputs'))
+
+    transform.handler(event, None)
+    transform.handler(event, None)
+    transform.handler(sqs_event(s3_event('in/part-1.jsonl', bucket='inputs', sequencer='0B')), None)
+
+    assert len(clients['sagemaker'].transform_jobs) == 2
+    started = [document for document in _emf_documents(capsys.readouterr().out) if 'TransformJobsStarted' in document]
+    assert len(started) == 2
+    assert started[0]['TransformName'] == 'scoring'
+    assert started[0]['TransformInputObjects'] == [1]
+
+
+def test_handler_WITH_finished_job_EXPECT_status_duration_and_throughput_metrics(clients, capsys):
+    transform.handler(sqs_event(s3_event('in/part-1.jsonl', 'in/part-2.jsonl', bucket='inputs')), None)
+    job_name, = clients['sagemaker'].transform_jobs
+    started_at = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    clients['sagemaker'].transform_jobs[job_name].update(
+        TransformJobStatus='Completed',
+        TransformStartTime=started_at,
+        TransformEndTime=started_at + timedelta(seconds=4)
+    )
+    capsys.readouterr()
+
+    transform.handler(_state_change_event(job_name), None)
+
+    document, = _emf_documents(capsys.readouterr().out)
+    assert document['_aws']['CloudWatchMetrics'][0]['Namespace'] == 'BSagemakerBatchTransform'
+    assert document['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [['TransformName']]
+    assert document['TransformJobsCompleted'] == [1]
+    assert document['TransformJobDuration'] == [4000]
+    assert document['TransformThroughput'] == [0.5]
+
+
+def test_handler_WITH_failed_job_EXPECT_failure_metric(clients, capsys):
+    transform.handler(sqs_event(s3_event('in/part-1.jsonl', bucket='inputs')), None)
+    job_name, = clients['sagemaker'].transform_jobs
+    clients['sagemaker'].transform_jobs[job_name].update(TransformJobStatus='Failed', FailureReason='ClientError')
+    capsys.readouterr()
+
+    transform.handler(_state_change_event(job_name), None)
+
+    document, = _emf_documents(capsys.readouterr().out)
+    assert document['TransformJobsFailed'] == [1]
+    assert 'TransformThroughput' not in document
+
+
+def test_transform_settings_WITH_invalid_combination_EXPECT_error():
+    with pytest.raises(ValueError):
+        TransformSettings(batch_strategy='MultiRecord')
+
+    with pytest.raises(ValueError):
+        TransformSettings(max_concurrent_transforms=8, max_payload_in_mb=20)
+
+
+def test_batch_transform_EXPECT_job_policy_in_stack_partition():
+    app = App()
+    stack = Stack(app, 'Stack')
+    BatchTransform(
+        stack,
+        'Scoring',
+        model=ModelProps(
+            model_name='model',
+            props=CfnModelProps(
+                execution_role_arn='arn:aws:iam::123456789012:role/model',
+                primary_container=CfnModel.ContainerDefinitionProperty(image='image')
+            )
+        ),
+        input_bucket=Bucket(stack, 'Inputs'),
+        input_prefix='transform-input/'
+    )
+
+    resources = app.synth().get_stack_by_name('Stack').template['Resources']
+    statement = next(
+        statement
+        for resource in resources.values() if resource['Type'] == 'AWS::IAM::Policy'
+        for statement in resource['Properties']['PolicyDocument']['Statement']
+        if 'sagemaker:CreateTransformJob' in statement['Action']
+    )
+    assert {'Ref': 'AWS::Partition'} in statement['Resource']['Fn::Join'][1]
@@ -0,0 +1,89 @@
+import pytest
+
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeClock, FakeSsmClient, FakeSqsClient, FakeSagemakerClient, s3_event
+)
+from debounce import Debouncer
+from index import handle_debounced
+from intake import unwrap_records
+from state import StateStore
+from swap import next_endpoint_config_name, update_endpoint_arguments
+
+ENDPOINT_NAME = 'endpoint'
+CONFIG_A_NAME = 'endpoint-config-a'
+CONFIG_B_NAME = 'endpoint-config-b'
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock(now=1000.0)
+
+
+@pytest.fixture
+def sqs_client(clock: FakeClock) -> FakeSqsClient:
+    return FakeSqsClient(clock)
+
+
+@pytest.fixture
+def sagemaker_client() -> FakeSagemakerClient:
+    return FakeSagemakerClient(ENDPOINT_NAME, CONFIG_A_NAME)
+
+
+@pytest.fixture
+def debouncer(clock: FakeClock, sqs_client: FakeSqsClient) -> Debouncer:
+    return Debouncer(
+        state_store=StateStore(FakeSsmClient(), 'state'),
+        sqs_client=sqs_client,
+        queue_url='queue',
+        wait_time=60,
+        clock=clock
+    )
+
+
+def _deliver_visible(sqs_client, debouncer, sagemaker_client) -> None:
+    def refresh():
+        description = sagemaker_client.describe_endpoint(EndpointName=ENDPOINT_NAME)
+        endpoint_config_name = next_endpoint_config_name(description, CONFIG_A_NAME, CONFIG_B_NAME)
+        sagemaker_client.update_endpoint(**update_endpoint_arguments(ENDPOINT_NAME, endpoint_config_name))
+
+    s3_records, ticks = unwrap_records(sqs_client.receive_visible())
+    handle_debounced(s3_records, ticks, debouncer, refresh)
+
+
+def test_burst_of_events_EXPECT_single_update_after_quiet_period(clock, sqs_client, sagemaker_client, debouncer):
+    # Five uploads, 10 seconds apart.
+    for index in range(5):
+        handle_debounced(s3_event(f'model/part-{index}')['Records'], [], debouncer, lambda: None)
+        clock.advance(10)
+        _deliver_visible(sqs_client, debouncer, sagemaker_client)
+
+    assert sagemaker_client.updates == [], 'Endpoint was updated before the quiet period ended.'
+
+    # Let every scheduled tick be delivered.
+    for _ in range(10):
+        clock.advance(10)
+        _deliver_visible(sqs_client, debouncer, sagemaker_client)
+
+    assert len(sagemaker_client.updates) == 1
+    assert sagemaker_client.updates[0]['EndpointConfigName'] == CONFIG_B_NAME
+    assert sqs_client.messages == []
+
+
+def test_tick_WITH_failing_refresh_EXPECT_deadline_kept_for_retry(clock, sqs_client, debouncer):
+    deadline = debouncer.push()
+
+    def failing_refresh():
+        raise RuntimeError('Failed to refresh.')
+
+    with pytest.raises(RuntimeError):
+        debouncer.tick(deadline, failing_refresh)
+
+    fired = []
+    assert debouncer.tick(deadline, lambda: fired.append(True)) is True
+    assert fired == [True]
+    assert debouncer.tick(deadline, lambda: fired.append(True)) is False
+
+
+def test_debouncer_WITH_too_long_wait_time_EXPECT_error(sqs_client):
+    with pytest.raises(ValueError):
+        Debouncer(StateStore(FakeSsmClient(), 'state'), sqs_client, 'queue', wait_time=901)
@@ -0,0 +1,191 @@
+import asyncio
+import gc
+import json
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from b_cfn_sagemaker_endpoint.endpoint_client import EndpointClient, MicroBatching
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeSagemakerRuntimeClient
+
+
+def echo(body: bytes) -> bytes:
+    return body
+
+
+def endpoint_client(runtime_client: FakeSagemakerRuntimeClient, delays=None, **kwargs) -> EndpointClient:
+    async def sleep(seconds):
+        if delays is not None:
+            delays.append(seconds)
+
+    return EndpointClient('endpoint', runtime_client, random=lambda: 1.0, sleep=sleep, **kwargs)
+
+
+def test_invoke_many_EXPECT_concurrency_bounded():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def respond(body):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return body
+
+    client = endpoint_client(FakeSagemakerRuntimeClient(respond=respond), max_concurrency=3)
+
+    results = asyncio.run(client.invoke_many([{'id': number} for number in range(12)]))
+
+    assert results == [{'id': number} for number in range(12)]
+    assert peak[0] == 3
+
+
+def test_invoke_WITH_throttling_EXPECT_retried_after_retry_after():
+    runtime_client = FakeSagemakerRuntimeClient(throttled_invocations=2, respond=echo)
+    delays = []
+
+    result = asyncio.run(endpoint_client(runtime_client, delays, base_backoff=0.1).invoke({'text': 'hello'}))
+
+    assert result == {'text': 'hello'}
+    assert delays == [2.0, 2.0]
+    assert len(runtime_client.invocations) == 3
+
+
+def test_invoke_WITH_http_date_retry_after_EXPECT_retried_after_throttling_backoff():
+    runtime_client = FakeSagemakerRuntimeClient(
+        throttled_invocations=1,
+        respond=echo,
+        retry_after='Wed, 21 Oct 2015 07:28:00 GMT'
+    )
+    delays = []
+
+    result = asyncio.run(endpoint_client(runtime_client, delays, base_backoff=0.1).invoke({'text': 'hello'}))
+
+    assert result == {'text': 'hello'}
+    assert delays == [1.0]
+
+
+def test_invoke_WITH_transient_errors_EXPECT_jittered_exponential_backoff():
+    runtime_client = FakeSagemakerRuntimeClient()
+    failures = [ReadTimeoutError(endpoint_url='https://runtime'), ReadTimeoutError(endpoint_url='https://runtime')]
+    invoke_endpoint = runtime_client.invoke_endpoint
+
+    def flaky_invoke_endpoint(**kwargs):
+        if failures:
+            raise failures.pop()
+        return invoke_endpoint(**kwargs)
+
+    runtime_client.invoke_endpoint = flaky_invoke_endpoint
+    delays = []
+
+    asyncio.run(endpoint_client(runtime_client, delays, base_backoff=0.5).invoke({}))
+
+    assert delays == [0.5, 1.0]
+
+
+def test_invoke_WITH_model_error_EXPECT_not_retried():
+    runtime_client = FakeSagemakerRuntimeClient(error_code='ModelError')
+
+    with pytest.raises(ClientError):
+        asyncio.run(endpoint_client(runtime_client).invoke({}))
+
+    assert len(runtime_client.invocations) == 1
+
+
+def test_invoke_WITH_micro_batching_EXPECT_requests_merged_and_split():
+    runtime_client = FakeSagemakerRuntimeClient(respond=echo)
+    client = endpoint_client(runtime_client, micro_batching=MicroBatching(max_batch_size=4, max_delay=0.05))
+
+    results = asyncio.run(client.invoke_many([{'id': number} for number in range(10)]))
+
+    assert results == [{'id': number} for number in range(10)]
+    assert [len(json.loads(invocation['Body'])) for invocation in runtime_client.invocations] == [4, 4, 2]
+
+
+def test_invoke_WITH_micro_batching_and_garbage_collection_EXPECT_in_flight_batches_completed():
+    def collect(body: bytes) -> bytes:
+        # In-flight batch tasks are only weakly referenced by the event loop.
+        gc.collect()
+        return body
+
+    runtime_client = FakeSagemakerRuntimeClient(respond=collect)
+    client = endpoint_client(runtime_client, micro_batching=MicroBatching(max_batch_size=2, max_delay=0.01))
+
+    async def invoke():
+        return await asyncio.wait_for(client.invoke_many([{'id': number} for number in range(5)]), timeout=5)
+
+    assert asyncio.run(invoke()) == [{'id': number} for number in range(5)]
+
+
+def test_invoke_WITH_micro_batching_and_large_payload_EXPECT_sent_alone():
+    runtime_client = FakeSagemakerRuntimeClient(respond=echo)
+    client = endpoint_client(runtime_client, micro_batching=MicroBatching(max_payload_size=16))
+
+    result = asyncio.run(client.invoke({'text': 'x' * 100}))
+
+    assert result == {'text': 'x' * 100}
+    assert json.loads(runtime_client.invocations[0]['Body']) == {'text': 'x' * 100}
+
+
+def test_invoke_WITH_micro_batching_and_invalid_response_EXPECT_error_of_every_request():
+    runtime_client = FakeSagemakerRuntimeClient(respond=lambda body: b'{}')
+    client = endpoint_client(runtime_client, micro_batching=MicroBatching())
+
+    async def invoke():
+        return await asyncio.gather(*[client.invoke({'id': number}) for number in range(3)], return_exceptions=True)
+
+    results = asyncio.run(invoke())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(runtime_client.invocations) == 1
+
+
+def test_for_endpoint_EXPECT_client_reused():
+    runtime_client = FakeSagemakerRuntimeClient()
+
+    client = EndpointClient.for_endpoint('shared-endpoint', sagemaker_runtime_client=runtime_client)
+
+    assert EndpointClient.for_endpoint('shared-endpoint') is client
+    assert EndpointClient.for_endpoint('other-endpoint', sagemaker_runtime_client=runtime_client) is not client
+
+
+def test_invoke_WITH_many_event_loops_EXPECT_requests_batched_per_loop():
+    runtime_client = FakeSagemakerRuntimeClient(respond=echo)
+    client = endpoint_client(runtime_client, max_concurrency=1, micro_batching=MicroBatching(max_batch_size=4))
+    results = {}
+
+    def run(name):
+        results[name] = asyncio.run(client.invoke_many([{'id': f'{name}-{number}'} for number in range(8)]))
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert results == {name: [{'id': f'{name}-{number}'} for number in range(8)] for name in ('a', 'b')}
+    assert asyncio.run(client.invoke({'id': 'c'})) == {'id': 'c'}
+
+
+def test_shared_client_EXPECT_pool_sized_to_largest_concurrency(monkeypatch):
+    import boto3
+
+    pool_sizes = []
+
+    def client(service_name, config):
+        pool_sizes.append(config.max_pool_connections)
+        return FakeSagemakerRuntimeClient()
+
+    monkeypatch.setattr(EndpointClient, '_EndpointClient__shared_runtime_client', None)
+    monkeypatch.setattr(EndpointClient, '_EndpointClient__shared_pool_size', 0)
+    monkeypatch.setattr(boto3, 'client', client)
+
+    EndpointClient('small', max_concurrency=4)
+    EndpointClient('large', max_concurrency=64)
+    EndpointClient('medium', max_concurrency=32)
+
+    assert pool_sizes == [10, 64]
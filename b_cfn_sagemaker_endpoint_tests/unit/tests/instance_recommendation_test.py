@@ -0,0 +1,235 @@
+import json
+import threading
+from typing import Any, Dict
+
+import pytest
+from aws_cdk.core import Duration
+
+import index
+from b_cfn_sagemaker_endpoint.instance_recommendation import InstanceCandidate, InstanceRecommendation
+from b_cfn_sagemaker_endpoint.variant_auto_scaling import VariantAutoScaling
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeSagemakerClient, FakeSagemakerRuntimeClient, FakeS3Client, s3_event
+)
+from b_cfn_sagemaker_endpoint_tests.unit.utils.stacks import synthesize
+from metrics import Metrics
+from recommendation import InstanceRecommender
+
+MODEL_URL = 's3://models/active_model/model.tar.gz'
+
+
+class ThreadClock:
+    """
+    Virtual clock of each thread, since candidates are load-tested in parallel.
+    """
+
+    def __init__(self):
+        self.__local = threading.local()
+
+    def __call__(self) -> float:
+        return getattr(self.__local, 'now', 0.0)
+
+    def advance(self, seconds: float) -> None:
+        self.__local.now = self() + seconds
+
+
+class InstanceRuntimeClient(FakeSagemakerRuntimeClient):
+    """
+    Runtime client stand-in, that takes virtual time depending on the instance type serving the endpoint.
+    """
+
+    def __init__(self, sagemaker_client: FakeSagemakerClient, clock: ThreadClock, latencies: Dict[str, float]):
+        super().__init__()
+        self.__sagemaker_client = sagemaker_client
+        self.__clock = clock
+        self.__latencies = latencies
+
+    def invoke_endpoint(self, EndpointName: str, Body: bytes, **kwargs) -> Dict[str, Any]:
+        endpoint = self.__sagemaker_client.endpoints[EndpointName]
+        config = self.__sagemaker_client.endpoint_configs[endpoint['EndpointConfigName']]
+        latency = self.__latencies[config['ProductionVariants'][0]['InstanceType']]
+        if latency is None:
+            raise RuntimeError('Model container does not support the instance type.')
+
+        self.__clock.advance(latency)
+        return super().invoke_endpoint(EndpointName, Body, **kwargs)
+
+
+@pytest.fixture
+def clients(clients, monkeypatch) -> Dict[str, Any]:
+    clients['s3'].put_object(Bucket='models', Key='active_model/model.tar.gz', Body=b'model-v1')
+    a_config = clients['sagemaker'].describe_endpoint_config(EndpointConfigName='endpoint-config-a')
+    clients['sagemaker'].create_endpoint_config(**{**a_config, 'EndpointConfigName': 'endpoint-config-b'})
+    monkeypatch.setenv('MODEL_ARTIFACT_URLS', json.dumps([MODEL_URL]))
+    monkeypatch.setenv('INSTANCE_RECOMMENDATION', json.dumps(settings(
+        candidates=[InstanceCandidate('ml.c5.large', 0.1)],
+        apply=True
+    )))
+    return clients
+
+
+def settings(**kwargs) -> Dict[str, Any]:
+    return InstanceRecommendation(**kwargs).to_settings('endpoint-rec-', 'models')
+
+
+def _recommendation_keys(s3_client: FakeS3Client):
+    return [key for key in s3_client.objects['models'] if key.startswith('instance-recommendations/')]
+
+
+def test_handler_WITH_new_artifact_EXPECT_candidates_benchmarked_and_recommended_config_applied(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    sagemaker_client = clients['sagemaker']
+    assert sagemaker_client.updates[0]['EndpointConfigName'] == 'endpoint-rec-applied-a'
+    variant, = sagemaker_client.endpoint_configs['endpoint-rec-applied-a']['ProductionVariants']
+    assert (variant['InstanceType'], variant['InitialInstanceCount']) == ('ml.c5.large', 1)
+    # Endpoint configurations managed by CloudFormation are left intact.
+    for endpoint_config_name in ('endpoint-config-a', 'endpoint-config-b'):
+        variant, = sagemaker_client.endpoint_configs[endpoint_config_name]['ProductionVariants']
+        assert variant['InstanceType'] == 'ml.t2.medium'
+
+    # Candidate endpoints and configurations are short-lived.
+    assert sagemaker_client.deleted_endpoints == ['endpoint-rec-0']
+    assert 'endpoint-rec-0' not in sagemaker_client.endpoint_configs
+
+    key, = _recommendation_keys(clients['s3'])
+    results = json.loads(clients['s3'].objects['models'][key])
+    assert results['recommendation']['instance_type'] == 'ml.c5.large'
+    assert results['candidates'][0]['requests_per_dollar'] > 0
+
+
+def test_handler_WITH_previously_benchmarked_artifact_versions_EXPECT_results_reused(clients):
+    s3_client = clients['s3']
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    s3_client.put_object(Bucket='models', Key='active_model/model.tar.gz', Body=b'model-v2')
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    # Rolled back artifacts were benchmarked already.
+    s3_client.put_object(Bucket='models', Key='active_model/model.tar.gz', Body=b'model-v1')
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    # Applied recommendations alternate, hence the served one is never replaced.
+    assert [update['EndpointConfigName'] for update in clients['sagemaker'].updates] == [
+        'endpoint-rec-applied-a',
+        'endpoint-rec-applied-b',
+        'endpoint-rec-applied-a',
+    ]
+    assert len(clients['sagemaker'].deleted_endpoints) == 2
+    assert len(_recommendation_keys(s3_client)) == 2
+
+
+def test_recommend_EXPECT_most_requests_per_dollar_within_threshold(clients):
+    clock = ThreadClock()
+    runtime_client = InstanceRuntimeClient(clients['sagemaker'], clock, {
+        # 5 requests/s, too slow.
+        'ml.c5.large': 0.2,
+        # 20 requests/s, 360000 requests/$.
+        'ml.c5.xlarge': 0.05,
+        # 100 requests/s, 300000 requests/$.
+        'ml.g4dn.xlarge': 0.01,
+        'ml.inf1.xlarge': None,
+    })
+    recommender = InstanceRecommender(
+        clients['sagemaker'],
+        runtime_client,
+        clients['s3'],
+        {
+            **settings(
+                candidates=[
+                    InstanceCandidate('ml.c5.large', 0.1),
+                    InstanceCandidate('ml.c5.xlarge', 0.2),
+                    InstanceCandidate('ml.g4dn.xlarge', 1.2),
+                    InstanceCandidate('ml.inf1.xlarge', 0.05),
+                ],
+                target_throughput=50,
+                p99_threshold=Duration.millis(100),
+                concurrency=1,
+                requests=10
+            ),
+        },
+        clock=clock
+    )
+
+    recommendation = recommender.recommend(
+        'endpoint-config-b',
+        {MODEL_URL: 'v1'},
+        Metrics('endpoint', emit=lambda document: None)
+    )
+
+    assert recommendation['instance_type'] == 'ml.c5.xlarge'
+    assert recommendation['instance_count'] == 3
+    assert recommendation['requests_per_dollar'] == pytest.approx(360000)
+    # Recommendation is only reported, unless it is applied.
+    assert clients['sagemaker'].endpoint_configs['endpoint-config-b']['ProductionVariants'][0]['InstanceType'] == (
+        'ml.t2.medium'
+    )
+
+
+def test_recommend_WITH_errored_candidate_EXPECT_only_errored_candidate_benchmarked_again(clients, monkeypatch):
+    sagemaker_client = clients['sagemaker']
+    create_endpoint_config = sagemaker_client.create_endpoint_config
+    quotas = {'ml.c5.large': 1, 'ml.c5.xlarge': 0}
+
+    def create_quota_limited_endpoint_config(**kwargs) -> Dict[str, Any]:
+        if not quotas[kwargs['ProductionVariants'][0]['InstanceType']]:
+            raise RuntimeError('Instance quota is exceeded.')
+        return create_endpoint_config(**kwargs)
+
+    monkeypatch.setattr(sagemaker_client, 'create_endpoint_config', create_quota_limited_endpoint_config)
+    clock = ThreadClock()
+    latencies = {'ml.c5.large': 0.2, 'ml.c5.xlarge': 0.05}
+    recommender = InstanceRecommender(
+        sagemaker_client,
+        InstanceRuntimeClient(sagemaker_client, clock, latencies),
+        clients['s3'],
+        settings(
+            candidates=[InstanceCandidate('ml.c5.large', 0.1), InstanceCandidate('ml.c5.xlarge', 0.2)],
+            concurrency=1,
+            requests=10
+        ),
+        clock=clock
+    )
+    metrics = Metrics('endpoint', emit=lambda document: None)
+
+    assert recommender.recommend('endpoint-config-b', {MODEL_URL: 'v1'}, metrics)['instance_type'] == 'ml.c5.large'
+    key, = _recommendation_keys(clients['s3'])
+    results = json.loads(clients['s3'].objects['models'][key])
+    assert [candidate['instance_type'] for candidate in results['candidates']] == ['ml.c5.large']
+
+    quotas['ml.c5.xlarge'] = 1
+    assert recommender.recommend('endpoint-config-b', {MODEL_URL: 'v1'}, metrics)['instance_type'] == 'ml.c5.xlarge'
+    # The persisted candidate is not benchmarked again.
+    assert sorted(sagemaker_client.deleted_endpoints) == ['endpoint-rec-0', 'endpoint-rec-1']
+    results = json.loads(clients['s3'].objects['models'][key])
+    assert [candidate['instance_type'] for candidate in results['candidates']] == ['ml.c5.large', 'ml.c5.xlarge']
+    assert results['recommendation']['instance_type'] == 'ml.c5.xlarge'
+
+
+def test_instance_recommendation_WITH_apply_and_auto_scaling_EXPECT_error():
+    recommendation = InstanceRecommendation(candidates=[InstanceCandidate('ml.c5.large', 0.1)], apply=True)
+
+    # Retained variant properties would ignore the recommended instance count.
+    with pytest.raises(ValueError):
+        synthesize(
+            instance_recommendation=recommendation,
+            skip_unchanged_models=True,
+            auto_scaling=VariantAutoScaling()
+        )
+
+    assert synthesize(
+        instance_recommendation=InstanceRecommendation(candidates=[InstanceCandidate('ml.c5.large', 0.1)]),
+        skip_unchanged_models=True,
+        auto_scaling=VariantAutoScaling()
+    )
+
+
+def test_instance_recommendation_props_WITH_invalid_settings_EXPECT_error():
+    with pytest.raises(ValueError):
+        InstanceRecommendation(candidates=[])
+
+    with pytest.raises(ValueError):
+        InstanceCandidate('ml.c5.large', 0)
+
+    with pytest.raises(ValueError):
+        InstanceRecommendation(candidates=[InstanceCandidate('ml.c5.large', 0.1)], prefix='results')
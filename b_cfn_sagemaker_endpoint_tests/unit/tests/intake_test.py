@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeSagemakerClient, s3_event, sqs_event
+from intake import is_later_sequencer, unwrap_records
+from state import StateStore
+
+
+@pytest.fixture
+def sagemaker_client(clients, monkeypatch) -> FakeSagemakerClient:
+    monkeypatch.setenv('EVENT_INTAKE_ENABLED', 'true')
+    return clients['sagemaker']
+
+
+def test_unwrap_records_EXPECT_s3_records_and_ticks_split():
+    event = sqs_event(
+        s3_event('model.tar.gz'),
+        {'Service': 'Amazon S3', 'Event': 's3:TestEvent'},
+        {'deadline': 10.0}
+    )
+
+    s3_records, ticks = unwrap_records(event['Records'])
+
+    assert [record['s3']['object']['key'] for record in s3_records] == ['model.tar.gz']
+    assert ticks == [{'deadline': 10.0}]
+
+
+def test_handler_WITH_batch_of_events_EXPECT_single_update(sagemaker_client):
+    index.handler(sqs_event(
+        s3_event('model/a', sequencer='01'),
+        s3_event('model/b', sequencer='01'),
+        s3_event('model/a', sequencer='02'),
+    ), None)
+
+    assert len(sagemaker_client.updates) == 1
+
+
+def test_handler_WITH_redelivered_batch_EXPECT_no_duplicate_update(sagemaker_client):
+    batch = sqs_event(s3_event('model/a', sequencer='0A'), s3_event('model/b', sequencer='0B'))
+
+    index.handler(batch, None)
+    index.handler(batch, None)
+    # Out of order delivery of an older upload.
+    index.handler(sqs_event(s3_event('model/a', sequencer='09')), None)
+
+    assert len(sagemaker_client.updates) == 1
+
+
+def test_handler_WITH_later_upload_EXPECT_another_update(sagemaker_client):
+    index.handler(sqs_event(s3_event('model/a', sequencer='0A')), None)
+    index.handler(sqs_event(s3_event('model/a', sequencer='0A1')), None)
+
+    assert len(sagemaker_client.updates) == 2
+
+
+def test_handler_WITH_sequencers_of_different_lengths_EXPECT_padded_comparison(sagemaker_client):
+    index.handler(sqs_event(s3_event('model/a', sequencer='00551')), None)
+    index.handler(sqs_event(s3_event('model/a', sequencer='0056')), None)
+    # Equal to "0056", once right-padded with zeros.
+    index.handler(sqs_event(s3_event('model/a', sequencer='00560')), None)
+
+    assert len(sagemaker_client.updates) == 2
+
+
+@pytest.mark.parametrize('sequencer, other, later', [
+    ('0056', '00551', True),
+    ('00551', '0056', False),
+    ('0A', '0A0', False),
+    ('0B', 'A0', False),
+    ('01', None, True),
+])
+def test_is_later_sequencer_EXPECT_right_padded_string_comparison(sequencer, other, later):
+    assert is_later_sequencer(sequencer, other) is later
+
+
+def test_handler_WITH_failed_refresh_EXPECT_batch_handled_on_retry(sagemaker_client, monkeypatch):
+    batch = sqs_event(s3_event('model/a', sequencer='0A'))
+
+    def failing_update(**kwargs):
+        raise RuntimeError('Failed to update.')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(sagemaker_client, 'update_endpoint', failing_update)
+        with pytest.raises(RuntimeError):
+            index.handler(batch, None)
+
+    index.handler(batch, None)
+
+    assert len(sagemaker_client.updates) == 1
+
+
+def test_handler_WITH_many_keys_and_large_shared_state_EXPECT_state_bounded(clients, sagemaker_client):
+    # Other refresh state, e.g. pinned generations, shares the state document with sequencers.
+    clients['ssm'].put_parameter(
+        Name='state',
+        Value=json.dumps({'pinned': {'generations': ['x' * 7000]}}),
+        Tier='Advanced'
+    )
+
+    for batch in range(15):
+        index.handler(sqs_event(*[
+            s3_event(f'models/{batch}/{index}/model.tar.gz', sequencer=f'{batch + 1:02X}') for index in range(10)
+        ]), None)
+
+    state = json.loads(clients['ssm'].parameters['state'])
+    assert len(clients['ssm'].parameters['state']) <= StateStore.MAX_SIZES['Advanced']
+    assert 0 < len(state['sequencers']) < 100
+    assert state['pinned'] == {'generations': ['x' * 7000]}
+    assert len(sagemaker_client.updates) == 15
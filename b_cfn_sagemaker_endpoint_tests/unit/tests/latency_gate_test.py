@@ -0,0 +1,214 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Iterator, List
+
+import pytest
+from aws_cdk.core import Duration
+
+import index
+from b_cfn_sagemaker_endpoint.latency_gate import LatencyGate
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeClock, FakeSagemakerRuntimeClient, s3_event
+from b_cfn_sagemaker_endpoint_tests.unit.utils.stacks import synthesize
+from latency_gate import LatencyGate as StagingLatencyGate, LoadGenerator, LocalRuntimeClient, percentile
+from metrics import Metrics
+
+STAGING_ENDPOINT_NAME = 'endpoint-staging'
+
+
+@pytest.fixture
+def clients(clients, monkeypatch) -> Dict[str, Any]:
+    monkeypatch.setenv('LATENCY_GATE', json.dumps(settings(p99=250)))
+    return clients
+
+
+@pytest.fixture
+def local_endpoint() -> Iterator[str]:
+    """
+    Serves a local model container stand-in, that echoes request bodies and fails on empty ones.
+
+    :return: Stand-in's base URL.
+    """
+
+    class InvocationsHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            self.send_response(200 if body else 500)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), InvocationsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+def settings(**thresholds) -> Dict[str, Any]:
+    gate = LatencyGate(**{f'{name}_threshold': Duration.millis(value) for name, value in thresholds.items()})
+    return gate.to_settings(STAGING_ENDPOINT_NAME)
+
+
+def _emf_documents(output: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_handler_WITH_new_model_within_thresholds_EXPECT_staging_load_tested_and_endpoint_updated(clients, capsys):
+    clients['sagemaker'].update_polls = 2
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    invocations = clients['sagemaker-runtime'].invocations
+    assert len(invocations) == 200
+    assert {invocation['EndpointName'] for invocation in invocations} == {STAGING_ENDPOINT_NAME}
+    assert clients['sagemaker'].deleted_endpoints == [STAGING_ENDPOINT_NAME]
+    assert [update['EndpointConfigName'] for update in clients['sagemaker'].updates] == ['endpoint-config-b']
+
+    document, = _emf_documents(capsys.readouterr().out)
+    assert {'LatencyGateP50', 'LatencyGateP95', 'LatencyGateP99'} <= set(document)
+    assert document['LatencyGateErrorRate'] == [0]
+    assert 'LatencyGateRejections' not in document
+
+
+def test_handler_WITH_failing_new_model_EXPECT_endpoint_not_updated(clients, capsys):
+    clients['sagemaker-runtime'].error_code = 'ModelError'
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    assert clients['sagemaker'].updates == []
+    assert clients['sagemaker'].deleted_endpoints == [STAGING_ENDPOINT_NAME]
+    assert clients['sagemaker'].endpoints['endpoint']['EndpointConfigName'] == 'endpoint-config-a'
+
+    document, = _emf_documents(capsys.readouterr().out)
+    assert document['LatencyGateRejections'] == [1]
+    assert document['LatencyGateErrorRate'] == [100]
+
+
+def test_handler_WITH_state_machine_and_rejected_model_EXPECT_execution_skipped(clients, monkeypatch):
+    monkeypatch.setenv('STATE_MACHINE_ARN', 'arn:aws:states:eu-west-1:123456789012:stateMachine:refresh')
+    clients['sagemaker-runtime'].error_code = 'ModelError'
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    execution, = clients['stepfunctions'].executions
+    execution = index.handler({'step': 'resolve', 'execution': execution['input']}, None)
+
+    assert execution['action'] == 'skip'
+    assert clients['sagemaker'].updates == []
+
+
+def test_latency_gate_WITH_slow_model_EXPECT_rejected_by_percentile(clients):
+    clock = FakeClock()
+    runtime_client = FakeSagemakerRuntimeClient(respond=lambda body: clock.advance(0.3) or body)
+
+    def promotes(gate_settings: Dict[str, Any]) -> bool:
+        gate = StagingLatencyGate(
+            clients['sagemaker'],
+            runtime_client,
+            {**gate_settings, 'concurrency': 1, 'requests': 10},
+            clock=clock
+        )
+        return gate.promotes('endpoint-config-b', Metrics('endpoint', emit=lambda document: None))
+
+    assert not promotes(settings(p99=250))
+    assert promotes(settings(p50=500, p99=500))
+    assert clients['sagemaker'].deleted_endpoints == [STAGING_ENDPOINT_NAME] * 2
+
+
+def test_latency_gate_WITH_leftover_staging_endpoint_EXPECT_replaced(clients):
+    clients['sagemaker'].create_endpoint(EndpointName=STAGING_ENDPOINT_NAME, EndpointConfigName='endpoint-config-a')
+    clients['sagemaker'].update_polls = 1
+
+    gate = StagingLatencyGate(clients['sagemaker'], clients['sagemaker-runtime'], settings(p99=250))
+    report = gate.check('endpoint-config-b')
+
+    assert report.requests == 200 and report.errors == 0
+    assert clients['sagemaker'].deleted_endpoints == [STAGING_ENDPOINT_NAME] * 2
+    assert STAGING_ENDPOINT_NAME not in clients['sagemaker'].endpoints
+
+
+def test_latency_gate_WITH_slow_staging_deletion_EXPECT_deletion_awaited_before_next_check(clients):
+    clock = FakeClock()
+    clients['sagemaker'].deletion_polls = 2
+
+    gate = StagingLatencyGate(
+        clients['sagemaker'],
+        clients['sagemaker-runtime'],
+        settings(p99=250),
+        clock=clock,
+        sleep=clock.advance
+    )
+    gate.check('endpoint-config-b')
+
+    # Otherwise, the next check would find the staging endpoint still ``Deleting``.
+    assert STAGING_ENDPOINT_NAME not in clients['sagemaker'].endpoints
+    assert gate.check('endpoint-config-b').requests == 200
+    assert clients['sagemaker'].deleted_endpoints == [STAGING_ENDPOINT_NAME] * 2
+
+
+def test_latency_gate_WITH_slow_model_EXPECT_load_test_stopped_before_timeout(clients):
+    clock = FakeClock()
+    runtime_client = FakeSagemakerRuntimeClient(respond=lambda body: clock.advance(10) or body)
+
+    gate = StagingLatencyGate(
+        clients['sagemaker'],
+        runtime_client,
+        {**settings(p99=250), 'concurrency': 1, 'timeout': 300},
+        clock=clock,
+        sleep=clock.advance
+    )
+    report = gate.check('endpoint-config-b')
+
+    # Invocations stop 2 minutes before the timeout, leaving time for the staging endpoint's deletion.
+    assert report.requests == 18
+    assert clock() <= 300
+    assert STAGING_ENDPOINT_NAME not in clients['sagemaker'].endpoints
+
+
+def test_load_generator_WITH_local_endpoint_stand_in_EXPECT_latencies_and_errors(local_endpoint):
+    payloads = [
+        {'body': '{"text": "ok"}', 'content_type': 'application/json', 'accept': 'application/json'},
+        {'body': '', 'content_type': 'application/json', 'accept': None},
+    ]
+
+    report = LoadGenerator(LocalRuntimeClient(local_endpoint), 'local', payloads, concurrency=4, requests=20).run()
+
+    assert (report.requests, report.errors) == (20, 10)
+    assert report.violations({'p99': 10_000, 'max_error_rate': 0.5}) == []
+    assert report.violations({'p99': 10_000, 'max_error_rate': 0.1}) == ['error rate 50.00% exceeds 10.00%']
+
+
+def test_percentile_EXPECT_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert [percentile(values, rank) for rank in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0
+
+
+def test_latency_gate_props_WITH_invalid_settings_EXPECT_error():
+    with pytest.raises(ValueError):
+        LatencyGate(p99_threshold=None)
+
+    with pytest.raises(ValueError):
+        LatencyGate(concurrency=10, requests=5)
+
+    with pytest.raises(ValueError):
+        LatencyGate(timeout=Duration.minutes(14))
+
+    with pytest.raises(ValueError):
+        LatencyGate(timeout=Duration.minutes(2))
+
+
+def test_latency_gate_WITH_wait_time_beyond_budget_EXPECT_error():
+    gate = LatencyGate(timeout=Duration.minutes(12))
+
+    # The refresh function sleeps through the wait time before the gate, in the same invocation.
+    with pytest.raises(ValueError):
+        synthesize(latency_gate=gate)
+
+    assert synthesize(latency_gate=gate, debounce=True)
+    assert synthesize(latency_gate=LatencyGate(timeout=Duration.minutes(11)))
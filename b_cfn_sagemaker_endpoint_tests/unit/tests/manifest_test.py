@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeClock, FakeS3Client
+from manifest import ManifestGate
+
+BUCKET_NAME = 'models'
+MANIFEST_KEY = 'active_model/manifest.json'
+
+
+@pytest.fixture
+def s3_client() -> FakeS3Client:
+    return FakeS3Client()
+
+
+def _put_manifest(s3_client: FakeS3Client, files: dict) -> None:
+    manifest = {
+        'objects': [
+            {'key': key, 'size': len(body), 'etag': s3_client.etag(body)}
+            for key, body in files.items()
+        ]
+    }
+    s3_client.put_object(Bucket=BUCKET_NAME, Key=MANIFEST_KEY, Body=json.dumps(manifest).encode())
+
+
+def _gate(s3_client: FakeS3Client, clock: FakeClock, timeout: float = 60) -> ManifestGate:
+    return ManifestGate(s3_client, BUCKET_NAME, MANIFEST_KEY, timeout=timeout, clock=clock, sleep=clock.advance)
+
+
+def test_wait_WITH_all_objects_present_EXPECT_no_delay(s3_client):
+    files = {f'active_model/part-{index}': f'data-{index}'.encode() for index in range(20)}
+    for key, body in files.items():
+        s3_client.put_object(Bucket=BUCKET_NAME, Key=key, Body=body)
+    _put_manifest(s3_client, files)
+
+    clock = FakeClock()
+    _gate(s3_client, clock).wait()
+
+    assert clock.now == 0
+    assert s3_client.head_calls == 20
+
+
+def test_wait_WITH_partially_uploaded_objects_EXPECT_waits_until_all_match(s3_client):
+    files = {'active_model/model.tar.gz': b'new-model', 'active_model/vocab.txt': b'vocab'}
+    _put_manifest(s3_client, files)
+    # Stale object of a previous upload.
+    s3_client.put_object(Bucket=BUCKET_NAME, Key='active_model/model.tar.gz', Body=b'old-model')
+
+    clock = FakeClock()
+    gate = _gate(s3_client, clock)
+    assert gate.mismatched(gate.load()) == ['active_model/model.tar.gz', 'active_model/vocab.txt']
+
+    def upload_on_sleep(seconds: float) -> None:
+        clock.advance(seconds)
+        if clock.now >= 3:
+            for key, body in files.items():
+                s3_client.put_object(Bucket=BUCKET_NAME, Key=key, Body=body)
+
+    ManifestGate(s3_client, BUCKET_NAME, MANIFEST_KEY, timeout=60, clock=clock, sleep=upload_on_sleep).wait()
+
+    assert 3 <= clock.now < 10
+
+
+def test_wait_WITH_missing_objects_EXPECT_timeout(s3_client):
+    _put_manifest(s3_client, {'active_model/model.tar.gz': b'model'})
+
+    clock = FakeClock()
+    with pytest.raises(TimeoutError):
+        _gate(s3_client, clock, timeout=30).wait()
+
+    assert clock.now == 30
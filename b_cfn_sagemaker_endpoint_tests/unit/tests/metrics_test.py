@@ -0,0 +1,47 @@
+import json
+from typing import Any, Dict, List
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import endpoint_state_change_event, s3_event
+from metrics import Metrics
+
+
+def _emf_documents(output: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_flush_EXPECT_embedded_metric_format_document():
+    emitted = []
+    metrics = Metrics('endpoint', emit=emitted.append)
+    metrics.put('EventAge', 1500)
+    metrics.put('EventAge', 2500)
+    metrics.set_endpoint_config_name('endpoint-config-b')
+    metrics.flush()
+    metrics.flush()
+
+    assert len(emitted) == 1
+    document = json.loads(emitted[0])
+    assert document['_aws']['CloudWatchMetrics'] == [{
+        'Namespace': 'BSagemakerEndpointRefresh',
+        'Dimensions': [['EndpointName'], ['EndpointName', 'EndpointConfigName']],
+        'Metrics': [{'Name': 'EventAge', 'Unit': 'Milliseconds'}],
+    }]
+    assert document['EndpointName'] == 'endpoint'
+    assert document['EndpointConfigName'] == 'endpoint-config-b'
+    assert document['EventAge'] == [1500, 2500]
+
+
+def test_handler_WITH_upload_and_in_service_event_EXPECT_pipeline_metrics(clients, capsys):
+    index.handler(s3_event('a/model.tar.gz', 'b/model.tar.gz', event_time='2022-01-01T00:00:00.000Z'), None)
+    update_document, = _emf_documents(capsys.readouterr().out)
+
+    assert update_document['EndpointConfigName'] == 'endpoint-config-b'
+    assert update_document['EventsCoalesced'] == [2]
+    assert len(update_document['EventAge']) == 2
+    assert len(update_document['DescribeEndpointLatency']) == 1
+    assert len(update_document['UpdateEndpointLatency']) == 1
+
+    index.handler(endpoint_state_change_event('endpoint', time='2022-01-01T00:10:00Z'), None)
+    in_service_document, = _emf_documents(capsys.readouterr().out)
+
+    assert in_service_document['UploadToInService'] == [600000]
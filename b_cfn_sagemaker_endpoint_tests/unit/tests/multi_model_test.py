@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeSagemakerRuntimeClient, s3_event
+from multi_model import MultiModelWarmer
+
+MODELS_URL = 's3://models/customers/'
+
+
+@pytest.fixture
+def multi_model_env(clients, monkeypatch):
+    monkeypatch.setenv('MULTI_MODEL_DATA_URLS', json.dumps([MODELS_URL]))
+    return clients
+
+
+def test_split_EXPECT_target_models_relative_to_prefix():
+    warmer = MultiModelWarmer(FakeSagemakerRuntimeClient(), 'endpoint', ['s3://models/customers'])
+
+    target_models, remaining = warmer.split(
+        s3_event('customers/acme/model.tar.gz', 'customers/acme/model.tar.gz', 'active_model/model.tar.gz')['Records']
+    )
+
+    assert target_models == ['acme/model.tar.gz']
+    assert [record['s3']['object']['key'] for record in remaining] == ['active_model/model.tar.gz']
+
+
+def test_warm_WITH_model_error_EXPECT_model_considered_loaded():
+    runtime_client = FakeSagemakerRuntimeClient(error_code='ModelError')
+    MultiModelWarmer(runtime_client, 'endpoint', [MODELS_URL]).warm(['acme.tar.gz'])
+    assert len(runtime_client.invocations) == 1
+
+    runtime_client = FakeSagemakerRuntimeClient(error_code='ValidationError')
+    with pytest.raises(ClientError):
+        MultiModelWarmer(runtime_client, 'endpoint', [MODELS_URL]).warm(['acme.tar.gz'])
+
+
+def test_handler_WITH_target_model_upload_EXPECT_warmed_without_update(multi_model_env, monkeypatch):
+    multi_model_env['ssm'].parameters['payloads'] = json.dumps({
+        'sets': [[{'body': '{"text": "hi"}', 'content_type': 'application/json', 'accept': 'application/json'}]],
+        'warm_up': 0,
+    })
+    monkeypatch.setenv('INVOCATION_PAYLOADS_PARAMETER_NAME', 'payloads')
+
+    index.handler(s3_event('customers/acme+corp.tar.gz'), None)
+
+    assert multi_model_env['sagemaker'].updates == []
+    assert multi_model_env['sagemaker-runtime'].invocations == [{
+        'EndpointName': 'endpoint',
+        'Body': b'{"text": "hi"}',
+        'TargetModel': 'acme corp.tar.gz',
+        'ContentType': 'application/json',
+        'Accept': 'application/json',
+    }]
+
+
+def test_handler_WITH_single_model_upload_EXPECT_endpoint_updated(multi_model_env):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    assert len(multi_model_env['sagemaker'].updates) == 1
+    assert multi_model_env['sagemaker-runtime'].invocations == []
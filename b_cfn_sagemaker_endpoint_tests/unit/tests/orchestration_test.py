@@ -0,0 +1,132 @@
+from typing import Any, Dict, List
+
+import pytest
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import endpoint_state_change_event, s3_event
+from swap import FAILED, IN_SERVICE, UPDATING, next_backoff, next_endpoint_config_name, update_status
+
+STATE_MACHINE_ARN = 'arn:aws:states:eu-west-1:123456789012:stateMachine:refresh'
+
+
+@pytest.fixture
+def clients(clients, monkeypatch) -> Dict[str, Any]:
+    monkeypatch.setenv('STATE_MACHINE_ARN', STATE_MACHINE_ARN)
+    return clients
+
+
+def _run_execution(execution: Dict[str, Any]) -> List[str]:
+    """
+    Runs refresh state machine steps the way ``RefreshStateMachine`` does, without waiting.
+
+    :return: Names of run steps and the final state.
+    """
+
+    run = ['resolve']
+    execution = index.handler({'step': 'resolve', 'execution': execution}, None)
+    if execution['action'] != 'update':
+        return [*run, 'Skipped']
+
+    run.append('update')
+    execution = index.handler({'step': 'update', 'execution': execution}, None)
+    if execution['action'] != 'update':
+        return [*run, 'Skipped']
+
+    while True:
+        run.append('poll')
+        execution = index.handler({'step': 'poll', 'execution': execution}, None)
+        if execution['status'] == 'InService':
+            return [*run, 'Updated']
+        if execution['status'] == 'Failed':
+            return [*run, 'UpdateFailed']
+
+
+def test_next_endpoint_config_name_EXPECT_configs_swapped():
+    description = {'EndpointStatus': 'InService', 'EndpointConfigName': 'a'}
+
+    assert next_endpoint_config_name(description, 'a', 'b') == 'b'
+    assert next_endpoint_config_name({**description, 'EndpointConfigName': 'b'}, 'a', 'b') == 'a'
+    assert next_endpoint_config_name({**description, 'EndpointStatus': 'Updating'}, 'a', 'b') is None
+    # E.g. an applied instance recommendation.
+    assert next_endpoint_config_name({**description, 'EndpointConfigName': 'rec-applied-a'}, 'a', 'b') == 'a'
+
+
+def test_update_status_EXPECT_rollback_classified_as_failure():
+    assert update_status({'EndpointStatus': 'Updating', 'EndpointConfigName': 'a'}, 'b') == UPDATING
+    assert update_status({'EndpointStatus': 'InService', 'EndpointConfigName': 'b'}, 'b') == IN_SERVICE
+    assert update_status({'EndpointStatus': 'InService', 'EndpointConfigName': 'a'}, 'b') == FAILED
+    assert update_status({'EndpointStatus': 'Failed', 'EndpointConfigName': 'b'}, 'b') == FAILED
+
+
+def test_next_backoff_EXPECT_doubled_within_bounds():
+    backoffs = [next_backoff()]
+    for _ in range(5):
+        backoffs.append(next_backoff(backoffs[-1]))
+
+    assert backoffs == [5, 10, 20, 40, 60, 60]
+
+
+def test_handler_WITH_burst_of_uploads_EXPECT_single_execution_updates_endpoint(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    index.handler(s3_event('active_model/tokenizer.tar.gz'), None)
+
+    executions = clients['stepfunctions'].executions
+    assert [execution['input']['wait_seconds'] for execution in executions] == [60, 60]
+    assert clients['sagemaker'].updates == [], 'Endpoint must only be updated by the state machine.'
+
+    clients['sagemaker'].update_polls = 2
+    assert _run_execution(executions[0]['input']) == ['resolve', 'Skipped']
+    assert _run_execution(executions[1]['input']) == ['resolve', 'update', 'poll', 'poll', 'poll', 'Updated']
+    assert [update['EndpointConfigName'] for update in clients['sagemaker'].updates] == ['endpoint-config-b']
+
+
+def test_handler_WITH_rolled_back_update_EXPECT_failure_path(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    execution = clients['stepfunctions'].executions[0]['input']
+    execution = index.handler({'step': 'resolve', 'execution': execution}, None)
+    execution = index.handler({'step': 'update', 'execution': execution}, None)
+
+    # Endpoint is rolled back to its previous configuration.
+    clients['sagemaker'].endpoints['endpoint'].update(
+        EndpointStatus='InService',
+        EndpointConfigName='endpoint-config-a'
+    )
+    execution = index.handler({'step': 'poll', 'execution': execution}, None)
+
+    assert execution['status'] == 'Failed'
+    assert execution['failure_reason'] == 'Endpoint update was rolled back.'
+
+
+def test_handler_WITH_busy_endpoint_EXPECT_execution_started_once_back_in_service(clients):
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'SystemUpdating'
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    assert _run_execution(clients['stepfunctions'].executions[0]['input']) == ['resolve', 'Skipped']
+    assert clients['sagemaker'].updates == []
+
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'InService'
+    index.handler(endpoint_state_change_event('endpoint'), None)
+
+    executions = clients['stepfunctions'].executions
+    assert len(executions) == 2
+    assert executions[1]['input']['wait_seconds'] == 0
+    assert _run_execution(executions[1]['input']) == ['resolve', 'update', 'poll', 'Updated']
+
+
+def test_handler_WITH_endpoint_busy_before_update_EXPECT_update_deferred(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    execution = index.handler({'step': 'resolve', 'execution': clients['stepfunctions'].executions[0]['input']}, None)
+
+    # E.g. a system update starts between the ``resolve`` and ``update`` steps.
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'SystemUpdating'
+    execution = index.handler({'step': 'update', 'execution': execution}, None)
+
+    assert execution['action'] == 'skip'
+    assert clients['sagemaker'].updates == []
+
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'InService'
+    index.handler(endpoint_state_change_event('endpoint'), None)
+
+    executions = clients['stepfunctions'].executions
+    assert len(executions) == 2, 'Deferred refresh must be retried once the endpoint is back in service.'
+    assert _run_execution(executions[1]['input']) == ['resolve', 'update', 'poll', 'Updated']
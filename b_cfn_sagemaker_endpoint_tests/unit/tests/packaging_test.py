@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import os
+import tarfile
+
+import pytest
+
+from b_cfn_sagemaker_endpoint import model_packaging
+from b_cfn_sagemaker_endpoint.model_packaging import DEFAULT_EXCLUDE, package_model
+
+
+def create_model(path, names):
+    for name in names:
+        file_path = os.path.join(path, name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file:
+            file.write(name.encode() * 1000)
+
+
+MODEL_FILES = ['model.bin', 'code/inference.py', 'code/__pycache__/inference.cpython-38.pyc', '__init__.py']
+
+
+def test_package_model_EXPECT_sorted_normalized_entries_without_excluded_files(tmp_path):
+    create_model(tmp_path / 'model', MODEL_FILES)
+
+    package_model(str(tmp_path / 'model'), str(tmp_path / 'model.tar.gz'), exclude=(*DEFAULT_EXCLUDE, '/__init__.py'))
+
+    with tarfile.open(tmp_path / 'model.tar.gz', 'r:gz') as archive:
+        members = archive.getmembers()
+        assert [member.name for member in members] == ['code', 'code/inference.py', 'model.bin']
+        assert all(member.mtime == 0 and member.uid == 0 and member.uname == '' for member in members)
+        assert archive.extractfile('model.bin').read() == b'model.bin' * 1000
+
+
+def test_package_model_WITH_different_mtimes_and_creation_order_EXPECT_identical_archives(tmp_path):
+    create_model(tmp_path / 'a', MODEL_FILES)
+    create_model(tmp_path / 'b', reversed(MODEL_FILES))
+    os.utime(tmp_path / 'b' / 'model.bin', (1, 1))
+
+    sha256_a = package_model(str(tmp_path / 'a'), str(tmp_path / 'a.tar.gz'))
+    sha256_b = package_model(str(tmp_path / 'b'), str(tmp_path / 'b.tar.gz'))
+
+    assert sha256_a == sha256_b
+    assert (tmp_path / 'a.tar.gz').read_bytes() == (tmp_path / 'b.tar.gz').read_bytes()
+    assert sha256_a == hashlib.sha256((tmp_path / 'a.tar.gz').read_bytes()).hexdigest()
+
+
+def test_package_model_WITH_many_blocks_EXPECT_output_independent_of_workers(tmp_path):
+    model_path = tmp_path / 'model'
+    model_path.mkdir()
+    (model_path / 'weights.bin').write_bytes(os.urandom(20_000) * 10)
+
+    package_model(str(model_path), str(tmp_path / 'single.tar.gz'), workers=1, block_size=16 * 1024)
+    package_model(str(model_path), str(tmp_path / 'parallel.tar.gz'), workers=4, block_size=16 * 1024)
+
+    compressed = (tmp_path / 'parallel.tar.gz').read_bytes()
+    assert compressed == (tmp_path / 'single.tar.gz').read_bytes()
+    # Repeated content is compressed across block boundaries.
+    assert len(compressed) < 50_000
+    with tarfile.open(fileobj=gzip.GzipFile(fileobj=open(tmp_path / 'parallel.tar.gz', 'rb'))) as archive:
+        assert archive.extractfile('weights.bin').read() == (model_path / 'weights.bin').read_bytes()
+
+
+def test_package_model_WITH_unchanged_files_EXPECT_packaging_skipped(tmp_path):
+    create_model(tmp_path / 'model', MODEL_FILES)
+    output_path = tmp_path / 'model.tar.gz'
+
+    sha256 = package_model(str(tmp_path / 'model'), str(output_path))
+    output_path.write_bytes(b'cached')
+
+    assert package_model(str(tmp_path / 'model'), str(output_path)) == sha256
+    assert output_path.read_bytes() == b'cached'
+
+    create_model(tmp_path / 'model', ['extra.bin'])
+    assert package_model(str(tmp_path / 'model'), str(output_path)) != sha256
+    assert output_path.read_bytes() != b'cached'
+
+
+def test_package_model_WITH_default_exclude_EXPECT_top_level_init_packaged(tmp_path):
+    create_model(tmp_path / 'model', MODEL_FILES)
+
+    package_model(str(tmp_path / 'model'), str(tmp_path / 'model.tar.gz'))
+
+    with tarfile.open(tmp_path / 'model.tar.gz', 'r:gz') as archive:
+        assert archive.getnames() == ['__init__.py', 'code', 'code/inference.py', 'model.bin']
+
+
+def test_package_model_WITH_failed_packaging_EXPECT_no_temporary_archive_left(tmp_path, monkeypatch):
+    create_model(tmp_path / 'model', MODEL_FILES)
+
+    def failing_add(*args):
+        raise OSError('Disk full.')
+
+    monkeypatch.setattr(model_packaging, '_add', failing_add)
+    with pytest.raises(OSError):
+        package_model(str(tmp_path / 'model'), str(tmp_path / 'model.tar.gz'))
+
+    assert sorted(os.listdir(tmp_path)) == ['model']
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeSagemakerClient, FakeSsmClient, endpoint_state_change_event, s3_event, sqs_event
+)
+from b_cfn_sagemaker_endpoint_tests.unit.utils.stacks import synthesize
+from router import RouteTable, route
+
+
+@pytest.fixture
+def sagemaker_client(clients) -> FakeSagemakerClient:
+    sagemaker_client = clients['sagemaker']
+    sagemaker_client.update_polls = 10
+    return sagemaker_client
+
+
+def test_handler_WITH_uploads_while_updating_EXPECT_single_follow_up_update(sagemaker_client):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    assert len(sagemaker_client.updates) == 1
+
+    # More models land while the previous swap is still in progress.
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    index.handler(s3_event('active_model/tokenizer.tar.gz'), None)
+    assert len(sagemaker_client.updates) == 1
+
+    # Endpoint is still updating, hence its status tick is stale.
+    index.handler(endpoint_state_change_event('endpoint', 'UPDATING'), None)
+    assert len(sagemaker_client.updates) == 1
+
+    sagemaker_client.endpoints['endpoint']['EndpointStatus'] = 'InService'
+    index.handler(endpoint_state_change_event('endpoint'), None)
+    assert [update['EndpointConfigName'] for update in sagemaker_client.updates] == [
+        'endpoint-config-b', 'endpoint-config-a'
+    ]
+
+    # Follow-up update's own state change does not start any other update.
+    index.handler(endpoint_state_change_event('endpoint'), None)
+    assert len(sagemaker_client.updates) == 2
+
+
+def test_handler_WITH_in_service_event_and_nothing_pending_EXPECT_no_update(clients):
+    index.handler(sqs_event(endpoint_state_change_event('endpoint')), None)
+    assert clients['sagemaker'].updates == []
+
+
+def test_endpoint_WITH_any_mode_EXPECT_state_change_events_queued():
+    for kwargs in ({}, {'debounce': True}, {'state_machine': True}):
+        resources = synthesize(**kwargs)
+        rule, = [resource for resource in resources.values() if resource['Type'] == 'AWS::Events::Rule']
+        target, = rule['Properties']['Targets']
+        queue_id = target['Arn']['Fn::GetAtt'][0]
+
+        # Asynchronous invocations of the single concurrency function would be dropped once too old.
+        assert resources[queue_id]['Type'] == 'AWS::SQS::Queue'
+        assert any(
+            resource['Type'] == 'AWS::Lambda::EventSourceMapping'
+            and resource['Properties']['EventSourceArn'] == {'Fn::GetAtt': [queue_id, 'Arn']}
+            for resource in resources.values()
+        )
+
+
+def test_endpoint_WITH_busy_updates_not_deferred_EXPECT_no_state_nor_status_events():
+    resources = synthesize(defer_busy_updates=False)
+
+    assert not any(
+        resource['Type'] in ('AWS::Events::Rule', 'AWS::SQS::Queue')
+        or resource['Type'] == 'AWS::SSM::Parameter' and 'refresh state' in resource['Properties']['Description']
+        for resource in resources.values()
+    )
+
+
+def test_handler_WITH_busy_endpoint_and_updates_not_deferred_EXPECT_update_skipped(sagemaker_client, monkeypatch):
+    monkeypatch.delenv('REFRESH_STATE_PARAMETER_NAME')
+    monkeypatch.delenv('DEFER_BUSY_UPDATES')
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    sagemaker_client.endpoints['endpoint']['EndpointStatus'] = 'InService'
+    index.handler(endpoint_state_change_event('endpoint'), None)
+
+    assert [update['EndpointConfigName'] for update in sagemaker_client.updates] == ['endpoint-config-b']
+
+
+def test_route_WITH_state_change_event_EXPECT_routed_by_endpoint_name(clients):
+    route_value = {
+        'ROUTE_ID': 'route0',
+        'ROUTE_RULES': [{'bucket': 'models', 'prefix': 'endpoint/', 'suffix': '.tar.gz'}],
+        'SAGEMAKER_ENDPOINT_NAME': 'endpoint',
+    }
+    route_table = RouteTable(FakeSsmClient({'/routes/route0': json.dumps(route_value)}), '/routes')
+    sent = []
+
+    class SqsClient:
+        @staticmethod
+        def send_message(**kwargs):
+            sent.append(kwargs)
+
+    route(
+        sqs_event(endpoint_state_change_event('endpoint'), endpoint_state_change_event('other'))['Records'],
+        route_table,
+        SqsClient(),
+        'dispatch'
+    )
+
+    assert [message['MessageGroupId'] for message in sent] == ['route0']
+    assert json.loads(sent[0]['MessageBody'])['ticks'] == [
+        {'endpoint_name': 'endpoint', 'endpoint_status': 'IN_SERVICE', 'time': '2022-01-01T00:10:00Z'}
+    ]
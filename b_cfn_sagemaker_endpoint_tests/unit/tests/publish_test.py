@@ -0,0 +1,131 @@
+import os
+import tarfile
+
+import pytest
+from botocore.exceptions import ClientError
+
+from b_cfn_sagemaker_endpoint.model_publisher import MIN_PART_SIZE, ModelPublisher, main
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeS3Client
+
+BUCKET_NAME = 'models'
+KEY = 'active_model/model.tar.gz'
+
+
+@pytest.fixture
+def archive(tmp_path) -> bytes:
+    body = os.urandom(MIN_PART_SIZE * 2 + 1024)
+    (tmp_path / 'model.tar.gz').write_bytes(body)
+    return body
+
+
+def publisher(s3_client: FakeS3Client, **kwargs) -> ModelPublisher:
+    return ModelPublisher(s3_client, BUCKET_NAME, **{'part_size': MIN_PART_SIZE, 'sleep': lambda seconds: None, **kwargs})
+
+
+def test_publish_EXPECT_single_created_event_of_complete_object(tmp_path, archive):
+    s3_client = FakeS3Client()
+    s3_client.put_object(Bucket=BUCKET_NAME, Key=KEY, Body=b'previous model')
+
+    result = publisher(s3_client).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    assert (result.parts_uploaded, result.parts_skipped, result.unchanged) == (3, 0, False)
+    assert result.size == len(archive) and result.throughput > 0
+    assert s3_client.objects[BUCKET_NAME][KEY] == archive
+    assert s3_client.head_object(Bucket=BUCKET_NAME, Key=KEY)['ETag'] == result.etag
+    assert s3_client.events[1:] == [{'eventName': 'ObjectCreated:CompleteMultipartUpload', 'key': KEY}]
+
+
+def test_publish_WITH_identical_object_EXPECT_upload_skipped(tmp_path, archive):
+    s3_client = FakeS3Client()
+    publisher(s3_client).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    result = publisher(s3_client).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    assert result.unchanged
+    assert len(s3_client.events) == 1
+    assert s3_client.uploaded_parts.count(1) == 1
+
+
+def test_publish_WITH_interrupted_upload_EXPECT_matching_parts_skipped(tmp_path, archive):
+    s3_client = FakeS3Client(failing_parts=100)
+    with pytest.raises(ClientError):
+        publisher(s3_client, max_attempts=1).publish(str(tmp_path / 'model.tar.gz'), KEY)
+    assert s3_client.events == []
+
+    # Only the first part is uploaded before the next publish.
+    upload_id = next(iter(s3_client.uploads))
+    s3_client.uploads[upload_id]['Parts'][1] = archive[:MIN_PART_SIZE]
+    s3_client.uploads[upload_id]['Parts'][2] = b'corrupted'
+    s3_client.failing_parts = 0
+
+    result = publisher(s3_client).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    assert (result.parts_uploaded, result.parts_skipped) == (2, 1)
+    assert sorted(s3_client.uploaded_parts) == [2, 3]
+    assert s3_client.objects[BUCKET_NAME][KEY] == archive
+    assert len(s3_client.events) == 1
+
+
+def test_publish_WITH_encrypted_bucket_EXPECT_returned_etags_used_and_upload_resumed(tmp_path, archive):
+    s3_client = FakeS3Client(failing_parts=100, encrypted=True)
+    with pytest.raises(ClientError):
+        publisher(s3_client, max_attempts=1).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    # Only the first part is uploaded before the next publish.
+    upload_id = next(iter(s3_client.uploads))
+    s3_client.uploads[upload_id]['Parts'][1] = archive[:MIN_PART_SIZE]
+    s3_client.failing_parts = 0
+
+    result = publisher(s3_client).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    assert (result.parts_uploaded, result.parts_skipped) == (2, 1)
+    assert s3_client.objects[BUCKET_NAME][KEY] == archive
+    assert s3_client.head_object(Bucket=BUCKET_NAME, Key=KEY)['ETag'] == result.etag
+
+    assert publisher(s3_client).publish(str(tmp_path / 'model.tar.gz'), KEY).unchanged
+    assert len(s3_client.events) == 1
+
+
+def test_publish_WITH_non_retryable_error_EXPECT_raised_without_retries(tmp_path, archive):
+    s3_client = FakeS3Client(failing_parts=1, failure_code='AccessDenied')
+    delays = []
+
+    with pytest.raises(ClientError):
+        publisher(s3_client, concurrency=1, sleep=delays.append).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    assert delays == []
+    assert s3_client.events == []
+
+
+def test_publish_WITH_throttled_parts_EXPECT_retried_with_backoff(tmp_path, archive):
+    s3_client = FakeS3Client(failing_parts=3)
+    delays = []
+
+    ModelPublisher(
+        s3_client,
+        BUCKET_NAME,
+        part_size=MIN_PART_SIZE,
+        concurrency=1,
+        backoff=0.5,
+        sleep=delays.append
+    ).publish(str(tmp_path / 'model.tar.gz'), KEY)
+
+    assert delays == [0.5, 1.0, 2.0]
+    assert s3_client.objects[BUCKET_NAME][KEY] == archive
+
+
+def test_publish_WITH_model_directory_EXPECT_packaged_archive(tmp_path):
+    (tmp_path / 'model').mkdir()
+    (tmp_path / 'model' / 'weights.bin').write_bytes(b'weights')
+    s3_client = FakeS3Client()
+
+    publisher(s3_client).publish(str(tmp_path / 'model'), KEY)
+
+    (tmp_path / 'published.tar.gz').write_bytes(s3_client.objects[BUCKET_NAME][KEY])
+    with tarfile.open(tmp_path / 'published.tar.gz') as archive:
+        assert archive.getnames() == ['weights.bin']
+
+
+def test_main_WITH_too_small_part_size_EXPECT_error(tmp_path, archive):
+    with pytest.raises(ValueError):
+        main([str(tmp_path / 'model.tar.gz'), '--bucket', BUCKET_NAME, '--key', KEY, '--part-size', '1'])
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from aws_cdk.core import Duration
+
+import index
+from b_cfn_sagemaker_endpoint.invocation_payload import InvocationPayload
+from b_cfn_sagemaker_endpoint.latency_gate import LatencyGate
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeSagemakerRuntimeClient, FakeSsmClient, endpoint_state_change_event, s3_event, sqs_event
+)
+from b_cfn_sagemaker_endpoint_tests.unit.utils.stacks import synthesize
+from readiness import EndpointWarmer
+from target import RefreshTarget
+
+
+def test_warm_EXPECT_every_payload_sent_to_every_variant():
+    runtime_client = FakeSagemakerRuntimeClient()
+    payloads = [
+        {'body': 'a', 'content_type': 'text/plain', 'accept': None},
+        {'body': 'b', 'content_type': 'text/plain', 'accept': None},
+    ]
+    warmer = EndpointWarmer(runtime_client, 'endpoint', payloads)
+
+    latencies = warmer.warm({'ProductionVariants': [{'VariantName': 'Blue'}, {'VariantName': 'Green'}]})
+
+    assert {variant: len(values) for variant, values in latencies.items()} == {'Blue': 2, 'Green': 2}
+    assert sorted((call['TargetVariant'], call['Body']) for call in runtime_client.invocations) == [
+        ('Blue', b'a'), ('Blue', b'b'), ('Green', b'a'), ('Green', b'b')
+    ]
+
+
+def test_handler_WITH_warm_up_EXPECT_endpoint_warmed_once_back_in_service(clients, monkeypatch):
+    monkeypatch.setenv('WARM_UP_ENABLED', 'true')
+    clients['ssm'].parameters['payloads'] = json.dumps({
+        'sets': [[{'body': '{}', 'content_type': 'application/json'}]],
+        'warm_up': 0,
+    })
+    monkeypatch.setenv('INVOCATION_PAYLOADS_PARAMETER_NAME', 'payloads')
+    sagemaker_client = clients['sagemaker']
+    sagemaker_client.update_polls = 10
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    # The function returns right after the update started, without waiting for it.
+    assert len(sagemaker_client.updates) == 1
+    assert sagemaker_client.endpoints['endpoint']['EndpointStatus'] == 'Updating'
+    assert clients['sagemaker-runtime'].invocations == []
+
+    sagemaker_client.endpoints['endpoint']['EndpointStatus'] = 'InService'
+    index.handler(sqs_event(endpoint_state_change_event('endpoint')), None)
+    index.handler(sqs_event(endpoint_state_change_event('endpoint')), None)
+
+    assert [call['TargetVariant'] for call in clients['sagemaker-runtime'].invocations] == ['AllTraffic']
+    assert len(sagemaker_client.updates) == 1
+
+
+def test_endpoint_WITH_large_payloads_EXPECT_payloads_parameter_instead_of_environment():
+    payloads = [InvocationPayload(body=json.dumps({'text': str(index) * 800})) for index in range(3)]
+
+    for kwargs in ({}, {'shared_refresh': True, 'event_intake': None}):
+        resources = synthesize(warm_up_payloads=payloads, latency_gate=LatencyGate(payloads=payloads), **kwargs)
+
+        parameters = [
+            resource['Properties'] for resource in resources.values()
+            if resource['Type'] == 'AWS::SSM::Parameter'
+            and 'invocation payloads' in resource['Properties']['Description']
+        ]
+        parameter, = parameters
+        assert parameter['Tier'] == 'Advanced'
+        # Identical payloads of the warm-up and the latency gate are stored once.
+        document = json.loads(parameter['Value'])
+        assert (len(document['sets']), document['warm_up'], document['latency_gate']) == (1, 0, 0)
+
+        functions = [resource for resource in resources.values() if resource['Type'] == 'AWS::Lambda::Function']
+        assert all('payloads' not in json.dumps(function['Properties'].get('Environment')) for function in functions)
+
+
+def test_endpoint_WITH_payloads_beyond_parameter_size_EXPECT_error():
+    payloads = [InvocationPayload(body=json.dumps({'text': str(index) * 3000})) for index in range(3)]
+
+    with pytest.raises(ValueError, match='Invocation payloads take'):
+        synthesize(warm_up_payloads=payloads)
+
+
+def test_with_invocation_payloads_EXPECT_payloads_of_each_owner():
+    target = RefreshTarget(
+        endpoint_name='endpoint',
+        endpoint_config_a_name='a',
+        endpoint_config_b_name='b',
+        wait_time=60,
+        latency_gate={'p99': Duration.seconds(1).to_milliseconds(), 'payloads': None},
+        invocation_payloads_parameter_name='payloads'
+    )
+    ssm_client = FakeSsmClient({'payloads': json.dumps({'sets': [[{'body': 'a'}], [{'body': 'b'}]], 'warm_up': 1})})
+
+    target = target.with_invocation_payloads(ssm_client)
+
+    assert target.warm_up_payloads == [{'body': 'b'}]
+    assert target.latency_gate == {'p99': 1000, 'payloads': None}
+    assert target.instance_recommendation is None
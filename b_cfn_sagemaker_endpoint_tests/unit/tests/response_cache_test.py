@@ -0,0 +1,185 @@
+import asyncio
+import json
+import threading
+from typing import Any, Dict, List
+
+import pytest
+
+import index
+from b_cfn_sagemaker_endpoint.endpoint_client import EndpointClient
+from b_cfn_sagemaker_endpoint.response_cache import MISSING, ResponseCache
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeClock, FakeSagemakerRuntimeClient, endpoint_state_change_event, s3_event
+)
+from b_cfn_sagemaker_endpoint_tests.unit.utils.stacks import synthesize
+
+GENERATION_PARAMETER_NAME = 'generation'
+
+
+@pytest.fixture
+def clients(clients, monkeypatch) -> Dict[str, Any]:
+    monkeypatch.setenv('MODEL_GENERATION_PARAMETER_NAME', GENERATION_PARAMETER_NAME)
+    clients['sagemaker'].update_polls = 10
+    return clients
+
+
+def generation_document(clients: Dict[str, Any]) -> Dict[str, Any]:
+    return json.loads(clients['ssm'].parameters[GENERATION_PARAMETER_NAME])
+
+
+def test_handler_WITH_refresh_EXPECT_generation_advanced_and_in_service_once_updated(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    assert generation_document(clients)['generation'] == 1
+    assert generation_document(clients)['endpoint_config_name'] == 'endpoint-config-b'
+    assert generation_document(clients)['status'] == 'UPDATING'
+
+    # Endpoint is still updating.
+    index.handler(endpoint_state_change_event('endpoint'), None)
+    assert generation_document(clients)['status'] == 'UPDATING'
+
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'InService'
+    index.handler(endpoint_state_change_event('endpoint'), None)
+    assert generation_document(clients)['generation'] == 1
+    assert generation_document(clients)['status'] == 'IN_SERVICE'
+
+
+def test_handler_WITH_rolled_back_update_EXPECT_generation_advanced_again(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    clients['sagemaker'].endpoints['endpoint'].update(
+        EndpointStatus='InService',
+        EndpointConfigName='endpoint-config-a'
+    )
+    index.handler(endpoint_state_change_event('endpoint'), None)
+
+    assert generation_document(clients)['generation'] == 2
+    assert generation_document(clients)['endpoint_config_name'] == 'endpoint-config-a'
+    assert generation_document(clients)['status'] == 'IN_SERVICE'
+
+
+def test_handler_WITH_lost_in_service_event_EXPECT_status_reconciled_by_next_invocation(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'InService'
+
+    # The in service state change event is lost, while a late one of the update arrives.
+    index.handler(endpoint_state_change_event('endpoint', 'UPDATING'), None)
+
+    assert generation_document(clients)['generation'] == 1
+    assert generation_document(clients)['status'] == 'IN_SERVICE'
+
+
+def test_handler_WITH_target_model_upload_EXPECT_generation_advanced_in_place(clients, monkeypatch):
+    monkeypatch.setenv('MULTI_MODEL_DATA_URLS', json.dumps(['s3://models/customers/']))
+    clients['sagemaker'].endpoints['endpoint']['EndpointConfigName'] = 'endpoint-config-b'
+
+    index.handler(s3_event('customers/acme.tar.gz'), None)
+    index.handler(s3_event('customers/acme.tar.gz'), None)
+
+    assert clients['sagemaker'].updates == []
+    assert generation_document(clients)['generation'] == 2
+    assert generation_document(clients)['status'] == 'IN_SERVICE'
+
+
+def test_endpoint_WITH_model_generation_EXPECT_generation_parameter_only_if_enabled():
+    def generation_parameters(resources: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            resource for resource in resources.values()
+            if resource['Type'] == 'AWS::SSM::Parameter' and 'model generation' in resource['Properties']['Description']
+        ]
+
+    assert generation_parameters(synthesize()) == []
+    assert len(generation_parameters(synthesize(model_generation=True))) == 1
+
+
+def test_response_cache_EXPECT_responses_reused_until_generation_changes(clients):
+    clock = FakeClock()
+    cache = ResponseCache(clients['ssm'], GENERATION_PARAMETER_NAME, generation_ttl=10, clock=clock)
+
+    generation = cache.generation()
+    cache.put({'a': 1, 'b': 2}, generation, {'label': 'cat'})
+    assert cache.get({'b': 2, 'a': 1}, generation) == {'label': 'cat'}
+
+    # Endpoint starts being refreshed, but the read generation is reused for a while.
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    assert cache.generation() == generation
+
+    clock.advance(10)
+    assert cache.generation() is None
+    assert cache.get({'a': 1, 'b': 2}, None) is MISSING
+
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'InService'
+    index.handler(endpoint_state_change_event('endpoint'), None)
+    clock.advance(10)
+
+    new_generation = cache.generation()
+    assert new_generation not in (None, generation)
+    assert cache.get({'a': 1, 'b': 2}, new_generation) is MISSING
+    # Responses computed by the previous model are discarded.
+    cache.put({'a': 1, 'b': 2}, generation, {'label': 'dog'})
+    assert cache.get({'a': 1, 'b': 2}, new_generation) is MISSING
+
+
+def test_response_cache_WITH_expired_and_least_recently_used_entries_EXPECT_evicted(clients):
+    clock = FakeClock()
+    cache = ResponseCache(clients['ssm'], GENERATION_PARAMETER_NAME, max_entries=2, ttl=60, clock=clock)
+    generation = cache.generation()
+
+    cache.put('first', generation, 1)
+    cache.put('second', generation, 2)
+    assert cache.get('first', generation) == 1
+    cache.put('third', generation, 3)
+
+    assert cache.get('second', generation) is MISSING
+    assert cache.get('first', generation) == 1
+
+    clock.advance(60)
+    assert cache.get('first', generation) is MISSING
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_response_cache_WITH_slow_generation_read_EXPECT_cached_responses_served_meanwhile(clients):
+    clock = FakeClock()
+    cache = ResponseCache(clients['ssm'], GENERATION_PARAMETER_NAME, generation_ttl=10, clock=clock)
+    generation = cache.generation()
+    cache.put('payload', generation, 'response')
+
+    reading = threading.Event()
+    served = threading.Event()
+    waits = []
+    get_parameter = clients['ssm'].get_parameter
+
+    def slow_get_parameter(**kwargs):
+        reading.set()
+        waits.append(served.wait(5))
+        return get_parameter(**kwargs)
+
+    clients['ssm'].get_parameter = slow_get_parameter
+    clock.advance(10)
+    reader = threading.Thread(target=cache.generation)
+    reader.start()
+    assert reading.wait(5)
+
+    # The cache is not locked by the generation read.
+    assert cache.get('payload', generation) == 'response'
+    served.set()
+    reader.join(5)
+
+    assert cache.generation() == generation
+    assert cache.get('payload', generation) == 'response'
+    assert waits == [True]
+
+
+def test_invoke_WITH_response_cache_EXPECT_repeated_payloads_not_sent(clients):
+    runtime_client = FakeSagemakerRuntimeClient(respond=lambda body: body)
+    client = EndpointClient(
+        'endpoint',
+        runtime_client,
+        response_cache=ResponseCache(clients['ssm'], GENERATION_PARAMETER_NAME)
+    )
+
+    async def invoke():
+        return [await client.invoke({'text': text}) for text in ['a', 'b', 'a', 'a']]
+
+    assert asyncio.run(invoke()) == [{'text': 'a'}, {'text': 'b'}, {'text': 'a'}, {'text': 'a'}]
+    assert len(runtime_client.invocations) == 2
@@ -0,0 +1,207 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+import router
+from b_cfn_sagemaker_endpoint import BucketEvent
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeClock, FakeSqsClient, FakeSsmClient, FakeSagemakerClient, s3_event, sqs_event
+)
+from b_cfn_sagemaker_endpoint_tests.unit.utils.stacks import synthesize
+from router import RouteTable
+
+ROUTES_PATH = '/routes'
+ENDPOINTS_COUNT = 12
+
+
+def _route(index: int) -> Dict[str, Any]:
+    return {
+        'ROUTE_ID': f'route{index}',
+        'ROUTE_RULES': [{'bucket': 'models', 'prefix': f'endpoint{index}/', 'suffix': '.tar.gz'}],
+        'WAIT_TIME': '0',
+        'SAGEMAKER_ENDPOINT_NAME': f'endpoint{index}',
+        'SAGEMAKER_ENDPOINT_CONFIG_A_NAME': f'endpoint{index}-a',
+        'SAGEMAKER_ENDPOINT_CONFIG_B_NAME': f'endpoint{index}-b',
+        'REFRESH_STATE_PARAMETER_NAME': f'/state/endpoint{index}',
+        'EVENT_INTAKE_ENABLED': 'true',
+    }
+
+
+@pytest.fixture
+def ssm_client() -> FakeSsmClient:
+    return FakeSsmClient({f'{ROUTES_PATH}/route{index}': json.dumps(_route(index)) for index in range(ENDPOINTS_COUNT)})
+
+
+@pytest.fixture
+def sagemaker_client(monkeypatch, ssm_client) -> FakeSagemakerClient:
+    sagemaker_client = FakeSagemakerClient('endpoint0', 'endpoint0-a')
+    for index in range(1, ENDPOINTS_COUNT):
+        sagemaker_client.endpoints.update(FakeSagemakerClient(f'endpoint{index}', f'endpoint{index}-a').endpoints)
+
+    clients = {'sagemaker': sagemaker_client, 'ssm': ssm_client}
+    monkeypatch.setattr(router.clients, 'get', lambda name: clients[name])
+    return sagemaker_client
+
+
+def _synthesized_routes(endpoints_count: int) -> Dict[str, str]:
+    """
+    Synthesizes endpoints of a shared refresh router with default bucket events and returns their
+    route parameters, with references resolved to logical ids.
+    """
+
+    resources = synthesize(endpoints_count, shared_refresh=True)
+
+    def resolve(value: Any) -> str:
+        if isinstance(value, dict) and 'Fn::Join' in value:
+            separator, parts = value['Fn::Join']
+            return separator.join(resolve(part) for part in parts)
+        if isinstance(value, dict) and 'Fn::GetAtt' in value:
+            # Attributes, e.g. endpoint configuration names, resolve to their properties.
+            logical_id, attribute = value['Fn::GetAtt']
+            return resources[logical_id]['Properties'][attribute]
+        if isinstance(value, dict):
+            return value['Ref']
+        return value
+
+    return {
+        resource['Properties']['Name']: resolve(resource['Properties']['Value'])
+        for resource in resources.values()
+        if resource['Type'] == 'AWS::SSM::Parameter' and '/routes/' in str(resource['Properties'].get('Name'))
+    }
+
+
+def _dispatch_records(sqs_client: FakeSqsClient) -> List[Dict[str, Any]]:
+    return [
+        {
+            'eventSource': 'aws:sqs',
+            'eventSourceARN': 'arn:aws:sqs:eu-central-1:123456789012:dispatch.fifo',
+            'messageId': str(index),
+            'attributes': {'MessageGroupId': message['MessageGroupId']},
+            'body': message['Body'],
+        }
+        for index, message in enumerate(sqs_client.messages)
+    ]
+
+
+def test_route_table_WITH_many_routes_EXPECT_all_pages_loaded(ssm_client):
+    route_table = RouteTable(ssm_client, ROUTES_PATH)
+
+    assert route_table.match('models', 'endpoint11/model.tar.gz') == ['route11']
+    assert route_table.match('models', 'endpoint11/readme.md') == []
+    assert route_table.match('other', 'endpoint11/model.tar.gz') == []
+
+
+def test_route_table_WITH_expired_cache_EXPECT_new_routes_loaded(ssm_client):
+    clock = FakeClock()
+    route_table = RouteTable(ssm_client, ROUTES_PATH, ttl=60, clock=clock)
+    assert route_table.get('route99') is None
+
+    ssm_client.parameters[f'{ROUTES_PATH}/route99'] = json.dumps(_route(99))
+    assert route_table.get('route99') is None
+
+    clock.advance(60)
+    assert route_table.get('route99')['SAGEMAKER_ENDPOINT_NAME'] == 'endpoint99'
+
+
+def test_route_and_dispatch_WITH_bursts_for_many_endpoints_EXPECT_single_update_per_endpoint(
+        sagemaker_client,
+        ssm_client
+):
+    route_table = RouteTable(ssm_client, ROUTES_PATH)
+    sqs_client = FakeSqsClient(FakeClock())
+
+    router.route(sqs_event(
+        s3_event('endpoint0/model.tar.gz', 'endpoint0/tokenizer.tar.gz', sequencer='01'),
+        s3_event('endpoint5/model.tar.gz', sequencer='01'),
+        s3_event('unknown/model.tar.gz', sequencer='01'),
+    )['Records'], route_table, sqs_client, 'dispatch.fifo')
+
+    assert [message['MessageGroupId'] for message in sqs_client.messages] == ['route0', 'route5']
+
+    response = router.dispatch(_dispatch_records(sqs_client), route_table)
+
+    assert response == {'batchItemFailures': []}
+    assert [update['EndpointName'] for update in sagemaker_client.updates] == ['endpoint0', 'endpoint5']
+
+
+def test_dispatch_WITH_failing_endpoint_EXPECT_other_endpoints_refreshed(sagemaker_client, ssm_client, monkeypatch):
+    route_table = RouteTable(ssm_client, ROUTES_PATH)
+    sqs_client = FakeSqsClient(FakeClock())
+    for sequencer in ('01', '02'):
+        router.route(sqs_event(
+            s3_event('endpoint1/model.tar.gz', sequencer=sequencer),
+            s3_event('endpoint2/model.tar.gz', sequencer=sequencer),
+        )['Records'], route_table, sqs_client, 'dispatch.fifo')
+
+    update_endpoint = sagemaker_client.update_endpoint
+
+    def failing_update_endpoint(EndpointName: str, **kwargs):
+        if EndpointName == 'endpoint1':
+            raise RuntimeError('Failed to update.')
+        return update_endpoint(EndpointName=EndpointName, **kwargs)
+
+    monkeypatch.setattr(sagemaker_client, 'update_endpoint', failing_update_endpoint)
+    records = _dispatch_records(sqs_client)
+    response = router.dispatch(records, route_table)
+
+    # Both messages of the failed endpoint are retried, in order.
+    assert response == {'batchItemFailures': [
+        {'itemIdentifier': record['messageId']}
+        for record in records if record['attributes']['MessageGroupId'] == 'route1'
+    ]}
+    assert [update['EndpointName'] for update in sagemaker_client.updates] == ['endpoint2', 'endpoint2']
+
+
+def test_route_and_dispatch_WITH_synthesized_default_routes_EXPECT_only_matching_endpoint_refreshed(monkeypatch):
+    routes = _synthesized_routes(2)
+    ssm_client = FakeSsmClient(routes)
+    sagemaker_client = FakeSagemakerClient('endpoint0', 'endpoint0-a')
+    sagemaker_client.endpoints.update(FakeSagemakerClient('endpoint1', 'endpoint1-a').endpoints)
+    clients = {'sagemaker': sagemaker_client, 'ssm': ssm_client}
+    monkeypatch.setattr(router.clients, 'get', lambda name: clients[name])
+    monkeypatch.setattr(router.index.time, 'sleep', lambda seconds: None)
+    routes_path, = {name.rsplit('/', 1)[0] for name in routes}
+    route_table = RouteTable(ssm_client, routes_path)
+    sqs_client = FakeSqsClient(FakeClock())
+
+    # Both endpoints share the default "*.tar.gz" bucket events, while routes match their model keys.
+    assert len(route_table.match('models', 'endpoint0/model.tar.gz')) == 1
+    assert route_table.match('models', 'endpoint0/other.tar.gz') == []
+
+    router.route(
+        sqs_event(s3_event('endpoint0/model.tar.gz', sequencer='01'))['Records'],
+        route_table,
+        sqs_client,
+        'dispatch.fifo'
+    )
+    response = router.dispatch(_dispatch_records(sqs_client), route_table)
+
+    assert response == {'batchItemFailures': []}
+    assert [update['EndpointName'] for update in sagemaker_client.updates] == ['endpoint0']
+
+
+def test_endpoint_WITH_shared_refresh_EXPECT_advanced_tier_route():
+    resources = synthesize(shared_refresh=True)
+
+    tiers = [
+        resource['Properties'].get('Tier') for resource in resources.values()
+        if resource['Type'] == 'AWS::SSM::Parameter' and '/routes/' in str(resource['Properties'].get('Name'))
+    ]
+    assert tiers == ['Advanced']
+
+
+def test_endpoint_WITH_route_beyond_parameter_size_EXPECT_error():
+    bucket_events = [BucketEvent.for_key(f'models/{index:04}/{"x" * 100}.tar.gz') for index in range(50)]
+
+    with pytest.raises(ValueError, match='Refresh route takes up to'):
+        synthesize(shared_refresh=True, bucket_events=bucket_events)
+
+
+@pytest.mark.parametrize('kwargs', [{'shared_refresh': True}, {'state_machine': True}])
+def test_endpoint_WITH_refresh_EXPECT_policy_arns_in_stack_partition(kwargs):
+    resources = synthesize(**kwargs)
+
+    policies = [resource for resource in resources.values() if resource['Type'] == 'AWS::IAM::Policy']
+    assert policies
+    assert 'arn:aws:' not in json.dumps(policies)
@@ -0,0 +1,33 @@
+import pytest
+
+from b_cfn_sagemaker_endpoint_tests.benchmark.refresh_simulation import MODES, SCENARIOS, Simulation
+
+
+@pytest.mark.parametrize('mode', [mode for mode in MODES if mode != 'sleep'])
+@pytest.mark.parametrize('scenario', list(SCENARIOS))
+def test_simulation_EXPECT_single_update_per_burst_without_lost_uploads(scenario, mode):
+    results = Simulation(SCENARIOS[scenario](), mode, wait_time=60, update_duration=600).run()
+
+    assert results['updates_per_burst'] == 1
+    assert results['lost_uploads'] == 0
+    assert results['expired_events'] == 0
+    assert results['failed_invocations'] == 0
+
+
+def test_simulation_WITH_sleep_mode_EXPECT_expired_events_and_follow_up_update():
+    results = Simulation(SCENARIOS['burst'](), 'sleep', wait_time=60, update_duration=600).run()
+
+    # Invocations never overlap, hence events of a burst queue up behind the one sleeping through the
+    # wait time, and expire. Those handled before expiring find the endpoint updating, and defer a
+    # follow-up update until it is back in service.
+    assert results['expired_events'] == 17 * 3
+    assert results['updates_per_burst'] == 2
+    assert results['lost_uploads'] == 0
+    assert results['failed_invocations'] == 0
+
+
+def test_simulation_WITH_upload_during_update_EXPECT_deferred_until_in_service():
+    results = Simulation(SCENARIOS['during_update'](), 'debounce', wait_time=60, update_duration=600).run()
+
+    # The second burst (at 180 s) is served by the follow-up update, started once the first one ends (at 664 s).
+    assert results['upload_to_update_max_s'] == pytest.approx(664 - 180)
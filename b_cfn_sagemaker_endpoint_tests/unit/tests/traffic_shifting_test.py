@@ -0,0 +1,49 @@
+import json
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import s3_event
+from target import pascal_case_keys
+
+# Deployment config as serialized by CDK.
+DEPLOYMENT_CONFIG = {
+    'blueGreenUpdatePolicy': {
+        'trafficRoutingConfiguration': {
+            'type': 'CANARY',
+            'canarySize': {'type': 'CAPACITY_PERCENT', 'value': 10},
+            'waitIntervalInSeconds': 300,
+        },
+        'terminationWaitInSeconds': 300,
+    },
+    'autoRollbackConfiguration': {'alarms': [{'alarmName': 'latency'}, {'alarmName': 'errors'}]},
+}
+
+
+def test_pascal_case_keys_EXPECT_only_nested_keys_converted():
+    assert pascal_case_keys(DEPLOYMENT_CONFIG) == {
+        'BlueGreenUpdatePolicy': {
+            'TrafficRoutingConfiguration': {
+                'Type': 'CANARY',
+                'CanarySize': {'Type': 'CAPACITY_PERCENT', 'Value': 10},
+                'WaitIntervalInSeconds': 300,
+            },
+            'TerminationWaitInSeconds': 300,
+        },
+        'AutoRollbackConfiguration': {'Alarms': [{'AlarmName': 'latency'}, {'AlarmName': 'errors'}]},
+    }
+
+
+def test_handler_WITH_deployment_config_EXPECT_applied_on_every_swap(clients, monkeypatch):
+    monkeypatch.setenv('DEPLOYMENT_CONFIG', json.dumps(DEPLOYMENT_CONFIG))
+
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    updates = clients['sagemaker'].updates
+    assert [update['EndpointConfigName'] for update in updates] == ['endpoint-config-b', 'endpoint-config-a']
+    assert all(update['DeploymentConfig'] == pascal_case_keys(DEPLOYMENT_CONFIG) for update in updates)
+
+
+def test_handler_WITHOUT_deployment_config_EXPECT_all_at_once_update(clients):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    assert 'DeploymentConfig' not in clients['sagemaker'].updates[0]
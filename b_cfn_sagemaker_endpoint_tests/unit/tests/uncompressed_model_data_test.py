@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from aws_cdk.aws_s3 import EventType
+from aws_cdk.aws_sagemaker import CfnModel, CfnModelProps
+
+import index
+from b_cfn_sagemaker_endpoint import ModelProps
+from b_cfn_sagemaker_endpoint.bucket_event import BucketEvent
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeS3Client, FakeSsmClient, s3_event
+from b_cfn_sagemaker_endpoint_tests.unit.utils.stacks import synthesize
+from state import StateStore
+from versions import ArtifactVersions
+
+MODEL_PREFIX_URL = 's3://models/llm/'
+MODEL_FILES = ['config.json', 'weights-1.safetensors', 'weights-2.safetensors', 'tokenizer.json']
+
+
+@pytest.fixture
+def s3_client(clients) -> FakeS3Client:
+    s3_client = clients['s3']
+    for name in MODEL_FILES:
+        s3_client.put_object(Bucket='models', Key=f'llm/{name}', Body=f'{name}-v1'.encode())
+    return s3_client
+
+
+def test_changed_WITH_any_file_under_prefix_changed_EXPECT_prefix_reported(s3_client):
+    versions = ArtifactVersions(s3_client, StateStore(FakeSsmClient(), 'state'), [MODEL_PREFIX_URL])
+    versions.commit(versions.current())
+
+    # Byte-identical re-upload of the whole prefix.
+    for name in MODEL_FILES:
+        s3_client.put_object(Bucket='models', Key=f'llm/{name}', Body=f'{name}-v1'.encode())
+    assert versions.changed(versions.current()) == []
+
+    s3_client.put_object(Bucket='models', Key='llm/weights-2.safetensors', Body=b'weights-v2')
+    assert versions.changed(versions.current()) == [MODEL_PREFIX_URL]
+
+
+def test_changed_WITH_file_added_or_removed_EXPECT_prefix_reported(s3_client):
+    versions = ArtifactVersions(s3_client, StateStore(FakeSsmClient(), 'state'), [MODEL_PREFIX_URL])
+    versions.commit(versions.current())
+
+    s3_client.put_object(Bucket='models', Key='llm/weights-3.safetensors', Body=b'weights-v1')
+    assert versions.changed(versions.current()) == [MODEL_PREFIX_URL]
+
+    s3_client.delete_object(Bucket='models', Key='llm/weights-3.safetensors')
+    assert versions.changed(versions.current()) == []
+
+    for name in MODEL_FILES:
+        s3_client.delete_object(Bucket='models', Key=f'llm/{name}')
+    assert versions.current() == {MODEL_PREFIX_URL: None}
+    assert versions.changed(versions.current()) == [MODEL_PREFIX_URL]
+
+
+def test_handler_WITH_many_file_upload_EXPECT_single_update_by_last_execution(clients, s3_client, monkeypatch):
+    monkeypatch.setenv('MODEL_ARTIFACT_URLS', json.dumps([MODEL_PREFIX_URL]))
+    monkeypatch.setenv('STATE_MACHINE_ARN', 'arn:aws:states:eu-west-1:123456789012:stateMachine:refresh')
+
+    # Refresh function invocations never overlap, hence each file's event is handled after the previous one.
+    for name in MODEL_FILES:
+        s3_client.put_object(Bucket='models', Key=f'llm/{name}', Body=b'v2')
+        index.handler(s3_event(f'llm/{name}'), None)
+
+    for execution in clients['stepfunctions'].executions:
+        execution = index.handler({'step': 'resolve', 'execution': execution['input']}, None)
+        if execution['action'] == 'update':
+            index.handler({'step': 'update', 'execution': execution}, None)
+
+    assert [update['EndpointConfigName'] for update in clients['sagemaker'].updates] == ['endpoint-config-b']
+
+
+def test_endpoint_WITH_uncompressed_model_data_in_default_mode_EXPECT_error():
+    models_props = [ModelProps(
+        model_name='model0',
+        props=CfnModelProps(
+            execution_role_arn='arn:aws:iam::123456789012:role/model',
+            primary_container=CfnModel.ContainerDefinitionProperty(image='image')
+        ),
+        uncompressed_model_data_url='s3://models/llm/'
+    )]
+
+    with pytest.raises(ValueError):
+        synthesize(models_props=models_props)
+
+    assert synthesize(models_props=models_props, debounce=True)
+
+
+def test_for_model_data_WITHOUT_prefixes_EXPECT_archive_suffix_filter():
+    events = BucketEvent.for_model_data(['s3://models/active_model/model.tar.gz'], ['s3://models/multi/'])
+
+    assert [(event.key_prefix, event.key_suffix) for event in events] == [(None, '.tar.gz')]
+
+
+def test_for_model_data_WITH_prefixes_EXPECT_non_overlapping_key_filters():
+    events = BucketEvent.for_model_data(
+        ['s3://models/llm/', 's3://models/llm/extra/', 's3://models/active_model/model.tar.gz'],
+        ['s3://models/multi/']
+    )
+
+    assert [(event.key_prefix, event.key_suffix) for event in events] == [
+        ('active_model/model.tar.gz', 'model.tar.gz'),
+        ('llm/', None),
+        ('multi/', '.tar.gz'),
+    ]
+    assert all(event.event_type == EventType.OBJECT_CREATED for event in events)
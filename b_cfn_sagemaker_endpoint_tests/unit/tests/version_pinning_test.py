@@ -0,0 +1,175 @@
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+import index
+from b_cfn_sagemaker_endpoint.version_pinning import VersionPinning
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import FakeS3Client, s3_event
+from pinning import VersionPinner
+from state import StateStore
+
+MODEL_KEY = 'active_model/model.tar.gz'
+
+
+@pytest.fixture
+def clients(clients, monkeypatch) -> Dict[str, Any]:
+    clients['s3'].put_object(Bucket='models', Key=MODEL_KEY, Body=b'model-v1')
+    monkeypatch.setenv('VERSION_PINNING', json.dumps(settings(retained_generations=2)))
+    return clients
+
+
+def settings(**kwargs) -> Dict[str, Any]:
+    return VersionPinning(**kwargs).to_settings('endpoint-v', 'models')
+
+
+def _pinned_keys(s3_client: FakeS3Client) -> List[str]:
+    return sorted(key for key in s3_client.objects['models'] if key.startswith('pinned-models/'))
+
+
+def _upload(clients: Dict[str, Any], body: bytes) -> None:
+    clients['s3'].put_object(Bucket='models', Key=MODEL_KEY, Body=body)
+    index.handler(s3_event(MODEL_KEY), None)
+
+
+def test_handler_WITH_new_artifact_EXPECT_pinned_generation_created_without_waiting(clients, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(index.time, 'sleep', sleeps.append)
+
+    index.handler(s3_event(MODEL_KEY), None)
+
+    sagemaker_client = clients['sagemaker']
+    assert sleeps == []
+    assert sagemaker_client.updates[0]['EndpointConfigName'] == 'endpoint-v1'
+    variant, = sagemaker_client.endpoint_configs['endpoint-v1']['ProductionVariants']
+    assert variant['ModelName'] == 'endpoint-v1-0'
+    assert variant['InstanceType'] == 'ml.t2.medium'
+
+    model = sagemaker_client.models['endpoint-v1-0']
+    assert model['ExecutionRoleArn'] == sagemaker_client.models['model']['ExecutionRoleArn']
+    pinned_key, = _pinned_keys(clients['s3'])
+    assert pinned_key.endswith(f'/{MODEL_KEY}')
+    assert model['PrimaryContainer']['ModelDataUrl'] == f's3://models/{pinned_key}'
+    assert clients['s3'].objects['models'][pinned_key] == b'model-v1'
+
+    # The template configuration and model keep referencing the mutable artifact.
+    assert sagemaker_client.models['model']['PrimaryContainer']['ModelDataUrl'] == f's3://models/{MODEL_KEY}'
+    assert sagemaker_client.endpoint_configs['endpoint-config-a']['ProductionVariants'][0]['ModelName'] == 'model'
+
+
+def test_handler_WITH_many_refreshes_EXPECT_generations_beyond_retention_deleted(clients):
+    sagemaker_client = clients['sagemaker']
+    s3_client = clients['s3']
+
+    _upload(clients, b'model-v1')
+    v1_keys = _pinned_keys(s3_client)
+    _upload(clients, b'model-v2')
+    v2_key, = set(_pinned_keys(s3_client)) - set(v1_keys)
+    _upload(clients, b'model-v3')
+    pinned_keys = _pinned_keys(s3_client)
+
+    assert [update['EndpointConfigName'] for update in sagemaker_client.updates] == [
+        'endpoint-v1', 'endpoint-v2', 'endpoint-v3'
+    ]
+    assert 'endpoint-v1' not in sagemaker_client.endpoint_configs
+    assert 'endpoint-v1-0' not in sagemaker_client.models
+    assert {'endpoint-v2', 'endpoint-v3'} <= set(sagemaker_client.endpoint_configs)
+    assert len(pinned_keys) == 2 and v2_key in pinned_keys
+
+    # A rollback to the content of a retained generation reuses its pinned artifact.
+    copies = len(s3_client.copies)
+    _upload(clients, b'model-v2')
+
+    assert len(s3_client.copies) == copies
+    assert sagemaker_client.models['endpoint-v4-0']['PrimaryContainer']['ModelDataUrl'] == f's3://models/{v2_key}'
+    assert 'endpoint-v2' not in sagemaker_client.endpoint_configs
+    assert _pinned_keys(s3_client) == pinned_keys
+
+
+def test_handler_WITH_pinned_copy_event_EXPECT_ignored(clients):
+    index.handler(s3_event(MODEL_KEY), None)
+    pinned_key, = _pinned_keys(clients['s3'])
+
+    index.handler(s3_event(pinned_key), None)
+
+    assert len(clients['sagemaker'].updates) == 1
+
+
+def test_handler_WITH_state_machine_EXPECT_pinned_generation_resolved_without_waiting(clients, monkeypatch):
+    monkeypatch.setenv('STATE_MACHINE_ARN', 'arn:aws:states:eu-west-1:123456789012:stateMachine:refresh')
+
+    index.handler(s3_event(MODEL_KEY), None)
+    execution, = clients['stepfunctions'].executions
+    execution = index.handler({'step': 'resolve', 'execution': execution['input']}, None)
+    execution = index.handler({'step': 'update', 'execution': execution}, None)
+
+    assert execution['wait_seconds'] == 0
+    assert execution['endpoint_config_name'] == 'endpoint-v1'
+    assert clients['sagemaker'].updates[0]['EndpointConfigName'] == 'endpoint-v1'
+
+
+def test_handler_WITH_busy_endpoint_EXPECT_no_generation_created(clients):
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'SystemUpdating'
+
+    index.handler(s3_event(MODEL_KEY), None)
+
+    assert clients['sagemaker'].updates == []
+    assert 'endpoint-v1' not in clients['sagemaker'].endpoint_configs
+    assert _pinned_keys(clients['s3']) == []
+
+
+def test_handler_WITH_endpoint_busy_before_update_EXPECT_pinned_generation_discarded(clients, monkeypatch):
+    monkeypatch.setenv('STATE_MACHINE_ARN', 'arn:aws:states:eu-west-1:123456789012:stateMachine:refresh')
+
+    index.handler(s3_event(MODEL_KEY), None)
+    execution, = clients['stepfunctions'].executions
+    execution = index.handler({'step': 'resolve', 'execution': execution['input']}, None)
+    assert 'endpoint-v1' in clients['sagemaker'].endpoint_configs
+
+    clients['sagemaker'].endpoints['endpoint']['EndpointStatus'] = 'SystemUpdating'
+    execution = index.handler({'step': 'update', 'execution': execution}, None)
+
+    assert execution['action'] == 'skip'
+    assert 'endpoint-v1' not in clients['sagemaker'].endpoint_configs
+    assert _pinned_keys(clients['s3']) == []
+
+
+def test_pin_WITH_uncompressed_model_data_EXPECT_prefix_pinned(clients):
+    s3_client = clients['s3']
+    for name in ('config.json', 'weights/0.bin', 'weights/1.bin'):
+        s3_client.put_object(Bucket='models', Key=f'uncompressed/{name}', Body=name.encode())
+    clients['sagemaker'].models['model']['PrimaryContainer'] = {
+        'Image': 'image',
+        'ModelDataSource': {'S3DataSource': {
+            'S3Uri': 's3://models/uncompressed/',
+            'S3DataType': 'S3Prefix',
+            'CompressionType': 'None',
+        }},
+    }
+    pinner = VersionPinner(
+        clients['sagemaker'],
+        s3_client,
+        StateStore(clients['ssm'], 'state'),
+        settings(),
+        'endpoint-config-a'
+    )
+
+    endpoint_config_name = pinner.pin('endpoint-config-a')
+
+    data_source = clients['sagemaker'].models[f'{endpoint_config_name}-0']['PrimaryContainer']['ModelDataSource']
+    pinned_url = data_source['S3DataSource']['S3Uri']
+    assert pinned_url.startswith('s3://models/pinned-models/') and pinned_url.endswith('/uncompressed/')
+    assert len(_pinned_keys(s3_client)) == 3
+
+    pinner.discard(endpoint_config_name)
+
+    assert endpoint_config_name not in clients['sagemaker'].endpoint_configs
+    assert _pinned_keys(s3_client) == []
+
+
+def test_version_pinning_props_WITH_invalid_settings_EXPECT_error():
+    with pytest.raises(ValueError):
+        VersionPinning(retained_generations=1)
+
+    with pytest.raises(ValueError):
+        VersionPinning(prefix='pinned')
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+import index
+from b_cfn_sagemaker_endpoint_tests.unit.utils.fakes import (
+    FakeS3Client, FakeSsmClient, FakeSagemakerClient, s3_event
+)
+from state import StateStore
+from versions import ArtifactVersions, parse_s3_url
+
+MODEL_URL = 's3://models/active_model/model.tar.gz'
+TOKENIZER_URL = 's3://models/active_model/tokenizer.tar.gz'
+
+
+@pytest.fixture
+def s3_client(clients) -> FakeS3Client:
+    s3_client = clients['s3']
+    s3_client.put_object(Bucket='models', Key='active_model/model.tar.gz', Body=b'model-v1')
+    s3_client.put_object(Bucket='models', Key='active_model/tokenizer.tar.gz', Body=b'tokenizer-v1')
+    return s3_client
+
+
+@pytest.fixture
+def sagemaker_client(clients, s3_client, monkeypatch) -> FakeSagemakerClient:
+    monkeypatch.setenv('MODEL_ARTIFACT_URLS', json.dumps([MODEL_URL, TOKENIZER_URL]))
+    return clients['sagemaker']
+
+
+def test_parse_s3_url_EXPECT_bucket_and_key():
+    assert parse_s3_url(MODEL_URL) == ('models', 'active_model/model.tar.gz')
+
+
+def test_changed_WITH_single_changed_artifact_EXPECT_only_it_reported(s3_client):
+    versions = ArtifactVersions(s3_client, StateStore(FakeSsmClient(), 'state'), [MODEL_URL, TOKENIZER_URL])
+    versions.commit(versions.current())
+
+    s3_client.put_object(Bucket='models', Key='active_model/tokenizer.tar.gz', Body=b'tokenizer-v2')
+
+    assert versions.changed(versions.current()) == [TOKENIZER_URL]
+
+
+def test_handler_WITH_identical_reupload_EXPECT_update_skipped(sagemaker_client, s3_client):
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    assert len(sagemaker_client.updates) == 1
+
+    # CI re-publishes byte-identical artifacts.
+    s3_client.put_object(Bucket='models', Key='active_model/model.tar.gz', Body=b'model-v1')
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    assert len(sagemaker_client.updates) == 1
+
+    s3_client.put_object(Bucket='models', Key='active_model/model.tar.gz', Body=b'model-v2')
+    index.handler(s3_event('active_model/model.tar.gz'), None)
+    assert len(sagemaker_client.updates) == 2
+
+
+def test_handler_WITH_identical_reupload_to_versioned_bucket_EXPECT_update_skipped(sagemaker_client, s3_client):
+    s3_client.versioned = True
+    for body in (b'model-v1', b'model-v1', b'model-v2'):
+        s3_client.put_object(Bucket='models', Key='active_model/model.tar.gz', Body=body, ChecksumAlgorithm='SHA256')
+        index.handler(s3_event('active_model/model.tar.gz'), None)
+
+    # Each upload got a new version id, while only the content change updated the endpoint.
+    assert len(sagemaker_client.updates) == 2
@@ -0,0 +1,610 @@
+import base64
+import copy
+import hashlib
+import io
+import json
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+
+class FakeClock:
+    """
+    Virtual clock that only moves when told to.
+    """
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class FakeSsmClient:
+    """
+    In-memory stand-in of ``boto3`` SSM client parameters API.
+    """
+
+    # Maximum sizes of parameter values per tier.
+    MAX_SIZES = {'Standard': 4096, 'Advanced': 8192}
+
+    def __init__(self, parameters: Optional[Dict[str, str]] = None):
+        self.parameters = dict(parameters or {})
+        self.tiers: Dict[str, str] = {}
+
+    def get_parameter(self, Name: str) -> Dict[str, Any]:
+        return {'Parameter': {'Name': Name, 'Value': self.parameters.get(Name, '{}')}}
+
+    def put_parameter(self, Name: str, Value: str, Tier: str = None, **kwargs) -> Dict[str, Any]:
+        # Advanced parameters can not be downgraded.
+        tier = 'Advanced' if 'Advanced' in (Tier, self.tiers.get(Name)) else 'Standard'
+        if len(Value.encode()) > self.MAX_SIZES[tier]:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': f'Parameter value exceeds {tier} tier limit.'}},
+                'PutParameter'
+            )
+
+        self.parameters[Name] = Value
+        self.tiers[Name] = tier
+        return {}
+
+    def get_parameters_by_path(self, Path: str, NextToken: str = None, **kwargs) -> Dict[str, Any]:
+        names = sorted(name for name in self.parameters if name.startswith(f'{Path}/'))
+        start = int(NextToken or 0)
+        page = names[start:start + 10]
+        response = {'Parameters': [{'Name': name, 'Value': self.parameters[name]} for name in page]}
+        if start + 10 < len(names):
+            response['NextToken'] = str(start + 10)
+        return response
+
+
+class FakeSqsClient:
+    """
+    In-memory stand-in of ``boto3`` SQS client that honours message delays against a clock.
+    """
+
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.messages: List[Dict[str, Any]] = []
+
+    def send_message(self, QueueUrl: str, MessageBody: str, DelaySeconds: int = 0, **kwargs) -> Dict[str, Any]:
+        self.messages.append({
+            'QueueUrl': QueueUrl,
+            'Body': MessageBody,
+            'VisibleAt': self.clock() + DelaySeconds,
+            **kwargs
+        })
+        return {}
+
+    def receive_visible(self) -> List[Dict[str, Any]]:
+        """
+        Removes and returns messages whose delay has passed, wrapped as lambda SQS records.
+        """
+
+        visible = [message for message in self.messages if message['VisibleAt'] <= self.clock()]
+        self.messages = [message for message in self.messages if message not in visible]
+        return [{'eventSource': 'aws:sqs', 'body': message['Body']} for message in visible]
+
+
+class FakeSfnClient:
+    """
+    In-memory stand-in of ``boto3`` Step Functions client, recording started executions.
+    """
+
+    def __init__(self):
+        self.executions: List[Dict[str, Any]] = []
+
+    def start_execution(self, stateMachineArn: str, input: str, **kwargs) -> Dict[str, Any]:
+        self.executions.append({'stateMachineArn': stateMachineArn, 'input': json.loads(input), **kwargs})
+        return {'executionArn': f'{stateMachineArn}:{len(self.executions)}'}
+
+
+class FakeS3Client:
+    """
+    In-memory stand-in of ``boto3`` S3 client objects and multipart uploads API.
+
+    Each created object is recorded in ``events``, like ``ObjectCreated`` bucket notifications.
+    The next ``failing_parts`` calls of ``upload_part()`` fail with the ``failure_code`` error. Objects of
+    a ``versioned`` bucket get a new ``VersionId`` on every upload, even of identical content. Parts and
+    objects of an ``encrypted`` bucket get random ETags, like with SSE-KMS, instead of MD5 digests.
+    """
+
+    def __init__(
+            self,
+            failing_parts: int = 0,
+            versioned: bool = False,
+            encrypted: bool = False,
+            failure_code: str = 'SlowDown'
+    ):
+        self.objects: Dict[str, Dict[str, bytes]] = {}
+        self.events: List[Dict[str, str]] = []
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.uploaded_parts: List[int] = []
+        self.copies: List[str] = []
+        self.failing_parts = failing_parts
+        self.failure_code = failure_code
+        self.head_calls = 0
+        self.versioned = versioned
+        self.encrypted = encrypted
+        self.__etags: Dict[Tuple[str, str], str] = {}
+        self.__checksums: Dict[Tuple[str, str], str] = {}
+        self.__version_ids: Dict[Tuple[str, str], str] = {}
+        self.__lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes = b'', **kwargs) -> Dict[str, Any]:
+        checksum = self.checksum(Body) if kwargs.get('ChecksumAlgorithm') == 'SHA256' else None
+        self.__create(Bucket, Key, Body, self.etag(Body), 'ObjectCreated:Put', checksum)
+        return {'ETag': self.etag(Body)}
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        self.objects.get(Bucket, {}).pop(Key, None)
+        self.__etags.pop((Bucket, Key), None)
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: Dict[str, Any], **kwargs) -> Dict[str, Any]:
+        for item in Delete['Objects']:
+            self.delete_object(Bucket, item['Key'])
+        return {}
+
+    def copy(self, CopySource: Dict[str, str], Bucket: str, Key: str, ExtraArgs: Dict[str, Any] = None) -> None:
+        with self.__lock:
+            self.copies.append(Key)
+            body = self.__get(CopySource['Bucket'], CopySource['Key'])
+            etag = self.__etags[(CopySource['Bucket'], CopySource['Key'])]
+            if_match = (ExtraArgs or {}).get('CopySourceIfMatch')
+            if if_match and if_match.strip('"') != etag.strip('"'):
+                raise ClientError({'Error': {'Code': 'PreconditionFailed', 'Message': 'Failed'}}, 'CopyObject')
+            self.__create(Bucket, Key, body, etag, 'ObjectCreated:Copy')
+
+    def list_objects_v2(
+            self,
+            Bucket: str,
+            Prefix: str = '',
+            ContinuationToken: str = '',
+            MaxKeys: int = 2,
+            **kwargs
+    ) -> Dict[str, Any]:
+        keys = sorted(key for key in self.objects.get(Bucket, {}) if key.startswith(Prefix) and key > ContinuationToken)
+        page = keys[:MaxKeys]
+        return {
+            'Contents': [{'Key': key, 'ETag': self.__etags[(Bucket, key)]} for key in page],
+            'IsTruncated': len(keys) > MaxKeys,
+            'NextContinuationToken': page[-1] if page else '',
+        }
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        upload_id = f'upload-{len(self.uploads) + 1}'
+        self.uploads[upload_id] = {
+            'Bucket': Bucket,
+            'Key': Key,
+            'Initiated': len(self.uploads),
+            'ChecksumAlgorithm': kwargs.get('ChecksumAlgorithm'),
+            'Parts': {},
+            'ETags': {},
+        }
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes, **kwargs) -> Dict[str, Any]:
+        with self.__lock:
+            if self.failing_parts:
+                self.failing_parts -= 1
+                raise ClientError({'Error': {'Code': self.failure_code, 'Message': 'Failed'}}, 'UploadPart')
+            if kwargs.get('ChecksumSHA256', self.checksum(Body)) != self.checksum(Body):
+                raise ClientError({'Error': {'Code': 'BadDigest', 'Message': 'Bad Digest'}}, 'UploadPart')
+            upload = self.uploads[UploadId]
+            upload['Parts'][PartNumber] = Body
+            upload['ETags'][PartNumber] = self.__etag(Body)
+            self.uploaded_parts.append(PartNumber)
+        return {'ETag': upload['ETags'][PartNumber]}
+
+    def list_multipart_uploads(self, Bucket: str, Prefix: str = '', **kwargs) -> Dict[str, Any]:
+        return {'Uploads': [
+            {
+                'Key': upload['Key'],
+                'UploadId': upload_id,
+                'Initiated': upload['Initiated'],
+                'ChecksumAlgorithm': upload['ChecksumAlgorithm'],
+            }
+            for upload_id, upload in self.uploads.items()
+            if upload['Bucket'] == Bucket and upload['Key'].startswith(Prefix)
+        ]}
+
+    def list_parts(self, Bucket: str, Key: str, UploadId: str, PartNumberMarker: int = 0, **kwargs) -> Dict[str, Any]:
+        upload = self.uploads[UploadId]
+        parts = sorted(upload['Parts'].items())
+        page = [(number, body) for number, body in parts if number > PartNumberMarker][:2]
+        truncated = bool(page) and page[-1][0] < parts[-1][0]
+        return {
+            'Parts': [
+                {
+                    'PartNumber': number,
+                    'ETag': upload['ETags'].setdefault(number, self.__etag(body)),
+                    'Size': len(body),
+                    **({'ChecksumSHA256': self.checksum(body)} if upload['ChecksumAlgorithm'] == 'SHA256' else {}),
+                }
+                for number, body in page
+            ],
+            'IsTruncated': truncated,
+            'NextPartNumberMarker': page[-1][0] if page else 0,
+        }
+
+    def complete_multipart_upload(
+            self,
+            Bucket: str,
+            Key: str,
+            UploadId: str,
+            MultipartUpload: Dict[str, Any],
+            **kwargs
+    ) -> Dict[str, Any]:
+        upload = self.uploads.pop(UploadId)
+        part_numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        bodies = [upload['Parts'][number] for number in part_numbers]
+        if [part['ETag'] for part in MultipartUpload['Parts']] != [upload['ETags'][number] for number in part_numbers]:
+            raise ClientError({'Error': {'Code': 'InvalidPart', 'Message': 'Invalid Part'}}, 'CompleteMultipartUpload')
+
+        checksum = None
+        if upload['ChecksumAlgorithm'] == 'SHA256':
+            digests = b''.join(hashlib.sha256(body).digest() for body in bodies)
+            checksum = f'{base64.b64encode(hashlib.sha256(digests).digest()).decode()}-{len(bodies)}'
+        if self.encrypted:
+            etag = f'"{uuid.uuid4().hex}-{len(bodies)}"'
+        else:
+            digests = b''.join(hashlib.md5(body).digest() for body in bodies)
+            etag = f'"{hashlib.md5(digests).hexdigest()}-{len(bodies)}"'
+        self.__create(Bucket, Key, b''.join(bodies), etag, 'ObjectCreated:CompleteMultipartUpload', checksum)
+        return {'ETag': etag}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        body = self.__get(Bucket, Key)
+        return {'Body': io.BytesIO(body), 'ContentLength': len(body), 'ETag': self.etag(body)}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        with self.__lock:
+            self.head_calls += 1
+        body = self.__get(Bucket, Key)
+        response = {'ContentLength': len(body), 'ETag': self.__etags.get((Bucket, Key)) or self.etag(body)}
+        if (Bucket, Key) in self.__version_ids:
+            response['VersionId'] = self.__version_ids[(Bucket, Key)]
+        if kwargs.get('ChecksumMode') == 'ENABLED' and (Bucket, Key) in self.__checksums:
+            response['ChecksumSHA256'] = self.__checksums[(Bucket, Key)]
+        return response
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+    @staticmethod
+    def checksum(body: bytes) -> str:
+        return base64.b64encode(hashlib.sha256(body).digest()).decode()
+
+    def __etag(self, body: bytes) -> str:
+        return f'"{uuid.uuid4().hex}"' if self.encrypted else self.etag(body)
+
+    def __create(
+            self,
+            bucket: str,
+            key: str,
+            body: bytes,
+            etag: str,
+            event_name: str,
+            checksum: Optional[str] = None
+    ) -> None:
+        self.objects.setdefault(bucket, {})[key] = body
+        self.__etags[(bucket, key)] = etag
+        self.__checksums.pop((bucket, key), None)
+        if checksum:
+            self.__checksums[(bucket, key)] = checksum
+        if self.versioned:
+            self.__version_ids[(bucket, key)] = f'version-{len(self.events) + 1}'
+        self.events.append({'eventName': event_name, 'key': key})
+
+    def __get(self, bucket: str, key: str) -> bytes:
+        try:
+            return self.objects[bucket][key]
+        except KeyError:
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+
+
+class FakeSagemakerClient:
+    """
+    In-memory stand-in of ``boto3`` SageMaker client endpoints, endpoint configurations, models and
+    transform jobs API.
+
+    An updated endpoint stays ``Updating`` (a created one ``Creating``) for ``update_polls`` subsequent
+    ``describe_endpoint()`` calls, and a deleted one ``Deleting`` for ``deletion_polls`` calls.
+    Unless variant properties are retained, updates reset variants' instance counts to a single instance.
+    """
+
+    def __init__(self, endpoint_name: str, endpoint_config_name: str, update_polls: int = 0):
+        self.endpoints = {
+            endpoint_name: {
+                'EndpointName': endpoint_name,
+                'EndpointConfigName': endpoint_config_name,
+                'EndpointStatus': 'InService',
+                'ProductionVariants': [{'VariantName': 'AllTraffic', 'CurrentInstanceCount': 1}],
+            }
+        }
+        self.update_polls = update_polls
+        self.deletion_polls = 0
+        self.updates: List[Dict[str, Any]] = []
+        self.transform_jobs: Dict[str, Dict[str, Any]] = {}
+        self.deleted_endpoints: List[str] = []
+        self.endpoint_configs: Dict[str, Dict[str, Any]] = {}
+        self.create_endpoint_config(
+            EndpointConfigName=endpoint_config_name,
+            ProductionVariants=[{
+                'VariantName': 'AllTraffic',
+                'ModelName': 'model',
+                'InstanceType': 'ml.t2.medium',
+                'InitialInstanceCount': 1,
+            }]
+        )
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.create_model(
+            ModelName='model',
+            PrimaryContainer={'Image': 'image', 'ModelDataUrl': 's3://models/active_model/model.tar.gz'},
+            ExecutionRoleArn='arn:aws:iam::123456789012:role/model'
+        )
+        self.__pending_polls: Dict[str, int] = {}
+
+    def describe_endpoint(self, EndpointName: str) -> Dict[str, Any]:
+        endpoint = self.endpoints.get(EndpointName)
+        if endpoint is None:
+            raise _endpoint_not_found(EndpointName, 'DescribeEndpoint')
+
+        if endpoint['EndpointStatus'] in ('Creating', 'Updating', 'Deleting'):
+            if self.__pending_polls.get(EndpointName, 0) > 0:
+                self.__pending_polls[EndpointName] -= 1
+            elif endpoint['EndpointStatus'] == 'Deleting':
+                del self.endpoints[EndpointName]
+                raise _endpoint_not_found(EndpointName, 'DescribeEndpoint')
+            else:
+                endpoint['EndpointStatus'] = 'InService'
+
+        return dict(endpoint)
+
+    def update_endpoint(self, EndpointName: str, EndpointConfigName: str, **kwargs) -> Dict[str, Any]:
+        if self.endpoints[EndpointName]['EndpointStatus'] != 'InService':
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'Cannot update in-progress endpoint.'}},
+                'UpdateEndpoint'
+            )
+
+        self.endpoints[EndpointName]['EndpointConfigName'] = EndpointConfigName
+        self.endpoints[EndpointName]['EndpointStatus'] = 'Updating'
+        if not kwargs.get('RetainAllVariantProperties'):
+            for variant in self.endpoints[EndpointName]['ProductionVariants']:
+                variant['CurrentInstanceCount'] = 1
+        self.__pending_polls[EndpointName] = self.update_polls
+        self.updates.append({'EndpointName': EndpointName, 'EndpointConfigName': EndpointConfigName, **kwargs})
+        return {}
+
+    def create_endpoint(self, EndpointName: str, EndpointConfigName: str, **kwargs) -> Dict[str, Any]:
+        if EndpointName in self.endpoints:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'Cannot create already existing endpoint.'}},
+                'CreateEndpoint'
+            )
+
+        self.endpoints[EndpointName] = {
+            'EndpointName': EndpointName,
+            'EndpointConfigName': EndpointConfigName,
+            'EndpointStatus': 'Creating',
+            'ProductionVariants': [{'VariantName': 'AllTraffic', 'CurrentInstanceCount': 1}],
+        }
+        self.__pending_polls[EndpointName] = self.update_polls
+        return {}
+
+    def delete_endpoint(self, EndpointName: str) -> Dict[str, Any]:
+        endpoint = self.endpoints.get(EndpointName)
+        if endpoint is None:
+            raise _endpoint_not_found(EndpointName, 'DeleteEndpoint')
+
+        if endpoint['EndpointStatus'] == 'Deleting':
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'Cannot delete endpoint in Deleting status.'}},
+                'DeleteEndpoint'
+            )
+
+        self.deleted_endpoints.append(EndpointName)
+        if self.deletion_polls:
+            endpoint['EndpointStatus'] = 'Deleting'
+            self.__pending_polls[EndpointName] = self.deletion_polls
+        else:
+            del self.endpoints[EndpointName]
+        return {}
+
+    def create_endpoint_config(self, EndpointConfigName: str, **kwargs) -> Dict[str, Any]:
+        if EndpointConfigName in self.endpoint_configs:
+            raise ClientError(
+                {'Error': {
+                    'Code': 'ValidationException',
+                    'Message': 'Cannot create already existing endpoint configuration.'
+                }},
+                'CreateEndpointConfig'
+            )
+
+        self.endpoint_configs[EndpointConfigName] = {'EndpointConfigName': EndpointConfigName, **kwargs}
+        return {}
+
+    def describe_endpoint_config(self, EndpointConfigName: str) -> Dict[str, Any]:
+        if EndpointConfigName not in self.endpoint_configs:
+            raise _endpoint_config_not_found(EndpointConfigName, 'DescribeEndpointConfig')
+
+        return copy.deepcopy(self.endpoint_configs[EndpointConfigName])
+
+    def delete_endpoint_config(self, EndpointConfigName: str) -> Dict[str, Any]:
+        if self.endpoint_configs.pop(EndpointConfigName, None) is None:
+            raise _endpoint_config_not_found(EndpointConfigName, 'DeleteEndpointConfig')
+
+        return {}
+
+    def create_model(self, ModelName: str, **kwargs) -> Dict[str, Any]:
+        if ModelName in self.models:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'Cannot create already existing model.'}},
+                'CreateModel'
+            )
+
+        self.models[ModelName] = copy.deepcopy({'ModelName': ModelName, **kwargs})
+        return {}
+
+    def describe_model(self, ModelName: str) -> Dict[str, Any]:
+        if ModelName not in self.models:
+            raise _model_not_found(ModelName, 'DescribeModel')
+
+        return copy.deepcopy(self.models[ModelName])
+
+    def delete_model(self, ModelName: str) -> Dict[str, Any]:
+        if self.models.pop(ModelName, None) is None:
+            raise _model_not_found(ModelName, 'DeleteModel')
+
+        return {}
+
+    def create_transform_job(self, TransformJobName: str, **kwargs) -> Dict[str, Any]:
+        if TransformJobName in self.transform_jobs:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationException', 'Message': 'Job name must be unique within an AWS account.'}},
+                'CreateTransformJob'
+            )
+
+        arn = f'arn:aws:sagemaker:eu-west-1:123456789012:transform-job/{TransformJobName.lower()}'
+        self.transform_jobs[TransformJobName] = {
+            'TransformJobName': TransformJobName,
+            'TransformJobArn': arn,
+            'TransformJobStatus': 'InProgress',
+            **kwargs
+        }
+        return {'TransformJobArn': arn}
+
+    def describe_transform_job(self, TransformJobName: str) -> Dict[str, Any]:
+        job = self.transform_jobs[TransformJobName]
+        return {key: value for key, value in job.items() if key != 'Tags'}
+
+    def list_tags(self, ResourceArn: str, **kwargs) -> Dict[str, Any]:
+        job = next(job for job in self.transform_jobs.values() if job['TransformJobArn'] == ResourceArn)
+        return {'Tags': job.get('Tags', [])}
+
+
+def _endpoint_not_found(endpoint_name: str, operation_name: str) -> ClientError:
+    return ClientError(
+        {'Error': {'Code': 'ValidationException', 'Message': f'Could not find endpoint "{endpoint_name}".'}},
+        operation_name
+    )
+
+
+def _endpoint_config_not_found(endpoint_config_name: str, operation_name: str) -> ClientError:
+    return ClientError(
+        {'Error': {
+            'Code': 'ValidationException',
+            'Message': f'Could not find endpoint configuration "{endpoint_config_name}".'
+        }},
+        operation_name
+    )
+
+
+def _model_not_found(model_name: str, operation_name: str) -> ClientError:
+    return ClientError(
+        {'Error': {'Code': 'ValidationException', 'Message': f'Could not find model "{model_name}".'}},
+        operation_name
+    )
+
+
+class FakeSagemakerRuntimeClient:
+    """
+    In-memory stand-in of ``boto3`` SageMaker runtime client, recording invocations.
+
+    The first ``throttled_invocations`` invocations are throttled with the ``retry_after`` header.
+    """
+
+    def __init__(
+            self,
+            error_code: Optional[str] = None,
+            throttled_invocations: int = 0,
+            respond: Optional[Callable[[bytes], bytes]] = None,
+            retry_after: str = '2'
+    ):
+        self.error_code = error_code
+        self.throttled_invocations = throttled_invocations
+        self.retry_after = retry_after
+        self.respond = respond
+        self.invocations: List[Dict[str, Any]] = []
+        self.__lock = threading.Lock()
+
+    def invoke_endpoint(self, EndpointName: str, Body: bytes, **kwargs) -> Dict[str, Any]:
+        with self.__lock:
+            self.invocations.append({'EndpointName': EndpointName, 'Body': Body, **kwargs})
+            throttled = self.throttled_invocations > 0
+            self.throttled_invocations -= int(throttled)
+        if throttled:
+            raise ClientError(
+                {
+                    'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'},
+                    'ResponseMetadata': {'HTTPStatusCode': 400, 'HTTPHeaders': {'retry-after': self.retry_after}}
+                },
+                'InvokeEndpoint'
+            )
+        if self.error_code:
+            raise ClientError({'Error': {'Code': self.error_code, 'Message': 'Failed'}}, 'InvokeEndpoint')
+        return {'Body': io.BytesIO(self.respond(Body) if self.respond else b'{}'), 'ContentType': 'application/json'}
+
+
+def s3_event(
+        *keys: str,
+        bucket: str = 'models',
+        sequencer: str = '0A',
+        event_time: str = '2022-01-01T00:00:00.000Z'
+) -> Dict[str, Any]:
+    """
+    Creates a lambda S3 bucket notification event of created objects.
+    """
+
+    return {
+        'Records': [
+            {
+                'eventSource': 'aws:s3',
+                'eventName': 'ObjectCreated:Put',
+                'eventTime': event_time,
+                's3': {
+                    'bucket': {'name': bucket},
+                    'object': {'key': key, 'size': 1, 'eTag': f'etag-{key}', 'sequencer': sequencer},
+                },
+            }
+            for key in keys
+        ]
+    }
+
+
+def endpoint_state_change_event(
+        endpoint_name: str,
+        endpoint_status: str = 'IN_SERVICE',
+        time: str = '2022-01-01T00:10:00Z'
+) -> Dict[str, Any]:
+    """
+    Creates an EventBridge SageMaker endpoint state change event.
+    """
+
+    return {
+        'source': 'aws.sagemaker',
+        'time': time,
+        'detail-type': 'SageMaker Endpoint State Change',
+        'detail': {'EndpointName': endpoint_name, 'EndpointStatus': endpoint_status},
+    }
+
+
+def sqs_event(*bodies: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Creates a lambda SQS event, e.g. of S3 bucket notifications delivered via the intake queue.
+    """
+
+    return {
+        'Records': [
+            {'eventSource': 'aws:sqs', 'messageId': str(index), 'body': json.dumps(body)}
+            for index, body in enumerate(bodies)
+        ]
+    }
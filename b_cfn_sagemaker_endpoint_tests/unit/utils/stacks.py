@@ -0,0 +1,63 @@
+from typing import Any, Dict
+
+from aws_cdk.aws_s3 import Bucket, IBucket
+from aws_cdk.aws_sagemaker import CfnEndpointConfig, CfnEndpointConfigProps, CfnEndpointProps, CfnModel, CfnModelProps
+from aws_cdk.core import App, Construct, Stack
+
+from b_cfn_sagemaker_endpoint import ModelProps, SagemakerEndpoint
+
+
+def add_endpoint(scope: Construct, bucket: IBucket, index: int = 0, **kwargs) -> SagemakerEndpoint:
+    """
+    Adds a single model endpoint "endpoint<index>", whose model archive is "endpoint<index>/model.tar.gz",
+    unless ``models_props`` are given.
+    """
+
+    models_props = kwargs.pop('models_props', None) or [ModelProps(
+        model_name=f'model{index}',
+        props=CfnModelProps(
+            execution_role_arn='arn:aws:iam::123456789012:role/model',
+            primary_container=CfnModel.ContainerDefinitionProperty(
+                image='image',
+                model_data_url=f's3://models/endpoint{index}/model.tar.gz'
+            )
+        )
+    )]
+
+    return SagemakerEndpoint(
+        scope,
+        f'Endpoint{index}',
+        endpoint_props=CfnEndpointProps(endpoint_config_name=f'endpoint{index}', endpoint_name=f'endpoint{index}'),
+        endpoint_config_props=CfnEndpointConfigProps(
+            endpoint_config_name=f'endpoint{index}',
+            production_variants=[CfnEndpointConfig.ProductionVariantProperty(
+                initial_instance_count=1,
+                initial_variant_weight=1,
+                instance_type='ml.t2.medium',
+                model_name=f'model{index}',
+                variant_name='AllTraffic'
+            )]
+        ),
+        models_props=models_props,
+        models_bucket=bucket,
+        **kwargs
+    )
+
+
+def synthesize(endpoints_count: int = 1, **kwargs) -> Dict[str, Any]:
+    """
+    Synthesizes a stack of endpoints of the "models" bucket and returns its resources.
+
+    :param endpoints_count: Number of endpoints.
+    :param kwargs: ``SagemakerEndpoint`` keyword arguments of every endpoint.
+
+    :return: Mapping of logical ids and resources of the stack's template.
+    """
+
+    app = App()
+    stack = Stack(app, 'Stack')
+    bucket = Bucket.from_bucket_name(stack, 'Models', 'models')
+    for index in range(endpoints_count):
+        add_endpoint(stack, bucket, index, **kwargs)
+
+    return app.synth().get_stack_by_name('Stack').template['Resources']
@@ -28,10 +28,19 @@ setup(
     long_description_content_type='text/markdown',
     include_package_data=True,
     install_requires=[
+        'aws-cdk.aws-applicationautoscaling>=1.90.0,<2.0.0',
+        'aws-cdk.aws-cloudwatch>=1.90.0,<2.0.0',
+        'aws-cdk.aws-events>=1.90.0,<2.0.0',
+        'aws-cdk.aws-events-targets>=1.90.0,<2.0.0',
         'aws-cdk.aws-iam>=1.90.0,<2.0.0',
         'aws-cdk.aws-lambda>=1.90.0,<2.0.0',
+        'aws-cdk.aws-lambda-event-sources>=1.90.0,<2.0.0',
         'aws-cdk.aws-sagemaker>=1.90.0,<2.0.0',
+        'aws-cdk.aws-sns>=1.90.0,<2.0.0',
+        'aws-cdk.aws-sqs>=1.90.0,<2.0.0',
         'aws-cdk.aws-ssm>=1.90.0,<2.0.0',
+        'aws-cdk.aws-stepfunctions>=1.90.0,<2.0.0',
+        'aws-cdk.aws-stepfunctions-tasks>=1.90.0,<2.0.0',
         'aws-cdk.aws-s3>=1.90.0,<2.0.0',
         'aws-cdk.aws-s3-assets>=1.90.0,<2.0.0',
         'aws-cdk.aws-s3-notifications>=1.90.0,<2.0.0',
@@ -44,6 +53,11 @@ setup(
         'boto3>=1.18.32<2.0.0',
         'urllib3>=1.26.6,<2.0.0',
     ],
+    entry_points={
+        'console_scripts': [
+            'b-sagemaker-publish=b_cfn_sagemaker_endpoint.model_publisher:main',
+        ],
+    },
     author='Matas Gumbinas',
     author_email='matas.gumbinas@biomapas.com',
     keywords='aws cdk sagemaker sagemaker-endpoint sagemaker-deployment python',